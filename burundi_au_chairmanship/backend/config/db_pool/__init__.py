@@ -0,0 +1,326 @@
+"""
+Process-local PostgreSQL connection pool.
+
+Used by the ``config.db_pool`` database backend (see base.py) when
+DB_POOL_ENABLED is set.  Django still opens/closes a connection around
+every request (CONN_MAX_AGE=0) and around every ``database_sync_to_async``
+call in Channels consumers — with this backend "close" hands the psycopg2
+connection back to the pool instead of tearing down the TCP/TLS session.
+
+Safety:
+  • Thread-safe — uvicorn's threadpool and Channels' executors share one
+    pool per alias; callers block (up to ``timeout`` seconds) when the pool
+    is exhausted.
+  • Fork-safe — pools are keyed by PID.  A child process (gunicorn
+    preload_app, Celery prefork) never reuses sockets inherited from its
+    parent; it builds a fresh pool on first use.
+  • Idle connections above ``min_size`` are evicted after ``max_idle``
+    seconds and every connection is retired after ``max_lifetime``.
+  • ``pre_ping`` validates an idle connection with ``SELECT 1`` before
+    handing it out so stale sockets are replaced instead of failing
+    mid-request.  The ping runs outside the pool lock; the connection's
+    slot stays reserved meanwhile so ``max_size`` still holds.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_OPTIONS = {
+    'min_size': 1,
+    'max_size': 10,
+    'max_idle': 300,       # seconds an idle connection above min_size may live
+    'max_lifetime': 3600,  # seconds before any connection is recycled
+    'timeout': 10,         # seconds to wait for a free connection
+    'pre_ping': True,
+}
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no connection becomes available within ``timeout``."""
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections created by ``connect``."""
+
+    def __init__(self, alias, connect, min_size=1, max_size=10, max_idle=300,
+                 max_lifetime=3600, timeout=10, pre_ping=True):
+        self.alias = alias
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = []        # [(conn, created_at, returned_at)] — LIFO
+        self._in_use = {}      # id(conn) -> created_at
+        self._closed = False
+
+        # Counters exposed via stats()
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        self.ping_failures = 0
+
+    # ── Public API ──────────────────────────────────────────────
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        waited_from = None
+        while True:
+            with self._cond:
+                conn = None
+                while True:
+                    self._evict_idle_locked()
+                    if self._idle:
+                        conn, created_at, _ = self._idle.pop()
+                        # Keep its slot counted while it is pinged unlocked.
+                        self._in_use[id(conn)] = created_at
+                        break
+                    if self._size_locked() < self.max_size:
+                        # Reserve the slot before releasing the lock to connect.
+                        placeholder = object()
+                        self._in_use[id(placeholder)] = None
+                        break
+                    if waited_from is None:
+                        waited_from = time.monotonic()
+                        self.waits += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        self._record_wait_locked(waited_from)
+                        raise PoolTimeout(
+                            f'Connection pool for "{self.alias}" exhausted '
+                            f'({self.max_size} in use, waited {self.timeout}s)'
+                        )
+                    self._cond.wait(remaining)
+            if conn is None:
+                break
+
+            # The pre-ping is a network round trip (and a stale socket can
+            # take a while to fail); every other checkout and return would
+            # queue behind it if it ran under the lock.
+            failure = self._check(conn, created_at)
+            with self._cond:
+                if failure is None:
+                    return self._checkout_locked(conn, created_at, waited_from)
+                self._in_use.pop(id(conn), None)
+                self.connections_closed += 1
+                if failure == 'ping':
+                    self.ping_failures += 1
+                self._cond.notify()
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use.pop(id(placeholder), None)
+                self._cond.notify()
+            raise
+        created_at = time.monotonic()
+        with self._cond:
+            self._in_use.pop(id(placeholder), None)
+            self.connections_created += 1
+            return self._checkout_locked(conn, created_at, waited_from)
+
+    def putconn(self, conn, discard=False):
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            if created_at is None and not discard:
+                # Not ours (e.g. checked out before a fork) — just close it.
+                discard = True
+            if not discard and not self._closed and self._reset(conn):
+                if time.monotonic() - created_at < self.max_lifetime:
+                    self._idle.append((conn, created_at, time.monotonic()))
+                    self._cond.notify()
+                    return
+            self._close_conn(conn)
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._close_conn(self._idle.pop()[0])
+
+    def stats(self):
+        with self._cond:
+            in_use = len(self._in_use)
+            size = in_use + len(self._idle)
+            return {
+                'size': size,
+                'in_use': in_use,
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'utilisation_percent': round(in_use / self.max_size * 100, 1),
+                'checkouts': self.checkouts,
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'waits': self.waits,
+                'avg_wait_ms': round(self.wait_time_total / self.waits * 1000, 1) if self.waits else 0.0,
+                'max_wait_ms': round(self.wait_time_max * 1000, 1),
+                'timeouts': self.timeouts,
+                'ping_failures': self.ping_failures,
+            }
+
+    # ── Internals (call with self._cond held) ───────────────────
+    def _size_locked(self):
+        return len(self._in_use) + len(self._idle)
+
+    def _checkout_locked(self, conn, created_at, waited_from):
+        self._in_use[id(conn)] = created_at
+        self.checkouts += 1
+        if waited_from is not None:
+            self._record_wait_locked(waited_from)
+        return conn
+
+    def _record_wait_locked(self, waited_from):
+        waited = time.monotonic() - waited_from
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        keep = []
+        # Oldest-returned first; only evict while above min_size.
+        for conn, created_at, returned_at in self._idle:
+            expired = now - created_at >= self.max_lifetime
+            idle_too_long = now - returned_at >= self.max_idle
+            if expired or (idle_too_long and self._size_locked() - 1 >= self.min_size
+                           and len(keep) + len(self._in_use) >= self.min_size):
+                self._close_conn(conn)
+            else:
+                keep.append((conn, created_at, returned_at))
+        self._idle = keep
+
+    @staticmethod
+    def _reset(conn):
+        """Return the connection to a clean, idle state; False if broken."""
+        if conn.closed:
+            return False
+        try:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close_conn(self, conn):
+        self.connections_closed += 1
+        self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ── Internals (call without the lock) ────────────────────────
+    def _check(self, conn, created_at):
+        """Validate an idle connection; None if reusable, else why it was
+        closed (``'expired'`` or ``'ping'``)."""
+        if conn.closed or time.monotonic() - created_at >= self.max_lifetime:
+            self._close_quietly(conn)
+            return 'expired'
+        if self.pre_ping:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                if not conn.autocommit:
+                    conn.rollback()
+            except psycopg2.Error:
+                self._close_quietly(conn)
+                return 'ping'
+        return None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Connections inherited across fork() are parked here rather than closed or
+# garbage-collected: closing them would terminate the parent's sessions.
+_inherited = []
+
+
+def _pool_key(alias, conn_params):
+    # Keyed by target as well as alias: Django's test runner and
+    # management commands may point the same alias at another database.
+    return (
+        alias,
+        conn_params.get('host'), conn_params.get('port'),
+        conn_params.get('database') or conn_params.get('dbname'),
+        conn_params.get('user'),
+    )
+
+
+def _current_pool(key):
+    pool = _pools.get(key)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    return None
+
+
+def get_pool(alias, conn_params, connect, options=None):
+    """Return this process's pool for (alias, target), creating it."""
+    key = _pool_key(alias, conn_params)
+    pool = _current_pool(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.pid != os.getpid():
+            _inherited.extend(conn for conn, _, _ in pool._idle)
+            pool = None
+        if pool is None:
+            opts = {**DEFAULT_POOL_OPTIONS, **(options or {})}
+            pool = ConnectionPool(alias, connect, **opts)
+            _pools[key] = pool
+            logger.info(
+                'DB pool "%s" created in pid %s (min=%s max=%s)',
+                alias, pool.pid, pool.min_size, pool.max_size,
+            )
+        return pool
+
+
+def release(alias, conn_params, conn, discard=False):
+    """Return ``conn`` to its pool, or close it if the pool is gone."""
+    pool = _current_pool(_pool_key(alias, conn_params))
+    if pool is None:
+        conn.close()
+        return
+    pool.putconn(conn, discard=discard)
+
+
+def close_pools(alias=None):
+    """Close idle connections of this process's pools (all, or one alias)."""
+    for key, pool in list(_pools.items()):
+        if pool.pid == os.getpid() and (alias is None or pool.alias == alias):
+            pool.closeall()
+            _pools.pop(key, None)
+
+
+def pool_stats():
+    """Stats for every pool owned by this process, keyed by alias."""
+    pid = os.getpid()
+    return {
+        pool.alias: pool.stats()
+        for pool in list(_pools.values())
+        if pool.pid == pid
+    }
@@ -0,0 +1,56 @@
+"""
+PostgreSQL backend that checks connections out of a process-local pool.
+
+Enable with DB_POOL_ENABLED=true; tune via the ``POOL`` key of the
+database settings dict (see settings.py and config/db_pool/__init__.py).
+"""
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as BaseCreation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from django.utils.asyncio import async_unsafe
+
+from . import close_pools, get_pool, release
+
+
+class DatabaseCreation(BaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled connections to the test database would block DROP DATABASE.
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def _pool_options(self):
+        return self.settings_dict.get('POOL') or {}
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = get_pool(
+            self.alias, conn_params,
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            self._pool_options(),
+        )
+        connection = pool.getconn()
+        # Mirror the isolation-level bookkeeping the parent does on connect.
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            # Broken connections are dropped; healthy ones go back to the
+            # pool (rolled back to an idle state by the pool itself).
+            discard = self.errors_occurred and not self.is_usable()
+            with self.wrap_database_errors:
+                release(
+                    self.alias, self.get_connection_params(),
+                    self.connection, discard=discard,
+                )
@@ -209,6 +209,32 @@ if READ_REPLICA_URL:
     DATABASES['replica'] = dj_database_url.parse(READ_REPLICA_URL, conn_max_age=0)
     DATABASE_ROUTERS = ['config.db_router.ReadReplicaRouter']
 
+# ─── Application-side connection pool ────────────────────────
+# Opt-in (DB_POOL_ENABLED=true).  Django keeps CONN_MAX_AGE=0 so every
+# request / database_sync_to_async call still "closes" its connection, but
+# the config.db_pool backend returns it to a per-process pool instead of
+# tearing down the TCP/TLS session.  Pools are rebuilt after fork (gunicorn
+# preload, Celery prefork) and shared by all threads of a process.
+# Size the pool so WEB_CONCURRENCY * DB_POOL_MAX_SIZE (+ Celery concurrency)
+# stays under the managed database / pgbouncer connection limit.
+DB_POOL_ENABLED = os.environ.get('DB_POOL_ENABLED', 'False').lower() in ('true', '1', 'yes')
+DB_POOL = {
+    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+    'max_idle': int(os.environ.get('DB_POOL_MAX_IDLE', '300')),          # seconds
+    'max_lifetime': int(os.environ.get('DB_POOL_MAX_LIFETIME', '3600')),  # seconds
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),            # seconds
+    'pre_ping': os.environ.get('DB_POOL_PRE_PING', 'True').lower() in ('true', '1', 'yes'),
+}
+if DB_POOL_ENABLED:
+    for _db in DATABASES.values():
+        if 'postgresql' in _db['ENGINE']:
+            _db['ENGINE'] = 'config.db_pool'
+            _db['POOL'] = DB_POOL
+            # Pre-ping happens on checkout; Django's per-request health
+            # check would just repeat it.
+            _db['CONN_HEALTH_CHECKS'] = not DB_POOL['pre_ping']
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -398,6 +424,163 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# ─── Firebase verified-token cache ───────────────────────────
+# FirebaseAuthentication caches verified ID tokens per process so the
+# Firebase revocation round-trip is paid at most once per uid per interval.
+# Logout / deactivate / delete drop a uid's entries immediately.
+FIREBASE_TOKEN_CACHE_SIZE = int(os.environ.get('FIREBASE_TOKEN_CACHE_SIZE', '5000'))
+FIREBASE_TOKEN_REVOCATION_CHECK_INTERVAL = int(
+    os.environ.get('FIREBASE_TOKEN_REVOCATION_CHECK_INTERVAL', '300')
+)  # seconds
+
+# ─── Buffered view counters ──────────────────────────────────
+# View increments accumulate in Redis (or in-process without Redis) and are
+# written to view_count / ContentAnalytics in bulk at this interval.
+VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', '60'))  # seconds
+
+# ─── Session analytics capture ───────────────────────────────
+# SessionTrackingMiddleware dedups in the cache and queues events; they are
+# written to UserSession in batches every SESSION_TRACKING_FLUSH_INTERVAL s.
+SESSION_TRACKING_DEDUP_SECONDS = int(os.environ.get('SESSION_TRACKING_DEDUP_SECONDS', '3600'))
+SESSION_TRACKING_FLUSH_INTERVAL = int(os.environ.get('SESSION_TRACKING_FLUSH_INTERVAL', '10'))
+SESSION_TRACKING_BATCH_SIZE = int(os.environ.get('SESSION_TRACKING_BATCH_SIZE', '500'))
+
+# ─── Presence ("users online now") ──────────────────────────
+# Heartbeats land in Redis sorted sets; a user/device is online if seen within
+# PRESENCE_WINDOW_SECONDS.  last_active / DeviceToken.updated_at are written
+# back to the DB every PRESENCE_PERSIST_INTERVAL seconds.
+PRESENCE_WINDOW_SECONDS = int(os.environ.get('PRESENCE_WINDOW_SECONDS', '300'))
+PRESENCE_PERSIST_INTERVAL = int(os.environ.get('PRESENCE_PERSIST_INTERVAL', '300'))
+
+# ─── Unread notification counters ───────────────────────────
+# Badge counts are maintained incrementally (core/notification_counters.py);
+# this is how often they are recomputed from the DB to correct drift.
+NOTIFICATION_COUNTER_RECONCILE_INTERVAL = int(
+    os.environ.get('NOTIFICATION_COUNTER_RECONCILE_INTERVAL', '3600')
+)  # seconds
+
+# ─── Live feed viewer counts ────────────────────────────────
+# Counts live in the channel layer's Redis; WebSocket broadcasts are coalesced
+# to one per feed per LIVE_VIEWER_BROADCAST_INTERVAL and LiveFeed.viewer_count
+# / peak_viewers are persisted every LIVE_VIEWER_PERSIST_INTERVAL seconds.
+# Each worker's viewers expire LIVE_VIEWER_WORKER_TTL seconds after its last
+# heartbeat, so a crashed worker cannot keep a feed's count inflated.
+LIVE_VIEWER_BROADCAST_INTERVAL = float(os.environ.get('LIVE_VIEWER_BROADCAST_INTERVAL', '2'))
+LIVE_VIEWER_PERSIST_INTERVAL = int(os.environ.get('LIVE_VIEWER_PERSIST_INTERVAL', '30'))
+LIVE_VIEWER_WORKER_TTL = int(os.environ.get('LIVE_VIEWER_WORKER_TTL', '60'))
+
+# ─── User segment snapshots ─────────────────────────────────
+# Dynamic segment membership is materialised (core/segments.py) and updated
+# per user on profile saves; every SEGMENT_REFRESH_INTERVAL seconds each
+# dynamic segment is fully re-diffed against its filters.
+SEGMENT_REFRESH_INTERVAL = int(os.environ.get('SEGMENT_REFRESH_INTERVAL', '3600'))
+
+# ─── Admin exports ──────────────────────────────────────────
+# Exports are streamed; above EXPORT_ASYNC_THRESHOLD rows they run as a Celery
+# ExportJob whose file is kept for EXPORT_RETENTION_DAYS (0 = always stream).
+EXPORT_ASYNC_THRESHOLD = int(os.environ.get('EXPORT_ASYNC_THRESHOLD', '5000'))
+EXPORT_RETENTION_DAYS = int(os.environ.get('EXPORT_RETENTION_DAYS', '7'))
+
+# ─── Dashboard metrics snapshot ──────────────────────────────
+# core/metrics.py pre-aggregates dashboard and analytics figures every
+# METRICS_SNAPSHOT_INTERVAL seconds. The first run backfills
+# METRICS_BACKFILL_DAYS of daily series; hourly series are kept for
+# METRICS_HOURLY_RETENTION_DAYS.
+METRICS_SNAPSHOT_INTERVAL = int(os.environ.get('METRICS_SNAPSHOT_INTERVAL', '300'))
+METRICS_BACKFILL_DAYS = int(os.environ.get('METRICS_BACKFILL_DAYS', '400'))
+METRICS_HOURLY_RETENTION_DAYS = int(os.environ.get('METRICS_HOURLY_RETENTION_DAYS', '14'))
+
+# ─── Image variants ──────────────────────────────────────────
+# Thumbnail/medium/large WebP variants are built by Celery after commit
+# (core/image_variants.py). Set IMAGE_VARIANT_QUEUE to route them to a
+# dedicated worker (celery -A config worker -Q images).
+IMAGE_VARIANT_QUEUE = os.environ.get('IMAGE_VARIANT_QUEUE', '')
+
+# ─── Document auto-approve ───────────────────────────────────
+# Auto-approve jobs validate pending Continental Dialogue documents in
+# Celery chunks of DOC_REVIEW_CHUNK (custom_admin/doc_review.py). Set
+# DOC_REVIEW_QUEUE to route them to a dedicated CPU worker pool.
+DOC_REVIEW_CHUNK = int(os.environ.get('DOC_REVIEW_CHUNK', '10'))
+DOC_REVIEW_QUEUE = os.environ.get('DOC_REVIEW_QUEUE', '')
+
+# ─── ID cards ────────────────────────────────────────────────
+# Participant ID cards are rendered once and stored (core/id_cards.py).
+# Print sheets render their cards in Celery chunks of ID_CARD_CHUNK; set
+# ID_CARD_QUEUE to route them to a dedicated CPU worker pool. Sheets are
+# kept for ID_CARD_SHEET_RETENTION_DAYS.
+ID_CARD_CHUNK = int(os.environ.get('ID_CARD_CHUNK', '25'))
+ID_CARD_QUEUE = os.environ.get('ID_CARD_QUEUE', '')
+ID_CARD_SHEET_RETENTION_DAYS = int(os.environ.get('ID_CARD_SHEET_RETENTION_DAYS', '7'))
+
+# ─── Bulk mail ───────────────────────────────────────────────
+# Newsletters and campaigns go out in batches of BULK_MAIL_BATCH_SIZE, one
+# SMTP session each, BULK_MAIL_CONNECTIONS sessions at a time and at most
+# BULK_MAIL_RATE messages per second overall (0 = unthrottled). An
+# unfinished send resumes from its checkpoint for BULK_MAIL_CHECKPOINT_MAX_AGE
+# after its last wave. One task sends for at most BULK_MAIL_TIME_BUDGET
+# seconds (keep it under CELERY_TASK_SOFT_TIME_LIMIT) and then re-queues
+# itself to continue.
+BULK_MAIL_BATCH_SIZE = int(os.environ.get('BULK_MAIL_BATCH_SIZE', '100'))
+BULK_MAIL_CONNECTIONS = int(os.environ.get('BULK_MAIL_CONNECTIONS', '3'))
+BULK_MAIL_RATE = float(os.environ.get('BULK_MAIL_RATE', '10'))
+BULK_MAIL_CHECKPOINT_MAX_AGE = int(os.environ.get('BULK_MAIL_CHECKPOINT_MAX_AGE', str(12 * 3600)))  # seconds
+BULK_MAIL_TIME_BUDGET = int(os.environ.get('BULK_MAIL_TIME_BUDGET', '180'))  # seconds, 0 = unlimited
+
+# ─── Webhook delivery ────────────────────────────────────────
+# Events are queued as WebhookDelivery rows and POSTed by Celery, one drain
+# per endpoint (core/webhooks.py). Failed attempts back off exponentially
+# from WEBHOOK_RETRY_BASE seconds up to WEBHOOK_RETRY_MAX, for at most
+# WEBHOOK_MAX_ATTEMPTS attempts. WEBHOOK_BREAKER_THRESHOLD consecutive
+# failures hold an endpoint's queue for WEBHOOK_BREAKER_COOLDOWN seconds
+# (doubling while it keeps failing). Resolved hosts pass the SSRF check for
+# WEBHOOK_DNS_TTL seconds.
+WEBHOOK_TIMEOUT = int(os.environ.get('WEBHOOK_TIMEOUT', '5'))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '6'))
+WEBHOOK_RETRY_BASE = int(os.environ.get('WEBHOOK_RETRY_BASE', '30'))
+WEBHOOK_RETRY_MAX = int(os.environ.get('WEBHOOK_RETRY_MAX', '3600'))
+WEBHOOK_BREAKER_THRESHOLD = int(os.environ.get('WEBHOOK_BREAKER_THRESHOLD', '5'))
+WEBHOOK_BREAKER_COOLDOWN = int(os.environ.get('WEBHOOK_BREAKER_COOLDOWN', '300'))
+WEBHOOK_DNS_TTL = int(os.environ.get('WEBHOOK_DNS_TTL', '300'))
+WEBHOOK_DISPATCH_INTERVAL = int(os.environ.get('WEBHOOK_DISPATCH_INTERVAL', '30'))
+WEBHOOK_DELIVERY_RETENTION_DAYS = int(os.environ.get('WEBHOOK_DELIVERY_RETENTION_DAYS', '14'))
+
+# ─── Outbox ──────────────────────────────────────────────────
+# Transactional emails and pushes are written as OutboxMessage rows and
+# sent after commit in batches of OUTBOX_BATCH_SIZE (core/outbox.py), by
+# Celery or — when Celery runs eagerly — by a background thread
+# (OUTBOX_BACKGROUND_DRAIN). Failures back off from OUTBOX_RETRY_BASE
+# seconds up to OUTBOX_RETRY_MAX, for at most OUTBOX_MAX_ATTEMPTS attempts.
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_RETRY_BASE = int(os.environ.get('OUTBOX_RETRY_BASE', '60'))
+OUTBOX_RETRY_MAX = int(os.environ.get('OUTBOX_RETRY_MAX', '3600'))
+OUTBOX_BACKGROUND_DRAIN = os.environ.get('OUTBOX_BACKGROUND_DRAIN', 'True').lower() in ('true', '1', 'yes')
+OUTBOX_DISPATCH_INTERVAL = int(os.environ.get('OUTBOX_DISPATCH_INTERVAL', '60'))
+OUTBOX_RETENTION_DAYS = int(os.environ.get('OUTBOX_RETENTION_DAYS', '14'))
+
+# ─── Gate check-in ───────────────────────────────────────────
+# Scanners download per-event credential manifests signed with the Ed25519
+# private key CHECKIN_MANIFEST_SIGNING_KEY (base64 of the 32-byte seed; make
+# a pair with `manage.py checkin_keygen`). Scanner builds ship only the public
+# key; manifests are not served until the key is set. Scanners upload
+# offline scans in batches of at most CHECKIN_UPLOAD_MAX (core/checkin.py). Each process
+# re-checks its in-memory credential index at least every
+# CHECKIN_INDEX_MAX_AGE seconds; per-code scan counts live in the cache for
+# CHECKIN_SCAN_COUNT_TTL seconds.
+CHECKIN_MANIFEST_SIGNING_KEY = os.environ.get('CHECKIN_MANIFEST_SIGNING_KEY', '')
+CHECKIN_UPLOAD_MAX = int(os.environ.get('CHECKIN_UPLOAD_MAX', '500'))
+CHECKIN_INDEX_MAX_AGE = int(os.environ.get('CHECKIN_INDEX_MAX_AGE', '30'))
+CHECKIN_SCAN_COUNT_TTL = int(os.environ.get('CHECKIN_SCAN_COUNT_TTL', '86400'))
+
+# ─── Push notification fan-out ───────────────────────────────
+# FCM batches (500 tokens each) sent concurrently per notification, and how
+# long an unfinished send's checkpoint stays resumable.
+PUSH_FANOUT_WORKERS = int(os.environ.get('PUSH_FANOUT_WORKERS', '4'))
+PUSH_CHECKPOINT_MAX_AGE = int(os.environ.get('PUSH_CHECKPOINT_MAX_AGE', str(6 * 3600)))  # seconds
+
+# ─── Comment profanity filter ────────────────────────────────
+# Seconds between checks for admin edits to the ProfanityWord list.
+PROFANITY_RELOAD_INTERVAL = int(os.environ.get('PROFANITY_RELOAD_INTERVAL', '30'))
 
 # ─── Admin Session Settings ──────────────────────────────────
 # Cookie-level expiry: 24 hours.  StaffSessionLifetimeMiddleware enforces
@@ -633,6 +816,66 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'core.tasks.transition_live_feed_statuses',
         'schedule': 60,  # Every minute
     },
+    'flush-view-counts': {
+        'task': 'core.tasks.flush_view_counts',
+        'schedule': VIEW_COUNT_FLUSH_INTERVAL,
+    },
+    'flush-session-events': {
+        'task': 'core.tasks.flush_session_events',
+        'schedule': SESSION_TRACKING_FLUSH_INTERVAL,
+    },
+    'persist-presence': {
+        'task': 'core.tasks.persist_presence',
+        'schedule': PRESENCE_PERSIST_INTERVAL,
+    },
+    'reconcile-unread-counters': {
+        'task': 'core.tasks.reconcile_unread_counters',
+        'schedule': NOTIFICATION_COUNTER_RECONCILE_INTERVAL,
+    },
+    'persist-live-viewer-counts': {
+        'task': 'core.tasks.persist_live_viewer_counts',
+        'schedule': LIVE_VIEWER_PERSIST_INTERVAL,
+    },
+    'rebuild-push-audience': {
+        'task': 'core.tasks.rebuild_push_audience',
+        'schedule': 86400,  # Daily
+    },
+    'refresh-user-segments': {
+        'task': 'core.tasks.refresh_user_segments',
+        'schedule': SEGMENT_REFRESH_INTERVAL,
+    },
+    'purge-export-jobs': {
+        'task': 'core.tasks.purge_export_jobs',
+        'schedule': 86400,  # Daily
+    },
+    'purge-id-card-sheets': {
+        'task': 'core.tasks.purge_id_card_sheets',
+        'schedule': 86400,  # Daily
+    },
+    'snapshot-dashboard-metrics': {
+        'task': 'core.tasks.snapshot_dashboard_metrics',
+        'schedule': METRICS_SNAPSHOT_INTERVAL,
+    },
+    'dispatch-webhook-deliveries': {
+        'task': 'core.tasks.dispatch_webhook_deliveries',
+        'schedule': WEBHOOK_DISPATCH_INTERVAL,
+    },
+    'purge-webhook-deliveries': {
+        'task': 'core.tasks.purge_webhook_deliveries',
+        'schedule': 86400,  # Daily
+    },
+    'dispatch-outbox': {
+        'task': 'core.tasks.dispatch_outbox',
+        'schedule': OUTBOX_DISPATCH_INTERVAL,
+    },
+    'purge-outbox': {
+        'task': 'core.tasks.purge_outbox',
+        'schedule': 86400,  # Daily
+    },
+    'rebuild-checkin-index': {
+        'task': 'core.tasks.rebuild_checkin_index',
+        'schedule': 86400,  # Daily
+    },
 }
 
 # ─── GraphQL (graphene-django) — REMOVED ─────────────────────
@@ -44,6 +44,14 @@ class _SpacesErrorHandlingMixin:
                 return False
             raise
 
+    def overwrite(self, name, content):
+        """Write ``name`` in place with a single upload.
+
+        Used for derived files (image variants) whose name is fixed, so the
+        exists()/rename dance of ``save()`` is skipped.
+        """
+        return self._save(name, content)
+
     def _save(self, name, content):
         try:
             return super()._save(name, content)
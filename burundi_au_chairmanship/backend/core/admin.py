@@ -15,8 +15,8 @@ from .models import (
     AuditLogEntry, AdminRole, SupportTicket, TicketMessage, Popup,
     UserSession, LinkedAccount,
     YouthDialogueApplication, YouthDialogueDocument, YouthDialogueActivityLog,
-    DeviceBan, ProfanityStrikeLog,
-    EmergencyContact,
+    DeviceBan, ProfanityStrikeLog, ProfanityWord,
+    EmergencyContact, OutboxMessage,
 )
 
 
@@ -1060,6 +1060,7 @@ class NotificationAdmin(admin.ModelAdmin):
                 'target_nationalities',
                 ('target_age_min', 'target_age_max'),
                 ('target_verified_only', 'target_badge_type'),
+                'target_segment',
                 'target_users',
             ],
             'description': 'Check "is global" to send to everyone, or use filters below for specific groups.',
@@ -1113,6 +1114,8 @@ class NotificationAdmin(admin.ModelAdmin):
             filters.append(f'{len(obj.target_nationalities)} countries')
         if obj.target_age_min or obj.target_age_max:
             filters.append(f'Age {obj.target_age_min or "any"}-{obj.target_age_max or "any"}')
+        if obj.target_segment_id:
+            filters.append(f'Segment: {obj.target_segment}')
         if obj.target_users.exists():
             filters.append(f'{obj.target_users.count()} users')
         return ', '.join(filters) if filters else 'No filters'
@@ -2160,6 +2163,19 @@ class DeviceBanAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(ProfanityWord)
+class ProfanityWordAdmin(admin.ModelAdmin):
+    list_display = ['word', 'language', 'action', 'is_active', 'created_by', 'updated_at']
+    list_filter = ['action', 'language', 'is_active']
+    search_fields = ['word']
+    readonly_fields = ['created_by', 'created_at', 'updated_at']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+
 @admin.register(ProfanityStrikeLog)
 class ProfanityStrikeLogAdmin(admin.ModelAdmin):
     list_display = ['user', 'strike_number', 'matched_word', 'content_type', 'resulted_in_ban', 'created_at']
@@ -2173,3 +2189,26 @@ class ProfanityStrikeLogAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['dedup_key', 'last_error']
+    readonly_fields = [
+        'kind', 'payload', 'dedup_key', 'status', 'attempts', 'next_attempt_at',
+        'expires_at', 'last_error', 'created_at', 'sent_at',
+    ]
+    date_hierarchy = 'created_at'
+    actions = ['retry_now']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected messages now')
+    def retry_now(self, request, queryset):
+        from core.outbox import retry
+
+        count = retry(queryset)
+        self.message_user(request, f'{count} message(s) queued for another attempt.')
@@ -7,6 +7,7 @@ from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from . import metrics
 from .permissions import HasAdminSection
 from rest_framework.response import Response
 
@@ -22,48 +23,30 @@ logger = logging.getLogger(__name__)
 @api_view(['GET'])
 @permission_classes([HasAdminSection.for_section('analytics')])
 def analytics_overview(request):
-    """High-level summary: users + content engagement."""
-    now = timezone.now()
-    total_users = User.objects.count()
-    new_7d = User.objects.filter(date_joined__gte=now - timedelta(days=7)).count()
-    new_30d = User.objects.filter(date_joined__gte=now - timedelta(days=30)).count()
-    active_7d = User.objects.filter(last_login__gte=now - timedelta(days=7)).count()
-    active_30d = User.objects.filter(last_login__gte=now - timedelta(days=30)).count()
-    active_today = User.objects.filter(last_login__date=now.date()).count()
+    """High-level summary: users + content engagement (from the metrics snapshot)."""
+    snapshot = metrics.latest()
+    joined = metrics.daily(['users.joined'], 30)[1]['users.joined']
 
     content = {
-        'articles': {
-            'count': Article.objects.count(),
-            'total_views': Article.objects.aggregate(s=Sum('view_count'))['s'] or 0,
-            'total_likes': Article.objects.aggregate(s=Sum('like_count'))['s'] or 0,
-        },
-        'magazines': {
-            'count': MagazineEdition.objects.count(),
-            'total_views': MagazineEdition.objects.aggregate(s=Sum('view_count'))['s'] or 0,
-            'total_likes': MagazineEdition.objects.aggregate(s=Sum('like_count'))['s'] or 0,
-        },
-        'videos': {
-            'count': Video.objects.count(),
-            'total_views': Video.objects.aggregate(s=Sum('view_count'))['s'] or 0,
-            'total_likes': Video.objects.aggregate(s=Sum('like_count'))['s'] or 0,
-        },
-        'albums': {
-            'count': GalleryAlbum.objects.count(),
-            'total_views': GalleryAlbum.objects.aggregate(s=Sum('view_count'))['s'] or 0,
-            'total_likes': GalleryAlbum.objects.aggregate(s=Sum('like_count'))['s'] or 0,
-        },
+        key: {
+            'count': snapshot[f'{key}.total'],
+            'total_views': snapshot[f'{key}.views'],
+            'total_likes': snapshot[f'{key}.likes'],
+        }
+        for key in ('articles', 'magazines', 'videos', 'albums')
     }
 
     return Response({
         'users': {
-            'total': total_users,
-            'new_7d': new_7d,
-            'new_30d': new_30d,
-            'active_7d': active_7d,
-            'active_30d': active_30d,
-            'active_today': active_today,
+            'total': snapshot['users.total'],
+            'new_7d': sum(joined[-7:]),
+            'new_30d': sum(joined),
+            'active_7d': snapshot['users.login_7d'],
+            'active_30d': snapshot['users.login_30d'],
+            'active_today': snapshot['users.login_today'],
         },
         'content': content,
+        'as_of': snapshot.taken_at,
     })
 
 
@@ -13,3 +13,35 @@ class CoreConfig(AppConfig):
         # Register signals that auto-create AdminNotification entries.
         from .signals import register_admin_notification_signals
         register_admin_notification_signals()
+
+        # Bump the shared home feed version whenever feed content changes.
+        from .signals import register_feed_invalidation_signals
+        register_feed_invalidation_signals()
+
+        # Refresh full-text search vectors when articles/magazines change.
+        from .signals import register_search_index_signals
+        register_search_index_signals()
+
+        # Recompile the profanity matcher when admins edit the word list.
+        from .signals import register_profanity_signals
+        register_profanity_signals()
+
+        # Maintain per-user unread notification counters.
+        from .signals import register_notification_counter_signals
+        register_notification_counter_signals()
+
+        # Keep the precomputed push audience index current.
+        from .signals import register_push_audience_signals
+        register_push_audience_signals()
+
+        # Keep dynamic user segment snapshots current.
+        from .signals import register_segment_signals
+        register_segment_signals()
+
+        # Give seats back to the event counter when submissions are deleted.
+        from .signals import register_event_seat_signals
+        register_event_seat_signals()
+
+        # Keep gate check-in manifests and the in-process lookup index current.
+        from .signals import register_checkin_signals
+        register_checkin_signals()
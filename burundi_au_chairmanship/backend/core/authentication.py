@@ -1,4 +1,10 @@
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 from django.db import OperationalError, close_old_connections
 from rest_framework import authentication
 from rest_framework import exceptions
@@ -9,6 +15,125 @@ from .models import UserProfile
 logger = logging.getLogger(__name__)
 
 
+class VerifiedTokenCache:
+    """
+    Process-local LRU cache of verified Firebase ID tokens.
+
+    Maps sha256(token) -> (firebase_uid, profile_id, exp) so a token that
+    has already passed signature + revocation checks is not re-verified
+    against Firebase on every API request.  Raw tokens are never stored.
+
+    Revocation is still honoured:
+      • Each uid is re-checked with Firebase (check_revoked=True) at most
+        once per ``revocation_interval`` seconds.
+      • ``revoke(uid)`` drops every cached token for that uid immediately
+        (called from logout / deactivate / delete paths).
+      • Entries never outlive the token's own ``exp`` claim.
+    """
+
+    def __init__(self, max_size=5000, revocation_interval=300):
+        self.max_size = max_size
+        self.revocation_interval = revocation_interval
+        self._entries = OrderedDict()  # digest -> (uid, profile_id, exp)
+        self._last_revocation_check = {}  # uid -> monotonic timestamp
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revocation_checks = 0
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        """Return (uid, profile_id) for a cached, unexpired token or None.
+
+        Returns None (a miss) when the uid's revocation re-check is due so
+        the caller goes back to Firebase.
+        """
+        key = self.digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            uid, profile_id, exp = entry
+            if exp <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            last_checked = self._last_revocation_check.get(uid)
+            if last_checked is None or time.monotonic() - last_checked >= self.revocation_interval:
+                self.misses += 1
+                self.revocation_checks += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return uid, profile_id
+
+    def put(self, token, uid, profile_id, exp):
+        """Record a token that was just verified with check_revoked=True."""
+        if not exp or exp <= time.time():
+            return
+        key = self.digest(token)
+        with self._lock:
+            self._entries[key] = (uid, profile_id, exp)
+            self._entries.move_to_end(key)
+            self._last_revocation_check[uid] = time.monotonic()
+            while len(self._entries) > self.max_size:
+                _, (old_uid, _, _) = self._entries.popitem(last=False)
+                if not any(e[0] == old_uid for e in self._entries.values()):
+                    self._last_revocation_check.pop(old_uid, None)
+
+    def revoke(self, uid):
+        """Drop every cached token belonging to ``uid``."""
+        if not uid:
+            return
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e[0] == uid]:
+                del self._entries[key]
+            self._last_revocation_check.pop(uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_revocation_check.clear()
+            self.hits = self.misses = self.revocation_checks = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revocation_checks': self.revocation_checks,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'revocation_interval_s': self.revocation_interval,
+            }
+
+
+token_cache = VerifiedTokenCache(
+    max_size=getattr(settings, 'FIREBASE_TOKEN_CACHE_SIZE', 5000),
+    revocation_interval=getattr(settings, 'FIREBASE_TOKEN_REVOCATION_CHECK_INTERVAL', 300),
+)
+
+
+def revoke_cached_tokens(user):
+    """
+    "Revoke now" hook: forget any cached Firebase tokens for ``user`` so
+    the next request re-verifies (and re-checks revocation) with Firebase.
+    Safe to call for JWT-only users (no firebase_uid).
+    """
+    try:
+        uid = user.profile.firebase_uid
+    except (AttributeError, UserProfile.DoesNotExist):
+        return
+    token_cache.revoke(uid)
+
+
 class FirebaseAuthentication(authentication.BaseAuthentication):
     """
     DRF authentication backend for Firebase ID tokens.
@@ -24,19 +149,32 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
     """
 
     @staticmethod
-    def _get_profile(firebase_uid):
+    def _get_profile(firebase_uid=None, pk=None):
         """Fetch UserProfile, retrying once on connection failure."""
+        lookup = {'pk': pk} if pk is not None else {'firebase_uid': firebase_uid}
         try:
-            return UserProfile.objects.select_related('user').get(
-                firebase_uid=firebase_uid,
-            )
+            return UserProfile.objects.select_related('user').get(**lookup)
         except OperationalError:
             # Connection slot may have been exhausted or gone stale.
             # Drop the broken connection and try once more.
             close_old_connections()
-            return UserProfile.objects.select_related('user').get(
-                firebase_uid=firebase_uid,
-            )
+            return UserProfile.objects.select_related('user').get(**lookup)
+
+    def _authenticate_cached(self, token):
+        """Resolve a previously verified token without calling Firebase."""
+        cached = token_cache.get(token)
+        if cached is None:
+            return None
+        uid, profile_id = cached
+        try:
+            profile = self._get_profile(pk=profile_id)
+        except UserProfile.DoesNotExist:
+            token_cache.revoke(uid)
+            return None
+        if profile.firebase_uid != uid or not profile.user.is_active:
+            token_cache.revoke(uid)
+            return None
+        return (profile.user, {'uid': uid, 'cached': True})
 
     def authenticate(self, request):
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
@@ -46,6 +184,10 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
 
         token = auth_header.split('Bearer ')[1].strip()
 
+        cached = self._authenticate_cached(token)
+        if cached is not None:
+            return cached
+
         try:
             decoded_token = verify_firebase_token(token, check_revoked=True)
             firebase_uid = decoded_token['uid']
@@ -63,6 +205,9 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
                     profile.is_email_verified = True
                     profile.save(update_fields=['is_email_verified'])
 
+                token_cache.put(
+                    token, firebase_uid, profile.pk, decoded_token.get('exp'),
+                )
                 return (profile.user, decoded_token)
             except UserProfile.DoesNotExist:
                 raise exceptions.AuthenticationFailed('User not found')
@@ -70,6 +215,7 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
         except FirebaseTokenRevoked as e:
             # Firebase account revoked — cascade to Django: deactivate user
             # and blacklist all outstanding JWT refresh tokens.
+            token_cache.revoke(e.uid)
             try:
                 profile = UserProfile.objects.select_related('user').get(
                     firebase_uid=e.uid,
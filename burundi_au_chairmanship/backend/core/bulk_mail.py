@@ -0,0 +1,200 @@
+"""
+Bulk mail engine for newsletters and email campaigns.
+
+Recipients are paged with a keyset cursor and sent in batches of
+``BULK_MAIL_BATCH_SIZE``; each batch is one ``send_messages`` call, i.e. one
+authenticated SMTP session, and up to ``BULK_MAIL_CONNECTIONS`` batches run
+concurrently on a bounded thread pool.  A shared throttle keeps the total
+rate under ``BULK_MAIL_RATE`` messages per second (provider limits).
+
+Batches are sent in waves.  After each wave the EmailLog rows collected by
+``LoggingEmailBackend`` (``defer_logs``) are bulk-inserted and the cursor,
+totals and throughput are saved on the owner's ``send_checkpoint`` /
+``send_stats`` in the same transaction, so a retried or redelivered task
+resumes after the last completed wave without re-sending or re-logging.
+
+A send that would outlast ``BULK_MAIL_TIME_BUDGET`` seconds (kept under the
+Celery soft time limit) stops between waves with ``SendPaused``; the task
+re-queues itself and the next run resumes from the checkpoint.  Checkpoints
+expire ``BULK_MAIL_CHECKPOINT_MAX_AGE`` after their last wave, not after the
+start of the send, so long lists keep resuming.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RECENT_BATCH_STATS = 20
+
+
+class SendPaused(Exception):
+    """The time budget ran out between waves; progress is checkpointed."""
+
+
+class Throttle:
+    """Spaces sends at least ``1 / rate`` seconds apart across threads (0 = unlimited)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(self._next_at, now)
+            self._next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def _fresh_checkpoint():
+    return {
+        'cursor': 0, 'done': False,
+        'started_at': timezone.now().isoformat(),
+        'messages': 0, 'sent': 0, 'failed': 0,
+        'batches': 0, 'send_ms': 0.0, 'last_error': '',
+    }
+
+
+def load_checkpoint(owner):
+    """Resume an unfinished send, or start over if none / finished / too old."""
+    checkpoint = owner.send_checkpoint or {}
+    if checkpoint.get('done') is False and checkpoint.get('started_at'):
+        last = datetime.fromisoformat(checkpoint.get('updated_at') or checkpoint['started_at'])
+        if (timezone.now() - last).total_seconds() < settings.BULK_MAIL_CHECKPOINT_MAX_AGE:
+            return checkpoint, True
+    return _fresh_checkpoint(), False
+
+
+def _stats(checkpoint, recent):
+    started = datetime.fromisoformat(checkpoint['started_at'])
+    wall = max((timezone.now() - started).total_seconds(), 0.001)
+    batches = checkpoint['batches']
+    return {
+        'messages': checkpoint['messages'],
+        'sent': checkpoint['sent'],
+        'failed': checkpoint['failed'],
+        'batches': batches,
+        'avg_batch_ms': round(checkpoint['send_ms'] / batches, 1) if batches else 0,
+        'elapsed_s': round(wall, 2),
+        'throughput_per_s': round(checkpoint['messages'] / wall, 1),
+        'connections': settings.BULK_MAIL_CONNECTIONS,
+        'rate_limit': settings.BULK_MAIL_RATE,
+        'recent_batches': recent[-RECENT_BATCH_STATS:],
+    }
+
+
+def _send_batch(connection_factory, messages, throttle):
+    """Send one batch over one SMTP session; runs on a pool thread (no DB access)."""
+    start = time.monotonic()
+    connection = connection_factory(throttle=throttle.wait, defer_logs=True)
+    try:
+        sent = connection.send_messages(messages) or 0
+        error = getattr(connection, 'last_error', '')
+    except Exception as exc:
+        sent, error = 0, str(exc)[:2000]
+    return {
+        'size': len(messages),
+        'sent': sent,
+        'failed': len(messages) - sent,
+        'ms': round((time.monotonic() - start) * 1000, 1),
+        'error': error,
+        'logs': getattr(connection, 'pending_logs', []),
+    }
+
+
+def send_bulk(owner, fetch_page, build_message, connection_factory):
+    """
+    Send one message per recipient and checkpoint progress on ``owner``.
+
+    Args:
+        owner: EmailCampaign or NewsletterEdition (``send_checkpoint`` / ``send_stats``)
+        fetch_page: ``(after, limit) -> [(cursor, email, extra), ...]`` ordered by cursor
+        build_message: ``(email, extra) -> EmailMessage``
+        connection_factory: ``(**options) -> email backend``, e.g. ``get_connection``
+
+    Returns the final checkpoint (``sent``, ``failed``, ``messages`` totals).
+    Raises ``SendPaused`` once another wave would overrun
+    ``BULK_MAIL_TIME_BUDGET``; call again (from a new task) to continue.
+    """
+    from core.models import EmailLog
+
+    manager = type(owner)._default_manager
+    checkpoint, resumed = load_checkpoint(owner)
+    if not resumed:
+        # Persist the fresh checkpoint so a crash before the first wave still resumes.
+        manager.filter(pk=owner.pk).update(send_checkpoint=checkpoint)
+    else:
+        logger.info(
+            f"Resuming bulk mail for {owner._meta.model_name} #{owner.pk} after cursor "
+            f"{checkpoint['cursor']} ({checkpoint['messages']} already sent)"
+        )
+    recent = list((owner.send_stats or {}).get('recent_batches', [])) if resumed else []
+    workers = max(1, settings.BULK_MAIL_CONNECTIONS)
+    batch_size = max(1, settings.BULK_MAIL_BATCH_SIZE)
+    throttle = Throttle(settings.BULK_MAIL_RATE)
+    budget = getattr(settings, 'BULK_MAIL_TIME_BUDGET', 0)
+    started = time.monotonic()
+    last_wave = 0.0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-mail') as pool:
+        while True:
+            # Every run completes at least one wave, so re-queued runs always progress.
+            if budget and last_wave and time.monotonic() - started + last_wave > budget:
+                raise SendPaused(
+                    f"{owner._meta.model_name} #{owner.pk} paused after cursor {checkpoint['cursor']}"
+                )
+            wave_started = time.monotonic()
+            # One wave = up to `workers` batches, each on its own connection.
+            futures = []
+            cursor = checkpoint['cursor']
+            for _ in range(workers):
+                rows = fetch_page(cursor, batch_size)
+                if not rows:
+                    break
+                cursor = rows[-1][0]
+                messages = [build_message(email, extra) for _, email, extra in rows]
+                futures.append(pool.submit(_send_batch, connection_factory, messages, throttle))
+            if not futures:
+                break
+
+            results = [f.result() for f in futures]
+            for r in results:
+                checkpoint['messages'] += r['size']
+                checkpoint['sent'] += r['sent']
+                checkpoint['failed'] += r['failed']
+                checkpoint['batches'] += 1
+                checkpoint['send_ms'] += r['ms']
+                if r['error']:
+                    checkpoint['last_error'] = r['error']
+                recent.append({k: r[k] for k in ('size', 'sent', 'failed', 'ms')})
+            checkpoint['cursor'] = cursor
+            checkpoint['updated_at'] = timezone.now().isoformat()
+            recent = recent[-RECENT_BATCH_STATS:]
+            with transaction.atomic():
+                EmailLog.objects.bulk_create([log for r in results for log in r['logs']])
+                manager.filter(pk=owner.pk).update(
+                    send_checkpoint=checkpoint, send_stats=_stats(checkpoint, recent),
+                )
+            last_wave = time.monotonic() - wave_started
+
+    checkpoint['done'] = True
+    owner.send_checkpoint = checkpoint
+    owner.send_stats = _stats(checkpoint, recent)
+    manager.filter(pk=owner.pk).update(send_checkpoint=owner.send_checkpoint, send_stats=owner.send_stats)
+    logger.info(
+        f"Bulk mail for {owner._meta.model_name} #{owner.pk}: {checkpoint['sent']} sent, "
+        f"{checkpoint['failed']} failed in {checkpoint['batches']} batches, "
+        f"{owner.send_stats['throughput_per_s']} msg/s"
+    )
+    return checkpoint
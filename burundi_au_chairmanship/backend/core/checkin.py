@@ -0,0 +1,654 @@
+"""
+Gate check-in: credential manifests, an in-process lookup index and batched
+scan logging.
+
+Every scan used to cost a ``QRScanLog`` COUNT, an INSERT, a
+``select_related`` lookup of the ticket / application and a separate
+``YouthDialogueRole`` query for the badge colour — too slow for many
+scanners on venue Wi-Fi.
+
+``CheckinCredential`` holds one row per scannable ticket or credential with
+everything a scanner shows: hash, status, role colour and display fields.
+Rows are grouped by *scope* — ``event:<registration id>`` or
+``yd:<Continental Dialogue event id>`` — and every change takes the next
+number from the scope's ``CheckinManifest.revision`` (a conditional UPDATE
+under the manifest row lock, so committed revisions are gap-free and in
+commit order).  That gives:
+
+  * **manifests** — ``manifest(scope, since)``: the whole scope for a
+    scanner's first download, then only the rows changed after ``since``
+    (removed credentials come back as ``status='removed'``).  Entries are
+    compact lists in ``MANIFEST_FIELDS`` order, carry a SHA-256 digest of
+    the QR hash rather than the hash itself (a leaked manifest cannot mint
+    codes) and the payload is signed with the Ed25519 key
+    ``CHECKIN_MANIFEST_SIGNING_KEY``; scanners hold only the public key, so
+    an unpacked scanner app can verify manifests but not forge them;
+  * **an in-memory index** — ``lookup(qr_type, code)`` serves online scans
+    from a per-process copy of each scope.  Writers bump a cache token
+    after commit; readers that see a new token (or an index older than
+    ``CHECKIN_INDEX_MAX_AGE``) pull the rows past their revision;
+  * **scan counts** — kept in the cache (seeded once from ``QRScanLog``),
+    so duplicate detection needs no COUNT; offline batches are written with
+    one ``bulk_create`` (``record_scans``).
+
+Keeping it current: post_save / post_delete on submissions, applications,
+roles and the events themselves (signals.py); ``queryset.update()`` callers
+sync explicitly.  A scope is built in full the first time it is touched, and
+``rebuild`` runs nightly (and via ``manage.py rebuild_checkin``).
+"""
+import base64
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+QR_EVENT = 'event'
+QR_YD = 'youth_dialogue'
+SCOPE_PREFIXES = {QR_EVENT: 'event', QR_YD: 'yd'}
+STATUS_REMOVED = 'removed'
+DEFAULT_ROLE_COLOR = '#4CAF50'
+HASH_DIGEST_LENGTH = 16
+INSERT_ATTEMPTS = 3
+
+MANIFEST_FIELDS = ('code', 'hash', 'status', 'valid', 'role_color', 'name', 'organization', 'role', 'nationality')
+_ROW_FIELDS = ('scope', 'qr_type', 'qr_hash', 'status', 'valid', 'role_color', 'name', 'organization', 'role',
+               'nationality', 'details')
+_INDEX_FIELDS = ('code', 'revision', *_ROW_FIELDS)
+
+TOKEN_KEY = 'checkin:token:{}'
+SCAN_COUNT_KEY = 'checkin:scans:{}:{}'
+
+# Dynamic form keys the scan result reads from EventSubmission.form_data.
+FORM_KEYS = {
+    'organization': ['organization', 'institution', 'company', 'organisation', 'org'],
+    'nationality': ['nationality', 'country', 'pays', 'nationalite'],
+    'title': ['title', 'titre', 'position', 'role', 'function', 'fonction'],
+    'phone': ['phone', 'phone_number', 'telephone', 'tel', 'mobile'],
+    'full_name': ['full_name', 'name', 'nom_complet', 'nom'],
+}
+
+
+def scope_for(qr_type, event_id):
+    return f'{SCOPE_PREFIXES[qr_type]}:{event_id}'
+
+
+def parse_scope(scope):
+    """``'event:12'`` → ``('event', 12)``; None for anything else."""
+    prefix, _, event_id = (scope or '').partition(':')
+    for qr_type, known in SCOPE_PREFIXES.items():
+        if prefix == known and event_id.isdigit():
+            return qr_type, int(event_id)
+    return None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def form_value(form_data, keys):
+    """First non-empty value of ``form_data`` under any of ``keys``."""
+    for key in keys:
+        value = (form_data or {}).get(key, '')
+        if value:
+            return str(value).strip()
+    return ''
+
+
+# ── Building entries from the source tables ─────────────────────
+
+
+def _event_info(reg):
+    return {
+        'event_title': reg.event_title,
+        'event_venue': reg.venue or '',
+        'event_date': _iso(reg.event_date),
+        'event_end_date': _iso(reg.event_end_date),
+    }
+
+
+def _yd_info(event):
+    return {
+        'event_name': event.programme_title,
+        'event_start_date': _iso(event.start_date),
+        'event_end_date': _iso(event.end_date),
+        'event_location': event.location,
+        'scan_result_visible_fields': event.get_scan_result_visible_fields(),
+    }
+
+
+def _event_entry(sub):
+    form_data = sub.form_data or {}
+    if sub.is_proxy:
+        name = sub.proxy_name
+    else:
+        name = form_value(form_data, FORM_KEYS['full_name']) or sub.user.first_name or sub.user.username
+    organization = form_value(form_data, FORM_KEYS['organization'])
+    nationality = form_value(form_data, FORM_KEYS['nationality'])
+    title = form_value(form_data, FORM_KEYS['title'])
+    return {
+        'scope': scope_for(QR_EVENT, sub.event_registration_id),
+        'qr_type': QR_EVENT,
+        'code': str(sub.pk),
+        'qr_hash': sub.qr_ticket_hash,
+        'status': sub.status,
+        'valid': True,
+        'role_color': '',
+        'name': name[:200],
+        'organization': organization[:200],
+        'role': title[:200],
+        'nationality': nationality[:100],
+        'details': {
+            'email': sub.proxy_email if sub.is_proxy else sub.user.email,
+            'phone': form_value(form_data, FORM_KEYS['phone']),
+            'is_proxy': sub.is_proxy,
+            'is_waitlisted': sub.is_waitlisted,
+            'checked_in_at': _iso(sub.checked_in_at),
+        },
+    }
+
+
+def _role_colors(event_id):
+    from core.models import YouthDialogueRole
+    roles = YouthDialogueRole.objects.filter(event_id=event_id, is_active=True).order_by('-order', '-pk')
+    return {name.lower(): color for name, color in roles.values_list('name', 'color')}
+
+
+def _yd_entry(app, role_colors):
+    role = app.position or 'Participant'
+    side_event = next(iter(app.selected_side_events.all()), None)
+    details = {
+        'nationality_flag': app.nationality_flag,
+        'position': app.position,
+        'email': app.email,
+        'reference_id': app.reference_id or '',
+        'credential_issued_at': _iso(app.credential_issued_at),
+        'id_photo': app.id_photo.name if app.id_photo else '',
+        'side_event': side_event.name if side_event else '',
+    }
+    if app.is_revoked:
+        details['revoked_at'] = _iso(app.revoked_at)
+        details['revoked_reason'] = app.revoked_reason
+    return {
+        'scope': scope_for(QR_YD, app.event_id),
+        'qr_type': QR_YD,
+        'code': app.participant_code,
+        'qr_hash': app.qr_hash,
+        'status': 'revoked' if app.is_revoked else 'valid',
+        'valid': not app.is_revoked,
+        'role_color': role_colors.get(role.lower(), DEFAULT_ROLE_COLOR),
+        'name': f'{app.first_name} {app.last_name}'[:200],
+        'organization': app.organization,
+        'role': role,
+        'nationality': app.get_nationality_display()[:100],
+        'details': details,
+    }
+
+
+def _event_entries(queryset):
+    queryset = queryset.exclude(qr_ticket_hash='').select_related('user')
+    return {str(sub.pk): _event_entry(sub) for sub in queryset}
+
+
+def _yd_entries(queryset):
+    queryset = (
+        queryset.exclude(participant_code__isnull=True).exclude(participant_code='').exclude(qr_hash='')
+        .prefetch_related('selected_side_events')
+    )
+    colors = {}
+    entries = {}
+    for app in queryset:
+        if app.event_id not in colors:
+            colors[app.event_id] = _role_colors(app.event_id)
+        entries[app.participant_code] = _yd_entry(app, colors[app.event_id])
+    return entries
+
+
+def _entries_for_codes(qr_type, codes):
+    from core.models import EventSubmission, YouthDialogueApplication
+    if qr_type == QR_EVENT:
+        ids = [int(code) for code in codes if code.isdigit()]
+        return _event_entries(EventSubmission.objects.filter(pk__in=ids)) if ids else {}
+    return _yd_entries(YouthDialogueApplication.objects.filter(participant_code__in=list(codes)))
+
+
+def _entries_for_scope(qr_type, event_id):
+    from core.models import EventSubmission, YouthDialogueApplication
+    if qr_type == QR_EVENT:
+        return _event_entries(EventSubmission.objects.filter(event_registration_id=event_id))
+    return _yd_entries(YouthDialogueApplication.objects.filter(event_id=event_id))
+
+
+def _scope_info(qr_type, event_id):
+    """Header info for a scope, or None when its event no longer exists."""
+    from core.models import EventRegistration, YouthDialogueEvent
+    if qr_type == QR_EVENT:
+        reg = EventRegistration.objects.filter(pk=event_id).first()
+        return _event_info(reg) if reg else None
+    event = YouthDialogueEvent.objects.filter(pk=event_id).first()
+    return _yd_info(event) if event else None
+
+
+def build_entry(qr_type, obj):
+    """``(entry, info)`` straight from a submission / application, bypassing the index.
+
+    For manual lookups of records that have no scannable credential (yet).
+    """
+    if qr_type == QR_EVENT:
+        return _event_entry(obj), _event_info(obj.event_registration)
+    return _yd_entry(obj, _role_colors(obj.event_id)), _yd_info(obj.event)
+
+
+# ── Storing rows and revisions ──────────────────────────────────
+
+
+def _bump_token(scope):
+    key = TOKEN_KEY.format(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing (first change or evicted) — any fresh value will do.
+        cache.set(key, time.time_ns(), timeout=None)
+    except Exception:
+        logger.warning('Failed to publish check-in change for %s', scope, exc_info=True)
+
+
+def _claim_revisions(scope, count):
+    """Reserve ``count`` revisions; returns the last one (None if the scope has no manifest)."""
+    from core.models import CheckinManifest
+    if not CheckinManifest.objects.filter(scope=scope).update(revision=F('revision') + count):
+        return None
+    transaction.on_commit(lambda: _bump_token(scope))
+    return CheckinManifest.objects.filter(scope=scope).values_list('revision', flat=True).get()
+
+
+def _store(qr_type, codes, entries):
+    """Write ``entries`` for ``codes``; codes without an entry become tombstones."""
+    from core.models import CheckinCredential
+
+    existing = {row.code: row for row in CheckinCredential.objects.filter(qr_type=qr_type, code__in=list(codes))}
+    changed = defaultdict(list)
+    for code in codes:
+        entry, row = entries.get(code), existing.get(code)
+        if entry is None:
+            if row is None or row.status == STATUS_REMOVED:
+                continue
+            entry = {
+                'scope': row.scope, 'qr_type': qr_type, 'qr_hash': '', 'status': STATUS_REMOVED,
+                'valid': False, 'role_color': '', 'name': row.name, 'organization': '', 'role': '',
+                'nationality': '', 'details': {},
+            }
+        if row is not None and all(getattr(row, field) == entry[field] for field in _ROW_FIELDS):
+            continue
+        row = row or CheckinCredential(code=code)
+        for field in _ROW_FIELDS:
+            setattr(row, field, entry[field])
+        changed[row.scope].append(row)
+
+    for scope, rows in changed.items():
+        with transaction.atomic():
+            last = _claim_revisions(scope, len(rows))
+            if last is None:
+                continue
+            for offset, row in enumerate(rows):
+                row.revision = last - len(rows) + 1 + offset
+            CheckinCredential.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=['qr_type', 'code'],
+                update_fields=[*_ROW_FIELDS, 'revision', 'updated_at'],
+            )
+    return sum(len(rows) for rows in changed.values())
+
+
+def ensure_scope(scope):
+    """Create and fill the scope's manifest on first use. False if its event does not exist."""
+    from core.models import CheckinManifest
+
+    parsed = parse_scope(scope)
+    if parsed is None:
+        return False
+    if CheckinManifest.objects.filter(scope=scope).exists():
+        return True
+    info = _scope_info(*parsed)
+    if info is None:
+        return False
+    with transaction.atomic():
+        _, created = CheckinManifest.objects.get_or_create(scope=scope, defaults={'info': info})
+        if created:
+            entries = _entries_for_scope(*parsed)
+            _store(parsed[0], list(entries), entries)
+    return True
+
+
+def sync(qr_type, codes):
+    """Recompute the rows for these codes (submission IDs / participant codes)."""
+    codes = {str(code) for code in codes if code}
+    if not codes:
+        return 0
+    entries = _entries_for_codes(qr_type, codes)
+    for scope in {entry['scope'] for entry in entries.values()}:
+        ensure_scope(scope)
+    return _store(qr_type, codes, entries)
+
+
+def rebuild_scope(scope):
+    """Recompute every row of an existing scope (role colours changed, nightly repair)."""
+    from core.models import CheckinCredential, CheckinManifest
+
+    parsed = parse_scope(scope)
+    if parsed is None or not CheckinManifest.objects.filter(scope=scope).exists():
+        return 0
+    refresh_info(scope)
+    entries = _entries_for_scope(*parsed)
+    codes = set(entries) | set(
+        CheckinCredential.objects.filter(scope=scope).exclude(status=STATUS_REMOVED).values_list('code', flat=True)
+    )
+    return _store(parsed[0], codes, entries)
+
+
+def refresh_info(scope):
+    """Pick up a changed event title / venue / dates in the manifest header."""
+    from core.models import CheckinManifest
+
+    parsed = parse_scope(scope)
+    if parsed is None:
+        return
+    current = CheckinManifest.objects.filter(scope=scope).values_list('info', flat=True).first()
+    if current is None:
+        return
+    info = _scope_info(*parsed)
+    if info is None or info == current:
+        return
+    with transaction.atomic():
+        CheckinManifest.objects.filter(scope=scope).update(info=info, revision=F('revision') + 1)
+        transaction.on_commit(lambda: _bump_token(scope))
+
+
+def rebuild():
+    """Rebuild every existing scope. Returns the number of rows that changed."""
+    from core.models import CheckinManifest
+
+    changed = 0
+    for scope in CheckinManifest.objects.values_list('scope', flat=True):
+        try:
+            changed += rebuild_scope(scope)
+        except Exception:
+            logger.exception('Failed to rebuild check-in scope %s', scope)
+    logger.info('Check-in index rebuilt: %d rows changed', changed)
+    return changed
+
+
+# ── In-process index ────────────────────────────────────────────
+
+
+class _ScopeIndex:
+    __slots__ = ('manifest_id', 'revision', 'info', 'entries', 'token', 'checked_at')
+
+    def __init__(self, manifest_id):
+        self.manifest_id = manifest_id
+        self.revision = 0
+        self.info = {}
+        self.entries = {}
+        self.token = None
+        self.checked_at = 0.0
+
+
+_scopes = {}        # scope → _ScopeIndex
+_code_scopes = {}   # (qr_type, code) → scope
+_lock = threading.Lock()
+
+
+def reset():
+    """Drop this process's index (tests)."""
+    with _lock:
+        _scopes.clear()
+        _code_scopes.clear()
+
+
+def _current(scope, force=False):
+    """This process's index of ``scope``, refreshed if another writer changed it."""
+    from core.models import CheckinCredential, CheckinManifest
+
+    token = cache.get(TOKEN_KEY.format(scope))
+    index = _scopes.get(scope)
+    if (index is not None and not force and index.token == token
+            and time.monotonic() - index.checked_at < settings.CHECKIN_INDEX_MAX_AGE):
+        return index
+
+    with _lock:
+        manifest = CheckinManifest.objects.filter(scope=scope).values('pk', 'revision', 'info').first()
+        if manifest is None:
+            _scopes.pop(scope, None)
+            return None
+        index = _scopes.get(scope)
+        if index is None or index.manifest_id != manifest['pk']:
+            index = _ScopeIndex(manifest['pk'])
+        # Committed revisions are a gap-free prefix, so "> what we have" is the whole delta.
+        for row in CheckinCredential.objects.filter(scope=scope, revision__gt=index.revision).values(*_INDEX_FIELDS):
+            index.entries[row['code']] = row
+            _code_scopes[(row['qr_type'], row['code'])] = scope
+            index.revision = max(index.revision, row['revision'])
+        index.revision = max(index.revision, manifest['revision'])
+        index.info = manifest['info']
+        index.token = token
+        index.checked_at = time.monotonic()
+        _scopes[scope] = index
+        return index
+
+
+def lookup(qr_type, code):
+    """``(entry, info)`` for a scanned code, or None if there is no such credential.
+
+    Removed credentials and unknown codes both return None.  Entries are the
+    index's own dicts; treat them as read-only.
+    """
+    from core.models import CheckinCredential
+
+    code = str(code)
+    scope = _code_scopes.get((qr_type, code))
+    index = _current(scope) if scope else None
+    if index is None or code not in index.entries:
+        credentials = CheckinCredential.objects.filter(qr_type=qr_type, code=code)
+        scope = credentials.values_list('scope', flat=True).first()
+        if scope is None:
+            # Issued before the index existed (or never): build it from the source row.
+            sync(qr_type, [code])
+            scope = credentials.values_list('scope', flat=True).first()
+            if scope is None:
+                return None
+        index = _current(scope, force=True)
+        if index is None:
+            return None
+    entry = index.entries.get(code)
+    if entry is None or entry['status'] == STATUS_REMOVED:
+        return None
+    return entry, index.info
+
+
+def hash_matches(entry, qr_hash):
+    return bool(entry['qr_hash']) and constant_time_compare(entry['qr_hash'], qr_hash or '')
+
+
+# ── Manifests ───────────────────────────────────────────────────
+
+
+def hash_digest(qr_hash):
+    """What a manifest carries instead of the QR hash; scanners hash the scanned value to compare."""
+    return hashlib.sha256(qr_hash.encode()).hexdigest()[:HASH_DIGEST_LENGTH] if qr_hash else ''
+
+
+@functools.lru_cache(maxsize=1)
+def _load_key(seed):
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    return Ed25519PrivateKey.from_private_bytes(base64.b64decode(seed))
+
+
+def _signing_key():
+    seed = settings.CHECKIN_MANIFEST_SIGNING_KEY
+    return _load_key(seed) if seed else None
+
+
+def can_sign():
+    """Whether a manifest signing key is configured (manifests are not served without one)."""
+    return bool(settings.CHECKIN_MANIFEST_SIGNING_KEY)
+
+
+def public_key():
+    """Base64 raw Ed25519 public key that scanner builds verify manifests with."""
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+    key = _signing_key()
+    if key is None:
+        raise ImproperlyConfigured('CHECKIN_MANIFEST_SIGNING_KEY is not set.')
+    return base64.b64encode(key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)).decode()
+
+
+def sign(payload):
+    """Base64 Ed25519 signature over the payload's canonical JSON."""
+    key = _signing_key()
+    if key is None:
+        raise ImproperlyConfigured('CHECKIN_MANIFEST_SIGNING_KEY is not set.')
+    message = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return base64.b64encode(key.sign(message.encode())).decode()
+
+
+def manifest(scope, since=0):
+    """Signed manifest of ``scope``: everything, or the changes after revision ``since``.
+
+    None when the scope's event does not exist.
+    """
+    if not ensure_scope(scope):
+        return None
+    index = _current(scope)
+    if index is None:
+        return None
+    if since > index.revision:
+        since = 0  # the scanner's copy is from a manifest that no longer exists
+    rows = sorted(
+        (e for e in index.entries.values() if e['revision'] > since and (since or e['status'] != STATUS_REMOVED)),
+        key=lambda e: e['revision'],
+    )
+    payload = {
+        'scope': scope,
+        'revision': index.revision,
+        'since': since,
+        'info': index.info,
+        'fields': list(MANIFEST_FIELDS),
+        'entries': [
+            [e['code'], hash_digest(e['qr_hash']), e['status'], e['valid'], e['role_color'], e['name'],
+             e['organization'], e['role'], e['nationality']]
+            for e in rows
+        ],
+    }
+    payload['signature'] = sign(payload)
+    return payload
+
+
+# ── Scan logging ────────────────────────────────────────────────
+
+
+def _bump_scan_count(qr_type, code, count=1, inserted=False):
+    """Add ``count`` scans of a code; returns the new total.
+
+    ``inserted``: the scans' rows are already stored (seed without them).
+    """
+    from core.models import QRScanLog
+
+    key = SCAN_COUNT_KEY.format(qr_type, code)
+    try:
+        return cache.incr(key, count)
+    except ValueError:
+        seen = QRScanLog.objects.filter(qr_type=qr_type, reference_id=code).count()
+        if inserted:
+            seen -= count
+        cache.add(key, seen, settings.CHECKIN_SCAN_COUNT_TTL)
+        return cache.incr(key, count)
+
+
+def record_scan(qr_type, code, scanned_by=None, ip_address=None):
+    """Log one online scan; returns the code's scan count including this one."""
+    from core.models import QRScanLog
+
+    scan_count = _bump_scan_count(qr_type, code)
+    QRScanLog.objects.create(
+        qr_type=qr_type,
+        reference_id=code,
+        scanned_by=scanned_by,
+        ip_address=ip_address,
+        is_duplicate=scan_count > 1,
+    )
+    return scan_count
+
+
+def _insert_scans(scans, scanned_by, ip_address):
+    """INSERT the scans whose ``client_ref`` is not stored yet; returns them with their rows.
+
+    The unique index on ``client_ref`` makes a concurrent upload of the same
+    refs wait for the first one to commit and then fail; the retry re-reads
+    the stored refs and drops them, so every scan is inserted exactly once.
+    """
+    from core.models import QRScanLog
+
+    for attempt in range(INSERT_ATTEMPTS):
+        refs = [s['client_ref'] for s in scans if s.get('client_ref')]
+        seen = set(QRScanLog.objects.filter(client_ref__in=refs).values_list('client_ref', flat=True)) if refs else set()
+        fresh = []
+        for scan in sorted(scans, key=lambda s: s['scanned_at']):
+            ref = scan.get('client_ref')
+            if ref and ref in seen:
+                continue
+            seen.add(ref)
+            fresh.append(scan)
+        rows = [
+            QRScanLog(
+                qr_type=scan['qr_type'], reference_id=scan['code'], scanned_by=scanned_by, ip_address=ip_address,
+                scanned_at=scan['scanned_at'], client_ref=scan.get('client_ref'),
+            )
+            for scan in fresh
+        ]
+        try:
+            with transaction.atomic():
+                QRScanLog.objects.bulk_create(rows)
+            return fresh, rows
+        except IntegrityError:
+            if attempt == INSERT_ATTEMPTS - 1:
+                raise
+
+
+def record_scans(scans, scanned_by=None, ip_address=None):
+    """Store a scanner's uploaded batch with one INSERT.
+
+    ``scans`` are dicts with ``qr_type``, ``code``, ``scanned_at`` and an
+    optional ``client_ref``.  Scans whose ``client_ref`` was already stored
+    (a retried upload) are skipped.  Returns ``(stored, skipped)``; stored
+    scans gain ``is_duplicate`` and ``scan_count``.  Counts are bumped only
+    for the rows this call inserted.
+    """
+    from core.models import QRScanLog
+
+    fresh, rows = _insert_scans(scans, scanned_by, ip_address)
+    totals = {
+        key: _bump_scan_count(*key, count, inserted=True)
+        for key, count in Counter((s['qr_type'], s['code']) for s in fresh).items()
+    }
+    counts = Counter()
+    for scan in reversed(fresh):
+        key = (scan['qr_type'], scan['code'])
+        scan['scan_count'] = totals[key] - counts[key]
+        scan['is_duplicate'] = scan['scan_count'] > 1
+        counts[key] += 1
+
+    duplicates = [row.pk for row, scan in zip(rows, fresh) if scan['is_duplicate']]
+    if duplicates:
+        QRScanLog.objects.filter(pk__in=duplicates).update(is_duplicate=True)
+    return fresh, len(scans) - len(fresh)
@@ -9,7 +9,8 @@ import time
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.db.models import F
+
+from . import live_viewers
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,8 @@ class LiveFeedConsumer(AsyncJsonWebsocketConsumer):
     All connected clients join the 'live_feeds' group and receive:
     - feed_started: A new live feed has started streaming.
     - feed_ended: A live feed has ended.
-    - viewer_count: Updated viewer count for a feed.
+    - viewer_count: Updated viewer count for a feed, coalesced to at most one
+      per feed per LIVE_VIEWER_BROADCAST_INTERVAL (see core/live_viewers.py).
 
     Clients can send:
     - {"type": "join_feed", "feed_id": <int>}   — Start watching a specific feed.
@@ -47,16 +49,12 @@ class LiveFeedConsumer(AsyncJsonWebsocketConsumer):
 
     async def disconnect(self, close_code):
         # Decrement viewer count for every feed this connection was watching
-        for feed_id in self._joined_feeds:
-            feed_group = f'live_feed_{feed_id}'
-            new_count = await self._decrement_viewer_count(feed_id)
-            await self.channel_layer.group_send(feed_group, {
-                'type': 'viewer_count_update',
-                'feed_id': feed_id,
-                'viewer_count': new_count,
-            })
-            await self.channel_layer.group_discard(feed_group, self.channel_name)
-        self._joined_feeds.clear()
+        # (unset when connect() rejected the socket).
+        joined = getattr(self, '_joined_feeds', set())
+        for feed_id in joined:
+            await self.channel_layer.group_discard(f'live_feed_{feed_id}', self.channel_name)
+            await live_viewers.leave(self.channel_layer, feed_id)
+        joined.clear()
         await self.channel_layer.group_discard(self.GROUP_NAME, self.channel_name)
         logger.info("LiveFeed WebSocket disconnected: %s (code=%s)", self.channel_name, close_code)
 
@@ -91,12 +89,7 @@ class LiveFeedConsumer(AsyncJsonWebsocketConsumer):
             self._joined_feeds.add(feed_id)
             feed_group = f'live_feed_{feed_id}'
             await self.channel_layer.group_add(feed_group, self.channel_name)
-            new_count = await self._increment_viewer_count(feed_id)
-            await self.channel_layer.group_send(feed_group, {
-                'type': 'viewer_count_update',
-                'feed_id': feed_id,
-                'viewer_count': new_count,
-            })
+            await live_viewers.join(self.channel_layer, feed_id)
 
         elif msg_type == 'leave_feed':
             # Only decrement if this connection actually joined that feed
@@ -105,12 +98,7 @@ class LiveFeedConsumer(AsyncJsonWebsocketConsumer):
             self._joined_feeds.discard(feed_id)
             feed_group = f'live_feed_{feed_id}'
             await self.channel_layer.group_discard(feed_group, self.channel_name)
-            new_count = await self._decrement_viewer_count(feed_id)
-            await self.channel_layer.group_send(feed_group, {
-                'type': 'viewer_count_update',
-                'feed_id': feed_id,
-                'viewer_count': new_count,
-            })
+            await live_viewers.leave(self.channel_layer, feed_id)
 
     # ─── Group message handlers (called via channel_layer.group_send) ──
 
@@ -140,31 +128,6 @@ class LiveFeedConsumer(AsyncJsonWebsocketConsumer):
             'viewer_count': event['viewer_count'],
         })
 
-    # ─── Database helpers ─────────────────────────────────────
-
-    @database_sync_to_async
-    def _increment_viewer_count(self, feed_id):
-        from .models import LiveFeed
-        try:
-            LiveFeed.objects.filter(pk=feed_id).update(
-                viewer_count=F('viewer_count') + 1
-            )
-            return LiveFeed.objects.values_list('viewer_count', flat=True).get(pk=feed_id)
-        except LiveFeed.DoesNotExist:
-            return 0
-
-    @database_sync_to_async
-    def _decrement_viewer_count(self, feed_id):
-        from .models import LiveFeed
-        try:
-            # Clamp to zero: only decrement if currently > 0
-            LiveFeed.objects.filter(pk=feed_id, viewer_count__gt=0).update(
-                viewer_count=F('viewer_count') - 1
-            )
-            return LiveFeed.objects.values_list('viewer_count', flat=True).get(pk=feed_id)
-        except LiveFeed.DoesNotExist:
-            return 0
-
 
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
     """
@@ -250,15 +213,8 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
 
     @database_sync_to_async
     def _get_unread_count(self):
-        from .models import Notification
-        from django.db.models import Q
-        return Notification.objects.filter(
-            is_active=True,
-        ).filter(
-            Q(is_global=True) | Q(target_users=self.user)
-        ).exclude(
-            read_by=self.user
-        ).distinct().count()
+        from .notification_counters import unread_count
+        return unread_count(self.user.id)
 
     @database_sync_to_async
     def _mark_notification_read(self, notification_id):
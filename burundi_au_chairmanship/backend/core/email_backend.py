@@ -11,10 +11,13 @@ touching Gmail.
 
 When the primary SMTP (Gmail) fails with an authentication or connection
 error, the backend automatically retries via the FALLBACK_EMAIL_* server.
+
+A ``send_messages`` call reuses one SMTP session for all of its messages
+and writes their EmailLog rows in one bulk insert.
 """
 import logging
 import re
-from smtplib import SMTPAuthenticationError
+from smtplib import SMTPAuthenticationError, SMTPServerDisconnected
 
 from django.conf import settings
 from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
@@ -69,7 +72,28 @@ def _body_preview(msg, redact: bool = False) -> str:
 
 
 class LoggingEmailBackend(SMTPEmailBackend):
-    """SMTP backend that writes an EmailLog row for every message."""
+    """SMTP backend that writes an EmailLog row for every message.
+
+    One ``send_messages`` call is one SMTP session (plus at most one
+    fallback session) and one bulk insert of its EmailLog rows.  Extra
+    ``get_connection`` options used by the bulk mail engine (core/bulk_mail.py):
+
+    * ``log_category`` / ``log_campaign`` tag the rows instead of guessing
+      the category from the subject.
+    * ``throttle`` is called before each message (provider rate limits).
+    * ``defer_logs`` keeps the rows on ``pending_logs`` for the caller to
+      insert, instead of writing them here.
+    """
+
+    def __init__(self, *args, log_category=None, log_campaign=None, throttle=None,
+                 defer_logs=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.log_category = log_category
+        self.log_campaign = log_campaign
+        self.throttle = throttle
+        self.defer_logs = defer_logs
+        self.pending_logs = []
+        self.last_error = ''
 
     def send_messages(self, email_messages):
         # Lazy import to avoid Django app-loading issues during startup.
@@ -78,30 +102,52 @@ class LoggingEmailBackend(SMTPEmailBackend):
         if not email_messages:
             return 0
 
-        total_sent = 0
-        for msg in email_messages:
-            subject = getattr(msg, 'subject', '') or ''
-            recipients = ', '.join(getattr(msg, 'to', []) or [])
-            from_email = getattr(msg, 'from_email', '') or ''
-            category = _categorize(subject)
-            redact = category in ('otp', 'verification', 'admin_invite')
-            body_preview = _body_preview(msg, redact=redact)
-
-            try:
-                sent = super().send_messages([msg]) or 0
-                total_sent += sent
-                status = 'sent' if sent else 'failed'
-                error = '' if sent else 'send_messages returned 0'
-            except (SMTPAuthenticationError, ConnectionRefusedError, OSError) as exc:
-                # Primary SMTP failed — try fallback server
-                sent, status, error = self._try_fallback(msg, exc)
-                total_sent += sent
-            except Exception as exc:
-                status = 'failed'
-                error = str(exc)[:2000]
+        # Open the primary session once for the whole list; if that fails,
+        # every message goes straight to the fallback server.
+        open_error = None
+        try:
+            new_conn_created = self.open()
+        except (SMTPAuthenticationError, ConnectionRefusedError, OSError) as exc:
+            new_conn_created, open_error = False, exc
 
-            try:
-                EmailLog.objects.create(
+        logs = []
+        fallback = None
+        total_sent = 0
+        try:
+            for msg in email_messages:
+                subject = getattr(msg, 'subject', '') or ''
+                recipients = ', '.join(getattr(msg, 'to', []) or [])
+                from_email = getattr(msg, 'from_email', '') or ''
+                category = self.log_category or _categorize(subject)
+                redact = category in ('otp', 'verification', 'admin_invite')
+                body_preview = _body_preview(msg, redact=redact)
+                if self.throttle:
+                    self.throttle()
+
+                try:
+                    if open_error:
+                        raise open_error
+                    if self.connection is None:
+                        self.open()  # reconnect after a dropped session
+                    sent = super().send_messages([msg]) or 0
+                    total_sent += sent
+                    status = 'sent' if sent else 'failed'
+                    error = '' if sent else 'send_messages returned 0'
+                except (SMTPAuthenticationError, ConnectionRefusedError, OSError) as exc:
+                    if isinstance(exc, SMTPServerDisconnected):
+                        self.close()
+                    # Primary SMTP failed — try fallback server
+                    if fallback is None:
+                        fallback = self._fallback_backend(exc)
+                    sent, status, error = self._try_fallback(msg, exc, fallback)
+                    total_sent += sent
+                except Exception as exc:
+                    status = 'failed'
+                    error = str(exc)[:2000]
+                if error:
+                    self.last_error = error
+
+                logs.append(EmailLog(
                     subject=subject[:255],
                     recipients=recipients,
                     from_email=from_email[:255],
@@ -109,7 +155,22 @@ class LoggingEmailBackend(SMTPEmailBackend):
                     error=error,
                     category=category,
                     body_preview=body_preview,
-                )
+                    campaign=self.log_campaign,
+                ))
+        finally:
+            if new_conn_created:
+                self.close()
+            if fallback:
+                try:
+                    fallback.close()
+                except Exception:
+                    pass
+
+        if self.defer_logs:
+            self.pending_logs.extend(logs)
+        else:
+            try:
+                EmailLog.objects.bulk_create(logs)
             except Exception:
                 # Logging must never break real mail delivery.
                 pass
@@ -117,17 +178,31 @@ class LoggingEmailBackend(SMTPEmailBackend):
         return total_sent
 
     @staticmethod
-    def _try_fallback(msg, primary_exc):
-        """Retry a single message via the FALLBACK_EMAIL_* SMTP server."""
+    def _fallback_backend(primary_exc):
+        """An unopened FALLBACK_EMAIL_* backend, or False when none is configured."""
         fallback_host = getattr(settings, 'FALLBACK_EMAIL_HOST', '')
         fallback_password = getattr(settings, 'FALLBACK_EMAIL_HOST_PASSWORD', '')
         if not fallback_host or not fallback_password:
-            return 0, 'failed', str(primary_exc)[:2000]
+            return False
 
         _logger.warning(
             'Primary SMTP failed (%s), retrying via fallback %s',
             primary_exc, fallback_host,
         )
+        return SMTPEmailBackend(
+            host=fallback_host,
+            port=getattr(settings, 'FALLBACK_EMAIL_PORT', 465),
+            username=getattr(settings, 'FALLBACK_EMAIL_HOST_USER', ''),
+            password=fallback_password,
+            use_tls=getattr(settings, 'FALLBACK_EMAIL_USE_TLS', False),
+            use_ssl=getattr(settings, 'FALLBACK_EMAIL_USE_SSL', True),
+        )
+
+    @staticmethod
+    def _try_fallback(msg, primary_exc, fallback_backend):
+        """Retry a single message via the fallback session (kept open across messages)."""
+        if not fallback_backend:
+            return 0, 'failed', str(primary_exc)[:2000]
 
         # Rewrite the from address to the fallback sender
         fallback_from = getattr(
@@ -136,14 +211,7 @@ class LoggingEmailBackend(SMTPEmailBackend):
         msg.from_email = fallback_from
 
         try:
-            fallback_backend = SMTPEmailBackend(
-                host=fallback_host,
-                port=getattr(settings, 'FALLBACK_EMAIL_PORT', 465),
-                username=getattr(settings, 'FALLBACK_EMAIL_HOST_USER', ''),
-                password=fallback_password,
-                use_tls=getattr(settings, 'FALLBACK_EMAIL_USE_TLS', False),
-                use_ssl=getattr(settings, 'FALLBACK_EMAIL_USE_SSL', True),
-            )
+            fallback_backend.open()
             sent = fallback_backend.send_messages([msg]) or 0
             status = 'sent' if sent else 'failed'
             error = '' if sent else 'fallback send_messages returned 0'
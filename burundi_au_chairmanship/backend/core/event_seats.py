@@ -0,0 +1,72 @@
+"""
+Seat and waitlist allocation for event registrations.
+
+Capacity used to be decided with ``submissions.filter(is_waitlisted=False)
+.count()`` and waitlist positions with ``waitlist.count() + 1`` — a table
+scan per POST and, under a registration rush, overbooked events and
+duplicate positions because nothing was locked between the read and the
+insert.
+
+Each ``EventRegistration`` row now carries its own counters:
+
+  * ``seats_taken`` — non-waitlisted submissions.  ``claim_seat`` takes a
+    seat with one conditional ``UPDATE ... WHERE seats_taken <
+    max_registrations``; the row lock serialises concurrent claims and the
+    condition is re-checked against the committed value, so exactly
+    ``max_registrations`` claims succeed.
+  * ``waitlist_seq`` — last waitlist position handed out.
+    ``next_waitlist_position`` bumps it and reads it back under the same
+    row lock, so positions are unique and gap-free per event.
+
+Both must run inside the transaction that writes the submission / waitlist
+entry, so a failed insert rolls the counter back with it.  Deleted
+submissions give their seat back (``release_seat``, via a post_delete
+signal) and ``reconcile_seats`` recounts from the submissions table for
+maintenance jobs.
+"""
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.db.models.functions import Greatest
+
+
+def claim_seat(event_reg_id):
+    """Take one seat; False means the event is full and the caller should waitlist."""
+    from core.models import EventRegistration
+    return bool(
+        EventRegistration.objects.filter(pk=event_reg_id)
+        .filter(Q(max_registrations__lte=0) | Q(seats_taken__lt=F('max_registrations')))
+        .update(seats_taken=F('seats_taken') + 1)
+    )
+
+
+def release_seat(event_reg_id):
+    """Give back a seat taken by a submission that no longer holds it."""
+    from core.models import EventRegistration
+    EventRegistration.objects.filter(pk=event_reg_id, seats_taken__gt=0).update(
+        seats_taken=F('seats_taken') - 1,
+    )
+
+
+def next_waitlist_position(event_reg_id):
+    """Next position in the event's waitlist (1-based, unique per event)."""
+    from core.models import EventRegistration
+    EventRegistration.objects.filter(pk=event_reg_id).update(waitlist_seq=F('waitlist_seq') + 1)
+    return EventRegistration.objects.filter(pk=event_reg_id).values_list('waitlist_seq', flat=True).get()
+
+
+def reconcile_seats(event_reg_id):
+    """Recount ``seats_taken`` from the submissions table; returns it.
+
+    ``waitlist_seq`` only moves forward so positions already handed out stay unique.
+    """
+    from core.models import EventRegistration, EventSubmission, EventWaitlist
+    with transaction.atomic():
+        # Hold the counter row so no claim lands between the count and the write.
+        if not list(EventRegistration.objects.select_for_update().filter(pk=event_reg_id).values_list('pk')):
+            return 0
+        taken = EventSubmission.objects.filter(event_registration_id=event_reg_id, is_waitlisted=False).count()
+        last = EventWaitlist.objects.filter(event_registration_id=event_reg_id).aggregate(m=Max('position'))['m']
+        EventRegistration.objects.filter(pk=event_reg_id).update(
+            seats_taken=taken, waitlist_seq=Greatest(F('waitlist_seq'), last or 0),
+        )
+    return taken
@@ -0,0 +1,209 @@
+"""
+Shared, versioned cache for the home feed.
+
+The home feed is split into:
+  • a *base* document — identical for every caller, built once and cached
+    under ``home_feed:base:v<version>``;
+  • a per-user *overlay* — ``is_liked`` on articles/magazines and the
+    ``has_registered`` / ``user_submission_*`` fields on event cards —
+    computed with three small indexed queries and patched onto a copy of
+    the base;
+  • a small *registration* section — live submission counts per event
+    card, cached separately under ``home_feed:registration_counts`` and
+    patched onto every response together with the open/closed state and
+    remaining seats derived from them.
+
+Content saves bump ``home_feed:version`` (see
+``register_feed_invalidation_signals`` in signals.py) so a new article is
+visible on the next request instead of after the TTL.  Submissions do
+*not* bump it: during a registration rush that would rebuild the whole
+base on every sign-up.  They only drop the registration section, which is
+one grouped query to refill.  Rebuilds are
+single-flight: one caller takes a short lock and rebuilds, concurrent
+callers serve the previous base until the new one lands.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'home_feed:version'
+STALE_KEY = 'home_feed:base:stale'
+LOCK_KEY = 'home_feed:rebuild_lock'
+LOCK_TIMEOUT = 30          # seconds — upper bound on a rebuild
+WAIT_FOR_REBUILD = 5.0     # seconds a caller with no stale copy will wait
+WAIT_POLL_INTERVAL = 0.05
+
+REGISTRATION_KEY = 'home_feed:registration_counts'
+REGISTRATION_TTL = 30      # seconds — backstop for seat changes made via update()
+
+ARTICLE_SECTIONS = ('featured_articles', 'featured_news', 'articles', 'news_items')
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # add() so concurrent first requests agree on the starting version.
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY) or 1
+    return version
+
+
+def bump_version():
+    """Invalidate the shared base document (called from content signals)."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Key missing (first run or evicted) — any fresh value invalidates.
+        cache.set(VERSION_KEY, int(time.time()), timeout=None)
+    except Exception:
+        logger.warning('Failed to bump home feed version', exc_info=True)
+
+
+def _base_key(version):
+    return f'home_feed:base:v{version}'
+
+
+def get_base(build):
+    """Return the shared base document, calling ``build()`` at most once
+    per version across all concurrent callers."""
+    version = get_version()
+    key = _base_key(version)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    if cache.add(LOCK_KEY, version, timeout=LOCK_TIMEOUT):
+        try:
+            data = build()
+            ttl = settings.CACHE_TTL_SHORT
+            cache.set(key, data, ttl)
+            # The stale copy outlives the versioned one so waiters always
+            # have something to serve while the next rebuild runs.
+            cache.set(STALE_KEY, data, ttl * 10)
+            return data
+        finally:
+            cache.delete(LOCK_KEY)
+
+    # Someone else is rebuilding — serve the previous version if we have one.
+    stale = cache.get(STALE_KEY)
+    if stale is not None:
+        return stale
+
+    deadline = time.monotonic() + WAIT_FOR_REBUILD
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_POLL_INTERVAL)
+        data = cache.get(key)
+        if data is not None:
+            return data
+    # Rebuilder is stuck or died; build for this caller only.
+    return build()
+
+
+# ── Registration counts ──────────────────────────────────────────
+
+
+def get_registration_counts():
+    """Return ``{registration_id: (submission_count, seats_taken)}`` for
+    every active registration card."""
+    counts = cache.get(REGISTRATION_KEY)
+    if counts is None:
+        from django.db.models import Count
+        from .models import EventRegistration
+
+        rows = EventRegistration.objects.filter(is_active=True).annotate(
+            n=Count('submissions'),
+        ).values_list('pk', 'n', 'seats_taken')
+        counts = {pk: (n, seats) for pk, n, seats in rows}
+        cache.set(REGISTRATION_KEY, counts, REGISTRATION_TTL)
+    return counts
+
+
+def invalidate_registration_counts():
+    """Drop the registration section (called when a submission changes)."""
+    try:
+        cache.delete(REGISTRATION_KEY)
+    except Exception:
+        logger.warning('Failed to invalidate home feed registration counts', exc_info=True)
+
+
+def apply_registration_counts(data):
+    """Patch live counts, open state and remaining seats onto event cards.
+
+    Mirrors ``EventRegistrationSerializer`` so the base document may carry
+    counts that are as old as its TTL.
+    """
+    from django.utils import timezone
+    from django.utils.dateparse import parse_datetime
+
+    cards = [c for c in data.get('event_cards', []) if c.get('has_registration')]
+    if not cards:
+        return data
+    counts = get_registration_counts()
+    now = timezone.now()
+    for card in cards:
+        if card['id'] not in counts:
+            continue
+        count, seats_taken = counts[card['id']]
+        limit = card.get('max_registrations') or 0
+        deadline = card.get('registration_deadline')
+        if isinstance(deadline, str):
+            deadline = parse_datetime(deadline)
+        card['current_registration_count'] = count
+        card['spots_remaining'] = max(0, limit - seats_taken) if limit > 0 else None
+        card['is_registration_open'] = bool(
+            card.get('is_registration_enabled')
+            and not (deadline and now > deadline)
+            and not (limit > 0 and count >= limit)
+        )
+    return data
+
+
+def apply_user_overlay(data, user):
+    """Patch per-user fields onto ``data`` (a private copy of the base)."""
+    from .models import ArticleLike, EventSubmission, MagazineLike
+
+    article_ids = {
+        item['id'] for section in ARTICLE_SECTIONS for item in data.get(section, [])
+    }
+    magazine_ids = {item['id'] for item in data.get('magazines', [])}
+    registration_ids = {
+        card['id'] for card in data.get('event_cards', [])
+        if card.get('has_registration')
+    }
+
+    liked_articles = set()
+    if article_ids:
+        liked_articles = set(ArticleLike.objects.filter(
+            user=user, article_id__in=article_ids,
+        ).values_list('article_id', flat=True))
+    liked_magazines = set()
+    if magazine_ids:
+        liked_magazines = set(MagazineLike.objects.filter(
+            user=user, edition_id__in=magazine_ids,
+        ).values_list('edition_id', flat=True))
+    submissions = {}
+    if registration_ids:
+        rows = EventSubmission.objects.filter(
+            user=user, is_proxy=False, event_registration_id__in=registration_ids,
+        ).order_by('-id').values_list('event_registration_id', 'id', 'status')
+        # Iterate newest-first and keep the oldest, matching Subquery()[:1].
+        for reg_id, sub_id, sub_status in rows:
+            submissions[reg_id] = (sub_id, sub_status)
+
+    for section in ARTICLE_SECTIONS:
+        for item in data.get(section, []):
+            item['is_liked'] = item['id'] in liked_articles
+    for item in data.get('magazines', []):
+        item['is_liked'] = item['id'] in liked_magazines
+    for card in data.get('event_cards', []):
+        if not card.get('has_registration'):
+            continue
+        sub = submissions.get(card['id'])
+        card['has_registered'] = sub is not None
+        card['user_submission_id'] = sub[0] if sub else None
+        card['user_submission_status'] = sub[1] if sub else None
+    return data
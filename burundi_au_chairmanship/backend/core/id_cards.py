@@ -0,0 +1,561 @@
+"""
+Participant ID cards, rendered once and kept in private storage.
+
+Card PDFs used to be drawn with ReportLab on every download — photo read
+from storage, QR code generated — although a card only changes when its
+application does, and staff print hundreds of them before an event.  Each
+card is now an ``IdCard`` row holding the rendered PDF, keyed by a
+fingerprint of ``TEMPLATE_VERSION``, the application's ``updated_at`` and
+the other inputs that are drawn (QR payload, event logos): a download is a
+storage read, and a stale card is re-rendered on first use.
+
+Templates (``TEMPLATES``):
+
+  * ``badge`` — the 3.5 × 5 in participant badge, centred on an A4 page
+    (app credential download, API admin download);
+  * ``cr80`` — the wallet-size card on a page of its own (admin dashboard).
+
+Print sheets are ``IdCardPrintJob``s: ``start_job`` queues the selected
+applications in chunks of ``ID_CARD_CHUNK`` as ``render_id_card_chunk``
+Celery tasks (on ``ID_CARD_QUEUE`` when set), so rendering is spread over
+the worker's process pool; the chunk that completes the job places the
+stored cards ``per_sheet(template)`` to an A4 page with pypdf.
+
+Bump ``TEMPLATE_VERSION`` whenever a layout changes.
+"""
+import hashlib
+import io
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.http import FileResponse
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_VERSION = 1
+SHEET_MARGIN = 0.25 * inch
+SHEET_GAP = 0.1 * inch
+
+GREEN = '#409843'
+DARK_GREEN = '#2D6E31'
+GOLD = '#D4A843'
+DARK = '#1a1a1a'
+
+
+# ── Inputs ───────────────────────────────────────────────────────
+
+
+def _read(field):
+    """Bytes of an image field through its storage (private storage has no ``.path``)."""
+    if not field:
+        return None
+    try:
+        with field.open('rb') as f:
+            return f.read()
+    except Exception:
+        logger.warning('Cannot read %s for an ID card', field.name)
+        return None
+
+
+def _url_base():
+    """SITE_URL when AppSettings asks for URL-format QR codes, else None."""
+    from core.models import AppSettings
+    try:
+        if AppSettings.load().qr_code_mode == 'url':
+            return settings.SITE_URL.rstrip('/')
+    except Exception:
+        pass
+    return None
+
+
+def qr_payload(app, url_base=None):
+    """What the card's QR code encodes: ``YD:<code>:<hash>``, or a verify URL in URL mode."""
+    data = f'YD:{app.participant_code}:{app.qr_hash}'
+    return f'{url_base}/verify?code={data}' if url_base else data
+
+
+class Inputs:
+    """What a batch of cards shares: the QR mode and each event's logos, read once."""
+
+    def __init__(self):
+        self.url_base = _url_base()
+        self._logos = {}
+
+    def logos(self, event):
+        if event.pk not in self._logos:
+            self._logos[event.pk] = (_read(event.logo_light), _read(event.secondary_logo))
+        return self._logos[event.pk]
+
+
+def fingerprint(app, template, qr_data):
+    event = app.event
+    parts = [
+        TEMPLATE_VERSION, template, app.updated_at.isoformat(), qr_data,
+        event.logo_light.name, event.secondary_logo.name,
+    ]
+    return hashlib.sha256('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+# ── Layouts: draw one card with its bottom-left corner at (x, y) ─
+
+
+def _image(data):
+    from reportlab.lib.utils import ImageReader
+    return ImageReader(io.BytesIO(data))
+
+
+def _qr_image(qr_data):
+    import qrcode
+    qr_obj = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=1)
+    qr_obj.add_data(qr_data)
+    qr_obj.make(fit=True)
+    buf = io.BytesIO()
+    qr_obj.make_image(fill_color='black', back_color='white').save(buf, format='PNG')
+    return _image(buf.getvalue())
+
+
+def _draw_badge(c, app, card_x, card_y, qr_data, photo, logos):
+    """The professional Continental Dialogue badge with QR code and logos."""
+    from reportlab.lib import colors as rl_colors
+
+    card_w, card_h = TEMPLATES['badge']['size']
+
+    # ── Card background with rounded corners ──
+    c.setFillColor(rl_colors.white)
+    c.setStrokeColor(rl_colors.HexColor('#e0e0e0'))
+    c.setLineWidth(0.5)
+    c.roundRect(card_x, card_y, card_w, card_h, 12, fill=1, stroke=1)
+
+    # ── Green header band ──
+    header_h = 1.1 * inch
+    header_y = card_y + card_h - header_h
+    c.saveState()
+    p = c.beginPath()
+    p.roundRect(card_x, header_y, card_w, header_h, 12)
+    c.clipPath(p, stroke=0)
+    c.setFillColor(rl_colors.HexColor(GREEN))
+    c.rect(card_x, header_y, card_w, header_h, fill=1, stroke=0)
+    # Darker bottom strip of header (below the rounded top)
+    c.setFillColor(rl_colors.HexColor(DARK_GREEN))
+    c.rect(card_x, header_y, card_w, 0.25 * inch, fill=1, stroke=0)
+    c.restoreState()
+
+    # ── Gold accent line below header ──
+    c.setStrokeColor(rl_colors.HexColor(GOLD))
+    c.setLineWidth(2)
+    c.line(card_x + 0.3 * inch, header_y, card_x + card_w - 0.3 * inch, header_y)
+
+    # ── Header text ──
+    cx = card_x + card_w / 2
+    c.setFillColor(rl_colors.white)
+    c.setFont('Helvetica-Bold', 10)
+    c.drawCentredString(cx, header_y + 0.72 * inch, 'YOUTH DIALOGUE')
+    c.setFont('Helvetica-Bold', 8)
+    c.drawCentredString(cx, header_y + 0.55 * inch, 'PARTICIPANT')
+    c.setFont('Helvetica', 7)
+    c.drawCentredString(cx, header_y + 0.35 * inch, 'Burundi AU Chairmanship 2025-2026')
+    c.setFont('Helvetica', 6)
+    c.setFillColor(rl_colors.HexColor('#D4E8D5'))
+    c.drawCentredString(cx, header_y + 0.12 * inch, 'Be 4 Africa')
+
+    # ── Event logos in header (programme logo left, secondary logo right) ──
+    logo_size = 0.45 * inch
+    left, right = logos
+    for data, logo_x in ((left, card_x + 0.15 * inch), (right, card_x + card_w - 0.15 * inch - logo_size)):
+        if data:
+            try:
+                c.drawImage(_image(data), logo_x, header_y + 0.5 * inch, logo_size, logo_size,
+                            preserveAspectRatio=True, mask='auto')
+            except Exception:
+                pass
+
+    # ── Participant photo ──
+    photo_size = 1.0 * inch
+    photo_x = cx - photo_size / 2
+    photo_y = header_y - photo_size - 0.15 * inch
+
+    # Photo border (gold ring)
+    c.setStrokeColor(rl_colors.HexColor(GOLD))
+    c.setLineWidth(2)
+    c.circle(cx, photo_y + photo_size / 2, photo_size / 2 + 3, fill=0, stroke=1)
+
+    try:
+        img = _image(photo) if photo else None
+    except Exception:
+        img = None
+    if img is not None:
+        # Clip to circle
+        c.saveState()
+        p = c.beginPath()
+        p.circle(cx, photo_y + photo_size / 2, photo_size / 2)
+        c.clipPath(p, stroke=0)
+        c.drawImage(img, photo_x, photo_y, photo_size, photo_size,
+                    preserveAspectRatio=True, mask='auto')
+        c.restoreState()
+    else:
+        c.setFillColor(rl_colors.HexColor('#e8e8e8'))
+        c.circle(cx, photo_y + photo_size / 2, photo_size / 2, fill=1, stroke=0)
+
+    # ── Name ──
+    name_y = photo_y - 0.25 * inch
+    c.setFillColor(rl_colors.HexColor(DARK))
+    c.setFont('Helvetica-Bold', 14)
+    full_name = f'{app.first_name} {app.last_name}'
+    # Smaller font if too long
+    if len(full_name) > 28:
+        c.setFont('Helvetica-Bold', 11)
+    c.drawCentredString(cx, name_y, full_name)
+
+    # ── Organization ──
+    info_y = name_y - 0.2 * inch
+    if app.organization:
+        c.setFillColor(rl_colors.HexColor('#666666'))
+        c.setFont('Helvetica', 8)
+        c.drawCentredString(cx, info_y, app.organization[:40])
+        info_y -= 0.18 * inch
+
+    # ── Nationality ──
+    if app.nationality:
+        c.setFillColor(rl_colors.HexColor('#888888'))
+        c.setFont('Helvetica', 8)
+        c.drawCentredString(cx, info_y, app.get_nationality_display())
+        info_y -= 0.18 * inch
+
+    # ── Thin separator ──
+    info_y -= 0.05 * inch
+    c.setStrokeColor(rl_colors.HexColor('#e0e0e0'))
+    c.setLineWidth(0.5)
+    c.line(card_x + 0.5 * inch, info_y, card_x + card_w - 0.5 * inch, info_y)
+
+    # ── Participant code ──
+    info_y -= 0.25 * inch
+    c.setFillColor(rl_colors.HexColor(GREEN))
+    c.setFont('Courier-Bold', 16)
+    c.drawCentredString(cx, info_y, app.participant_code)
+
+    # ── QR Code ──
+    qr_size = 0.9 * inch
+    qr_y = info_y - qr_size - 0.2 * inch
+    c.drawImage(_qr_image(qr_data), cx - qr_size / 2, qr_y, qr_size, qr_size)
+
+    # "Scan to verify" label
+    c.setFillColor(rl_colors.HexColor('#999999'))
+    c.setFont('Helvetica', 5)
+    c.drawCentredString(cx, qr_y - 0.12 * inch, 'SCAN TO VERIFY')
+
+    # ── Footer ──
+    footer_y = card_y + 0.15 * inch
+    c.setFillColor(rl_colors.HexColor('#cccccc'))
+    c.setFont('Helvetica', 5)
+    c.drawCentredString(cx, footer_y, 'Burundi Be 4 Africa 2026')
+    if app.credential_issued_at:
+        c.drawCentredString(cx, footer_y - 0.12 * inch,
+                            f'Issued {app.credential_issued_at.strftime("%d/%m/%Y")}')
+
+
+def _draw_cr80(c, app, x, y, qr_data, photo, logos):
+    """The wallet-size card: photo, name and code, with the QR data printed in the footer."""
+    from reportlab.lib import colors as rl_colors
+
+    card_w, card_h = TEMPLATES['cr80']['size']
+
+    # Green header
+    header_h = 0.65 * inch
+    c.setFillColor(rl_colors.HexColor(GREEN))
+    c.rect(x, y + card_h - header_h, card_w, header_h, fill=1, stroke=0)
+    c.setFillColor(rl_colors.white)
+    c.setFont('Helvetica-Bold', 8)
+    c.drawCentredString(x + card_w / 2, y + card_h - 0.25 * inch, 'YOUTH DIALOGUE PARTICIPANT')
+    c.setFont('Helvetica', 6)
+    c.drawCentredString(x + card_w / 2, y + card_h - 0.40 * inch, 'Be 4 Africa 2026')
+
+    # Photo
+    photo_x = x + 0.15 * inch
+    photo_y = y + card_h - header_h - 0.85 * inch
+    photo_size = 0.7 * inch
+    try:
+        c.drawImage(_image(photo), photo_x, photo_y, photo_size, photo_size,
+                    preserveAspectRatio=True, mask='auto')
+    except Exception:
+        c.setFillColor(rl_colors.HexColor('#e0e0e0'))
+        c.rect(photo_x, photo_y, photo_size, photo_size, fill=1, stroke=0)
+
+    # Name & details
+    text_x = photo_x + photo_size + 0.15 * inch
+    text_y = y + card_h - header_h - 0.2 * inch
+    c.setFillColor(rl_colors.black)
+    c.setFont('Helvetica-Bold', 9)
+    c.drawString(text_x, text_y, f'{app.first_name} {app.last_name}')
+    c.setFont('Helvetica', 7)
+    text_y -= 0.15 * inch
+    if app.organization:
+        c.drawString(text_x, text_y, app.organization)
+        text_y -= 0.13 * inch
+    if app.nationality:
+        c.drawString(text_x, text_y, f'Nationality: {app.get_nationality_display()}')
+        text_y -= 0.13 * inch
+
+    # Participant code
+    c.setFont('Courier-Bold', 10)
+    c.setFillColor(rl_colors.HexColor(GREEN))
+    c.drawString(text_x, text_y - 0.05 * inch, app.participant_code)
+
+    # QR data footer
+    c.setFillColor(rl_colors.HexColor('#888888'))
+    c.setFont('Helvetica', 5)
+    c.drawCentredString(x + card_w / 2, y + 0.1 * inch, f'{app.participant_code}:{app.qr_hash}')
+    c.setStrokeColor(rl_colors.HexColor(GREEN))
+    c.setLineWidth(1)
+    c.line(x, y + 0.25 * inch, x + card_w, y + 0.25 * inch)
+
+
+# size = card (w, h); page = page of the single-card PDF, card centred on it.
+TEMPLATES = {
+    'badge': {'size': (3.5 * inch, 5.0 * inch), 'page': A4, 'draw': _draw_badge},
+    'cr80': {'size': (3.375 * inch, 2.125 * inch), 'page': (3.375 * inch, 2.125 * inch), 'draw': _draw_cr80},
+}
+
+
+def _origin(template):
+    """Bottom-left corner of the card on its single-card page."""
+    spec = TEMPLATES[template]
+    (card_w, card_h), (page_w, page_h) = spec['size'], spec['page']
+    return (page_w - card_w) / 2, (page_h - card_h) / 2
+
+
+def render(app, template, qr_data, logos=(None, None)):
+    """PDF bytes of one card."""
+    from reportlab.pdfgen import canvas as rl_canvas
+
+    spec = TEMPLATES[template]
+    buf = io.BytesIO()
+    c = rl_canvas.Canvas(buf, pagesize=spec['page'])
+    spec['draw'](c, app, *_origin(template), qr_data, _read(app.id_photo), logos)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+# ── Stored cards ─────────────────────────────────────────────────
+
+
+def printable(queryset):
+    """Applications that have a card to print."""
+    return (
+        queryset.filter(status='credential_issued', is_revoked=False)
+        .exclude(participant_code__isnull=True).exclude(participant_code='')
+    )
+
+
+def ensure(app, template, inputs=None):
+    """The application's stored card, rendered first if missing or stale.
+
+    Re-renders are serialised on the application row, so a concurrent
+    caller waits and then finds the fresh card instead of rendering (and
+    later deleting) its own copy.  The replaced file is deleted only once
+    the new name is committed.  Returns ``(card, rendered)``.
+    """
+    from core.models import IdCard, YouthDialogueApplication
+
+    inputs = inputs or Inputs()
+    qr_data = qr_payload(app, inputs.url_base)
+    key = fingerprint(app, template, qr_data)
+    card = IdCard.objects.filter(application=app, template=template).first()
+    if card and card.fingerprint == key and card.file:
+        return card, False
+
+    field = IdCard._meta.get_field('file')
+    name = None
+    try:
+        with transaction.atomic():
+            YouthDialogueApplication.objects.select_for_update().values_list('pk').get(pk=app.pk)
+            card = IdCard.objects.filter(application=app, template=template).first()
+            if card and card.fingerprint == key and card.file:
+                return card, False  # rendered while we waited for the lock
+
+            pdf = render(app, template, qr_data, inputs.logos(app.event))
+            name = field.storage.save(
+                field.generate_filename(None, f'{app.participant_code}-{template}.pdf'), ContentFile(pdf),
+            )
+            old = card.file.name if card else ''
+            card, _ = IdCard.objects.update_or_create(
+                application=app, template=template, defaults={'fingerprint': key, 'file': name},
+            )
+            if old and old != name:
+                transaction.on_commit(lambda: field.storage.delete(old))
+    except Exception:
+        if name:
+            field.storage.delete(name)
+        raise
+    return card, True
+
+
+def download(app, template):
+    """Attachment response for the application's card, read from storage."""
+    card, _ = ensure(app, template)
+    return FileResponse(
+        card.file.open('rb'), as_attachment=True, content_type='application/pdf',
+        filename=f'YD-IDCard-{app.participant_code}.pdf',
+    )
+
+
+# ── Print sheets ─────────────────────────────────────────────────
+
+
+def layout(template):
+    """``(columns, rows)`` of cards on an A4 print sheet."""
+    card_w, card_h = TEMPLATES[template]['size']
+    page_w, page_h = A4
+    columns = int((page_w - 2 * SHEET_MARGIN + SHEET_GAP) // (card_w + SHEET_GAP))
+    rows = int((page_h - 2 * SHEET_MARGIN + SHEET_GAP) // (card_h + SHEET_GAP))
+    return max(1, columns), max(1, rows)
+
+
+def per_sheet(template):
+    columns, rows = layout(template)
+    return columns * rows
+
+
+def _slots(template):
+    """Bottom-left corners of the card slots, left to right from the top row."""
+    card_w, card_h = TEMPLATES[template]['size']
+    page_w, page_h = A4
+    columns, rows = layout(template)
+    left = (page_w - columns * card_w - (columns - 1) * SHEET_GAP) / 2
+    top = (page_h + rows * card_h + (rows - 1) * SHEET_GAP) / 2
+    return [
+        (left + col * (card_w + SHEET_GAP), top - (row + 1) * card_h - row * SHEET_GAP)
+        for row in range(rows) for col in range(columns)
+    ]
+
+
+def start_job(job):
+    """Queue the job's applications for rendering, in chunks."""
+    from core.models import IdCardPrintJob
+    from core.tasks import render_id_card_chunk
+
+    app_ids = list(job.application_ids)
+    job.total = len(app_ids)
+    job.status = 'running'
+    job.save(update_fields=['total', 'status'])
+    if not app_ids:
+        assemble(job)
+        return IdCardPrintJob.objects.get(pk=job.pk)
+
+    size = max(1, settings.ID_CARD_CHUNK)
+    for i in range(0, len(app_ids), size):
+        args = [job.pk, app_ids[i:i + size]]
+        if settings.ID_CARD_QUEUE:
+            render_id_card_chunk.apply_async(args=args, queue=settings.ID_CARD_QUEUE)
+        else:
+            render_id_card_chunk.delay(*args)
+    return IdCardPrintJob.objects.get(pk=job.pk)
+
+
+def render_chunk(job_id, app_ids):
+    """Make sure one chunk of the job's cards is stored and current."""
+    from core.models import IdCardPrintJob, YouthDialogueApplication
+
+    job = IdCardPrintJob.objects.filter(pk=job_id, status='running').first()
+    if job is None:
+        return 0
+    # Credentials revoked since the job started are left out.
+    apps = list(printable(YouthDialogueApplication.objects.filter(pk__in=app_ids)).select_related('event'))
+    inputs = Inputs()
+    rendered = sum(ensure(app, job.template, inputs)[1] for app in apps)
+
+    IdCardPrintJob.objects.filter(pk=job_id).update(
+        processed=F('processed') + len(app_ids), rendered=F('rendered') + rendered,
+    )
+    job.refresh_from_db()
+    if job.processed >= job.total:
+        assemble(job)
+    return len(apps)
+
+
+def assemble(job):
+    """Place the job's stored cards on A4 sheets; runs once per job."""
+    from pypdf import PdfReader, PdfWriter, Transformation
+    from core.models import IdCard, IdCardPrintJob, YouthDialogueApplication
+
+    if not IdCardPrintJob.objects.filter(pk=job.pk, status='running').update(status='assembling'):
+        return  # another chunk got here first
+    apps = printable(YouthDialogueApplication.objects.filter(pk__in=job.application_ids))
+    cards = {
+        card.application_id: card
+        for card in IdCard.objects.filter(application__in=apps, template=job.template)
+    }
+    origin_x, origin_y = _origin(job.template)
+    slots = _slots(job.template)
+    writer = PdfWriter()
+    placed = 0
+    for app_id in job.application_ids:
+        card = cards.get(app_id)
+        if card is None:
+            continue
+        if placed % len(slots) == 0:
+            sheet = writer.add_blank_page(*A4)
+        with card.file.open('rb') as f:
+            page = PdfReader(io.BytesIO(f.read())).pages[0]
+        x, y = slots[placed % len(slots)]
+        sheet.merge_transformed_page(page, Transformation().translate(x - origin_x, y - origin_y))
+        placed += 1
+
+    job.refresh_from_db()
+    if placed:
+        with tempfile.TemporaryFile() as tmp:
+            writer.write(tmp)
+            tmp.seek(0)
+            stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            job.file.save(f'id-cards-{job.event_id}-{job.template}-{stamp}.pdf', File(tmp), save=False)
+    job.cards = placed
+    job.pages = len(writer.pages)
+    job.status = 'completed'
+    job.completed_at = timezone.now()
+    job.save(update_fields=['file', 'cards', 'pages', 'status', 'completed_at'])
+
+
+def progress(job):
+    """JSON-ready progress for the admin UI."""
+    done = job.status == 'completed'
+    payload = {
+        'job_id': job.pk,
+        'state': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'rendered_count': job.rendered,
+        'card_count': job.cards,
+        'page_count': job.pages,
+        'percent': round(100 * job.processed / job.total) if job.total else (100 if done else 0),
+    }
+    if done:
+        payload['message'] = (
+            f'{job.cards} card(s) on {job.pages} A4 page(s), {job.rendered} newly rendered.'
+            if job.cards else 'No issued credentials to print.'
+        )
+    elif job.status == 'failed':
+        payload['message'] = job.error_message or 'ID card printing failed.'
+    return payload
+
+
+def purge_jobs(days=None):
+    """Delete print jobs (and their sheets) older than ``ID_CARD_SHEET_RETENTION_DAYS``."""
+    from core.models import IdCardPrintJob
+
+    days = days or settings.ID_CARD_SHEET_RETENTION_DAYS
+    removed = 0
+    for job in IdCardPrintJob.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)):
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        removed += 1
+    return removed
@@ -21,6 +21,14 @@ IMAGE_SIZES = {
     'medium': 600,
     'large': 1200,
 }
+VARIANT_QUALITY = {
+    'thumb': 70,
+    'medium': 80,
+    'large': 85,
+}
+# Bump when IMAGE_SIZES / VARIANT_QUALITY change so existing variants are
+# regenerated (see core/image_variants.py).
+VARIANT_SPEC = 'v2'
 
 
 def optimize_image(image_field, max_width=1200, quality=85):
@@ -63,6 +71,64 @@ def optimize_image(image_field, max_width=1200, quality=85):
         logger.exception('Image optimization failed for %s', image_field.name)
 
 
+def variant_base(name):
+    """Storage name without extension or an existing size suffix."""
+    base, _ext = os.path.splitext(name)
+    # Strip an existing size suffix to avoid stacking (e.g. photo_thumb_thumb)
+    for suffix in ('_thumb', '_medium', '_large'):
+        if base.endswith(suffix):
+            return base[: -len(suffix)]
+    return base
+
+
+def variant_name(name, size_name):
+    return f"{variant_base(name)}_{size_name}.webp"
+
+
+def render_variants(data):
+    """
+    Encode every size in IMAGE_SIZES from the raw bytes of an image.
+
+    Sizes are produced largest first, each one resized from the previous
+    (large -> medium -> thumb) instead of from full resolution, and JPEG
+    sources are decoded with ``draft()`` at the smallest DCT scale that still
+    covers the largest variant.  A WebP already no wider than ``large`` (what
+    the pre_save optimiser produces) is reused as-is for ``large``.
+
+    Args:
+        data: Bytes of the source image.
+
+    Returns:
+        dict: {size_name: (webp_bytes, width, height)}, largest first.
+    """
+    img = Image.open(BytesIO(data))
+    source_format = img.format
+    sizes = sorted(IMAGE_SIZES.items(), key=lambda item: item[1], reverse=True)
+    largest = sizes[0][1]
+
+    if source_format == 'JPEG' and img.width > largest:
+        img.draft('RGB', (largest, -(-img.height * largest // img.width)))
+    reuse_source = source_format == 'WEBP' and img.mode == 'RGB' and img.width <= largest
+
+    # Convert RGBA/P to RGB for WebP compatibility
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    variants = {}
+    current = img
+    for size_name, max_width in sizes:
+        if current.width > max_width:
+            new_height = max(1, round(current.height * max_width / current.width))
+            current = current.resize((max_width, new_height), Image.LANCZOS)
+        if reuse_source and current is img and size_name == sizes[0][0]:
+            variants[size_name] = (data, current.width, current.height)
+            continue
+        buffer = BytesIO()
+        current.save(buffer, format='WEBP', quality=VARIANT_QUALITY[size_name], optimize=True)
+        variants[size_name] = (buffer.getvalue(), current.width, current.height)
+    return variants
+
+
 def generate_image_variants(image_field, upload_to=''):
     """
     Generate thumbnail, medium, and large variants from an image.
@@ -80,33 +146,15 @@ def generate_image_variants(image_field, upload_to=''):
 
     variants = {}
     try:
-        img = Image.open(image_field)
-
-        # Convert RGBA to RGB
-        if img.mode in ('RGBA', 'P'):
-            img = img.convert('RGB')
-
+        image_field.open('rb')
+        data = image_field.read()
         original_name = os.path.splitext(os.path.basename(image_field.name))[0]
 
-        for size_name, max_width in IMAGE_SIZES.items():
-            if img.width <= max_width:
-                # Image already smaller than target — still convert to WebP
-                resized = img.copy()
-            else:
-                ratio = max_width / img.width
-                new_height = int(img.height * ratio)
-                resized = img.resize((max_width, new_height), Image.LANCZOS)
-
-            buffer = BytesIO()
-            quality = 70 if size_name == 'thumb' else 80 if size_name == 'medium' else 85
-            resized.save(buffer, format='WEBP', quality=quality, optimize=True)
-            buffer.seek(0)
-
+        for size_name, (content, _w, _h) in render_variants(data).items():
             filename = f"{original_name}_{size_name}.webp"
             if upload_to:
                 filename = f"{upload_to}/{filename}"
-
-            variants[size_name] = ContentFile(buffer.read(), name=filename)
+            variants[size_name] = ContentFile(content, name=filename)
 
     except Exception:
         logger.exception('Image variant generation failed for %s', image_field.name)
@@ -140,30 +188,10 @@ def generate_thumbnails_on_disk(image_path):
 
     generated = {}
     try:
-        img = Image.open(source)
-
-        # Convert RGBA/P to RGB for WebP compatibility
-        if img.mode in ('RGBA', 'P'):
-            img = img.convert('RGB')
-
-        # Strip the existing size suffix if re-processing (e.g. photo_thumb -> photo)
-        stem = source.stem
-        for suffix in ('_thumb', '_medium', '_large'):
-            if stem.endswith(suffix):
-                stem = stem[: -len(suffix)]
-                break
-
-        for size_name, max_width in IMAGE_SIZES.items():
-            if img.width <= max_width:
-                resized = img.copy()
-            else:
-                ratio = max_width / img.width
-                new_height = int(img.height * ratio)
-                resized = img.resize((max_width, new_height), Image.LANCZOS)
-
-            quality = 70 if size_name == 'thumb' else 80 if size_name == 'medium' else 85
+        stem = Path(variant_base(str(source))).name
+        for size_name, (content, _w, _h) in render_variants(source.read_bytes()).items():
             out_path = source.parent / f"{stem}_{size_name}.webp"
-            resized.save(str(out_path), format='WEBP', quality=quality, optimize=True)
+            out_path.write_bytes(content)
             generated[size_name] = str(out_path)
             logger.info("Generated %s variant: %s", size_name, out_path)
 
@@ -195,51 +223,12 @@ def generate_thumbnails_to_storage(image_field):
     generated = {}
     try:
         image_field.open('rb')
-        img = Image.open(image_field)
-        img.load()  # force read before closing the file handle
+        data = image_field.read()
         image_field.close()
 
-        if img.mode in ('RGBA', 'P'):
-            img = img.convert('RGB')
-
-        base, _ext = os.path.splitext(image_field.name)
-        for suffix in ('_thumb', '_medium', '_large'):
-            if base.endswith(suffix):
-                base = base[: -len(suffix)]
-                break
-
         storage = image_field.storage
-
-        for size_name, max_width in IMAGE_SIZES.items():
-            if img.width <= max_width:
-                resized = img.copy()
-            else:
-                ratio = max_width / img.width
-                new_height = int(img.height * ratio)
-                resized = img.resize((max_width, new_height), Image.LANCZOS)
-
-            quality = 70 if size_name == 'thumb' else 80 if size_name == 'medium' else 85
-            buf = BytesIO()
-            resized.save(buf, format='WEBP', quality=quality, optimize=True)
-            buf.seek(0)
-
-            variant_name = f"{base}_{size_name}.webp"
-            content = ContentFile(buf.read())
-
-            # Overwrite if the variant already exists.
-            if storage.exists(variant_name):
-                storage.delete(variant_name)
-
-            # Explicitly set public-read ACL for S3-based storage backends
-            # to ensure variants are accessible like their originals.
-            original_acl = getattr(storage, 'default_acl', None)
-            try:
-                storage.default_acl = 'public-read'
-                saved_name = storage.save(variant_name, content)
-            finally:
-                if original_acl is not None:
-                    storage.default_acl = original_acl
-
+        for size_name, (content, _w, _h) in render_variants(data).items():
+            saved_name = write_variant(storage, variant_name(image_field.name, size_name), content)
             generated[size_name] = saved_name
             logger.info("Generated %s variant (remote): %s", size_name, saved_name)
 
@@ -252,13 +241,41 @@ def generate_thumbnails_to_storage(image_field):
     return generated
 
 
-def get_variant_url(image_field, size_name):
+def write_variant(storage, name, content):
+    """
+    Store variant bytes under exactly ``name``, replacing any previous file.
+
+    Storages with an ``overwrite()`` method (the Spaces backends) write in a
+    single request; others delete then save so the name is not suffixed.
+    The storage's own ACL applies, so variants match their originals.
+    """
+    overwrite = getattr(storage, 'overwrite', None)
+    if overwrite is not None:
+        return overwrite(name, ContentFile(content))
+    storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def absolute_media_url(storage, name):
+    """``storage.url(name)``, with SITE_URL prepended for local storage."""
+    url = storage.url(name)
+    # If URL is relative (local FileSystemStorage), prepend SITE_URL
+    if url and not url.startswith(('http://', 'https://')):
+        site_url = getattr(settings, 'SITE_URL', '').rstrip('/')
+        if site_url:
+            url = f"{site_url}{url}"
+    return url
+
+
+def get_variant_url(image_field, size_name, manifest=None, fmt='webp'):
     """
     Return the URL of a size variant for a given ImageField value.
 
-    Constructs the URL by replacing the file extension with ``_<size>webp``.
-    Does *not* check whether the file exists on disk (the frontend should
-    fall back to the original URL if a variant 404s).
+    Whether the variant exists comes from the image's variant manifest
+    (core/image_variants.py), never from storage. Existing variants get their
+    content hash appended (``?v=``) for cache-busting; while a variant is
+    missing, pending or failed the original image URL is returned instead,
+    so clients never fetch a 404.
 
     Always returns an absolute URL. For S3/Spaces storage the URL is already
     absolute; for local FileSystemStorage, SITE_URL is prepended.
@@ -266,30 +283,44 @@ def get_variant_url(image_field, size_name):
     Args:
         image_field: A Django FieldFile / ImageFieldFile instance (e.g. ``instance.image``).
         size_name: One of ``'thumb'``, ``'medium'``, or ``'large'``.
+        manifest: The manifest's ``variants`` dict, when already loaded in
+            bulk; otherwise it is looked up with one query.
+        fmt: Variant format.
 
     Returns:
         str or None: The variant URL, or ``None`` if no image is set.
     """
     if not image_field or not image_field.name:
         return None
+    if manifest is None:
+        from .image_variants import load_manifests
+        manifest = load_manifests([image_field.name]).get(image_field.name, {})
 
-    base, _ext = os.path.splitext(image_field.name)
-    # Strip an existing size suffix to avoid stacking (e.g. photo_thumb_thumb)
-    for suffix in ('_thumb', '_medium', '_large'):
-        if base.endswith(suffix):
-            base = base[: -len(suffix)]
-            break
-
-    variant_name = f"{base}_{size_name}.webp"
-
-    # Build the full URL the same way Django does
+    entry = manifest.get(size_name, {}).get(fmt)
     try:
-        url = image_field.storage.url(variant_name)
-        # If URL is relative (local FileSystemStorage), prepend SITE_URL
-        if url and not url.startswith(('http://', 'https://')):
-            site_url = getattr(settings, 'SITE_URL', '').rstrip('/')
-            if site_url:
-                url = f"{site_url}{url}"
-        return url
+        if entry:
+            return f"{absolute_media_url(image_field.storage, entry['name'])}?v={entry['hash']}"
+        return absolute_media_url(image_field.storage, image_field.name)
     except Exception:
         return None
+
+
+def get_variant_set(image_field, manifest):
+    """
+    Every existing variant of an image, smallest first, for ``srcset``-style
+    responses: ``[{'size', 'format', 'url', 'width', 'height', 'bytes'}, ...]``.
+    """
+    if not image_field or not image_field.name:
+        return []
+    entries = []
+    for size_name, formats in manifest.items():
+        for fmt, entry in formats.items():
+            entries.append({
+                'size': size_name,
+                'format': fmt,
+                'url': f"{absolute_media_url(image_field.storage, entry['name'])}?v={entry['hash']}",
+                'width': entry['width'],
+                'height': entry['height'],
+                'bytes': entry['bytes'],
+            })
+    return sorted(entries, key=lambda e: (e['width'], e['format']))
@@ -0,0 +1,122 @@
+"""
+Off-request image variant pipeline and variant manifests.
+
+Saving a model with an image used to generate the ``_thumb``/``_medium``/
+``_large`` WebP variants inside the admin request: with Spaces storage that
+meant downloading the original, three full-resolution LANCZOS resizes and an
+``exists`` + ``delete`` + ``save`` round-trip per variant.
+
+Now the post_save signal only calls ``enqueue``, which schedules the
+``build_image_variants`` Celery task for after the transaction commits (on
+``IMAGE_VARIANT_QUEUE`` when set, so CPU-bound resizing can get its own
+prefork worker pool).  The worker renders the sizes in cascade with JPEG draft
+decoding (``image_utils.render_variants``) and writes each variant with a
+single upload.
+
+Every built image gets an ``ImageVariantManifest`` row listing the variants
+that exist — size, format, byte size, dimensions and a content hash.  API
+serializers read the manifests in bulk (``load_manifests``) and only
+advertise variant URLs that exist, falling back to the original otherwise,
+so clients no longer pay a 404 per pending or failed variant.
+
+The manifest is also the idempotency record: once a name's variants were
+built with the current ``VARIANT_SPEC``, re-saves of the row (admin edits
+that keep the image) and duplicate tasks are no-ops.  ``manage.py
+build_image_variants`` queues images that have no current manifest.
+"""
+import hashlib
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from .image_utils import VARIANT_SPEC, render_variants, variant_name, write_variant
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMAT = 'webp'
+
+
+def _manifests():
+    from .models import ImageVariantManifest
+    return ImageVariantManifest.objects
+
+
+def is_done(name):
+    return _manifests().filter(source_name=name, spec=VARIANT_SPEC, status='ready').exists()
+
+
+def load_manifests(names):
+    """``{source_name: variants}`` for the given storage names, in one query."""
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    return dict(_manifests().filter(source_name__in=names).values_list('source_name', 'variants'))
+
+
+def enqueue(instance, field_name, image):
+    """Queue variant generation for ``image`` once the current transaction commits.
+
+    Returns False when the variants for this file already exist.
+    """
+    from .tasks import build_image_variants
+
+    name = image.name
+    if is_done(name):
+        return False
+    _manifests().get_or_create(source_name=name, defaults={'spec': VARIANT_SPEC})
+    args = [instance._meta.label, field_name, name]
+
+    def send():
+        if settings.IMAGE_VARIANT_QUEUE:
+            build_image_variants.apply_async(args=args, queue=settings.IMAGE_VARIANT_QUEUE)
+        else:
+            build_image_variants.delay(*args)
+
+    transaction.on_commit(send)
+    return True
+
+
+def build(model_label, field_name, name):
+    """Render and store every variant of one stored image, then record the manifest.
+
+    Runs in the Celery worker. Returns the manifest's ``variants``; empty if
+    they were already built or the source file is gone.
+    """
+    if is_done(name):
+        return {}
+    storage = apps.get_model(model_label)._meta.get_field(field_name).storage
+    try:
+        with storage.open(name, 'rb') as source:
+            data = source.read()
+    except FileNotFoundError:
+        logger.warning('Image variants skipped, source not found: %s', name)
+        _manifests().filter(source_name=name).update(status='failed', error='Source file not found')
+        return {}
+
+    variants = {}
+    try:
+        for size_name, (content, width, height) in render_variants(data).items():
+            saved = write_variant(storage, variant_name(name, size_name), content)
+            variants[size_name] = {VARIANT_FORMAT: {
+                'name': saved,
+                'bytes': len(content),
+                'width': width,
+                'height': height,
+                'hash': hashlib.sha256(content).hexdigest()[:12],
+            }}
+            logger.info('Generated %s variant (%dx%d): %s', size_name, width, height, saved)
+    except Exception as exc:
+        # Variants written before the failure exist and stay advertised.
+        manifest, _ = _manifests().get_or_create(source_name=name, defaults={'spec': VARIANT_SPEC})
+        manifest.variants = {**manifest.variants, **variants}
+        manifest.status = 'failed'
+        manifest.error = str(exc)[:1000]
+        manifest.save()
+        raise
+
+    _manifests().update_or_create(source_name=name, defaults={
+        'spec': VARIANT_SPEC, 'status': 'ready', 'variants': variants, 'error': '',
+    })
+    return variants
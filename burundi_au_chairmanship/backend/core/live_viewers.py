@@ -0,0 +1,355 @@
+"""
+Live feed viewer counting for ``LiveFeedConsumer``.
+
+Every ``join_feed`` / ``leave_feed`` used to UPDATE ``LiveFeed.viewer_count``
+(one hot row per popular stream), SELECT it back and ``group_send`` the new
+number to every watcher — O(viewers²) messages while a stream fills up.
+
+Counts now live next to the channel layer:
+
+  * ``RedisChannelLayer`` — each ASGI worker keeps its own viewers in a
+    per-worker hash on the channel layer's Redis, kept alive by a heartbeat
+    (``LIVE_VIEWER_WORKER_TTL``).  A feed's count is the sum over workers
+    whose heartbeat has not lapsed, so a worker that dies without running
+    its ``leave_feed`` calls stops being counted once its TTL runs out.  A
+    Lua script applies the change, sums, raises the peak and marks the feed
+    dirty in one round trip, so every worker sees the same numbers;
+  * ``InMemoryChannelLayer`` — plain dicts in the (single) process.
+
+Broadcasts are coalesced: a change only claims a per-feed broadcast slot
+(``SET NX PX``) and, if it got it, schedules one ``viewer_count_update`` that
+reads the latest count ``LIVE_VIEWER_BROADCAST_INTERVAL`` seconds later.  A
+feed therefore gets at most one broadcast per interval however fast viewers
+come and go.
+
+``persist_viewer_counts`` copies the counts of dirty and still-live feeds to
+``viewer_count`` and ``peak_viewers`` with one UPDATE; it runs from Celery beat every
+``LIVE_VIEWER_PERSIST_INTERVAL`` seconds (or from the broadcast path when the
+in-memory layer is used).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'burundi_au:live_viewers'
+WORKERS_KEY = f'{KEY_PREFIX}:workers'   # zset: worker id -> heartbeat expiry (ms)
+WORKER_PREFIX = f'{KEY_PREFIX}:worker:'  # hash per worker: feed id -> viewers
+PEAKS_KEY = f'{KEY_PREFIX}:peaks'
+DIRTY_KEY = f'{KEY_PREFIX}:dirty'
+SLOT_PREFIX = f'{KEY_PREFIX}:broadcast'
+
+# KEYS[1]: workers; ARGV[1]: now (ms), ARGV[2]: worker hash prefix.
+_TOTAL_LUA = """
+local function total(feed_id)
+  local n = 0
+  for _, w in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[1], '+inf')) do
+    n = n + tonumber(redis.call('HGET', ARGV[2] .. w, feed_id) or '0')
+  end
+  return n
+end
+"""
+
+# KEYS: workers, peaks, dirty, this worker's hash; ARGV: now, prefix,
+# worker id, ttl (ms), expiry (ms), feed_id, delta. Returns the new count.
+_CHANGE_LUA = _TOTAL_LUA + """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+local mine = redis.call('HINCRBY', KEYS[4], ARGV[6], ARGV[7])
+if mine <= 0 then
+  redis.call('HDEL', KEYS[4], ARGV[6])
+end
+redis.call('PEXPIRE', KEYS[4], ARGV[4])
+redis.call('ZADD', KEYS[1], ARGV[5], ARGV[3])
+local n = total(ARGV[6])
+if n > tonumber(redis.call('HGET', KEYS[2], ARGV[6]) or '0') then
+  redis.call('HSET', KEYS[2], ARGV[6], n)
+end
+redis.call('SADD', KEYS[3], ARGV[6])
+return n
+"""
+
+# KEYS: workers; ARGV: now, prefix, feed ids... Returns one count per feed.
+_TOTALS_LUA = _TOTAL_LUA + """
+local out = {}
+for i = 3, #ARGV do
+  out[#out + 1] = total(ARGV[i])
+end
+return out
+"""
+
+
+def _broadcast_interval():
+    return getattr(settings, 'LIVE_VIEWER_BROADCAST_INTERVAL', 2.0)
+
+
+def _worker_ttl():
+    return getattr(settings, 'LIVE_VIEWER_WORKER_TTL', 60)
+
+
+_worker = {}
+
+
+def _worker_id():
+    """Identity of this process in the workers zset (new after a fork)."""
+    pid = os.getpid()
+    if _worker.get('pid') != pid:
+        _worker.update(pid=pid, id=f'{pid}-{uuid.uuid4().hex[:12]}')
+    return _worker['id']
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _redis_url():
+    """Address of the channel layer's Redis, or None for the in-memory layer."""
+    layer = settings.CHANNEL_LAYERS['default']
+    if 'RedisChannelLayer' not in layer['BACKEND']:
+        return None
+    host = layer.get('CONFIG', {}).get('hosts', ['redis://localhost:6379'])[0]
+    if isinstance(host, dict):
+        host = host.get('address')
+    if isinstance(host, (tuple, list)):
+        host = f'redis://{host[0]}:{host[1]}'
+    return host
+
+
+# ── Backends ────────────────────────────────────────────────────
+
+class _LocalViewers:
+    """Single-process counts for InMemoryChannelLayer."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.peaks = {}
+        self.dirty = set()
+        self.slots = {}
+        self.persisted_at = time.monotonic()
+
+    async def change(self, feed_id, delta):
+        with self.lock:
+            n = max(0, self.counts.get(feed_id, 0) + delta)
+            self.counts[feed_id] = n
+            self.peaks[feed_id] = max(self.peaks.get(feed_id, 0), n)
+            self.dirty.add(feed_id)
+            return n
+
+    async def count(self, feed_id):
+        with self.lock:
+            return self.counts.get(feed_id, 0)
+
+    async def claim_slot(self, feed_id, interval):
+        now = time.monotonic()
+        with self.lock:
+            if self.slots.get(feed_id, 0) > now:
+                return False
+            self.slots[feed_id] = now + interval
+            return True
+
+    def drain_dirty(self):
+        with self.lock:
+            feed_ids = set(self.dirty)
+            self.dirty.clear()
+            self.persisted_at = time.monotonic()
+            return feed_ids
+
+    def totals(self, feed_ids):
+        with self.lock:
+            return {f: (self.counts.get(f, 0), self.peaks.get(f, 0)) for f in feed_ids}
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+            self.peaks.clear()
+            self.dirty.clear()
+            self.slots.clear()
+
+
+class _RedisViewers:
+    """Counts in the channel layer's Redis, shared by every ASGI worker."""
+
+    def __init__(self, url):
+        self.url = url
+        # redis.asyncio connections are bound to the loop that created them.
+        self._clients = weakref.WeakKeyDictionary()
+        self._heartbeats = weakref.WeakKeyDictionary()
+        self._sync = None
+
+    def _async_client(self):
+        import redis.asyncio as aioredis
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = aioredis.Redis.from_url(self.url)
+            self._heartbeats[loop] = loop.create_task(self._heartbeat(client))
+        return client
+
+    def _sync_client(self):
+        # One client (and connection pool) per process, reused by every
+        # persist run; redis-py replaces its connections after a fork.
+        if self._sync is None:
+            import redis
+            self._sync = redis.Redis.from_url(self.url)
+        return self._sync
+
+    async def _heartbeat(self, client):
+        """Keep this worker's counts alive while its event loop runs."""
+        ttl = _worker_ttl()
+        while True:
+            await asyncio.sleep(ttl / 3)
+            worker = _worker_id()
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.pexpire(f'{WORKER_PREFIX}{worker}', ttl * 1000)
+                    pipe.zadd(WORKERS_KEY, {worker: _now_ms() + ttl * 1000})
+                    await pipe.execute()
+            except Exception:
+                logger.warning('Live viewer heartbeat failed', exc_info=True)
+
+    async def change(self, feed_id, delta):
+        worker, ttl_ms, now = _worker_id(), _worker_ttl() * 1000, _now_ms()
+        return int(await self._async_client().eval(
+            _CHANGE_LUA, 4, WORKERS_KEY, PEAKS_KEY, DIRTY_KEY, f'{WORKER_PREFIX}{worker}',
+            now, WORKER_PREFIX, worker, ttl_ms, now + ttl_ms, feed_id, delta,
+        ))
+
+    async def count(self, feed_id):
+        counts = await self._async_client().eval(
+            _TOTALS_LUA, 1, WORKERS_KEY, _now_ms(), WORKER_PREFIX, feed_id,
+        )
+        return int(counts[0])
+
+    async def claim_slot(self, feed_id, interval):
+        return bool(await self._async_client().set(
+            f'{SLOT_PREFIX}:{feed_id}', 1, nx=True, px=max(1, int(interval * 1000)),
+        ))
+
+    def drain_dirty(self):
+        pipe = self._sync_client().pipeline()  # MULTI: no change slips between read and delete
+        pipe.smembers(DIRTY_KEY)
+        pipe.delete(DIRTY_KEY)
+        return {int(f) for f in pipe.execute()[0]}
+
+    def totals(self, feed_ids):
+        if not feed_ids:
+            return {}
+        client = self._sync_client()
+        pipe = client.pipeline(transaction=False)
+        pipe.eval(_TOTALS_LUA, 1, WORKERS_KEY, _now_ms(), WORKER_PREFIX, *feed_ids)
+        pipe.hmget(PEAKS_KEY, feed_ids)
+        counts, peaks = pipe.execute()
+        return {
+            feed_id: (int(c or 0), int(p or 0))
+            for feed_id, c, p in zip(feed_ids, counts, peaks)
+        }
+
+
+_local = _LocalViewers()
+_redis_backends = {}
+
+
+def _backend():
+    url = _redis_url()
+    if url is None:
+        return _local
+    backend = _redis_backends.get(url)
+    if backend is None:
+        backend = _redis_backends[url] = _RedisViewers(url)
+    return backend
+
+
+# ── Consumer API ────────────────────────────────────────────────
+
+_pending_broadcasts = set()  # strong refs so scheduled tasks aren't GC'd
+
+
+def _feed_group(feed_id):
+    return f'live_feed_{feed_id}'
+
+
+async def _broadcast(channel_layer, feed_id):
+    backend = _backend()
+    await channel_layer.group_send(_feed_group(feed_id), {
+        'type': 'viewer_count_update',
+        'feed_id': feed_id,
+        'viewer_count': await backend.count(feed_id),
+    })
+    if backend is _local and (
+        time.monotonic() - _local.persisted_at
+        >= getattr(settings, 'LIVE_VIEWER_PERSIST_INTERVAL', 30)
+    ):
+        from channels.db import database_sync_to_async
+        await database_sync_to_async(persist_viewer_counts)()
+
+
+async def _broadcast_later(channel_layer, feed_id, delay):
+    try:
+        await asyncio.sleep(delay)
+        await _broadcast(channel_layer, feed_id)
+    except Exception:
+        logger.exception('Viewer count broadcast failed for feed %s', feed_id)
+
+
+async def _changed(channel_layer, feed_id, delta):
+    backend = _backend()
+    count = await backend.change(feed_id, delta)
+    interval = _broadcast_interval()
+    if interval <= 0:
+        await _broadcast(channel_layer, feed_id)
+    elif await backend.claim_slot(feed_id, interval):
+        task = asyncio.get_running_loop().create_task(
+            _broadcast_later(channel_layer, feed_id, interval)
+        )
+        _pending_broadcasts.add(task)
+        task.add_done_callback(_pending_broadcasts.discard)
+    return count
+
+
+async def join(channel_layer, feed_id):
+    """A connection started watching ``feed_id``. Returns the new count."""
+    return await _changed(channel_layer, feed_id, +1)
+
+
+async def leave(channel_layer, feed_id):
+    """A connection stopped watching ``feed_id``. Returns the new count."""
+    return await _changed(channel_layer, feed_id, -1)
+
+
+# ── Persistence ─────────────────────────────────────────────────
+
+def persist_viewer_counts():
+    """Write dirty feeds' live/peak counts to LiveFeed. Returns feeds updated."""
+    from django.db.models import Case, F, IntegerField, Value, When
+    from django.db.models.functions import Greatest
+    from .models import LiveFeed
+
+    backend = _backend()
+    feed_ids = backend.drain_dirty()
+    # Live feeds are re-read every run even when nobody joined or left, so
+    # viewers of a crashed worker drop out once its heartbeat lapses.
+    feed_ids.update(LiveFeed.objects.filter(status='live').values_list('pk', flat=True))
+    snapshot = backend.totals(sorted(feed_ids))
+    if not snapshot:
+        return 0
+    counts = Case(
+        *[When(pk=pk, then=Value(count)) for pk, (count, _) in snapshot.items()],
+        output_field=IntegerField(),
+    )
+    peaks = Case(
+        *[When(pk=pk, then=Value(peak)) for pk, (_, peak) in snapshot.items()],
+        output_field=IntegerField(),
+    )
+    updated = LiveFeed.objects.filter(pk__in=list(snapshot)).update(
+        viewer_count=counts, peak_viewers=Greatest(F('peak_viewers'), peaks),
+    )
+    logger.debug('Persisted viewer counts for %d live feed(s)', updated)
+    return updated
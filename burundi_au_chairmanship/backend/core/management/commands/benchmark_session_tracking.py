@@ -0,0 +1,90 @@
+"""
+Benchmark for SessionTrackingMiddleware's request-path cost.
+
+Runs the same stream of /api/ requests through the previous inline
+implementation (exists() + GeoIP + INSERT) and the current queued one, and
+reports time and DB statements per request.  Everything runs inside a
+rolled-back transaction, so no rows are left behind.
+
+Usage:
+    python manage.py benchmark_session_tracking
+    python manage.py benchmark_session_tracking --requests 2000 --distinct-ips 200
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+def _legacy_track(request):
+    """The pre-queue implementation, inline on the request thread."""
+    from core.geo_utils import get_client_ip, get_country_from_ip
+    from core.models import UserSession
+
+    ip = get_client_ip(request)
+    user = request.user if request.user.is_authenticated else None
+    existing = UserSession.objects.filter(
+        ip_address=ip, created_at__gte=timezone.now() - timedelta(hours=1),
+    )
+    existing = existing.filter(user=user) if user else existing.filter(user__isnull=True)
+    if existing.exists():
+        return
+    country_code, country_name, city = get_country_from_ip(ip)
+    UserSession.objects.create(
+        user=user, ip_address=ip, country_code=country_code,
+        country_name=country_name, city=city,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Compare inline vs queued session tracking cost per API request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--distinct-ips', type=int, default=100,
+                            help='Unique client IPs in the request stream')
+
+    def _requests(self, n, ips):
+        factory = RequestFactory()
+        for i in range(n):
+            request = factory.get('/api/home-feed/', REMOTE_ADDR=f'10.0.{(i % ips) // 250}.{(i % ips) % 250 + 1}')
+            request.user = AnonymousUser()
+            yield request
+
+    def _run(self, label, track, n, ips):
+        requests = list(self._requests(n, ips))
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for request in requests:
+                track(request)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'  {label:<8}: {elapsed / n * 1e6:8.1f} µs/request, '
+            f'{len(ctx.captured_queries) / n:5.2f} DB statements/request'
+        )
+
+    def handle(self, *args, **options):
+        from core import session_events
+        from core.middleware.session_tracking import SessionTrackingMiddleware
+
+        n = max(1, options['requests'])
+        ips = max(1, options['distinct_ips'])
+        middleware = SessionTrackingMiddleware(lambda request: HttpResponse())
+
+        self.stdout.write(f'{n} requests from {ips} distinct IPs')
+        # Fresh dedup namespace so earlier runs (and real traffic) don't skew it.
+        session_events.DEDUP_PREFIX = f'session_track_bench_{time.time_ns()}'
+        with transaction.atomic(), override_settings(SESSION_TRACKING_BACKGROUND_FLUSH=False):
+            self._run('inline', _legacy_track, n, ips)
+            self._run('queued', middleware._track_session, n, ips)
+            start = time.perf_counter()
+            written = session_events.flush_session_events()
+            flush_ms = (time.perf_counter() - start) * 1000
+            self.stdout.write(f'  background flush: {written} rows in {flush_ms:.1f} ms (off the request path)')
+            transaction.set_rollback(True)
@@ -0,0 +1,44 @@
+"""
+Management command to queue size variants for images without a current
+variant manifest (ImageVariantManifest).
+
+New uploads are handled by the post_save signal; run this once after
+deploying the manifest (so existing images are advertised again) and
+whenever image_utils.VARIANT_SPEC changes.
+
+Usage:
+    python manage.py build_image_variants [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Queue WebP size variants for stored images that have no current variant manifest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the images')
+
+    def handle(self, *args, **options):
+        from core.image_utils import VARIANT_SPEC
+        from core.image_variants import enqueue
+        from core.models import ImageVariantManifest
+        from core.signals import _get_image_field_names, thumbnail_models
+
+        done = set(ImageVariantManifest.objects.filter(
+            spec=VARIANT_SPEC, status='ready',
+        ).values_list('source_name', flat=True))
+        queued = 0
+        for model in thumbnail_models():
+            for field_name in _get_image_field_names(model):
+                rows = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                for instance in rows.only('pk', field_name).iterator():
+                    image = getattr(instance, field_name)
+                    if image.name in done:
+                        continue
+                    done.add(image.name)
+                    if options['dry_run'] or enqueue(instance, field_name, image):
+                        queued += 1
+
+        verb = 'Would queue' if options['dry_run'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(f'{verb} variants for {queued} images'))
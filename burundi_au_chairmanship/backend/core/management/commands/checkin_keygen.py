@@ -0,0 +1,28 @@
+"""
+Management command to generate a gate check-in manifest signing key pair.
+
+Set the private key as CHECKIN_MANIFEST_SIGNING_KEY on the server and build
+the public key into the scanner app; the private key never leaves the server.
+
+Usage:
+    python manage.py checkin_keygen
+"""
+import base64
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Generate an Ed25519 key pair for signing gate check-in manifests'
+
+    def handle(self, *args, **options):
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+        from cryptography.hazmat.primitives.serialization import (
+            Encoding, NoEncryption, PrivateFormat, PublicFormat,
+        )
+
+        key = Ed25519PrivateKey.generate()
+        seed = key.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption())
+        public = key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+        self.stdout.write(f'CHECKIN_MANIFEST_SIGNING_KEY={base64.b64encode(seed).decode()}')
+        self.stdout.write(self.style.SUCCESS(f'Scanner public key: {base64.b64encode(public).decode()}'))
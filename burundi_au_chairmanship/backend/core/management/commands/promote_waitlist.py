@@ -7,7 +7,9 @@ Usage:
     python manage.py promote_waitlist --dry-run
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
+from core.event_seats import claim_seat, reconcile_seats
 from core.models import EventRegistration, EventSubmission, EventWaitlist
 
 
@@ -37,7 +39,8 @@ class Command(BaseCommand):
         total_promoted = 0
 
         for event_reg in qs:
-            current_count = event_reg.submissions.filter(is_waitlisted=False).count()
+            # Recount the seat counter first (drifts only if rows were edited by hand).
+            current_count = event_reg.seats_taken if dry_run else reconcile_seats(event_reg.pk)
             available_spots = event_reg.max_registrations - current_count
 
             if available_spots <= 0:
@@ -55,15 +58,19 @@ class Command(BaseCommand):
                         f'for "{event_reg.event_title}"'
                     )
                 else:
-                    submission.is_waitlisted = False
-                    submission.status = 'pending'
-                    submission.save(update_fields=['is_waitlisted', 'status'])
+                    with transaction.atomic():
+                        # A registration may have taken the seat since the recount.
+                        if not claim_seat(event_reg.pk):
+                            break
+                        submission.is_waitlisted = False
+                        submission.status = 'pending'
+                        submission.save(update_fields=['is_waitlisted', 'status'])
 
-                    # Update EventWaitlist entry
-                    EventWaitlist.objects.filter(
-                        user=submission.user,
-                        event_registration=event_reg,
-                    ).update(promoted=True, notified=True)
+                        # Update EventWaitlist entry
+                        EventWaitlist.objects.filter(
+                            user=submission.user,
+                            event_registration=event_reg,
+                        ).update(promoted=True, notified=True)
 
                     self.stdout.write(self.style.SUCCESS(
                         f'  Promoted: {submission.user.username} '
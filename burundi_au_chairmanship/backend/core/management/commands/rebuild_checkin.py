@@ -0,0 +1,22 @@
+"""
+Management command to rebuild the gate check-in manifests (CheckinCredential).
+
+Manifests are kept current by signals and rebuilt nightly; run this after
+bulk imports or ``queryset.update()`` calls on EventSubmission /
+YouthDialogueApplication that bypass post_save signals.
+
+Usage:
+    python manage.py rebuild_checkin
+"""
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the gate check-in manifests from event submissions and Continental Dialogue credentials'
+
+    def handle(self, *args, **options):
+        from core.checkin import rebuild
+
+        changed = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Check-in manifests: {changed} credentials updated'))
@@ -0,0 +1,22 @@
+"""
+Management command to rebuild the push audience index (PushAudienceToken).
+
+The index is kept current by signals and runs a full rebuild nightly; run
+this after bulk imports or ``queryset.update()`` calls on DeviceToken /
+UserProfile that bypass post_save signals.
+
+Usage:
+    python manage.py rebuild_push_audience
+"""
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalised push audience index from DeviceToken and UserProfile'
+
+    def handle(self, *args, **options):
+        from core.push_audience import rebuild
+
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Push audience index: {total} tokens'))
@@ -0,0 +1,41 @@
+"""
+Management command to rebuild the full-text search vectors.
+
+Vectors are refreshed on every save; run this after bulk imports, raw SQL
+edits or ``queryset.update()`` calls that bypass post_save signals.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --model article
+"""
+
+import logging
+from django.core.management.base import BaseCommand, CommandError
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Recompute search_vector_en / search_vector_fr for articles and magazines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=['article', 'magazine'],
+            help='Only rebuild one model (default: both)',
+        )
+
+    def handle(self, *args, **options):
+        from core.models import Article, MagazineEdition
+        from core.search import fts_available, search_vector_updates
+
+        models = {'article': Article, 'magazine': MagazineEdition}
+        if options['model']:
+            models = {options['model']: models[options['model']]}
+
+        for label, model in models.items():
+            if not fts_available(model):
+                raise CommandError('Full-text search vectors require PostgreSQL.')
+            updated = model.objects.update(**search_vector_updates(model))
+            logger.info('Rebuilt search vectors for %d %s rows', updated, label)
+            self.stdout.write(self.style.SUCCESS(f'{label}: {updated} rows re-indexed'))
@@ -0,0 +1,394 @@
+"""
+Pre-aggregated admin dashboard metrics (``MetricSnapshot``).
+
+The admin dashboard, its widgets, the analytics pages and the
+``/api/analytics/overview/`` endpoint each used to recompute the same figures
+from the source tables on every request: row counts, ``Sum(view_count)`` /
+``Sum(like_count)`` per content type, per-nationality and per-language
+``GROUP BY``s and 30-day ``TruncDate`` series.  Their cost grew with the
+tables.
+
+``snapshot_metrics`` runs every ``METRICS_SNAPSHOT_INTERVAL`` seconds from
+Celery beat and writes three kinds of rows:
+
+  * ``day`` series — rows created per local day (sign-ups, content, likes,
+    tickets...).  Only the buckets since the previous run (plus one day of
+    slack for late writes) are recomputed; the first run backfills
+    ``METRICS_BACKFILL_DAYS``;
+  * ``hour`` series — the same for successful logins, kept for
+    ``METRICS_HOURLY_RETENTION_DAYS``;
+  * ``gauge`` values — current totals and breakdowns, replaced in place for
+    today's bucket.
+
+The read helpers below turn a page into a few indexed lookups on that table.
+A read that finds no snapshot at all (fresh deploy, beat not run yet) queues
+one run and shows zeros until it lands — the backfill is far too slow for a
+request.  Figures are as fresh as the last run; lists of individual rows (recent
+articles, queues, alerts) are still read live by the views.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Subquery, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_LOCK_KEY = 'metrics:backfill_queued'
+BACKFILL_LOCK_TIMEOUT = 900  # seconds before a lost backfill may be queued again
+
+# MetricSnapshot.PERIOD_*
+HOUR = 'hour'
+DAY = 'day'
+GAUGE = 'gauge'
+BREAKDOWN_LIMIT = 50
+WRITE_CHUNK = 1000
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _last_days(days, today=None):
+    today = today or timezone.localdate()
+    return [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+
+
+# ── Sources ─────────────────────────────────────────────────────
+
+def _day_series():
+    """metric -> (queryset, datetime field) counted per local day."""
+    from django.contrib.auth.models import User
+    from .models import (
+        Article, ArticleComment, ArticleLike, Bookmark, Event, MagazineEdition,
+        Reaction, SupportTicket, Video,
+    )
+    return {
+        'users.joined': (User.objects.all(), 'date_joined'),
+        'app_users.joined': (User.objects.filter(is_staff=False), 'date_joined'),
+        'events.created': (Event.objects.all(), 'created_at'),
+        'articles.created': (Article.objects.all(), 'created_at'),
+        'magazines.created': (MagazineEdition.objects.all(), 'created_at'),
+        'videos.created': (Video.objects.all(), 'created_at'),
+        'article_likes.created': (ArticleLike.objects.all(), 'created_at'),
+        'article_comments.created': (ArticleComment.objects.all(), 'created_at'),
+        'reactions.created': (Reaction.objects.all(), 'created_at'),
+        'bookmarks.created': (Bookmark.objects.all(), 'created_at'),
+        'tickets.opened': (SupportTicket.objects.all(), 'created_at'),
+        'tickets.closed': (SupportTicket.objects.filter(status__in=['resolved', 'closed']), 'resolved_at'),
+    }
+
+
+def _hour_series():
+    from .models import LoginHistory
+    return {
+        'logins.success': (LoginHistory.objects.filter(success=True), 'created_at'),
+    }
+
+
+def _content_gauges(values, prefix, model):
+    agg = model.objects.aggregate(total=Count('pk'), views=Sum('view_count'), likes=Sum('like_count'))
+    values[f'{prefix}.total'] = agg['total']
+    values[f'{prefix}.views'] = agg['views'] or 0
+    values[f'{prefix}.likes'] = agg['likes'] or 0
+
+
+def _gauges(now):
+    """Current totals as ``{metric: value}``."""
+    from django.contrib.auth.models import User
+    from .models import (
+        Article, Event, EventCheckIn, EventSubmission, FeatureCard, GalleryAlbum,
+        HeroSlide, LiveFeed, MagazineEdition, SupportTicket, UserProfile,
+        VerificationRequest, Video,
+    )
+    today = timezone.localdate(now)
+    values = {}
+
+    users = User.objects.aggregate(
+        total=Count('pk'),
+        app=Count('pk', filter=Q(is_staff=False)),
+        today=Count('pk', filter=Q(last_login__date=today)),
+        week=Count('pk', filter=Q(last_login__gte=now - timedelta(days=7))),
+        month=Count('pk', filter=Q(last_login__gte=now - timedelta(days=30))),
+    )
+    values['users.total'] = users['total']
+    values['app_users.total'] = users['app']
+    values['users.login_today'] = users['today']
+    values['users.login_7d'] = users['week']
+    values['users.login_30d'] = users['month']
+
+    profiles = UserProfile.objects.aggregate(
+        active=Count('pk', filter=Q(last_active__gte=now - timedelta(days=1), user__is_staff=False)),
+        verified=Count('pk', filter=Q(is_verified=True)),
+        gold=Count('pk', filter=Q(badge_type='GOLD')),
+        blue=Count('pk', filter=Q(badge_type='BLUE')),
+        no_badge=Count('pk', filter=Q(badge_type__isnull=True) | Q(badge_type='')),
+        nationality=Count('pk', filter=~Q(nationality='')),
+    )
+    values['app_users.active_24h'] = profiles['active']
+    values['users.verified'] = profiles['verified']
+    values['users.badge_gold'] = profiles['gold']
+    values['users.badge_blue'] = profiles['blue']
+    values['users.badge_none'] = profiles['no_badge']
+    values['users.with_nationality'] = profiles['nationality']
+
+    _content_gauges(values, 'articles', Article)
+    _content_gauges(values, 'magazines', MagazineEdition)
+    _content_gauges(values, 'videos', Video)
+    _content_gauges(values, 'albums', GalleryAlbum)
+    values['articles.published'] = Article.objects.filter(status='published').count()
+
+    values['events.total'] = Event.objects.count()
+    values['hero_slides.active'] = HeroSlide.objects.filter(is_active=True).count()
+    values['live_feeds.live'] = LiveFeed.objects.filter(status='live').count()
+    values['feature_cards.active'] = FeatureCard.objects.filter(is_active=True).count()
+    values['verification.pending'] = VerificationRequest.objects.filter(status='pending').count()
+    values['tickets.open'] = SupportTicket.objects.filter(status='open').count()
+    submissions = EventSubmission.objects.aggregate(total=Count('pk'), users=Count('user', distinct=True))
+    values['event_submissions.total'] = submissions['total']
+    values['event_submissions.users'] = submissions['users']
+    values['checkins.total'] = EventCheckIn.objects.filter(checked_in=True).count()
+    return values
+
+
+def _breakdowns():
+    """``{metric: [(dimension, value), ...]}`` for the grouped gauges."""
+    from .models import UserProfile
+
+    def grouped(queryset, field):
+        return list(
+            queryset.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            .order_by().values(field).annotate(n=Count('pk')).order_by('-n')
+            .values_list(field, 'n')[:BREAKDOWN_LIMIT]
+        )
+
+    profiles = UserProfile.objects.all()
+    return {
+        'users.nationality': grouped(profiles, 'nationality'),
+        'app_users.language': grouped(
+            profiles.filter(user__is_staff=False, user__is_active=True), 'preferred_language',
+        ),
+        'users.device_os': grouped(profiles, 'device_os'),
+        'users.device_type': grouped(profiles, 'device_type'),
+    }
+
+
+# ── Writing ─────────────────────────────────────────────────────
+
+def _count_rows(period, series, start):
+    from .models import MetricSnapshot
+
+    trunc = TruncDate if period == DAY else TruncHour
+    rows = []
+    for metric, (queryset, field) in series.items():
+        counts = (
+            queryset.filter(**{f'{field}__gte': start}).order_by()
+            .annotate(b=trunc(field)).values('b').annotate(n=Count('pk')).values_list('b', 'n')
+        )
+        for bucket, n in counts:
+            if bucket is None:
+                continue
+            if period == DAY:
+                bucket = _day_start(bucket)
+            rows.append(MetricSnapshot(metric=metric, period=period, bucket=bucket, value=n))
+    return rows
+
+
+def _replace(period, metrics, start, rows):
+    """Swap every row of these metrics from ``start`` on for ``rows``."""
+    from .models import MetricSnapshot
+
+    with transaction.atomic():
+        MetricSnapshot.objects.filter(period=period, metric__in=metrics, bucket__gte=start).delete()
+        MetricSnapshot.objects.bulk_create(rows, batch_size=WRITE_CHUNK, ignore_conflicts=True)
+
+
+def snapshot_metrics(full=False):
+    """Refresh the snapshot. Returns the number of rows written.
+
+    Series are recomputed from the day before the previous run (or the whole
+    backfill window with ``full``); gauges are replaced for today.
+    """
+    from .models import MetricSnapshot
+
+    now = timezone.now()
+    today = timezone.localdate(now)
+    backfill_start = today - timedelta(days=settings.METRICS_BACKFILL_DAYS)
+    last_run = None if full else (
+        MetricSnapshot.objects.filter(period=GAUGE).order_by('-bucket').values_list('bucket', flat=True).first()
+    )
+    if last_run is None:
+        start_day = backfill_start
+    else:
+        start_day = max(timezone.localdate(last_run) - timedelta(days=1), backfill_start)
+    start = _day_start(start_day)
+
+    day_series = _day_series()
+    day_rows = _count_rows(DAY, day_series, start)
+    _replace(DAY, list(day_series), start, day_rows)
+
+    hourly_cutoff = now - timedelta(days=settings.METRICS_HOURLY_RETENTION_DAYS)
+    hour_start = max(start, hourly_cutoff.replace(minute=0, second=0, microsecond=0))
+    hour_series = _hour_series()
+    hour_rows = _count_rows(HOUR, hour_series, hour_start)
+    _replace(HOUR, list(hour_series), hour_start, hour_rows)
+    MetricSnapshot.objects.filter(period=HOUR, bucket__lt=hourly_cutoff).delete()
+
+    bucket = _day_start(today)
+    gauge_rows = [
+        MetricSnapshot(metric=metric, period=GAUGE, bucket=bucket, value=value)
+        for metric, value in _gauges(now).items()
+    ]
+    for metric, pairs in _breakdowns().items():
+        gauge_rows.extend(
+            MetricSnapshot(metric=metric, period=GAUGE, bucket=bucket, dimension=str(dim)[:100], value=n)
+            for dim, n in pairs
+        )
+    _replace(GAUGE, list({row.metric for row in gauge_rows}), bucket, gauge_rows)
+    # Keep the daily history of plain totals; breakdowns are only read for today.
+    MetricSnapshot.objects.filter(period=GAUGE, bucket__lt=bucket).exclude(dimension='').delete()
+
+    cache.delete(BACKFILL_LOCK_KEY)
+    written = len(day_rows) + len(hour_rows) + len(gauge_rows)
+    logger.info('Metric snapshot written from %s: %d rows', start_day, written)
+    return written
+
+
+# ── Reading ─────────────────────────────────────────────────────
+
+class Snapshot:
+    """Latest gauges and breakdowns; missing metrics read as 0."""
+
+    def __init__(self, rows):
+        self._values = {}
+        self._breakdowns = defaultdict(list)
+        self.taken_at = None
+        for metric, dimension, value, updated_at in rows:
+            if dimension:
+                self._breakdowns[metric].append((dimension, value))
+            else:
+                self._values[metric] = value
+            if self.taken_at is None or updated_at > self.taken_at:
+                self.taken_at = updated_at
+        for pairs in self._breakdowns.values():
+            pairs.sort(key=lambda pair: (-pair[1], pair[0]))
+
+    def __getitem__(self, metric):
+        return self._values.get(metric, 0)
+
+    def breakdown(self, metric, limit=None):
+        """``[(dimension, value), ...]``, largest first."""
+        return self._breakdowns.get(metric, [])[:limit]
+
+    def as_dict(self):
+        return dict(self._values)
+
+
+def _ensure_snapshot():
+    """First read before the beat job ever ran: queue one snapshot run.
+
+    Only the first caller queues it (``cache.add``); returns True when it
+    was queued, after which the caller reads again — rows are only there
+    already when Celery runs eagerly.
+    """
+    from .models import MetricSnapshot
+    from .tasks import snapshot_dashboard_metrics
+
+    if MetricSnapshot.objects.filter(period=GAUGE).exists():
+        return False
+    if not cache.add(BACKFILL_LOCK_KEY, 1, timeout=BACKFILL_LOCK_TIMEOUT):
+        return False
+    snapshot_dashboard_metrics.delay()
+    return True
+
+
+def latest():
+    """The most recent gauge values, in one query."""
+    from .models import MetricSnapshot
+
+    newest = MetricSnapshot.objects.filter(period=GAUGE).order_by('-bucket').values('bucket')[:1]
+    query = MetricSnapshot.objects.filter(period=GAUGE, bucket=Subquery(newest)).values_list(
+        'metric', 'dimension', 'value', 'updated_at',
+    )
+    rows = list(query)
+    if not rows and _ensure_snapshot():
+        rows = list(query.all())
+    return Snapshot(rows)
+
+
+def _day_values(metrics, first_day):
+    from .models import MetricSnapshot
+
+    query = MetricSnapshot.objects.filter(
+        period=DAY, metric__in=metrics, bucket__gte=_day_start(first_day),
+    ).values_list('metric', 'bucket', 'value')
+    rows = list(query)
+    if not rows and _ensure_snapshot():
+        rows = list(query.all())
+    values = defaultdict(dict)
+    for metric, bucket, value in rows:
+        values[metric][timezone.localdate(bucket)] = value
+    return values
+
+
+def daily(metrics, days):
+    """Per-day values of each metric over the last ``days`` days, oldest first.
+
+    Returns ``(dates, {metric: [value, ...]})`` with missing days as 0.
+    """
+    dates = _last_days(days)
+    values = _day_values(metrics, dates[0])
+    return dates, {m: [values[m].get(d, 0) for d in dates] for m in metrics}
+
+
+def weekly(metrics, weeks):
+    """Per-week (Monday-based) totals over the last ``weeks`` weeks, oldest first.
+
+    Returns ``(mondays, {metric: [value, ...]})``.
+    """
+    today = timezone.localdate()
+    this_monday = today - timedelta(days=today.weekday())
+    mondays = [this_monday - timedelta(weeks=i) for i in range(weeks - 1, -1, -1)]
+    values = _day_values(metrics, mondays[0])
+    totals = {m: defaultdict(int) for m in metrics}
+    for metric in metrics:
+        for day, value in values[metric].items():
+            totals[metric][day - timedelta(days=day.weekday())] += value
+    return mondays, {m: [totals[m][monday] for monday in mondays] for m in metrics}
+
+
+def monthly(metric, months):
+    """Per-month totals for the last ``months`` calendar months (current one
+    included), skipping empty months. Returns ``[(first_of_month, value), ...]``.
+    """
+    today = timezone.localdate()
+    year, month = today.year, today.month - (months - 1)
+    while month < 1:
+        year, month = year - 1, month + 12
+    first = today.replace(year=year, month=month, day=1)
+    totals = defaultdict(int)
+    for day, value in _day_values([metric], first)[metric].items():
+        totals[day.replace(day=1)] += value
+    return sorted((m, v) for m, v in totals.items() if v)
+
+
+def total_since(metric, days):
+    """Sum of a day series over the last ``days`` days (today included)."""
+    return sum(daily([metric], days)[1][metric])
+
+
+def hour_of_day(metric, days):
+    """Totals per local hour of day (0-23) over the last ``days`` days."""
+    from .models import MetricSnapshot
+
+    hours = [0] * 24
+    for bucket, value in MetricSnapshot.objects.filter(
+        period=HOUR, metric=metric, bucket__gte=timezone.now() - timedelta(days=days),
+    ).values_list('bucket', 'value'):
+        hours[timezone.localtime(bucket).hour] += value
+    return hours
@@ -1,32 +1,24 @@
 """
-Middleware that keeps ``UserProfile.last_active`` fresh on every authenticated
-API request.
+Middleware that keeps users' presence fresh on every authenticated API request.
 
-This is the signal the admin dashboard uses for "users online now". Updating
-it on every request would be expensive, so we throttle writes to at most one
-per user per 60 seconds using Django's cache as a lightweight mutex.
+This is the signal the admin dashboard uses for "users online now". Each hit
+is a single sorted-set write in the presence store (see ``core/presence.py``);
+``UserProfile.last_active`` is persisted from there by the ``persist_presence``
+task, so the request path does no database writes.
 
 Anonymous devices are handled separately by the ``/api/heartbeat/`` endpoint,
-which bumps ``DeviceToken.updated_at`` based on the ``X-FCM-Token`` header.
+which records the ``X-FCM-Token`` header in the same store.
 """
 
 import logging
 
-from django.core.cache import cache
-from django.utils import timezone
-
 logger = logging.getLogger(__name__)
 
-# Minimum interval between writes for the same user, in seconds.
-THROTTLE_SECONDS = 60
-
 
 class LastActiveMiddleware:
-    """Throttled writer for ``UserProfile.last_active``.
+    """Presence recorder for authenticated API traffic.
 
     Skips unauthenticated requests, non-/api/ paths, and error responses.
-    Uses a per-user cache key so parallel requests from the same user
-    collapse into a single DB write.
     """
 
     def __init__(self, get_response):
@@ -46,19 +38,12 @@ class LastActiveMiddleware:
         if response.status_code >= 400:
             return response
 
-        cache_key = f'last_active_bumped:{user.pk}'
-        if cache.get(cache_key):
-            return response
-
         try:
             # Deferred import to avoid circular imports at app startup
-            from core.models import UserProfile
-            UserProfile.objects.filter(user_id=user.pk).update(
-                last_active=timezone.now()
-            )
-            cache.set(cache_key, 1, THROTTLE_SECONDS)
+            from core.presence import touch_user
+            touch_user(user.pk)
         except Exception:
             # Analytics-style middleware must never break a request.
-            logger.warning('LastActiveMiddleware failed to update', exc_info=True)
+            logger.warning('LastActiveMiddleware failed to record presence', exc_info=True)
 
         return response
@@ -1,6 +1,4 @@
 import logging
-from datetime import timedelta
-from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +9,9 @@ class SessionTrackingMiddleware:
 
     - Only tracks /api/ requests (not admin or static)
     - Only tracks successful responses (status < 400)
-    - Throttled: max 1 session record per user/IP per hour
+    - Throttled: max 1 session record per user/IP per hour (cache dedup)
+    - Adds no database statements to the request: events are queued and
+      written in batches off the request path (see core/session_events.py)
     - Gracefully fails (logs warning, doesn't crash request)
     """
 
@@ -37,52 +37,15 @@ class SessionTrackingMiddleware:
         return response
 
     def _track_session(self, request):
-        from core.geo_utils import get_client_ip, get_country_from_ip
-        from core.models import UserSession
+        from core import session_events
+        from core.geo_utils import get_client_ip
 
         ip = get_client_ip(request)
         if not ip:
             return
 
-        user = request.user if hasattr(request, 'user') and request.user.is_authenticated else None
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
 
-        # Throttle: max 1 session per user/IP per hour
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        existing = UserSession.objects.filter(
-            ip_address=ip,
-            created_at__gte=one_hour_ago,
-        )
-        if user:
-            existing = existing.filter(user=user)
-        else:
-            existing = existing.filter(user__isnull=True)
-
-        if existing.exists():
-            return
-
-        # Geolocate IP
-        country_code, country_name, city = get_country_from_ip(ip)
-
-        # Get user nationality snapshot
-        user_nationality = ''
-        device_type = ''
-        device_os = ''
-        app_version = ''
-        if user and hasattr(user, 'profile'):
-            profile = user.profile
-            user_nationality = profile.nationality or ''
-            device_type = profile.device_type or ''
-            device_os = profile.device_os or ''
-            app_version = profile.app_version or ''
-
-        UserSession.objects.create(
-            user=user,
-            ip_address=ip,
-            country_code=country_code,
-            country_name=country_name,
-            city=city,
-            user_nationality=user_nationality,
-            device_type=device_type,
-            device_os=device_os,
-            app_version=app_version,
-        )
+        if session_events.should_track(user_id, ip):
+            session_events.enqueue(user_id, ip)
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-18 08:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0165_auto_approve_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfanityWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(help_text='Word or phrase; matching ignores case and accents', max_length=100, unique=True)),
+                ('language', models.CharField(choices=[('en', 'English'), ('fr', 'French'), ('other', 'Other')], default='en', max_length=10)),
+                ('action', models.CharField(choices=[('block', 'Block'), ('allow', 'Allow (exempt a built-in word)')], default='block', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Profanity Word',
+                'verbose_name_plural': 'Profanity Words',
+                'ordering': ['word'],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.28 on 2026-10-18 08:58
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Frozen copy of core.search's vector expressions (title weighted A, tag-
+# stripped body weighted B) so later edits to that module cannot change
+# what this migration does.
+_VECTOR = (
+    "setweight(to_tsvector('{config}'::regconfig, COALESCE({title}, '')), 'A') || "
+    "setweight(to_tsvector('{config}'::regconfig, "
+    "COALESCE(REGEXP_REPLACE({body}, '<[^>]+>', ' ', 'g'), '')), 'B')"
+)
+_TABLES = {
+    'core_article': {'en': ('title', 'content'), 'fr': ('title_fr', 'content_fr')},
+    'core_magazineedition': {'en': ('title', 'description'), 'fr': ('title_fr', 'description_fr')},
+}
+_CONFIGS = {'en': 'english', 'fr': 'french'}
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Populate the new tsvector columns for existing rows (PostgreSQL only)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, fields in _TABLES.items():
+        assignments = ', '.join(
+            f'search_vector_{lang} = '
+            + _VECTOR.format(config=config, title=fields[lang][0], body=fields[lang][1])
+            for lang, config in _CONFIGS.items()
+        )
+        schema_editor.execute(f'UPDATE {table} SET {assignments}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0166_profanity_word'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector_en',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='search_vector_fr',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='magazineedition',
+            name='search_vector_en',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='magazineedition',
+            name='search_vector_fr',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector_en'], name='article_search_en_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector_fr'], name='article_search_fr_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='magazineedition',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector_en'], name='magazine_search_en_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='magazineedition',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector_fr'], name='magazine_search_fr_gin'),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
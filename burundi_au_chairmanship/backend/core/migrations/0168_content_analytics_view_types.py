@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0167_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contentanalytics',
+            name='content_type',
+            field=models.CharField(choices=[('article', 'Article'), ('magazine', 'Magazine'), ('video', 'Video'), ('event', 'Event'), ('livefeed', 'Live Feed'), ('album', 'Gallery Album'), ('resource', 'Resource'), ('featurecard', 'Feature Card'), ('agenda', 'Priority Agenda'), ('discussion', 'Discussion')], max_length=20),
+        ),
+    ]
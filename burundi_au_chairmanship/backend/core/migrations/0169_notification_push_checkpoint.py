@@ -0,0 +1,23 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0168_content_analytics_view_types'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='push_checkpoint',
+            field=models.JSONField(blank=True, default=dict, help_text='Fan-out cursor and running totals; lets a retried send resume'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='push_stats',
+            field=models.JSONField(blank=True, default=dict, help_text='Fan-out timings: batch count, per-batch latency, throughput'),
+        ),
+    ]
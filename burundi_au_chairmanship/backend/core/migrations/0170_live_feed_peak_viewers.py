@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0169_notification_push_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livefeed',
+            name='peak_viewers',
+            field=models.PositiveIntegerField(default=0, help_text='Highest concurrent viewer count seen on the WebSocket'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_push_audience(apps, schema_editor):
+    from core.push_audience import rebuild
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0170_live_feed_peak_viewers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushAudienceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255, unique=True)),
+                ('source', models.CharField(choices=[('device', 'Device token'), ('legacy', 'Legacy profile token')], default='device', max_length=10)),
+                ('language', models.CharField(default='en', help_text='Language the push is sent in', max_length=5)),
+                ('platform', models.CharField(blank=True, help_text="'android', 'ios' or empty if unknown", max_length=10)),
+                ('gender', models.CharField(blank=True, max_length=20)),
+                ('nationality', models.CharField(blank=True, max_length=5)),
+                ('date_of_birth', models.DateField(blank=True, null=True)),
+                ('is_verified', models.BooleanField(default=False)),
+                ('badge_type', models.CharField(blank=True, max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, help_text='Empty for anonymous devices', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Push Audience Token',
+                'verbose_name_plural': 'Push Audience Tokens',
+                'indexes': [models.Index(fields=['user', 'language'], name='core_pushau_user_id_3ee952_idx'), models.Index(fields=['language', 'platform'], name='core_pushau_languag_d1bc85_idx'), models.Index(fields=['gender', 'language'], name='core_pushau_gender_22b6ac_idx'), models.Index(fields=['nationality'], name='core_pushau_nationa_e8344a_idx'), models.Index(fields=['is_verified', 'badge_type'], name='core_pushau_is_veri_8de8f3_idx'), models.Index(fields=['date_of_birth'], name='core_pushau_date_of_a1e1c8_idx')],
+            },
+        ),
+        migrations.RunPython(build_push_audience, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0171_push_audience_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='target_segment',
+            field=models.ForeignKey(blank=True, help_text='Deliver to the members of this segment (read from its membership snapshot)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='core.usersegment'),
+        ),
+        migrations.AddField(
+            model_name='usersegment',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, help_text='Size of the membership snapshot at the last refresh'),
+        ),
+        migrations.AddField(
+            model_name='usersegment',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, help_text='When the membership snapshot was last rebuilt (empty = needs a refresh)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='usersegment',
+            name='is_dynamic',
+            field=models.BooleanField(default=True, help_text='Dynamic segments are materialised from the filters and refreshed as profiles change'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:41
+
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0172_segment_membership_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='adminnotification',
+            name='notification_type',
+            field=models.CharField(choices=[('new_ticket', 'New Support Ticket'), ('new_verification', 'New Verification Request'), ('new_user', 'New User Registration'), ('ticket_reply', 'Ticket Reply'), ('system_alert', 'System Alert'), ('content_flagged', 'Content Flagged'), ('export_ready', 'Export Ready')], help_text='Category of admin notification', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='Key in custom_admin.exports.EXPORTS', max_length=50)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel')], default='csv', max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('file', models.FileField(blank=True, storage=core.models._private_storage, upload_to='exports/')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
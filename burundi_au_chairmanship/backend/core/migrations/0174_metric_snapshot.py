@@ -0,0 +1,31 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0173_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=64)),
+                ('period', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily'), ('gauge', 'Gauge')], max_length=10)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour/day (local time)')),
+                ('dimension', models.CharField(blank=True, max_length=100)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Metric Snapshot',
+                'verbose_name_plural': 'Metric Snapshots',
+                'indexes': [models.Index(fields=['period', '-bucket'], name='core_metric_period_fafbdb_idx')],
+                'unique_together': {('metric', 'period', 'bucket', 'dimension')},
+            },
+        ),
+    ]
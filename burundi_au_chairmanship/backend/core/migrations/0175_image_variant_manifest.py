@@ -0,0 +1,29 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0174_metric_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariantManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(help_text='Storage name of the original', max_length=500, unique=True)),
+                ('spec', models.CharField(help_text='image_utils.VARIANT_SPEC the variants were built with', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('variants', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Image Variant Manifest',
+                'verbose_name_plural': 'Image Variant Manifests',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:07
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0175_image_variant_manifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Webhook Delivery',
+                'verbose_name_plural': 'Webhook Deliveries',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='webhook',
+            name='circuit_open_until',
+            field=models.DateTimeField(blank=True, help_text='Deliveries are held until then after repeated failures (core/webhooks.py)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='webhook',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['events'], name='webhook_events_gin'),
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='webhook',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='core.webhook'),
+        ),
+        migrations.AddField(
+            model_name='webhooklog',
+            name='delivery',
+            field=models.ForeignKey(blank=True, help_text='Queued delivery this attempt belongs to (empty for test pings)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='core.webhookdelivery'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='core_webhoo_status_1d7fc3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['webhook', 'status', 'next_attempt_at'], name='core_webhoo_webhook_70e1c9_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0176_webhook_delivery_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='send_checkpoint',
+            field=models.JSONField(blank=True, default=dict, help_text='Bulk mail cursor and running totals; lets a retried send resume'),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='send_stats',
+            field=models.JSONField(blank=True, default=dict, help_text='Bulk mail timings: batch count, per-batch latency, messages per second'),
+        ),
+        migrations.AddField(
+            model_name='newsletteredition',
+            name='send_checkpoint',
+            field=models.JSONField(blank=True, default=dict, help_text='Bulk mail cursor and running totals; lets a retried send resume'),
+        ),
+        migrations.AddField(
+            model_name='newsletteredition',
+            name='send_stats',
+            field=models.JSONField(blank=True, default=dict, help_text='Bulk mail timings: batch count, per-batch latency, messages per second'),
+        ),
+    ]
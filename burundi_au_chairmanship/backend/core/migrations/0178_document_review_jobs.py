@@ -0,0 +1,69 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0177_bulk_mail_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentReviewJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('finalizing', 'Finalizing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('memoised', models.PositiveIntegerField(default=0, help_text='Verdicts reused from DocumentVerdict')),
+                ('credentials', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Document Review Job',
+                'verbose_name_plural': 'Document Review Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the file content', max_length=64)),
+                ('document_type', models.CharField(max_length=20)),
+                ('spec', models.CharField(help_text='core.validators.AUTO_APPROVE_SPEC', max_length=10)),
+                ('file_name', models.CharField(db_index=True, help_text='Storage name it was last seen under', max_length=500)),
+                ('is_valid', models.BooleanField()),
+                ('reason', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Document Verdict',
+                'verbose_name_plural': 'Document Verdicts',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentverdict',
+            constraint=models.UniqueConstraint(fields=('content_hash', 'document_type', 'spec'), name='unique_document_verdict'),
+        ),
+        migrations.AddField(
+            model_name='documentreviewjob',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_review_jobs', to='core.youthdialogueevent'),
+        ),
+        migrations.AddField(
+            model_name='documentreviewjob',
+            name='requested_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='document_review_jobs', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:22
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    EventRegistration = apps.get_model('core', 'EventRegistration')
+    EventSubmission = apps.get_model('core', 'EventSubmission')
+    EventWaitlist = apps.get_model('core', 'EventWaitlist')
+    taken = (
+        EventSubmission.objects.filter(event_registration=OuterRef('pk'), is_waitlisted=False)
+        .order_by().values('event_registration').annotate(n=Count('pk')).values('n')
+    )
+    last = (
+        EventWaitlist.objects.filter(event_registration=OuterRef('pk'))
+        .order_by().values('event_registration').annotate(m=Max('position')).values('m')
+    )
+    EventRegistration.objects.update(
+        seats_taken=Coalesce(Subquery(taken), 0),
+        waitlist_seq=Coalesce(Subquery(last), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0178_document_review_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventregistration',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Non-waitlisted submissions (core/event_seats.py)'),
+        ),
+        migrations.AddField(
+            model_name='eventregistration',
+            name='waitlist_seq',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Last waitlist position handed out'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0180_outbox_messages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckinManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text="'event:<registration id>' or 'yd:<event id>'", max_length=40, unique=True)),
+                ('revision', models.PositiveBigIntegerField(default=0, editable=False)),
+                ('info', models.JSONField(blank=True, default=dict, help_text='Event title, venue, dates shown on scan results')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Check-in Manifest',
+                'verbose_name_plural': 'Check-in Manifests',
+            },
+        ),
+        migrations.AddField(
+            model_name='qrscanlog',
+            name='client_ref',
+            field=models.CharField(blank=True, help_text='Scanner-generated scan ID; a re-uploaded batch is stored once', max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='qrscanlog',
+            name='scanned_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Device time for uploaded offline scans'),
+        ),
+        migrations.CreateModel(
+            name='CheckinCredential',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=40)),
+                ('qr_type', models.CharField(choices=[('event', 'Event Ticket'), ('youth_dialogue', 'Continental Dialogue Credential')], max_length=20)),
+                ('code', models.CharField(help_text='Submission ID or participant code', max_length=100)),
+                ('qr_hash', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(help_text="Source status; 'removed' once the credential is gone", max_length=30)),
+                ('valid', models.BooleanField(default=True)),
+                ('role_color', models.CharField(blank=True, max_length=7)),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('organization', models.CharField(blank=True, max_length=200)),
+                ('role', models.CharField(blank=True, max_length=200)),
+                ('nationality', models.CharField(blank=True, max_length=100)),
+                ('details', models.JSONField(blank=True, default=dict)),
+                ('revision', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Check-in Credential',
+                'verbose_name_plural': 'Check-in Credentials',
+                'indexes': [models.Index(fields=['scope', 'revision'], name='core_checki_scope_a5faa2_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='checkincredential',
+            constraint=models.UniqueConstraint(fields=('qr_type', 'code'), name='checkin_credential_unique_code'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:55
+
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0181_checkin_manifests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdCardPrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template', models.CharField(choices=[('badge', 'Badge (3.5 × 5 in)'), ('cr80', 'Wallet card (CR80)')], default='badge', max_length=20)),
+                ('application_ids', models.JSONField(blank=True, default=list, help_text='Applications in print order')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('assembling', 'Assembling'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('rendered', models.PositiveIntegerField(default=0, help_text='Cards rendered by this job (the rest were reused)')),
+                ('cards', models.PositiveIntegerField(default=0, help_text='Cards placed on the sheet')),
+                ('pages', models.PositiveIntegerField(default=0)),
+                ('file', models.FileField(blank=True, storage=core.models._private_storage, upload_to='youth_dialogue/id_card_sheets/')),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='id_card_print_jobs', to='core.youthdialogueevent')),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='id_card_print_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'ID Card Print Job',
+                'verbose_name_plural': 'ID Card Print Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IdCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template', models.CharField(choices=[('badge', 'Badge (3.5 × 5 in)'), ('cr80', 'Wallet card (CR80)')], max_length=20)),
+                ('fingerprint', models.CharField(help_text='Template version, updated_at and drawn inputs', max_length=64)),
+                ('file', models.FileField(storage=core.models._private_storage, upload_to='youth_dialogue/id_cards/')),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='id_cards', to='core.youthdialogueapplication')),
+            ],
+            options={
+                'verbose_name': 'ID Card',
+                'verbose_name_plural': 'ID Cards',
+                'unique_together': {('application', 'template')},
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@ import logging
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.files.base import ContentFile
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
@@ -278,6 +280,9 @@ class MagazineEdition(models.Model):
         help_text='When to auto-publish this magazine (used when status=scheduled)'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Full-text search vectors, refreshed on save by core.search
+    search_vector_en = SearchVectorField(null=True, editable=False)
+    search_vector_fr = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-publish_date']
@@ -285,6 +290,8 @@ class MagazineEdition(models.Model):
             models.Index(fields=['-publish_date']),
             models.Index(fields=['is_featured', '-publish_date']),
             models.Index(fields=['status', '-publish_date']),
+            GinIndex(fields=['search_vector_en'], name='magazine_search_en_gin'),
+            GinIndex(fields=['search_vector_fr'], name='magazine_search_fr_gin'),
         ]
 
     def __str__(self):
@@ -447,6 +454,9 @@ class Article(models.Model):
     scheduled_publish_at = models.DateTimeField(null=True, blank=True, help_text='Legacy: Schedule article for future publication. If set and in the future, article is hidden from public API.')
     expires_at = models.DateTimeField(null=True, blank=True, help_text='Auto-archive article after this date. Expired articles are hidden from public API but remain in the database.')
     is_draft = models.BooleanField(default=False, help_text='Legacy: Draft articles are hidden from the public API until published.')
+    # Full-text search vectors, refreshed on save by core.search
+    search_vector_en = SearchVectorField(null=True, editable=False)
+    search_vector_fr = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-publish_date']
@@ -456,6 +466,8 @@ class Article(models.Model):
             models.Index(fields=['is_draft', '-publish_date']),
             models.Index(fields=['status', '-publish_date']),
             models.Index(fields=['content_type', '-publish_date']),
+            GinIndex(fields=['search_vector_en'], name='article_search_en_gin'),
+            GinIndex(fields=['search_vector_fr'], name='article_search_fr_gin'),
         ]
 
     def __str__(self):
@@ -708,6 +720,9 @@ class LiveFeed(models.Model):
     thumbnail = models.ImageField(upload_to='live_feeds/', blank=True, validators=[validate_image_file])
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='upcoming')
     viewer_count = models.IntegerField(default=0)
+    peak_viewers = models.PositiveIntegerField(
+        default=0, help_text='Highest concurrent viewer count seen on the WebSocket'
+    )
     view_count = models.PositiveIntegerField(default=0)
     duration = models.CharField(max_length=50, blank=True, help_text='e.g. 1h 30m')
     scheduled_time = models.DateTimeField(null=True, blank=True)
@@ -1081,6 +1096,8 @@ class EventRegistration(models.Model):
     is_registration_enabled = models.BooleanField(default=True, help_text='Enable/disable registration form')
     registration_deadline = models.DateTimeField(blank=True, null=True)
     max_registrations = models.IntegerField(default=0, help_text='0 = unlimited')
+    seats_taken = models.PositiveIntegerField(default=0, editable=False, help_text='Non-waitlisted submissions (core/event_seats.py)')
+    waitlist_seq = models.PositiveIntegerField(default=0, editable=False, help_text='Last waitlist position handed out')
     send_confirmation_email = models.BooleanField(default=True)
     confirmation_message = models.TextField(blank=True, help_text='Message sent to user after registration')
     confirmation_message_fr = models.TextField(blank=True)
@@ -1219,11 +1236,12 @@ class EventSubmission(models.Model):
         return self.qr_ticket_hash
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Auto-generate QR hash after first save (needs pk)
-        if not self.qr_ticket_hash and self.pk:
+        # Set before the INSERT so post_save (check-in index) already sees it.
+        if not self.qr_ticket_hash:
             self.generate_qr_hash()
-            EventSubmission.objects.filter(pk=self.pk).update(qr_ticket_hash=self.qr_ticket_hash)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'qr_ticket_hash'}
+        super().save(*args, **kwargs)
 
 
 class Notification(models.Model):
@@ -1282,6 +1300,15 @@ class Notification(models.Model):
         help_text='Specific users (optional, overrides filters)'
     )
 
+    target_segment = models.ForeignKey(
+        'UserSegment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notifications',
+        help_text='Deliver to the members of this segment (read from its membership snapshot)'
+    )
+
     # Advanced targeting filters (only used if is_global=False and target_users is empty)
     target_gender = models.CharField(
         max_length=20,
@@ -1382,6 +1409,14 @@ class Notification(models.Model):
         help_text='Number of devices that received the French version'
     )
     opened_count = models.IntegerField(default=0, help_text='Number of times users opened/tapped this notification')
+    push_checkpoint = models.JSONField(
+        default=dict, blank=True,
+        help_text='Fan-out cursor and running totals; lets a retried send resume'
+    )
+    push_stats = models.JSONField(
+        default=dict, blank=True,
+        help_text='Fan-out timings: batch count, per-batch latency, throughput'
+    )
 
     # Status
     is_active = models.BooleanField(default=True, help_text='Active notifications appear in app')
@@ -1479,6 +1514,53 @@ class DeviceToken(models.Model):
         return f"{username} - {self.token[:20]}... ({status})"
 
 
+class PushAudienceToken(models.Model):
+    """Denormalised push audience: one row per deliverable FCM token.
+
+    Built from active ``DeviceToken`` rows and legacy ``UserProfile.fcm_token``
+    values, with the owner's targeting attributes copied alongside so audience
+    estimates and token collection are single-table queries.  Maintained by
+    ``core.push_audience`` (signals + nightly rebuild); never edit by hand.
+    """
+    SOURCE_DEVICE = 'device'
+    SOURCE_LEGACY = 'legacy'
+    SOURCE_CHOICES = [
+        (SOURCE_DEVICE, 'Device token'),
+        (SOURCE_LEGACY, 'Legacy profile token'),
+    ]
+
+    token = models.CharField(max_length=255, unique=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default=SOURCE_DEVICE)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='+',
+        help_text='Empty for anonymous devices',
+    )
+    language = models.CharField(max_length=5, default='en', help_text='Language the push is sent in')
+    platform = models.CharField(max_length=10, blank=True, help_text="'android', 'ios' or empty if unknown")
+    gender = models.CharField(max_length=20, blank=True)
+    nationality = models.CharField(max_length=5, blank=True)
+    date_of_birth = models.DateField(null=True, blank=True)
+    is_verified = models.BooleanField(default=False)
+    badge_type = models.CharField(max_length=10, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Push Audience Token'
+        verbose_name_plural = 'Push Audience Tokens'
+        indexes = [
+            models.Index(fields=['user', 'language']),
+            models.Index(fields=['language', 'platform']),
+            models.Index(fields=['gender', 'language']),
+            models.Index(fields=['nationality']),
+            models.Index(fields=['is_verified', 'badge_type']),
+            models.Index(fields=['date_of_birth']),
+        ]
+
+    def __str__(self):
+        owner = self.user_id or 'anonymous'
+        return f"{owner} - {self.token[:20]}... ({self.language}/{self.platform or '?'})"
+
+
 class NotificationEvent(models.Model):
     """Per-recipient engagement events for a push Notification.
 
@@ -3528,6 +3610,14 @@ class EmailCampaign(models.Model):
     sent_count = models.PositiveIntegerField(default=0)
     failed_count = models.PositiveIntegerField(default=0)
     last_error = models.TextField(blank=True)
+    send_checkpoint = models.JSONField(
+        default=dict, blank=True,
+        help_text='Bulk mail cursor and running totals; lets a retried send resume'
+    )
+    send_stats = models.JSONField(
+        default=dict, blank=True,
+        help_text='Bulk mail timings: batch count, per-batch latency, messages per second'
+    )
 
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='email_campaigns')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -3581,6 +3671,50 @@ class EmailLog(models.Model):
         return f"{self.get_status_display()} → {self.recipients[:60]}"
 
 
+class OutboxMessage(models.Model):
+    """Email / push side effect written with the request's transaction; sent by core/outbox.py."""
+    KIND_EMAIL = 'email'
+    KIND_PUSH = 'push'
+    KIND_CHOICES = [
+        (KIND_EMAIL, 'Email'),
+        (KIND_PUSH, 'Push notification'),
+    ]
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    dedup_key = models.CharField(
+        max_length=200, unique=True, null=True, blank=True,
+        help_text='Enqueueing the same key twice keeps only the first message',
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(null=True, blank=True, help_text='Dropped if still unsent by then (e.g. OTP codes)')
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
 class Webhook(models.Model):
     """Webhook endpoints for external integrations."""
     EVENT_CHOICES = [
@@ -3606,17 +3740,58 @@ class Webhook(models.Model):
     is_active = models.BooleanField(default=True)
     last_triggered_at = models.DateTimeField(null=True, blank=True)
     failure_count = models.IntegerField(default=0)
+    circuit_open_until = models.DateTimeField(
+        null=True, blank=True,
+        help_text='Deliveries are held until then after repeated failures (core/webhooks.py)',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Webhook'
         verbose_name_plural = 'Webhooks'
+        indexes = [
+            GinIndex(fields=['events'], name='webhook_events_gin'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.url}"
 
 
+class WebhookDelivery(models.Model):
+    """One queued event for one webhook; attempted by Celery (core/webhooks.py)."""
+    STATUS_PENDING = 'pending'
+    STATUS_DELIVERED = 'delivered'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DELIVERED, 'Delivered'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='deliveries')
+    event = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Webhook Delivery'
+        verbose_name_plural = 'Webhook Deliveries'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['webhook', 'status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event} → webhook {self.webhook_id} ({self.status})"
+
+
 class WebhookLog(models.Model):
     """Log of webhook delivery attempts."""
     webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='logs')
@@ -3626,6 +3801,10 @@ class WebhookLog(models.Model):
     response_body = models.TextField(blank=True)
     success = models.BooleanField(default=False)
     duration_ms = models.IntegerField(null=True, blank=True, help_text='Request duration in milliseconds')
+    delivery = models.ForeignKey(
+        WebhookDelivery, on_delete=models.SET_NULL, null=True, blank=True, related_name='logs',
+        help_text='Queued delivery this attempt belongs to (empty for test pings)',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -3832,6 +4011,12 @@ class ContentAnalytics(models.Model):
         ('magazine', 'Magazine'),
         ('video', 'Video'),
         ('event', 'Event'),
+        ('livefeed', 'Live Feed'),
+        ('album', 'Gallery Album'),
+        ('resource', 'Resource'),
+        ('featurecard', 'Feature Card'),
+        ('agenda', 'Priority Agenda'),
+        ('discussion', 'Discussion'),
     ]
     content_type = models.CharField(max_length=20, choices=CONTENT_TYPE_CHOICES)
     content_id = models.PositiveIntegerField()
@@ -3874,6 +4059,42 @@ class EngagementHeatmap(models.Model):
         return f"{self.date} {self.hour}:00 - {self.active_users} users"
 
 
+class MetricSnapshot(models.Model):
+    """Pre-aggregated admin dashboard figure, written by ``core.metrics``.
+
+    ``day``/``hour`` rows hold the number of source rows created in that
+    bucket; ``gauge`` rows hold point-in-time totals, bucketed by the day they
+    were taken, with ``dimension`` set for breakdowns (e.g. per nationality).
+    """
+    PERIOD_HOUR = 'hour'
+    PERIOD_DAY = 'day'
+    PERIOD_GAUGE = 'gauge'
+    PERIOD_CHOICES = [
+        (PERIOD_HOUR, 'Hourly'),
+        (PERIOD_DAY, 'Daily'),
+        (PERIOD_GAUGE, 'Gauge'),
+    ]
+
+    metric = models.CharField(max_length=64)
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField(help_text='Start of the hour/day (local time)')
+    dimension = models.CharField(max_length=100, blank=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('metric', 'period', 'bucket', 'dimension')
+        verbose_name = 'Metric Snapshot'
+        verbose_name_plural = 'Metric Snapshots'
+        indexes = [
+            models.Index(fields=['period', '-bucket']),
+        ]
+
+    def __str__(self):
+        label = f"{self.metric}[{self.dimension}]" if self.dimension else self.metric
+        return f"{label} {self.period} {self.bucket:%Y-%m-%d %H:%M} = {self.value}"
+
+
 class WeeklyReport(models.Model):
     """Automated weekly analytics reports."""
     week_start = models.DateField()
@@ -4127,12 +4348,47 @@ class DatabaseBackup(models.Model):
         return f"{self.filename} ({self.get_status_display()})"
 
 
+class ExportJob(models.Model):
+    """A large admin export generated in the background (custom_admin/exports.py)."""
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, help_text='Key in custom_admin.exports.EXPORTS')
+    params = models.JSONField(default=dict, blank=True)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='exports/', storage=_private_storage, blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='export_jobs'
+    )
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+
+    def __str__(self):
+        return f"{self.kind} {self.file_format} export ({self.get_status_display()})"
+
+
 # ── User Segmentation ────────────────────────────────────────
 class UserSegment(models.Model):
     """
     Defines a user segment for targeted notifications and analytics.
-    Segments can be dynamic (filter-based, recalculated on access) or
-    static (manually curated membership list).
+    Segments can be dynamic (filter-based, materialised into a membership
+    snapshot) or static (manually curated membership list).
     """
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -4143,7 +4399,16 @@ class UserSegment(models.Model):
     )
     is_dynamic = models.BooleanField(
         default=True,
-        help_text='Dynamic segments recalculate members from filters on every access'
+        help_text='Dynamic segments are materialised from the filters and refreshed as profiles change'
+    )
+    member_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Size of the membership snapshot at the last refresh'
+    )
+    refreshed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the membership snapshot was last rebuilt (empty = needs a refresh)'
     )
     created_by = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, related_name='created_segments'
@@ -4161,16 +4426,21 @@ class UserSegment(models.Model):
 
     def get_users(self):
         """
-        Return a User queryset matching this segment.
-        Dynamic segments build a queryset from the JSON filters.
-        Static segments return users from UserSegmentMembership.
+        Return a User queryset of this segment's members.
+        Both kinds read UserSegmentMembership: the curated list for static
+        segments, the materialised snapshot for dynamic ones (built on
+        first use if it has never been refreshed).
         """
-        from datetime import date, timedelta
-        from django.db.models import Q
+        self._ensure_snapshot()
+        return User.objects.filter(segment_memberships__segment=self)
 
-        if not self.is_dynamic:
-            user_ids = self.memberships.values_list('user_id', flat=True)
-            return User.objects.filter(pk__in=user_ids)
+    def matching_users(self):
+        """
+        Evaluate the JSON filters live and return the matching User queryset.
+        Used to (re)build the snapshot and to preview unsaved filters.
+        """
+        from datetime import date
+        from django.db.models import Q
 
         filters = self.filters or {}
         qs = User.objects.all().select_related('profile')
@@ -4237,12 +4507,19 @@ class UserSegment(models.Model):
 
     def get_member_count(self):
         """Return the number of users in this segment."""
-        return self.get_users().count()
+        self._ensure_snapshot()
+        return self.member_count
+
+    def _ensure_snapshot(self):
+        if self.pk and self.refreshed_at is None:
+            from .segments import refresh_segment
+            refresh_segment(self)
 
 
 class UserSegmentMembership(models.Model):
     """
-    Tracks manual membership for static (non-dynamic) segments.
+    A segment member: curated for static segments, a row of the
+    materialised snapshot for dynamic ones (see core/segments.py).
     """
     segment = models.ForeignKey(
         UserSegment, on_delete=models.CASCADE, related_name='memberships'
@@ -4275,6 +4552,7 @@ class AdminNotification(models.Model):
         ('ticket_reply', 'Ticket Reply'),
         ('system_alert', 'System Alert'),
         ('content_flagged', 'Content Flagged'),
+        ('export_ready', 'Export Ready'),
     ]
 
     notification_type = models.CharField(
@@ -4456,6 +4734,36 @@ class LinkedAccount(models.Model):
         return f"{self.user.username} - {self.get_provider_display()} ({self.email or self.provider_uid})"
 
 
+# ── Image variant manifest ────────────────────────────────────
+class ImageVariantManifest(models.Model):
+    """Which size variants of a stored image exist (core/image_variants.py).
+
+    ``variants`` maps size -> format -> entry, e.g.
+    ``{"thumb": {"webp": {"name": "...", "bytes": 8123, "width": 300,
+    "height": 200, "hash": "9f2c..."}}}``, so serializers can build variant
+    URLs without touching storage and new sizes or formats need no migration.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    source_name = models.CharField(max_length=500, unique=True, help_text='Storage name of the original')
+    spec = models.CharField(max_length=20, help_text='image_utils.VARIANT_SPEC the variants were built with')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    variants = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Image Variant Manifest'
+        verbose_name_plural = 'Image Variant Manifests'
+
+    def __str__(self):
+        return f"{self.source_name} ({self.status})"
+
+
 # ── Auto-optimize images on upload ────────────────────────────
 def _auto_optimize_image(sender, instance, **kwargs):
     """Convert uploaded images to WebP on save for all core models."""
@@ -4701,6 +5009,14 @@ class NewsletterEdition(models.Model):
     body_html = models.TextField()
     sent_at = models.DateTimeField(null=True, blank=True)
     recipient_count = models.IntegerField(default=0)
+    send_checkpoint = models.JSONField(
+        default=dict, blank=True,
+        help_text='Bulk mail cursor and running totals; lets a retried send resume'
+    )
+    send_stats = models.JSONField(
+        default=dict, blank=True,
+        help_text='Bulk mail timings: batch count, per-batch latency, messages per second'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -5236,6 +5552,122 @@ class YouthDialogueDocument(models.Model):
         return f"{self.get_document_type_display()} - {self.application}"
 
 
+class DocumentVerdict(models.Model):
+    """Memoised auto-approve verdict for a document's content (custom_admin/doc_review.py)."""
+    content_hash = models.CharField(max_length=64, help_text='SHA-256 of the file content')
+    document_type = models.CharField(max_length=20)
+    spec = models.CharField(max_length=10, help_text='core.validators.AUTO_APPROVE_SPEC')
+    file_name = models.CharField(max_length=500, db_index=True, help_text='Storage name it was last seen under')
+    is_valid = models.BooleanField()
+    reason = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Document Verdict'
+        verbose_name_plural = 'Document Verdicts'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_hash', 'document_type', 'spec'], name='unique_document_verdict',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type} {self.content_hash[:12]}: {'valid' if self.is_valid else 'invalid'}"
+
+
+class DocumentReviewJob(models.Model):
+    """A background auto-approve run over an event's pending documents."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('finalizing', 'Finalizing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    event = models.ForeignKey(YouthDialogueEvent, on_delete=models.CASCADE, related_name='document_review_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    memoised = models.PositiveIntegerField(default=0, help_text='Verdicts reused from DocumentVerdict')
+    credentials = models.PositiveIntegerField(default=0)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='document_review_jobs'
+    )
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Document Review Job'
+        verbose_name_plural = 'Document Review Jobs'
+
+    def __str__(self):
+        return f"Auto-approve {self.event_id}: {self.processed}/{self.total} ({self.get_status_display()})"
+
+
+class IdCard(models.Model):
+    """A rendered participant ID card PDF, reused until its fingerprint changes (core/id_cards.py)."""
+    TEMPLATE_CHOICES = [
+        ('badge', 'Badge (3.5 × 5 in)'),
+        ('cr80', 'Wallet card (CR80)'),
+    ]
+
+    application = models.ForeignKey(YouthDialogueApplication, on_delete=models.CASCADE, related_name='id_cards')
+    template = models.CharField(max_length=20, choices=TEMPLATE_CHOICES)
+    fingerprint = models.CharField(max_length=64, help_text='Template version, updated_at and drawn inputs')
+    file = models.FileField(upload_to='youth_dialogue/id_cards/', storage=_private_storage)
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('application', 'template')
+        verbose_name = 'ID Card'
+        verbose_name_plural = 'ID Cards'
+
+    def __str__(self):
+        return f"{self.get_template_display()} for application {self.application_id}"
+
+
+class IdCardPrintJob(models.Model):
+    """A background print sheet: the selected ID cards laid out N per A4 page."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('assembling', 'Assembling'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    event = models.ForeignKey(YouthDialogueEvent, on_delete=models.CASCADE, related_name='id_card_print_jobs')
+    template = models.CharField(max_length=20, choices=IdCard.TEMPLATE_CHOICES, default='badge')
+    application_ids = models.JSONField(default=list, blank=True, help_text='Applications in print order')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0, help_text='Cards rendered by this job (the rest were reused)')
+    cards = models.PositiveIntegerField(default=0, help_text='Cards placed on the sheet')
+    pages = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='youth_dialogue/id_card_sheets/', storage=_private_storage, blank=True)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='id_card_print_jobs'
+    )
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'ID Card Print Job'
+        verbose_name_plural = 'ID Card Print Jobs'
+
+    def __str__(self):
+        return f"ID cards {self.event_id}: {self.processed}/{self.total} ({self.get_status_display()})"
+
+
 class YouthDialogueActivityLog(models.Model):
     """Activity tracking for the Continental Dialogue feature."""
 
@@ -5284,9 +5716,13 @@ class QRScanLog(models.Model):
     qr_type = models.CharField(max_length=20, choices=QR_TYPE_CHOICES)
     reference_id = models.CharField(max_length=100, db_index=True, help_text='Submission ID or participant code')
     scanned_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='qr_scans')
-    scanned_at = models.DateTimeField(auto_now_add=True)
+    scanned_at = models.DateTimeField(default=timezone.now, help_text='Device time for uploaded offline scans')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     is_duplicate = models.BooleanField(default=False)
+    client_ref = models.CharField(
+        max_length=64, unique=True, null=True, blank=True,
+        help_text='Scanner-generated scan ID; a re-uploaded batch is stored once',
+    )
 
     class Meta:
         ordering = ['-scanned_at']
@@ -5300,6 +5736,54 @@ class QRScanLog(models.Model):
         return f"{self.get_qr_type_display()} scan: {self.reference_id} at {self.scanned_at}"
 
 
+class CheckinManifest(models.Model):
+    """Per-event revision counter and header of the gate check-in manifest (core/checkin.py)."""
+    scope = models.CharField(max_length=40, unique=True, help_text="'event:<registration id>' or 'yd:<event id>'")
+    revision = models.PositiveBigIntegerField(default=0, editable=False)
+    info = models.JSONField(default=dict, blank=True, help_text='Event title, venue, dates shown on scan results')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Check-in Manifest'
+        verbose_name_plural = 'Check-in Manifests'
+
+    def __str__(self):
+        return f"{self.scope} @ {self.revision}"
+
+
+class CheckinCredential(models.Model):
+    """One scannable ticket / credential as gate scanners see it; maintained by core/checkin.py."""
+    STATUS_REMOVED = 'removed'
+
+    scope = models.CharField(max_length=40)
+    qr_type = models.CharField(max_length=20, choices=QRScanLog.QR_TYPE_CHOICES)
+    code = models.CharField(max_length=100, help_text='Submission ID or participant code')
+    qr_hash = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=30, help_text="Source status; 'removed' once the credential is gone")
+    valid = models.BooleanField(default=True)
+    role_color = models.CharField(max_length=7, blank=True)
+    name = models.CharField(max_length=200, blank=True)
+    organization = models.CharField(max_length=200, blank=True)
+    role = models.CharField(max_length=200, blank=True)
+    nationality = models.CharField(max_length=100, blank=True)
+    details = models.JSONField(default=dict, blank=True)
+    revision = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Check-in Credential'
+        verbose_name_plural = 'Check-in Credentials'
+        constraints = [
+            models.UniqueConstraint(fields=['qr_type', 'code'], name='checkin_credential_unique_code'),
+        ]
+        indexes = [
+            models.Index(fields=['scope', 'revision']),
+        ]
+
+    def __str__(self):
+        return f"{self.qr_type}:{self.code} ({self.status})"
+
+
 class DeviceBan(models.Model):
     """Tracks device-level comment bans that persist across accounts."""
     device_id = models.CharField(max_length=255, unique=True, db_index=True)
@@ -5382,6 +5866,36 @@ class ProfanityStrikeLog(models.Model):
         return f"Strike #{self.strike_number} by {self.user} — {'BAN' if self.resulted_in_ban else 'warning'}"
 
 
+class ProfanityWord(models.Model):
+    """Admin-managed addition to (or exemption from) the built-in profanity list."""
+    ACTION_BLOCK = 'block'
+    ACTION_ALLOW = 'allow'
+    ACTION_CHOICES = [
+        (ACTION_BLOCK, 'Block'),
+        (ACTION_ALLOW, 'Allow (exempt a built-in word)'),
+    ]
+    LANGUAGE_CHOICES = [
+        ('en', 'English'),
+        ('fr', 'French'),
+        ('other', 'Other'),
+    ]
+    word = models.CharField(max_length=100, unique=True, help_text='Word or phrase; matching ignores case and accents')
+    language = models.CharField(max_length=10, choices=LANGUAGE_CHOICES, default='en')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default=ACTION_BLOCK)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['word']
+        verbose_name = 'Profanity Word'
+        verbose_name_plural = 'Profanity Words'
+
+    def __str__(self):
+        return f"{self.word} ({self.get_action_display()})"
+
+
 class PhrasebookEntry(models.Model):
     """A Kirundi/English/French phrase for the phrasebook (translate) screen."""
     CATEGORY_CHOICES = [
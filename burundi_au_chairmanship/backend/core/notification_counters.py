@@ -0,0 +1,369 @@
+"""
+Incrementally maintained unread-notification counters.
+
+The badge used to be recomputed with ``(is_global | target_users=user)
+.distinct().exclude(read_by=user).count()`` over the whole notification
+table on every badge read, mark-read response and WebSocket connect.  It is
+now derived from three counters kept in one Redis hash
+(``burundi_au:notif_unread``):
+
+  ``g``          active global notifications (shared by everyone)
+  ``r:<uid>``    active global notifications the user has read
+  ``t:<uid>``    active targeted (non-global) notifications the user
+                 has *not* read (``target_users``; segment notifications
+                 record their members there when sent)
+
+so ``unread = g - r + t`` is a single ``HMGET``.  Per-user fields are seeded
+from the database the first time a user's badge is read; increments only
+touch fields that already exist (a Lua ``HEXISTS``/``HINCRBY`` pair), so an
+unseeded user can never hold a partial count.
+
+Signals in ``core/signals.py`` keep the counters current when a notification
+is created, activated/deactivated, switched between global and targeted,
+deleted, targeted at users or read; ``segments.record_recipients`` reports
+the rows it inserts through ``targets_changed``.  Writes that bypass signals (queryset
+``update()``, raw through-table inserts, cascades from deleted users) leave
+drift that ``reconcile_unread_counters`` — run periodically from Celery beat —
+recomputes with a few grouped queries per chunk of users.
+
+Without django-redis an in-process dict stands in for the hash.
+"""
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HASH_KEY = 'burundi_au:notif_unread'
+GLOBAL_FIELD = 'g'
+RECONCILE_CHUNK = 1000
+INCR_CHUNK = 1000
+
+# HINCRBY only fields that already exist; ARGV is field, delta, field, delta...
+_INCR_EXISTING_LUA = """
+for i = 1, #ARGV, 2 do
+  if redis.call('HEXISTS', KEYS[1], ARGV[i]) == 1 then
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+  end
+end
+return 1
+"""
+
+
+def _redis():
+    """Raw Redis client when the default cache is django-redis, else None."""
+    if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+        return None
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception:
+        return None
+
+
+def _read_field(user_id):
+    return f'r:{user_id}'
+
+
+def _target_field(user_id):
+    return f't:{user_id}'
+
+
+# ── Storage ─────────────────────────────────────────────────────
+
+class _LocalStore:
+    """Dict stand-in for the Redis hash (single-process dev/tests)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def get(self, fields):
+        with self.lock:
+            return [self.data.get(f) for f in fields]
+
+    def setnx(self, mapping):
+        with self.lock:
+            for field, value in mapping.items():
+                self.data.setdefault(field, value)
+
+    def set(self, mapping):
+        with self.lock:
+            self.data.update(mapping)
+
+    def incr_existing(self, deltas):
+        with self.lock:
+            for field, delta in deltas.items():
+                if field in self.data:
+                    self.data[field] += delta
+
+    def delete(self, fields):
+        with self.lock:
+            for field in fields:
+                self.data.pop(field, None)
+
+    def fields(self):
+        with self.lock:
+            return list(self.data)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class _RedisStore:
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, fields):
+        return [None if v is None else int(v) for v in self.client.hmget(HASH_KEY, fields)]
+
+    def setnx(self, mapping):
+        pipe = self.client.pipeline()
+        for field, value in mapping.items():
+            pipe.hsetnx(HASH_KEY, field, value)
+        pipe.execute()
+
+    def set(self, mapping):
+        if mapping:
+            self.client.hset(HASH_KEY, mapping=mapping)
+
+    def incr_existing(self, deltas):
+        items = [x for field, delta in deltas.items() for x in (field, delta)]
+        for i in range(0, len(items), INCR_CHUNK * 2):
+            self.client.eval(_INCR_EXISTING_LUA, 1, HASH_KEY, *items[i:i + INCR_CHUNK * 2])
+
+    def delete(self, fields):
+        if fields:
+            self.client.hdel(HASH_KEY, *fields)
+
+    def fields(self):
+        return [f.decode() if isinstance(f, bytes) else f
+                for f, _ in self.client.hscan_iter(HASH_KEY, count=1000)]
+
+
+_local = _LocalStore()
+
+
+def _store():
+    client = _redis()
+    return _RedisStore(client) if client is not None else _local
+
+
+# ── Database truth ──────────────────────────────────────────────
+
+def _db_global_total():
+    from .models import Notification
+    return Notification.objects.filter(is_active=True, is_global=True).count()
+
+
+def _targeted_pairs(user_ids=None, **notification):
+    """``(notification_id, user_id)`` target rows.
+
+    ``notification`` holds lookups on Notification, e.g. ``pk__in=[...]``.
+    """
+    from .models import Notification
+
+    direct = Notification.target_users.through.objects.filter(
+        **{f'notification__{k}': v for k, v in notification.items()}
+    )
+    if user_ids is not None:
+        direct = direct.filter(user_id__in=user_ids)
+    return set(direct.values_list('notification_id', 'user_id'))
+
+
+def _db_user_counts(user_ids):
+    """``{uid: (global_read, targeted_unread)}`` from a few grouped queries."""
+    from django.db.models import Count
+    from .models import Notification
+
+    reads = Notification.read_by.through.objects
+    counts = {uid: [0, 0] for uid in user_ids}
+    for row in reads.filter(
+        user_id__in=user_ids, notification__is_active=True, notification__is_global=True,
+    ).values('user_id').annotate(n=Count('notification_id', distinct=True)):
+        counts[row['user_id']][0] = row['n']
+    targeted = _targeted_pairs(user_ids, is_active=True, is_global=False)
+    if targeted:
+        targeted -= set(reads.filter(
+            user_id__in=user_ids, notification__is_active=True, notification__is_global=False,
+        ).values_list('notification_id', 'user_id'))
+    for _, uid in targeted:
+        counts[uid][1] += 1
+    return {uid: tuple(c) for uid, c in counts.items()}
+
+
+# ── Reads ───────────────────────────────────────────────────────
+
+def unread_count(user_id):
+    """Unread badge for a user: one hash read once the user is seeded."""
+    fields = [GLOBAL_FIELD, _read_field(user_id), _target_field(user_id)]
+    try:
+        store = _store()
+        values = store.get(fields)
+        if None in values:
+            seed = {}
+            if values[0] is None:
+                seed[GLOBAL_FIELD] = _db_global_total()
+            if values[1] is None or values[2] is None:
+                read, targeted = _db_user_counts([user_id])[user_id]
+                seed[fields[1]], seed[fields[2]] = read, targeted
+            store.setnx(seed)
+            values = store.get(fields)
+        g, r, t = (v or 0 for v in values)
+    except Exception:
+        logger.warning('Unread counter store unavailable; counting in the DB', exc_info=True)
+        g = _db_global_total()
+        r, t = _db_user_counts([user_id])[user_id]
+    return max(0, g - r + t)
+
+
+# ── Writes ──────────────────────────────────────────────────────
+
+def _apply(deltas):
+    deltas = {f: d for f, d in deltas.items() if d}
+    if not deltas:
+        return
+    try:
+        _store().incr_existing(deltas)
+    except Exception:
+        # The reconciler will repair the drift.
+        logger.warning('Could not update unread counters', exc_info=True)
+
+
+def _add(deltas, field, delta):
+    deltas[field] = deltas.get(field, 0) + delta
+
+
+def _contribution(notification_id, is_active, is_global, sign, deltas):
+    """Add (sign=+1) or remove (sign=-1) one notification's effect on badges."""
+    from .models import Notification
+
+    if not is_active:
+        return
+    readers = set(Notification.read_by.through.objects.filter(
+        notification_id=notification_id,
+    ).values_list('user_id', flat=True))
+    if is_global:
+        _add(deltas, GLOBAL_FIELD, sign)
+        for uid in readers:
+            _add(deltas, _read_field(uid), sign)
+        return
+    for _, uid in _targeted_pairs(pk=notification_id):
+        if uid not in readers:
+            _add(deltas, _target_field(uid), sign)
+
+
+def notification_state_changed(notification_id, old_state, new_state):
+    """``old_state``/``new_state`` are ``(is_active, is_global)`` or None."""
+    if old_state == new_state:
+        return
+    deltas = {}
+    if old_state is not None:
+        _contribution(notification_id, *old_state, -1, deltas)
+    if new_state is not None:
+        _contribution(notification_id, *new_state, +1, deltas)
+    _apply(deltas)
+
+
+def _pair_context(pairs):
+    from .models import Notification
+
+    notification_ids = {n for n, _ in pairs}
+    user_ids = {u for _, u in pairs}
+    states = {
+        pk: (active, is_global) for pk, active, is_global in Notification.objects.filter(
+            pk__in=notification_ids,
+        ).values_list('pk', 'is_active', 'is_global')
+    }
+    return notification_ids, user_ids, states
+
+
+def targets_changed(pairs, sign):
+    """(notification_id, user_id) targeting rows were added (+1) or removed (-1)."""
+    from .models import Notification
+
+    pairs = set(pairs)
+    if not pairs:
+        return
+    notification_ids, user_ids, states = _pair_context(pairs)
+    read = set(Notification.read_by.through.objects.filter(
+        notification_id__in=notification_ids, user_id__in=user_ids,
+    ).values_list('notification_id', 'user_id'))
+    deltas = {}
+    for pair in pairs:
+        active, is_global = states.get(pair[0], (False, False))
+        if active and not is_global and pair not in read:
+            _add(deltas, _target_field(pair[1]), sign)
+    _apply(deltas)
+
+
+def reads_changed(pairs, sign):
+    """(notification_id, user_id) read rows were added (+1) or removed (-1)."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    notification_ids, user_ids, states = _pair_context(pairs)
+    targeted = _targeted_pairs(user_ids, pk__in=notification_ids)
+    deltas = {}
+    for pair in pairs:
+        active, is_global = states.get(pair[0], (False, False))
+        if not active:
+            continue
+        if is_global:
+            _add(deltas, _read_field(pair[1]), sign)
+        elif pair in targeted:
+            _add(deltas, _target_field(pair[1]), -sign)
+    _apply(deltas)
+
+
+def mark_all_read(user_id):
+    """Zero a user's badge after every visible notification was marked read."""
+    try:
+        store = _store()
+        g = store.get([GLOBAL_FIELD])[0]
+        if g is None:
+            store.delete([_read_field(user_id), _target_field(user_id)])
+        else:
+            store.set({_read_field(user_id): g, _target_field(user_id): 0})
+    except Exception:
+        logger.warning('Could not reset unread counters for user %s', user_id, exc_info=True)
+
+
+# ── Reconciliation ──────────────────────────────────────────────
+
+def reconcile_unread_counters():
+    """Recompute every seeded counter from the DB. Returns fields corrected."""
+    from django.contrib.auth.models import User
+
+    store = _store()
+    user_ids = sorted({
+        int(f[2:]) for f in store.fields() if f[:2] in ('r:', 't:') and f[2:].isdigit()
+    })
+    corrected = 0
+    g = _db_global_total()
+    if store.get([GLOBAL_FIELD])[0] != g:
+        corrected += 1
+    store.set({GLOBAL_FIELD: g})
+
+    for i in range(0, len(user_ids), RECONCILE_CHUNK):
+        chunk = user_ids[i:i + RECONCILE_CHUNK]
+        existing = set(User.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+        gone = [f(uid) for uid in chunk if uid not in existing for f in (_read_field, _target_field)]
+        store.delete(gone)
+
+        truth = _db_user_counts(sorted(existing))
+        fields = [f(uid) for uid in sorted(existing) for f in (_read_field, _target_field)]
+        current = dict(zip(fields, store.get(fields))) if fields else {}
+        mapping = {}
+        for uid, (read, targeted) in truth.items():
+            mapping[_read_field(uid)] = read
+            mapping[_target_field(uid)] = targeted
+        corrected += sum(1 for f, v in mapping.items() if current.get(f) != v) + len(gone)
+        store.set(mapping)
+
+    if corrected:
+        logger.info('Reconciled %d unread counter field(s)', corrected)
+    return corrected
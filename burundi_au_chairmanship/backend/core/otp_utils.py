@@ -1,54 +1,41 @@
-"""OTP utility functions for email verification"""
+"""OTP utility functions for email verification.
+
+OTP emails are queued on the outbox (core/outbox.py) with the OTP record:
+they expire with the code and their payload is cleared once sent, so the
+plaintext code does not outlive the send.
+"""
 import hashlib
 import logging
 import secrets
 import string
 from datetime import timedelta
-from smtplib import SMTPAuthenticationError, SMTPException
-from django.core.mail import EmailMultiAlternatives, send_mail, get_connection
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import F as models_F
+from . import outbox
 from .models import OTPVerification
 
 logger = logging.getLogger(__name__)
 
 MAX_OTP_ATTEMPTS = 5
+OTP_TTL = 600  # seconds
 
 
-def _send_mail_with_fallback(subject, message, from_email, recipient_list):
-    """
-    Try sending via the primary SMTP backend. On authentication or
-    connection failure, automatically retry via the fallback SMTP server.
-    """
-    try:
-        send_mail(subject, message, from_email, recipient_list, fail_silently=False)
-        return
-    except (SMTPAuthenticationError, ConnectionRefusedError, OSError) as primary_err:
-        fallback_host = getattr(settings, 'FALLBACK_EMAIL_HOST', '')
-        fallback_password = getattr(settings, 'FALLBACK_EMAIL_HOST_PASSWORD', '')
-        if not fallback_host or not fallback_password:
-            raise  # no fallback configured, propagate original error
-
-        logger.warning(
-            'Primary SMTP failed (%s), retrying with fallback %s',
-            primary_err, fallback_host,
-        )
-
-        fallback_from = getattr(settings, 'FALLBACK_FROM_EMAIL', from_email)
-        connection = get_connection(
-            backend='django.core.mail.backends.smtp.EmailBackend',
-            host=fallback_host,
-            port=getattr(settings, 'FALLBACK_EMAIL_PORT', 465),
-            username=getattr(settings, 'FALLBACK_EMAIL_HOST_USER', ''),
-            password=fallback_password,
-            use_tls=getattr(settings, 'FALLBACK_EMAIL_USE_TLS', False),
-            use_ssl=getattr(settings, 'FALLBACK_EMAIL_USE_SSL', True),
-        )
-        send_mail(
-            subject, message, fallback_from, recipient_list,
-            fail_silently=False, connection=connection,
-        )
+def queue_otp_email(email, name, otp_code, dedup_key=None):
+    """Queue the verification-code email; dropped if unsent when the code expires."""
+    subject = 'Be 4 Africa - Email Verification OTP'
+    message = (
+        f'Hello {name},\n\n'
+        f'Your email verification OTP code is: {otp_code}\n\n'
+        f'This code will expire in 10 minutes.\n\n'
+        f'If you did not request this code, please ignore this email.\n\n'
+        f'Best regards,\n'
+        f'Be 4 Africa Team'
+    )
+    return outbox.queue_email(
+        [email], subject, body=message, dedup_key=dedup_key, expires_in=OTP_TTL, redact=True,
+    )
 
 
 def _hash_otp(code) -> str:
@@ -66,70 +53,45 @@ def send_email_otp(user, email):
     Send OTP to email address.
     Returns (success, message, otp_id)
     """
-    try:
-        # Invalidate all previous unverified OTPs for this user+email
-        OTPVerification.objects.filter(
-            user=user, type='email', contact=email, is_verified=False
-        ).update(is_verified=True)
-
-        # Generate OTP
-        otp_code = generate_otp()
-
-        # Create OTP record (store SHA-256 hash, never plaintext)
-        otp = OTPVerification.objects.create(
-            user=user,
-            type='email',
-            contact=email,
-            otp_code=_hash_otp(otp_code),
-            expires_at=timezone.now() + timedelta(minutes=10)
-        )
-
-        # Build email content
-        subject = 'Be 4 Africa - Email Verification OTP'
-        message = (
-            f'Hello {user.username},\n\n'
-            f'Your email verification OTP code is: {otp_code}\n\n'
-            f'This code will expire in 10 minutes.\n\n'
-            f'If you did not request this code, please ignore this email.\n\n'
-            f'Best regards,\n'
-            f'Be 4 Africa Team'
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
+    if not from_email:
+        logger.error('DEFAULT_FROM_EMAIL is not configured')
+        return False, 'Email sending is not configured. Please contact support.', None
+
+    # Verify email configuration before sending
+    backend = getattr(settings, 'EMAIL_BACKEND', '')
+    if 'console' in backend.lower():
+        logger.warning(
+            'EMAIL_BACKEND is set to console - OTP emails will only appear '
+            'in the server log. Set EMAIL_BACKEND to '
+            'django.core.mail.backends.smtp.EmailBackend for production.'
         )
 
-        # Verify email configuration before sending
-        backend = getattr(settings, 'EMAIL_BACKEND', '')
-        if 'console' in backend.lower():
-            logger.warning(
-                'EMAIL_BACKEND is set to console - OTP emails will only appear '
-                'in the server log. Set EMAIL_BACKEND to '
-                'django.core.mail.backends.smtp.EmailBackend for production.'
+    try:
+        with transaction.atomic():
+            # Invalidate all previous unverified OTPs for this user+email
+            OTPVerification.objects.filter(
+                user=user, type='email', contact=email, is_verified=False
+            ).update(is_verified=True)
+
+            # Generate OTP
+            otp_code = generate_otp()
+
+            # Create OTP record (store SHA-256 hash, never plaintext)
+            otp = OTPVerification.objects.create(
+                user=user,
+                type='email',
+                contact=email,
+                otp_code=_hash_otp(otp_code),
+                expires_at=timezone.now() + timedelta(seconds=OTP_TTL)
             )
+            queue_otp_email(email, user.username, otp_code, dedup_key=f'otp:{otp.pk}')
 
-        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
-        if not from_email:
-            logger.error('DEFAULT_FROM_EMAIL is not configured')
-            return False, 'Email sending is not configured. Please contact support.', None
-
-        _send_mail_with_fallback(subject, message, from_email, [email])
-
-        logger.info(f'OTP email sent to {email} for user {user.pk}')
+        logger.info(f'OTP email queued for {email} for user {user.pk}')
         return True, 'OTP sent successfully', otp.id
 
-    except ConnectionRefusedError:
-        logger.error(
-            'SMTP connection refused. Check EMAIL_HOST (%s) and EMAIL_PORT (%s).',
-            getattr(settings, 'EMAIL_HOST', '(not set)'),
-            getattr(settings, 'EMAIL_PORT', '(not set)'),
-        )
-        return False, 'Email server is unreachable. Please try again later or contact support.', None
     except Exception as e:
-        logger.exception('Failed to send email OTP: %s', e)
-        error_detail = str(e)
-        if 'authentication' in error_detail.lower():
-            return False, 'Email authentication failed. Please contact support.', None
-        elif 'timed out' in error_detail.lower() or 'timeout' in error_detail.lower():
-            return False, 'Email server timed out. Please try again later.', None
-        elif 'ssl' in error_detail.lower() or 'certificate' in error_detail.lower():
-            return False, 'Email SSL/TLS error. Please contact support.', None
+        logger.exception('Failed to queue email OTP: %s', e)
         return False, 'Failed to send verification code. Please try again.', None
 
 
@@ -139,45 +101,17 @@ def send_pending_email_otp(email, name):
     No User object required — OTP is stored in the Django cache, not the DB.
     Returns (success, message).
     """
-    try:
-        otp_code = generate_otp()
-
-        subject = 'Be 4 Africa - Email Verification OTP'
-        message = (
-            f'Hello {name},\n\n'
-            f'Your email verification OTP code is: {otp_code}\n\n'
-            f'This code will expire in 10 minutes.\n\n'
-            f'If you did not request this code, please ignore this email.\n\n'
-            f'Best regards,\n'
-            f'Be 4 Africa Team'
-        )
-
-        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
-        if not from_email:
-            logger.error('DEFAULT_FROM_EMAIL is not configured')
-            return False, 'Email sending is not configured. Please contact support.'
-
-        _send_mail_with_fallback(subject, message, from_email, [email])
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
+    if not from_email:
+        logger.error('DEFAULT_FROM_EMAIL is not configured')
+        return False, 'Email sending is not configured. Please contact support.'
 
-        logger.info('Pending signup OTP email sent to %s', email)
+    try:
+        queue_otp_email(email, name, generate_otp())
+        logger.info('Pending signup OTP email queued for %s', email)
         return True, 'OTP sent successfully'
-
-    except ConnectionRefusedError:
-        logger.error(
-            'SMTP connection refused. Check EMAIL_HOST (%s) and EMAIL_PORT (%s).',
-            getattr(settings, 'EMAIL_HOST', '(not set)'),
-            getattr(settings, 'EMAIL_PORT', '(not set)'),
-        )
-        return False, 'Email server is unreachable. Please try again later or contact support.'
     except Exception as e:
-        logger.exception('Failed to send pending signup OTP: %s', e)
-        error_detail = str(e)
-        if 'authentication' in error_detail.lower():
-            return False, 'Email authentication failed. Please contact support.'
-        elif 'timed out' in error_detail.lower() or 'timeout' in error_detail.lower():
-            return False, 'Email server timed out. Please try again later.'
-        elif 'ssl' in error_detail.lower() or 'certificate' in error_detail.lower():
-            return False, 'Email SSL/TLS error. Please contact support.'
+        logger.exception('Failed to queue pending signup OTP: %s', e)
         return False, 'Failed to send verification code. Please try again.'
 
 
@@ -0,0 +1,322 @@
+"""
+Transactional outbox for email and push side effects.
+
+Request handlers used to talk to SMTP and FCM inline (or from fire-and-forget
+threads): the response waited on the mail server, and a failed send left
+nothing behind but a log line.  They now call ``queue_email`` /
+``queue_push``, which write an ``OutboxMessage`` row in the caller's
+transaction — the side effect exists if and only if the change that caused
+it commits.
+
+After commit a drain is started: the ``dispatch_outbox`` Celery task, or,
+when Celery runs eagerly (no broker), a short-lived daemon thread so the
+request still returns before the send.  A drain takes due messages in
+batches of ``OUTBOX_BATCH_SIZE``: emails share one SMTP session per
+connection, identical pushes are merged into one multicast.  Failures are
+retried with exponential backoff up to ``OUTBOX_MAX_ATTEMPTS`` and then kept
+as ``failed`` rows (Django admin → Outbox Messages).  A ``dedup_key`` makes
+enqueueing idempotent; ``expires_at`` drops messages that are useless late
+(OTP codes).  The ``dispatch-outbox`` beat entry picks up retries.
+
+Usage:
+    from core import outbox
+    outbox.queue_email([user.email], 'Subject', body='Plain text', html='<p>…</p>')
+    outbox.queue_push([user.pk], 'Title', 'Body', {'type': 'support_reply'})
+"""
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DRAIN_LOCK = 'outbox-drain'
+DRAIN_LOCK_TTL = 300  # CELERY_TASK_TIME_LIMIT
+DRAIN_ROUNDS = 20
+
+
+def _enqueue(kind, payload, dedup_key=None, expires_in=None):
+    from core.models import OutboxMessage
+
+    message = OutboxMessage(
+        kind=kind,
+        payload=payload,
+        dedup_key=dedup_key[:200] if dedup_key else None,
+        expires_at=timezone.now() + timedelta(seconds=expires_in) if expires_in else None,
+    )
+    # ON CONFLICT DO NOTHING: a duplicate key is skipped without breaking the caller's transaction.
+    OutboxMessage.objects.bulk_create([message], ignore_conflicts=dedup_key is not None)
+    transaction.on_commit(_start_drain)
+    return message
+
+
+def queue_email(to, subject, body='', html='', from_email=None, connection='default',
+                inline_images=(), dedup_key=None, expires_in=None, redact=False):
+    """
+    Queue one email.
+
+    Args:
+        to: recipient addresses
+        body / html: plain text and/or HTML (HTML only → sent as text/html)
+        connection: 'default' (EMAIL_BACKEND) or 'support' (FALLBACK_EMAIL_* SMTP)
+        inline_images: ``[(cid, storage_name), ...]`` embedded as ``cid:`` parts
+        expires_in: seconds after which an unsent message is dropped
+        redact: clear the payload once the message is sent or given up (secrets)
+    """
+    payload = {
+        'to': list(to),
+        'subject': subject,
+        'body': body,
+        'html': html,
+        'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+        'connection': connection,
+        'inline_images': [list(image) for image in inline_images],
+        'redact': redact,
+    }
+    return _enqueue('email', payload, dedup_key, expires_in)
+
+
+def queue_push(user_ids, title, body, data=None, dedup_key=None):
+    """Queue a push notification to every active device of ``user_ids``."""
+    payload = {
+        'user_ids': list(user_ids),
+        'title': title,
+        'body': body,
+        'data': {k: str(v) for k, v in (data or {}).items()},
+    }
+    return _enqueue('push', payload, dedup_key)
+
+
+# ── Dispatch ─────────────────────────────────────────────────────
+
+
+def _drain_in_background():
+    from django.db import connection
+    try:
+        drain()
+    except Exception:
+        logger.exception('Background outbox drain failed')
+    finally:
+        connection.close()
+
+
+def _start_drain():
+    try:
+        if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False) and settings.OUTBOX_BACKGROUND_DRAIN:
+            threading.Thread(target=_drain_in_background, name='outbox-drain', daemon=True).start()
+        else:
+            from core.tasks import dispatch_outbox
+            dispatch_outbox.delay()
+    except Exception:
+        # The row is committed; the beat task will send it.
+        logger.exception('Failed to start outbox drain')
+
+
+def _due():
+    from core.models import OutboxMessage
+    return OutboxMessage.objects.filter(
+        status=OutboxMessage.STATUS_PENDING, next_attempt_at__lte=timezone.now(),
+    )
+
+
+def drain():
+    """Send due messages, one locked batch per round. Returns the number handled."""
+    handled = 0
+    for _ in range(DRAIN_ROUNDS):
+        if not cache.add(DRAIN_LOCK, 1, DRAIN_LOCK_TTL):
+            # The running drain re-checks the queue before it stops.
+            return handled
+        try:
+            batch = list(_due().order_by('pk')[:max(1, settings.OUTBOX_BATCH_SIZE)])
+            if batch:
+                _process(batch)
+        finally:
+            cache.delete(DRAIN_LOCK)
+        handled += len(batch)
+        if not _due().exists():
+            return handled
+    _start_drain()  # still busy: continue in a fresh task
+    return handled
+
+
+def retry(queryset):
+    """Give unsent messages a fresh set of attempts (Django admin action). Returns the count."""
+    from core.models import OutboxMessage
+
+    # Redacted payloads (OTP codes) are gone and cannot be resent.
+    count = (
+        queryset.exclude(status=OutboxMessage.STATUS_SENT).exclude(payload={'redact': True})
+        .update(status=OutboxMessage.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now())
+    )
+    if count:
+        transaction.on_commit(_start_drain)
+    return count
+
+
+def _backoff(attempts):
+    return min(settings.OUTBOX_RETRY_BASE * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX)
+
+
+def _process(batch):
+    from core.models import OutboxMessage
+
+    now = timezone.now()
+    expired = {m.pk for m in batch if m.expires_at and m.expires_at <= now}
+    live = [m for m in batch if m.pk not in expired]
+    errors = {}
+    for kind, send in SENDERS.items():
+        messages = [m for m in live if m.kind == kind]
+        if messages:
+            errors.update(send(messages))
+
+    now = timezone.now()
+    for message in batch:
+        if message.pk in expired:
+            message.status = OutboxMessage.STATUS_FAILED
+            message.last_error = 'Expired before it could be sent'
+        elif message.kind not in SENDERS:
+            message.status = OutboxMessage.STATUS_FAILED
+            message.last_error = f'Unknown outbox message kind: {message.kind}'
+        else:
+            message.attempts += 1
+            error = errors.get(message.pk, '')
+            if not error:
+                message.status = OutboxMessage.STATUS_SENT
+                message.sent_at = now
+                message.last_error = ''
+            else:
+                message.last_error = error[:2000]
+                if message.attempts < settings.OUTBOX_MAX_ATTEMPTS:
+                    message.next_attempt_at = now + timedelta(seconds=_backoff(message.attempts))
+                else:
+                    message.status = OutboxMessage.STATUS_FAILED
+                    logger.error('Outbox message %s failed for good: %s', message.pk, error)
+        if message.status != OutboxMessage.STATUS_PENDING and message.payload.get('redact'):
+            message.payload = {'redact': True}
+    OutboxMessage.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'payload'],
+    )
+
+
+# ── Senders: {message.pk: error ('' = sent)} per batch ──────────
+
+
+def _mail_connection(name):
+    from django.core.mail import get_connection
+    if name == 'support':
+        return get_connection(
+            backend='django.core.mail.backends.smtp.EmailBackend',
+            host=settings.FALLBACK_EMAIL_HOST,
+            port=settings.FALLBACK_EMAIL_PORT,
+            username=settings.FALLBACK_EMAIL_HOST_USER,
+            password=settings.FALLBACK_EMAIL_HOST_PASSWORD,
+            use_tls=settings.FALLBACK_EMAIL_USE_TLS,
+            use_ssl=settings.FALLBACK_EMAIL_USE_SSL,
+        )
+    return get_connection()
+
+
+def _build_email(payload, connection):
+    from email.mime.image import MIMEImage
+    from django.core.files.storage import default_storage
+    from django.core.mail import EmailMultiAlternatives
+
+    body, html = payload.get('body', ''), payload.get('html', '')
+    email = EmailMultiAlternatives(
+        subject=payload['subject'],
+        body=body or html,
+        from_email=payload['from_email'],
+        to=payload['to'],
+        connection=connection,
+    )
+    if body and html:
+        email.attach_alternative(html, 'text/html')
+    elif html:
+        email.content_subtype = 'html'
+    for cid, name in payload.get('inline_images', []):
+        try:
+            with default_storage.open(name, 'rb') as f:
+                image = MIMEImage(f.read())
+            image.add_header('Content-ID', f'<{cid}>')
+            image.add_header('Content-Disposition', 'inline', filename=f'{cid}.png')
+            email.attach(image)
+        except Exception:
+            logger.warning('Failed to embed image %s (%s) in outbox email', cid, name)
+    return email
+
+
+def _send_emails(messages):
+    """One SMTP session per connection for the whole batch."""
+    errors = {}
+    by_connection = defaultdict(list)
+    for message in messages:
+        by_connection[message.payload.get('connection', 'default')].append(message)
+
+    for name, group in by_connection.items():
+        connection = _mail_connection(name)
+        try:
+            connection.open()
+        except Exception:
+            pass  # each send retries the connection (LoggingEmailBackend falls back)
+        try:
+            for message in group:
+                try:
+                    sent = connection.send_messages([_build_email(message.payload, connection)])
+                    errors[message.pk] = '' if sent else (getattr(connection, 'last_error', '') or 'Not sent')
+                except Exception as exc:
+                    errors[message.pk] = str(exc) or exc.__class__.__name__
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+    return errors
+
+
+def _send_pushes(messages):
+    """Identical pushes are merged into one send to the union of their users."""
+    from core.push_service import send_push_to_users
+
+    groups = defaultdict(list)
+    for message in messages:
+        p = message.payload
+        groups[json.dumps([p['title'], p['body'], p.get('data') or {}], sort_keys=True)].append(message)
+
+    errors = {}
+    for key, group in groups.items():
+        title, body, data = json.loads(key)
+        user_ids = sorted({uid for message in group for uid in message.payload['user_ids']})
+        try:
+            send_push_to_users(user_ids, title, body, data, raise_errors=True)
+            error = ''
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+        for message in group:
+            errors[message.pk] = error
+    return errors
+
+
+SENDERS = {
+    'email': _send_emails,
+    'push': _send_pushes,
+}
+
+
+def purge():
+    """Delete sent/failed messages older than OUTBOX_RETENTION_DAYS."""
+    from core.models import OutboxMessage
+
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted, _ = (
+        OutboxMessage.objects
+        .exclude(status=OutboxMessage.STATUS_PENDING)
+        .filter(created_at__lt=cutoff)
+        .delete()
+    )
+    return deleted
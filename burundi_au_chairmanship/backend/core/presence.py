@@ -0,0 +1,266 @@
+"""
+"Users online now" presence store.
+
+Heartbeats and authenticated API hits used to write ``UserProfile.last_active``
+/ ``DeviceToken.updated_at`` directly, and the admin dashboard counted the
+online population with two table scans.  Presence now lives in Redis sorted
+sets whose score is the last-seen Unix timestamp:
+
+  ``burundi_au:presence:users``    member = user id
+  ``burundi_au:presence:devices``  member = FCM token (every heartbeat)
+  ``burundi_au:presence:anon``     member = FCM token from anonymous callers
+
+A heartbeat is a ``ZADD`` (O(log n)), made only for device tokens that match
+an active ``DeviceToken`` (cached by ``known_device``); "online now" is a ``ZCOUNT`` over the
+last ``PRESENCE_WINDOW_SECONDS`` (O(log n), no table scan).
+
+``persist_presence`` runs every ``PRESENCE_PERSIST_INTERVAL`` seconds: it
+copies timestamps touched since the previous run to the database with one
+CASE UPDATE per chunk, drops anonymous tokens that don't match an active
+anonymous ``DeviceToken`` (so made-up tokens can't inflate the count for
+longer than one interval) and prunes expired members.  ``last_active`` in
+the database therefore lags real activity by up to one interval.
+
+Without django-redis an in-process dict stands in for the sorted sets and
+persists itself from the touch path when due (single-process dev/tests).
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'burundi_au:presence'
+SETS = ('users', 'devices', 'anon')
+PERSISTED_AT_KEY = f'{KEY_PREFIX}:persisted_at'
+PERSIST_LOCK_KEY = 'presence:persist_lock'
+PERSIST_CHUNK = 500
+KNOWN_DEVICE_KEY = f'{KEY_PREFIX}:known:{{}}'
+UNKNOWN_DEVICE_TTL = 60
+
+
+def _redis():
+    """Raw Redis client when the default cache is django-redis, else None."""
+    if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+        return None
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception:
+        return None
+
+
+def _key(name):
+    return f'{KEY_PREFIX}:{name}'
+
+
+def _window():
+    return getattr(settings, 'PRESENCE_WINDOW_SECONDS', 300)
+
+
+# ── In-process fallback ─────────────────────────────────────────
+
+class _LocalPresence:
+    """Dict-of-dicts stand-in for the sorted sets."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sets = {name: {} for name in SETS}
+        self.persisted_at = time.time()
+
+    def touch(self, name, member, ts):
+        with self.lock:
+            self.sets[name][member] = ts
+            due = ts - self.persisted_at >= getattr(settings, 'PRESENCE_PERSIST_INTERVAL', 300)
+        if due:
+            try:
+                persist_presence()
+            except Exception:
+                logger.exception('In-process presence persist failed')
+
+    def count(self, name, since):
+        with self.lock:
+            return sum(1 for ts in self.sets[name].values() if ts >= since)
+
+    def clear(self):
+        with self.lock:
+            for members in self.sets.values():
+                members.clear()
+            self.persisted_at = time.time()
+
+
+_local = _LocalPresence()
+
+
+# ── Request path ────────────────────────────────────────────────
+
+def _touch(name, member):
+    now = time.time()
+    client = _redis()
+    if client is not None:
+        try:
+            client.zadd(_key(name), {member: now})
+            return
+        except Exception:
+            logger.warning('Redis ZADD failed; recording presence in-process', exc_info=True)
+    _local.touch(name, str(member), now)
+
+
+def touch_user(user_id):
+    """Mark an authenticated user as online."""
+    _touch('users', str(user_id))
+
+
+def known_device(token):
+    """Whether ``token`` belongs to an active DeviceToken.
+
+    The answer is cached (a miss only briefly, so a freshly registered
+    device is picked up on its next heartbeat); made-up tokens cost at most
+    one indexed lookup per ``UNKNOWN_DEVICE_TTL`` seconds.
+    """
+    from django.core.cache import cache
+    from .models import DeviceToken
+
+    if not token:
+        return False
+    key = KNOWN_DEVICE_KEY.format(hashlib.sha256(token.encode()).hexdigest())
+    known = cache.get(key)
+    if known is None:
+        known = DeviceToken.objects.filter(token=token, is_active=True).exists()
+        cache.set(key, known, _window() if known else UNKNOWN_DEVICE_TTL)
+    return known
+
+
+def touch_device(token, anonymous=True):
+    """Mark a device as online; only anonymous callers add to the count."""
+    if not token:
+        return
+    _touch('devices', token)
+    if anonymous:
+        _touch('anon', token)
+
+
+def online_counts():
+    """``{'users', 'anonymous_devices', 'total'}`` seen within the window."""
+    since = time.time() - _window()
+    client = _redis()
+    counts = None
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.zcount(_key('users'), since, '+inf')
+            pipe.zcount(_key('anon'), since, '+inf')
+            counts = pipe.execute()
+        except Exception:
+            logger.warning('Could not read presence from Redis', exc_info=True)
+    if counts is None:
+        counts = [_local.count('users', since), _local.count('anon', since)]
+    users, anon = (int(c) for c in counts)
+    return {'users': users, 'anonymous_devices': anon, 'total': users + anon}
+
+
+# ── Compaction ──────────────────────────────────────────────────
+
+def _bulk_set_timestamp(queryset, key_field, ts_field, stamps):
+    """One ``UPDATE ... SET ts_field = CASE key_field ...`` per chunk."""
+    from django.db.models import Case, DateTimeField, Value, When
+
+    written = 0
+    items = list(stamps.items())
+    for i in range(0, len(items), PERSIST_CHUNK):
+        chunk = dict(items[i:i + PERSIST_CHUNK])
+        whens = [
+            When(**{key_field: key}, then=Value(datetime.fromtimestamp(ts, tz=dt_timezone.utc)))
+            for key, ts in chunk.items()
+        ]
+        written += queryset.filter(**{f'{key_field}__in': list(chunk)}).update(
+            **{ts_field: Case(*whens, output_field=DateTimeField())}
+        )
+    return written
+
+
+def _read_changes(client, since, until):
+    """Members touched in (since, until] per set, as ``{member: ts}``."""
+    if client is None:
+        with _local.lock:
+            return {
+                name: {m: ts for m, ts in members.items() if since < ts <= until}
+                for name, members in _local.sets.items()
+            }
+    pipe = client.pipeline()
+    for name in SETS:
+        pipe.zrangebyscore(_key(name), f'({since}', until, withscores=True)
+    results = pipe.execute()
+    return {
+        name: {m.decode() if isinstance(m, bytes) else m: ts for m, ts in rows}
+        for name, rows in zip(SETS, results)
+    }
+
+
+def _prune(client, anon_rejected, cutoff):
+    if client is None:
+        with _local.lock:
+            for members in _local.sets.values():
+                for member in [m for m, ts in members.items() if ts < cutoff]:
+                    del members[member]
+            for token in anon_rejected:
+                _local.sets['anon'].pop(token, None)
+        return
+    pipe = client.pipeline()
+    for name in SETS:
+        pipe.zremrangebyscore(_key(name), '-inf', f'({cutoff}')
+    if anon_rejected:
+        pipe.zrem(_key('anon'), *anon_rejected)
+    pipe.execute()
+
+
+def persist_presence():
+    """Copy recent presence to ``last_active`` / ``updated_at`` and prune.
+
+    Returns the number of database rows updated.
+    """
+    from django.core.cache import cache
+    from .models import DeviceToken, UserProfile
+
+    interval = getattr(settings, 'PRESENCE_PERSIST_INTERVAL', 300)
+    if not cache.add(PERSIST_LOCK_KEY, 1, max(interval, 60)):
+        return 0
+    try:
+        client = _redis()
+        until = time.time()
+        if client is None:
+            # The dict only ever holds one window's worth; rewrite all of it.
+            since = 0
+            _local.persisted_at = until
+        else:
+            since = float(client.get(PERSISTED_AT_KEY) or (until - max(interval, _window())))
+
+        changes = _read_changes(client, since, until)
+        written = 0
+        users = {int(m): ts for m, ts in changes['users'].items() if m.isdigit()}
+        if users:
+            written += _bulk_set_timestamp(
+                UserProfile.objects.all(), 'user_id', 'last_active', users,
+            )
+        if changes['devices']:
+            written += _bulk_set_timestamp(
+                DeviceToken.objects.filter(is_active=True), 'token', 'updated_at', changes['devices'],
+            )
+
+        anon = set(changes['anon'])
+        valid = set(DeviceToken.objects.filter(
+            token__in=anon, user__isnull=True, is_active=True,
+        ).values_list('token', flat=True)) if anon else set()
+
+        _prune(client, anon - valid, until - _window())
+        if client is not None:
+            client.set(PERSISTED_AT_KEY, until)
+        if written:
+            logger.debug('Persisted presence for %d rows', written)
+        return written
+    finally:
+        cache.delete(PERSIST_LOCK_KEY)
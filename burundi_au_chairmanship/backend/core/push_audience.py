@@ -0,0 +1,264 @@
+"""
+Precomputed push audience index (``PushAudienceToken``).
+
+Audience estimates used to run ~8 ``COUNT(DISTINCT)`` queries joining
+``UserProfile`` to ``DeviceToken`` on every change of the notification
+targeting form, and token collection re-ran the same joins per language.
+The index keeps one row per deliverable FCM token — active device tokens
+plus legacy ``UserProfile.fcm_token`` values not already covered by one —
+with the owner's language, platform, gender, nationality, date of birth and
+verification badge copied onto it.  Any filter combination is then a single
+aggregate over one narrow, indexed table, and the push sender pages tokens
+straight out of it (``push_service._iter_token_pages``), so the preview and
+the delivery see the same audience.
+
+Keeping it current:
+
+  * ``DeviceToken`` save/delete and ``UserProfile`` saves that touch a
+    targeting field re-sync the affected rows (signals in core/signals.py);
+    logout and the language switch end in such a profile save;
+  * bulk ``update()`` stale-token cleanup calls ``sync_tokens`` explicitly;
+  * ``rebuild`` runs nightly from Celery beat (and via
+    ``manage.py rebuild_push_audience``) to repair anything else.
+"""
+import logging
+from datetime import date
+
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+# PushAudienceToken.SOURCE_*; literals so historical (migration) models work.
+SOURCE_DEVICE = 'device'
+SOURCE_LEGACY = 'legacy'
+BUILD_CHUNK = 2000
+
+# UserProfile fields copied onto the index; saves touching none of them skip the sync.
+PROFILE_FIELDS = (
+    'preferred_language', 'gender', 'nationality', 'date_of_birth',
+    'is_verified', 'badge_type', 'fcm_token',
+)
+_UPSERT_FIELDS = [
+    'source', 'user', 'language', 'platform', 'gender', 'nationality',
+    'date_of_birth', 'is_verified', 'badge_type', 'updated_at',
+]
+
+
+def _models(apps=None):
+    if apps is None:
+        from django.apps import apps
+    return (
+        apps.get_model('core', 'PushAudienceToken'),
+        apps.get_model('core', 'DeviceToken'),
+        apps.get_model('core', 'UserProfile'),
+    )
+
+
+def platform_of(device_os):
+    device_os = (device_os or '').lower()
+    if device_os.startswith('android'):
+        return 'android'
+    if device_os.startswith('ios'):
+        return 'ios'
+    return ''
+
+
+# ── Building rows ───────────────────────────────────────────────
+
+def _user_rows(user_ids, apps=None):
+    """Index rows (keyed by token) for the given users, from the source tables."""
+    Audience, DeviceToken, UserProfile = _models(apps)
+    profiles = {
+        p['user_id']: p for p in UserProfile.objects.filter(user_id__in=user_ids).values(
+            'user_id', *PROFILE_FIELDS,
+        )
+    }
+    rows = {}
+
+    def row(token, source, profile, platform):
+        return Audience(
+            token=token, source=source, user_id=profile['user_id'],
+            language=profile['preferred_language'] or 'en', platform=platform,
+            gender=profile['gender'] or '', nationality=profile['nationality'] or '',
+            date_of_birth=profile['date_of_birth'], is_verified=profile['is_verified'],
+            badge_type=profile['badge_type'] or '',
+        )
+
+    for token, user_id, device_os in DeviceToken.objects.filter(
+        user_id__in=list(profiles), is_active=True,
+    ).exclude(token='').values_list('token', 'user_id', 'device_os'):
+        rows[token] = row(token, SOURCE_DEVICE, profiles[user_id], platform_of(device_os))
+
+    legacy = {p['fcm_token']: p for p in profiles.values() if p['fcm_token']}
+    if legacy:
+        covered = set(DeviceToken.objects.filter(
+            token__in=list(legacy), is_active=True,
+        ).values_list('token', flat=True))
+        for token, profile in legacy.items():
+            if token not in rows and token not in covered:
+                rows[token] = row(token, SOURCE_LEGACY, profile, '')
+    return rows
+
+
+def _anonymous_rows(queryset, apps=None):
+    Audience = _models(apps)[0]
+    return {
+        token: Audience(
+            token=token, source=SOURCE_DEVICE, user_id=None,
+            language='fr' if lang == 'fr' else 'en', platform=platform_of(device_os),
+        )
+        for token, lang, device_os in queryset.filter(
+            user__isnull=True, is_active=True,
+        ).exclude(token='').values_list('token', 'preferred_language', 'device_os')
+    }
+
+
+def _upsert(rows, apps=None):
+    if rows:
+        _models(apps)[0].objects.bulk_create(
+            list(rows.values()), batch_size=BUILD_CHUNK,
+            update_conflicts=True, unique_fields=['token'], update_fields=_UPSERT_FIELDS,
+        )
+
+
+# ── Incremental maintenance ─────────────────────────────────────
+
+def sync_users(user_ids):
+    """Recompute every index row owned by these users."""
+    Audience = _models()[0]
+    user_ids = [uid for uid in set(user_ids) if uid]
+    if not user_ids:
+        return
+    rows = _user_rows(user_ids)
+    Audience.objects.filter(user_id__in=user_ids).exclude(token__in=list(rows)).delete()
+    _upsert(rows)
+
+
+def sync_tokens(tokens):
+    """Recompute the index rows for these FCM token strings."""
+    Audience, DeviceToken, _ = _models()
+    tokens = [t for t in set(tokens) if t]
+    if not tokens:
+        return
+    devices = DeviceToken.objects.filter(token__in=tokens)
+    owners = set(Audience.objects.filter(token__in=tokens, user__isnull=False).values_list('user_id', flat=True))
+    owners |= set(devices.exclude(user__isnull=True).values_list('user_id', flat=True))
+    Audience.objects.filter(token__in=tokens, user__isnull=True).delete()
+    _upsert(_anonymous_rows(devices))
+    sync_users(owners)
+
+
+def rebuild(apps=None):
+    """Rebuild the whole index in chunks. Returns the number of rows."""
+    from django.utils import timezone
+
+    Audience, DeviceToken, UserProfile = _models(apps)
+    started = timezone.now()
+    user_ids = sorted(
+        set(DeviceToken.objects.filter(is_active=True, user__isnull=False).values_list('user_id', flat=True))
+        | set(UserProfile.objects.exclude(fcm_token='').exclude(fcm_token__isnull=True)
+              .values_list('user_id', flat=True))
+    )
+    total = 0
+    for i in range(0, len(user_ids), BUILD_CHUNK):
+        rows = _user_rows(user_ids[i:i + BUILD_CHUNK], apps)
+        _upsert(rows, apps)
+        total += len(rows)
+
+    anon = DeviceToken.objects.filter(user__isnull=True, is_active=True).order_by('pk')
+    last_pk = 0
+    while True:
+        page = list(anon.filter(pk__gt=last_pk).values_list('pk', flat=True)[:BUILD_CHUNK])
+        if not page:
+            break
+        last_pk = page[-1]
+        rows = _anonymous_rows(DeviceToken.objects.filter(pk__in=page), apps)
+        _upsert(rows, apps)
+        total += len(rows)
+
+    # Anything not refreshed by this pass no longer has a source row.
+    stale, _ = Audience.objects.filter(updated_at__lt=started).delete()
+    logger.info('Push audience index rebuilt: %d rows (%d stale removed)', total, stale)
+    return total
+
+
+# ── Queries ─────────────────────────────────────────────────────
+
+def audience_filter(notification, platform=True):
+    """Q over ``PushAudienceToken`` for the notification's recipients.
+
+    Global notifications reach every signed-in user and anonymous device,
+    then explicit ``target_users`` (a sent segment notification's recorded
+    members), then a segment's current members, otherwise the demographic
+    filters.  With ``platform`` the ``target_platform`` filter
+    is applied the way sending does: tokens of unknown OS are kept.
+    """
+    language = notification.target_language
+    users = Q(user__isnull=False)
+    if language:
+        users &= Q(language=language)
+
+    if notification.is_global:
+        anonymous = Q(user__isnull=True)
+        if language:
+            anonymous &= Q(language=language)
+        audience = users | anonymous
+    elif notification.pk and notification.target_users.exists():
+        # Includes a sent segment notification's recorded recipients.
+        audience = users & Q(user_id__in=notification.target_users.values('pk'))
+    elif notification.target_segment_id:
+        from .models import UserSegmentMembership
+        audience = users & Q(user_id__in=UserSegmentMembership.objects.filter(
+            segment_id=notification.target_segment_id,
+        ).values('user_id'))
+    else:
+        audience = users
+        if notification.target_gender:
+            audience &= Q(gender=notification.target_gender)
+        if notification.target_nationalities:
+            audience &= Q(nationality__in=notification.target_nationalities)
+        today = date.today()
+        if notification.target_age_min is not None:
+            audience &= Q(date_of_birth__lte=today.replace(year=today.year - notification.target_age_min))
+        if notification.target_age_max is not None:
+            audience &= Q(date_of_birth__gte=today.replace(year=today.year - notification.target_age_max - 1))
+        if notification.target_verified_only:
+            audience &= Q(is_verified=True)
+            if notification.target_badge_type:
+                audience &= Q(badge_type=notification.target_badge_type)
+
+    target_platform = getattr(notification, 'target_platform', '') or ''
+    if platform and target_platform in ('android', 'ios'):
+        audience &= Q(platform=target_platform) | Q(platform='')
+    return audience
+
+
+def audience_queryset(notification):
+    from .models import PushAudienceToken
+    return PushAudienceToken.objects.filter(audience_filter(notification))
+
+
+def estimate(notification):
+    """Audience preview for the targeting form, as one aggregate query."""
+    from .models import PushAudienceToken
+
+    match = audience_filter(notification)
+    signed_in = Q(user__isnull=False)
+    anonymous = Q(user__isnull=True)
+    device = Q(source=SOURCE_DEVICE)
+    counts = PushAudienceToken.objects.aggregate(
+        users=Count('user_id', distinct=True, filter=match & signed_in),
+        anonymous=Count('pk', filter=match & anonymous),
+        en=Count('user_id', distinct=True, filter=match & signed_in & Q(language='en')),
+        fr=Count('user_id', distinct=True, filter=match & signed_in & Q(language='fr')),
+        total_users=Count('user_id', distinct=True),
+        total_anonymous=Count('pk', filter=anonymous),
+        android=Count('pk', filter=device & Q(platform='android')),
+        ios=Count('pk', filter=device & Q(platform='ios')),
+    )
+    return {
+        'count': counts['users'] + counts['anonymous'],
+        'total': counts['total_users'] + counts['total_anonymous'],
+        'by_language': {'en': counts['en'], 'fr': counts['fr']},
+        'by_platform': {'android': counts['android'], 'ios': counts['ios']},
+    }
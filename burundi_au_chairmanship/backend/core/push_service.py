@@ -1,8 +1,8 @@
 """
 Firebase Cloud Messaging push notification service.
 
-Handles collecting target tokens based on notification targeting rules
-and dispatching FCM messages to devices.
+Dispatches FCM messages to the devices targeted by a notification; the
+audience is read from the precomputed index in core/push_audience.py.
 
 Supports:
 - Language-specific push notifications (EN/FR)
@@ -12,7 +12,6 @@ Supports:
 """
 
 import logging
-from datetime import date
 
 from django.conf import settings
 from django.utils import timezone
@@ -22,217 +21,23 @@ from core.models import UserProfile, DeviceToken, Notification
 logger = logging.getLogger(__name__)
 
 
-def get_target_profiles(notification):
-    """
-    Collect target UserProfile queryset based on notification targeting fields.
-
-    Returns a filtered queryset of UserProfile objects (not just tokens).
-    This allows language-specific message dispatch.
-
-    Includes profiles that have EITHER a legacy fcm_token OR active entries
-    in the DeviceToken model, so users who registered tokens via the
-    ``register_fcm_token`` endpoint (which only creates DeviceToken rows)
-    are not silently excluded.
-    """
-    from django.db.models import Q
-
-    profiles = UserProfile.objects.filter(
-        Q(fcm_token__isnull=False) & ~Q(fcm_token='')
-        | Q(user__device_tokens__is_active=True)
-    ).select_related('user').distinct()
-
-    if notification.is_global:
-        # Apply language filter even for global notifications
-        if notification.target_language:
-            profiles = profiles.filter(preferred_language=notification.target_language)
-        return profiles
-
-    # Specific users take priority over filter-based targeting
-    if notification.target_users.exists():
-        profiles = profiles.filter(user__in=notification.target_users.all())
-        if notification.target_language:
-            profiles = profiles.filter(preferred_language=notification.target_language)
-        return profiles
-
-    # Filter-based targeting
-    if notification.target_gender:
-        profiles = profiles.filter(gender=notification.target_gender)
-
-    if notification.target_nationalities:
-        profiles = profiles.filter(nationality__in=notification.target_nationalities)
-
-    if notification.target_language:
-        profiles = profiles.filter(preferred_language=notification.target_language)
-
-    today = date.today()
-    if notification.target_age_min is not None:
-        max_dob = today.replace(year=today.year - notification.target_age_min)
-        profiles = profiles.filter(date_of_birth__lte=max_dob)
-
-    if notification.target_age_max is not None:
-        min_dob = today.replace(year=today.year - notification.target_age_max - 1)
-        profiles = profiles.filter(date_of_birth__gte=min_dob)
-
-    # Verification-based targeting
-    if notification.target_verified_only:
-        profiles = profiles.filter(is_verified=True)
-        if notification.target_badge_type:
-            profiles = profiles.filter(badge_type=notification.target_badge_type)
-
-    return profiles
-
-
-def get_target_tokens(notification):
-    """
-    Collect FCM tokens based on notification targeting fields.
-    Uses both DeviceToken model (preferred) and legacy UserProfile.fcm_token.
-    For global notifications, also includes anonymous device tokens (user=None).
-
-    Returns a list of non-empty, deduplicated FCM token strings.
-    """
-    profiles = get_target_profiles(notification)
-    user_ids = list(profiles.values_list('user_id', flat=True))
-
-    # Collect tokens from DeviceToken model (active tokens only, deduplicated)
-    device_tokens = list(
-        DeviceToken.objects.filter(
-            user_id__in=user_ids,
-            is_active=True,
-        ).values_list('token', flat=True).distinct()
-    )
-
-    # Include anonymous device tokens for global notifications
-    if notification.is_global:
-        anonymous_tokens = list(
-            DeviceToken.objects.filter(
-                user__isnull=True,
-                is_active=True,
-            ).values_list('token', flat=True).distinct()
-        )
-        device_tokens = list(set(device_tokens + anonymous_tokens))
-
-    # Also collect legacy tokens from UserProfile for backward compatibility
-    legacy_tokens = list(profiles.values_list('fcm_token', flat=True))
-
-    # Merge and deduplicate
-    all_tokens = list(set(device_tokens + [t for t in legacy_tokens if t]))
-    return all_tokens
-
-
-def _apply_platform_filter(qs, notification):
-    """Apply target_platform filter to a DeviceToken queryset.
-    Filters on device_os which starts with 'Android …' or 'iOS …'.
-    Tokens with empty device_os (registered before device info was
-    collected) are always included so they aren't silently dropped."""
-    from django.db.models import Q
-
-    platform = getattr(notification, 'target_platform', '') or ''
-    if platform == 'android':
-        return qs.filter(Q(device_os__istartswith='android') | Q(device_os=''))
-    elif platform == 'ios':
-        return qs.filter(Q(device_os__istartswith='ios') | Q(device_os=''))
-    return qs
-
-
-def get_target_tokens_by_language(notification):
-    """
-    Collect FCM tokens grouped by language preference.
-
-    Returns dict: {'en': [tokens...], 'fr': [tokens...]}
-
-    Language is resolved in this priority order:
-      1. Authenticated user: ``UserProfile.preferred_language``
-      2. Anonymous device: ``DeviceToken.preferred_language`` (set from the
-         client's current in-app language at token registration time)
-      3. Default: ``'en'``
-
-    This ensures anonymous users browsing in French receive the French
-    push variant instead of being silently bucketed into English.
-    When the admin set a ``target_language`` filter, only tokens matching
-    that language are returned.
-    """
-    profiles = get_target_profiles(notification)
-    tokens_by_lang = {'en': [], 'fr': []}
-
-    for lang_code in ('en', 'fr'):
-        # Skip the bucket entirely if the admin explicitly targeted the other language.
-        if notification.target_language and notification.target_language != lang_code:
-            continue
-
-        lang_profiles = profiles.filter(preferred_language=lang_code)
-        lang_user_ids = list(lang_profiles.values_list('user_id', flat=True))
-
-        # Collect from DeviceToken model (active only, deduplicated)
-        dt_qs = DeviceToken.objects.filter(
-            user_id__in=lang_user_ids,
-            is_active=True,
-        )
-        dt_qs = _apply_platform_filter(dt_qs, notification)
-        device_tokens = list(dt_qs.values_list('token', flat=True).distinct())
-
-        # Also collect legacy tokens from UserProfile.fcm_token.
-        # These have no device_os info, so include them regardless of
-        # platform filter — better to over-deliver than miss users.
-        legacy_tokens = list(lang_profiles.values_list('fcm_token', flat=True))
-
-        tokens_by_lang[lang_code] = list(set(
-            device_tokens + [t for t in legacy_tokens if t]
-        ))
-
-    # Include anonymous device tokens for global notifications, bucketed by
-    # their own ``preferred_language`` so anonymous FR users get FR content.
-    if notification.is_global:
-        all_assigned = set(tokens_by_lang['en'] + tokens_by_lang['fr'])
-        anon_qs = DeviceToken.objects.filter(
-            user__isnull=True,
-            is_active=True,
-        )
-        anon_qs = _apply_platform_filter(anon_qs, notification)
-        if notification.target_language:
-            anon_qs = anon_qs.filter(preferred_language=notification.target_language)
-
-        anon_rows = list(anon_qs.values_list('token', 'preferred_language').distinct())
-        for token, anon_lang in anon_rows:
-            if not token or token in all_assigned:
-                continue
-            bucket = 'fr' if anon_lang == 'fr' else 'en'
-            if notification.target_language and bucket != notification.target_language:
-                continue
-            tokens_by_lang[bucket].append(token)
-            all_assigned.add(token)
-
-        # Deduplicate final buckets
-        tokens_by_lang['en'] = list(set(tokens_by_lang['en']))
-        tokens_by_lang['fr'] = list(set(tokens_by_lang['fr']))
-
-    return tokens_by_lang
-
-
 def get_target_audience_count(notification):
     """
-    Return the number of unique devices that would receive this notification.
+    Return the number of recipients (signed-in users plus anonymous devices
+    for global notifications) that would receive this notification.
     Used for audience preview in admin before sending.
-    Includes anonymous device tokens for global notifications.
     """
-    profiles = get_target_profiles(notification)
-    count = profiles.count()
-
-    # Add anonymous device tokens for global notifications
-    if notification.is_global:
-        anonymous_count = DeviceToken.objects.filter(
-            user__isnull=True,
-            is_active=True,
-        ).count()
-        count += anonymous_count
+    from .push_audience import estimate
+    return estimate(notification)['count']
 
-    return count
 
-
-def send_push_to_users(user_ids, title, body, data=None):
+def send_push_to_users(user_ids, title, body, data=None, raise_errors=False):
     """
     Synchronous push to specific users — used as fallback when Celery/Redis
-    is unavailable.  Collects tokens from both DeviceToken and legacy
-    UserProfile, sends via FCM, and cleans stale tokens.
+    is unavailable, and by the outbox (core/outbox.py) with
+    ``raise_errors=True`` so a failed send is retried.  Collects tokens from
+    both DeviceToken and legacy UserProfile, sends via FCM, and cleans stale
+    tokens.
     """
     try:
         from config.firebase import initialize_firebase
@@ -240,6 +45,8 @@ def send_push_to_users(user_ids, title, body, data=None):
         from firebase_admin import messaging
     except ImportError:
         logger.error("firebase_admin not available for synchronous push fallback")
+        if raise_errors:
+            raise
         return
 
     device_tokens = list(
@@ -291,55 +98,54 @@ def send_push_to_users(user_ids, title, body, data=None):
             )
         ]
         if stale:
+            from .push_audience import sync_tokens
             UserProfile.objects.filter(fcm_token__in=stale).update(fcm_token='')
             DeviceToken.objects.filter(token__in=stale).update(is_active=False)
+            sync_tokens(stale)
         logger.info(
             f"Sync push: {response.success_count} sent, "
             f"{response.failure_count} failed, {len(stale)} stale cleaned"
         )
     except Exception as exc:
         logger.error(f"Sync push failed: {exc}")
+        if raise_errors:
+            raise
 
 
-def send_push_notification(notification):
-    """
-    Build and send FCM messages for a Notification instance.
+# ── Streaming fan-out ──────────────────────────────────────────
+#
+# send_push_notification() never materialises the audience.  Tokens are
+# paged from the push audience index with a keyset cursor on its pk, a "wave" of pages is sent concurrently on a bounded thread pool,
+# and after each wave the cursor, running totals and stale-token cleanup
+# are committed to Notification.push_checkpoint.  A retried task resumes
+# after the last completed wave instead of re-sending from the start.
 
-    Sends language-specific content:
-    - French users receive title_fr/message_fr (falls back to EN if empty)
-    - English users receive title/message
+FCM_BATCH_SIZE = 500  # FCM limit for send_each
+RECENT_BATCH_STATS = 20
 
-    Uses firebase_admin.messaging.send_each() in batches of 500.
-    Clears stale tokens on UnregisteredError.
-    Updates notification push tracking fields.
 
-    Returns (success_count, failure_count) tuple.
+def _iter_token_pages(notification, checkpoint, page_size=None):
     """
-    try:
-        from config.firebase import initialize_firebase
-        initialize_firebase()
-        from firebase_admin import messaging
-    except ImportError:
-        logger.error("firebase_admin.messaging not available")
-        raise RuntimeError("Firebase Admin SDK messaging module is not installed.")
+    Yield ``(phase, last_pk, [(token, lang), ...])`` pages starting after the
+    checkpointed cursor.  Each page is one keyset query on the precomputed
+    audience index (``core.push_audience``), the same rows ``estimate()``
+    counts.
+    """
+    from .push_audience import audience_queryset
 
-    # Get tokens grouped by language
-    tokens_by_lang = get_target_tokens_by_language(notification)
+    page_size = page_size or FCM_BATCH_SIZE
+    last_pk = checkpoint.get('last_pk', 0)
+    qs = audience_queryset(notification).filter(language__in=('en', 'fr')).order_by('pk')
+    while True:
+        rows = list(qs.filter(pk__gt=last_pk).values_list('pk', 'token', 'language')[:page_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        yield 'audience', last_pk, [(token, lang) for _, token, lang in rows]
 
-    all_token_count = sum(len(t) for t in tokens_by_lang.values())
-    if all_token_count == 0:
-        logger.info(f"No FCM tokens found for notification #{notification.pk}")
-        notification.push_sent = True
-        notification.push_sent_at = timezone.now()
-        notification.push_recipient_count = 0
-        notification.push_recipient_en = 0
-        notification.push_recipient_fr = 0
-        notification.save(update_fields=[
-            'push_sent', 'push_sent_at', 'push_recipient_count',
-            'push_recipient_en', 'push_recipient_fr',
-        ])
-        return 0, 0
 
+def _build_push_parts(notification, messaging):
+    """Shared data payload and platform configs for one notification."""
     # Build absolute image URL for rich push notifications
     image_url = None
     if notification.image:
@@ -402,95 +208,229 @@ def send_push_notification(notification):
         fcm_options=messaging.APNSFCMOptions(image=image_url) if image_url else None,
     )
 
-    total_success = 0
-    total_failure = 0
-    stale_tokens = []
-    success_by_lang = {'en': 0, 'fr': 0}
+    # Select correct language content (FR falls back to EN if empty)
+    fcm_notifications = {
+        'en': messaging.Notification(
+            title=notification.title, body=notification.message, image=image_url,
+        ),
+        'fr': messaging.Notification(
+            title=notification.title_fr or notification.title,
+            body=notification.message_fr or notification.message,
+            image=image_url,
+        ),
+    }
+    return data_payload, android_config, apns_config, fcm_notifications
 
-    # Send per-language batches
-    for lang_code, tokens in tokens_by_lang.items():
-        if not tokens:
-            continue
 
-        # Select correct language content
-        if lang_code == 'fr':
-            title = notification.title_fr or notification.title
-            body = notification.message_fr or notification.message
-        else:
-            title = notification.title
-            body = notification.message
+def _send_batch(messaging, notification_id, lang_code, tokens, parts):
+    """Send one ≤500-token batch. Runs on a worker thread — no DB access."""
+    import time
 
-        fcm_notification = messaging.Notification(
-            title=title,
-            body=body,
-            image=image_url,
+    data_payload, android_config, apns_config, fcm_notifications = parts
+    fcm_messages = [
+        messaging.Message(
+            notification=fcm_notifications[lang_code],
+            data=data_payload,
+            token=token,
+            android=android_config,
+            apns=apns_config,
         )
+        for token in tokens
+    ]
+    started = time.monotonic()
+    response = messaging.send_each(fcm_messages)
+    elapsed_ms = (time.monotonic() - started) * 1000
+
+    stale = []
+    for j, send_response in enumerate(response.responses):
+        if not send_response.exception:
+            continue
+        if isinstance(
+            send_response.exception,
+            (messaging.UnregisteredError, messaging.SenderIdMismatchError),
+        ):
+            stale.append(tokens[j])
+        else:
+            logger.warning(
+                'FCM send error for notification #%s token=%s…: %s: %s',
+                notification_id,
+                tokens[j][:12],
+                type(send_response.exception).__name__,
+                send_response.exception,
+            )
+    return {
+        'lang': lang_code,
+        'size': len(tokens),
+        'success': response.success_count,
+        'failure': response.failure_count,
+        'stale': stale,
+        'ms': round(elapsed_ms, 1),
+    }
+
+
+def _clear_stale_tokens(stale_tokens):
+    """Clean up stale tokens from both DeviceToken and legacy UserProfile."""
+    from .push_audience import sync_tokens
+
+    if not stale_tokens:
+        return
+    cleaned_legacy = UserProfile.objects.filter(fcm_token__in=stale_tokens).update(fcm_token='')
+    cleaned_device = DeviceToken.objects.filter(token__in=stale_tokens).update(is_active=False)
+    sync_tokens(stale_tokens)
+    logger.info(
+        f"Cleared {cleaned_legacy} stale legacy tokens, "
+        f"deactivated {cleaned_device} device tokens"
+    )
+
 
-        # Send in batches of 500 (FCM limit for send_each)
-        batch_size = 500
-        for i in range(0, len(tokens), batch_size):
-            batch_tokens = tokens[i:i + batch_size]
-            fcm_messages = [
-                messaging.Message(
-                    notification=fcm_notification,
-                    data=data_payload,
-                    token=token,
-                    android=android_config,
-                    apns=apns_config,
-                )
-                for token in batch_tokens
-            ]
-
-            response = messaging.send_each(fcm_messages)
-            total_success += response.success_count
-            total_failure += response.failure_count
-            success_by_lang[lang_code] += response.success_count
-
-            # Collect stale tokens for cleanup and log all errors
-            for j, send_response in enumerate(response.responses):
-                if send_response.exception:
-                    if isinstance(
-                        send_response.exception,
-                        (messaging.UnregisteredError, messaging.SenderIdMismatchError),
-                    ):
-                        stale_tokens.append(batch_tokens[j])
-                    else:
-                        logger.warning(
-                            'FCM send error for notification #%s token=%s…: %s: %s',
-                            notification.pk,
-                            batch_tokens[j][:12],
-                            type(send_response.exception).__name__,
-                            send_response.exception,
-                        )
-
-    # Clean up stale tokens from both DeviceToken and legacy UserProfile
-    if stale_tokens:
-        cleaned_legacy = UserProfile.objects.filter(
-            fcm_token__in=stale_tokens
-        ).update(fcm_token='')
-        cleaned_device = DeviceToken.objects.filter(
-            token__in=stale_tokens
-        ).update(is_active=False)
+def _fresh_checkpoint():
+    return {
+        'phase': 'audience', 'last_pk': 0,
+        'started_at': timezone.now().isoformat(),
+        'success_en': 0, 'success_fr': 0, 'failure': 0, 'stale': 0,
+        'batches': 0, 'tokens': 0, 'send_ms': 0.0, 'max_batch_ms': 0.0,
+    }
+
+
+def _load_checkpoint(notification):
+    """Resume an unfinished send, or start over if none / finished / too old."""
+    checkpoint = notification.push_checkpoint or {}
+    if checkpoint.get('phase') == 'audience' and checkpoint.get('started_at'):
+        from datetime import datetime
+        started = datetime.fromisoformat(checkpoint['started_at'])
+        max_age = getattr(settings, 'PUSH_CHECKPOINT_MAX_AGE', 6 * 3600)
+        if (timezone.now() - started).total_seconds() < max_age:
+            return checkpoint, True
+    return _fresh_checkpoint(), False
+
+
+def _stats_from_checkpoint(checkpoint, recent):
+    from datetime import datetime
+
+    started = datetime.fromisoformat(checkpoint['started_at'])
+    wall = max((timezone.now() - started).total_seconds(), 0.001)
+    batches = checkpoint['batches']
+    return {
+        'batches': batches,
+        'tokens': checkpoint['tokens'],
+        'avg_batch_ms': round(checkpoint['send_ms'] / batches, 1) if batches else 0,
+        'max_batch_ms': checkpoint['max_batch_ms'],
+        'elapsed_s': round(wall, 2),
+        'throughput_per_s': round(checkpoint['tokens'] / wall, 1),
+        'workers': getattr(settings, 'PUSH_FANOUT_WORKERS', 4),
+        'recent_batches': recent[-RECENT_BATCH_STATS:],
+    }
+
+
+def send_push_notification(notification):
+    """
+    Build and send FCM messages for a Notification instance.
+
+    Sends language-specific content:
+    - French users receive title_fr/message_fr (falls back to EN if empty)
+    - English users receive title/message
+
+    Streams the audience in keyset-paged batches of 500, sends up to
+    PUSH_FANOUT_WORKERS batches concurrently, and checkpoints progress
+    (cursor, totals, stale-token cleanup, per-batch timings) on the
+    notification after every wave so a retry resumes where it stopped.
+
+    Returns (success_count, failure_count) tuple.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        from config.firebase import initialize_firebase
+        initialize_firebase()
+        from firebase_admin import messaging
+    except ImportError:
+        logger.error("firebase_admin.messaging not available")
+        raise RuntimeError("Firebase Admin SDK messaging module is not installed.")
+
+    # Segment notifications go to the members as of now (also for the inbox).
+    from .segments import record_recipients
+    record_recipients(notification)
+
+    checkpoint, resumed = _load_checkpoint(notification)
+    if resumed:
         logger.info(
-            f"Cleared {cleaned_legacy} stale legacy tokens, "
-            f"deactivated {cleaned_device} device tokens"
+            f"Resuming push for notification #{notification.pk} after "
+            f"{checkpoint['phase']} pk {checkpoint['last_pk']} ({checkpoint['tokens']} already sent)"
         )
+    parts = _build_push_parts(notification, messaging)
+    workers = max(1, getattr(settings, 'PUSH_FANOUT_WORKERS', 4))
+    recent = list((notification.push_stats or {}).get('recent_batches', [])) if resumed else []
+    pages = _iter_token_pages(notification, checkpoint)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fcm-fanout') as pool:
+        while True:
+            # One wave = up to `workers` pages, each split into per-language batches.
+            wave = []
+            for _ in range(workers):
+                page = next(pages, None)
+                if page is None:
+                    break
+                wave.append(page)
+            if not wave:
+                break
+
+            futures = []
+            for _, _, rows in wave:
+                by_lang = {'en': [], 'fr': []}
+                for token, lang in rows:
+                    by_lang['fr' if lang == 'fr' else 'en'].append(token)
+                for lang_code, tokens in by_lang.items():
+                    if tokens:
+                        futures.append(pool.submit(
+                            _send_batch, messaging, notification.pk, lang_code, tokens, parts,
+                        ))
+            # .result() re-raises send failures: the wave is not checkpointed
+            # and a retry re-sends only this wave.
+            results = [f.result() for f in futures]
+
+            stale = [t for r in results for t in r['stale']]
+            _clear_stale_tokens(stale)
+            for r in results:
+                checkpoint[f"success_{r['lang']}"] += r['success']
+                checkpoint['failure'] += r['failure']
+                checkpoint['batches'] += 1
+                checkpoint['tokens'] += r['size']
+                checkpoint['send_ms'] += r['ms']
+                checkpoint['max_batch_ms'] = max(checkpoint['max_batch_ms'], r['ms'])
+                recent.append({k: r[k] for k in ('lang', 'size', 'success', 'failure', 'ms')})
+            checkpoint['stale'] += len(stale)
+            checkpoint['phase'], checkpoint['last_pk'] = wave[-1][0], wave[-1][1]
+            recent = recent[-RECENT_BATCH_STATS:]
+            Notification.objects.filter(pk=notification.pk).update(
+                push_checkpoint=checkpoint,
+                push_stats=_stats_from_checkpoint(checkpoint, recent),
+            )
+
+    total_success = checkpoint['success_en'] + checkpoint['success_fr']
+    total_failure = checkpoint['failure']
+    if checkpoint['tokens'] == 0:
+        logger.info(f"No FCM tokens found for notification #{notification.pk}")
 
     # Update notification tracking (including per-language split)
+    checkpoint['phase'] = 'done'
+    notification.push_checkpoint = checkpoint
+    notification.push_stats = _stats_from_checkpoint(checkpoint, recent)
     notification.push_sent = True
     notification.push_sent_at = timezone.now()
     notification.push_recipient_count = total_success
-    notification.push_recipient_en = success_by_lang['en']
-    notification.push_recipient_fr = success_by_lang['fr']
+    notification.push_recipient_en = checkpoint['success_en']
+    notification.push_recipient_fr = checkpoint['success_fr']
     notification.save(update_fields=[
         'push_sent', 'push_sent_at', 'push_recipient_count',
         'push_recipient_en', 'push_recipient_fr',
+        'push_checkpoint', 'push_stats',
     ])
 
     logger.info(
         f"Push notification #{notification.pk}: "
-        f"{total_success} sent ({success_by_lang['en']} EN, {success_by_lang['fr']} FR), "
-        f"{total_failure} failed, {len(stale_tokens)} stale tokens cleared"
+        f"{total_success} sent ({checkpoint['success_en']} EN, {checkpoint['success_fr']} FR), "
+        f"{total_failure} failed, {checkpoint['stale']} stale tokens cleared, "
+        f"{notification.push_stats['throughput_per_s']} tokens/s"
     )
 
     return total_success, total_failure
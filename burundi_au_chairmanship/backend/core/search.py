@@ -0,0 +1,210 @@
+"""
+Bilingual full-text search for articles and magazine editions.
+
+Each indexed model carries two ``tsvector`` columns — ``search_vector_en``
+(``english`` config) and ``search_vector_fr`` (``french`` config) — with
+title text weighted A and body text weighted B, both GIN-indexed.  The
+vectors are refreshed by ``update_search_vectors`` on every save (see
+``register_search_index_signals`` in signals.py) and can be rebuilt in bulk
+with ``manage.py rebuild_search_index``.
+
+``run_search`` matches the query as prefixes against both languages (so
+keystroke-driven searches hit ``summ`` → ``summit``), ranks by
+``ts_rank`` with a recency boost, and attaches a highlighted
+``search_snippet`` to every result.
+
+Non-PostgreSQL databases (local SQLite) fall back to ``icontains`` with
+newest-first ordering and a Python-built snippet.
+"""
+import html
+import logging
+import re
+
+from django.db import connections, router
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.functions import Coalesce, Greatest, NullIf
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIGS = {'en': 'english', 'fr': 'french'}
+
+# model label → per-language (title, body) fields and the recency field
+SEARCH_SPECS = {
+    'core.article': {
+        'en': ('title', 'content'),
+        'fr': ('title_fr', 'content_fr'),
+        'date_field': 'publish_date',
+    },
+    'core.magazineedition': {
+        'en': ('title', 'description'),
+        'fr': ('title_fr', 'description_fr'),
+        'date_field': 'publish_date',
+    },
+}
+
+# Score = ts_rank * (1 + RECENCY_WEIGHT / (1 + age_days / RECENCY_DAYS)):
+# fresh content gets up to (1 + RECENCY_WEIGHT)x, decaying over ~a month.
+RECENCY_WEIGHT = 1.0
+RECENCY_DAYS = 30.0
+
+MARK_START = '<mark>'
+MARK_STOP = '</mark>'
+# ts_headline marks hits with these sentinels; the text around them is
+# HTML-escaped before they become MARK_START / MARK_STOP.
+_SEL_START = '\x02'
+_SEL_STOP = '\x03'
+SNIPPET_WORDS = 30
+
+_TERM_RE = re.compile(r'[^\W_]+')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _spec(model):
+    return SEARCH_SPECS[model._meta.label_lower]
+
+
+def fts_available(model):
+    """True when ``model`` lives on a PostgreSQL database."""
+    return connections[router.db_for_read(model)].vendor == 'postgresql'
+
+
+def query_terms(query, max_terms=8):
+    """Split user input into plain word tokens (safe for to_tsquery)."""
+    return _TERM_RE.findall(query.lower())[:max_terms]
+
+
+class _AgeInDays(Func):
+    template = 'GREATEST(EXTRACT(EPOCH FROM (NOW() - %(expressions)s)) / 86400.0, 0)'
+    output_field = FloatField()
+
+
+class _StripTags(Func):
+    function = 'REGEXP_REPLACE'
+    template = "%(function)s(%(expressions)s, '<[^>]+>', ' ', 'g')"
+
+
+def _vector(fields, config):
+    from django.contrib.postgres.search import SearchVector
+
+    title, body = fields
+    return (
+        SearchVector(title, weight='A', config=config)
+        + SearchVector(_StripTags(F(body)), weight='B', config=config)
+    )
+
+
+def search_vector_updates(model):
+    """``update()`` kwargs that recompute both vectors for ``model`` rows."""
+    spec = _spec(model)
+    return {
+        f'search_vector_{lang}': _vector(spec[lang], config)
+        for lang, config in SEARCH_CONFIGS.items()
+    }
+
+
+def update_search_vectors(instance):
+    """Recompute the vectors for one saved instance."""
+    model = type(instance)
+    if not fts_available(model):
+        return
+    model.objects.filter(pk=instance.pk).update(**search_vector_updates(model))
+
+
+def run_search(queryset, query, lang='en', limit=20):
+    """
+    Rank ``queryset`` against ``query`` and return up to ``limit`` objects,
+    each with ``search_rank`` and ``search_snippet`` attributes.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    if fts_available(queryset.model):
+        rows = list(_postgres_search(queryset, terms, lang)[:limit])
+        for obj in rows:
+            obj.search_snippet = _mark(obj.search_snippet)
+        return rows
+    return _fallback_search(queryset, terms, lang, limit)
+
+
+def _postgres_search(queryset, terms, lang):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+
+    spec = _spec(queryset.model)
+    raw = ' & '.join(f'{term}:*' for term in terms)
+    queries = {
+        code: SearchQuery(raw, search_type='raw', config=config)
+        for code, config in SEARCH_CONFIGS.items()
+    }
+    rank = Greatest(*[
+        SearchRank(F(f'search_vector_{code}'), q) for code, q in queries.items()
+    ])
+    boost = Value(1.0) + Value(RECENCY_WEIGHT) / (
+        Value(1.0) + _AgeInDays(F(spec['date_field'])) / Value(RECENCY_DAYS)
+    )
+    lang = lang if lang in SEARCH_CONFIGS else 'en'
+    body_field = spec[lang][1]
+    if lang != 'en':
+        # Untranslated rows still get an (English) snippet.
+        body = Coalesce(NullIf(F(body_field), Value('')), F(spec['en'][1]))
+    else:
+        body = F(body_field)
+    snippet = SearchHeadline(
+        _StripTags(body), queries[lang], config=SEARCH_CONFIGS[lang],
+        start_sel=_SEL_START, stop_sel=_SEL_STOP,
+        max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2, max_fragments=2,
+    )
+    match = Q()
+    for code, q in queries.items():
+        match |= Q(**{f'search_vector_{code}': q})
+    return queryset.filter(match).annotate(
+        search_rank=rank * boost,
+        search_snippet=snippet,
+    ).order_by('-search_rank', f'-{spec["date_field"]}')
+
+
+def _fallback_search(queryset, terms, lang, limit):
+    spec = _spec(queryset.model)
+    match = Q()
+    for field in (*spec['en'], *spec['fr']):
+        term_match = Q()
+        for term in terms:
+            term_match &= Q(**{f'{field}__icontains': term})
+        match |= term_match
+    rows = list(queryset.filter(match).order_by(f'-{spec["date_field"]}')[:limit])
+    body_field = spec[lang if lang in SEARCH_CONFIGS else 'en'][1]
+    for obj in rows:
+        obj.search_rank = 0.0
+        body = getattr(obj, body_field, '') or getattr(obj, spec['en'][1], '')
+        obj.search_snippet = plain_snippet(body, terms)
+    return rows
+
+
+def _mark(headline):
+    """HTML-escape a ts_headline snippet, then turn its sentinels into marks.
+
+    Bodies are stored as HTML, so entities are decoded first — escaping
+    ``&lt;`` again would show the reader a literal ``&lt;``.
+    """
+    return (
+        html.escape(html.unescape(headline or ''))
+        .replace(_SEL_START, MARK_START).replace(_SEL_STOP, MARK_STOP)
+    )
+
+
+def plain_snippet(text, terms, words=SNIPPET_WORDS):
+    """Python snippet around the first term hit, HTML-escaped and marked."""
+    plain = _TAG_RE.sub(' ', text or '')
+    tokens = plain.split()
+    lowered = [t.lower() for t in tokens]
+    start = 0
+    for i, token in enumerate(lowered):
+        if any(term in token for term in terms):
+            start = max(0, i - words // 3)
+            break
+    out = []
+    for token in tokens[start:start + words]:
+        escaped = html.escape(html.unescape(token))
+        if any(term in token.lower() for term in terms):
+            escaped = f'{MARK_START}{escaped}{MARK_STOP}'
+        out.append(escaped)
+    return ' '.join(out)
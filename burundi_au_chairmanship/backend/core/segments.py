@@ -0,0 +1,188 @@
+"""
+Materialised user segment membership.
+
+Dynamic segments used to rebuild a filtered, ``distinct()`` User queryset
+from their JSON filters on every access (list, detail, export, member
+count), and notifying a segment copied every member into
+``Notification.target_users`` inside the admin request.
+
+Members of every segment now live in ``UserSegmentMembership``: the curated
+list for static segments and a snapshot of the filter result for dynamic
+ones, with ``UserSegment.member_count`` / ``refreshed_at`` alongside.  The
+snapshot is kept current by:
+
+  * ``refresh_user`` — re-evaluates one user against the dynamic segments
+    when their profile or account changes (signals in core/signals.py);
+  * ``refresh_segment`` — diffs the live filter result against the snapshot
+    in a few set-based queries, after the filters are edited and for every
+    dynamic segment on the ``SEGMENT_REFRESH_INTERVAL`` beat schedule (which
+    also catches age-range drift and bulk ``update()`` writes).
+
+Notifications point at the segment (``Notification.target_segment``).  When
+one is sent, ``record_recipients`` copies the snapshot into ``target_users``
+from the push task (set-based, in chunks, outside the admin request), so the
+inbox, the unread badge and the push audience all see the members at send
+time: joining later doesn't add the segment's history, leaving doesn't take
+delivered notifications away.
+"""
+import logging
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+WRITE_CHUNK = 1000
+
+# Fields the segment filters read; saves touching none of them skip refresh_user.
+PROFILE_FIELDS = ('nationality', 'gender', 'badge_type', 'date_of_birth', 'is_email_verified')
+USER_FIELDS = ('is_active', 'date_joined')
+
+
+def _apply_diff(segment, added, removed):
+    """Insert/delete snapshot rows."""
+    from .models import UserSegmentMembership
+
+    removed = sorted(removed)
+    added = sorted(added)
+    for i in range(0, len(removed), WRITE_CHUNK):
+        UserSegmentMembership.objects.filter(
+            segment=segment, user_id__in=removed[i:i + WRITE_CHUNK],
+        ).delete()
+    UserSegmentMembership.objects.bulk_create(
+        [UserSegmentMembership(segment=segment, user_id=uid) for uid in added],
+        batch_size=WRITE_CHUNK, ignore_conflicts=True,
+    )
+
+
+def _stamp(segment):
+    segment.member_count = segment.memberships.count()
+    segment.refreshed_at = timezone.now()
+    type(segment).objects.filter(pk=segment.pk).update(
+        member_count=segment.member_count, refreshed_at=segment.refreshed_at,
+    )
+
+
+def refresh_segment(segment):
+    """Bring a segment's snapshot in line with its filters.
+
+    Static segments are only recounted. Returns ``(added, removed)``.
+    """
+    added = removed = []
+    if segment.is_dynamic:
+        matching = segment.matching_users().order_by().values('pk')
+        removed = list(segment.memberships.exclude(user_id__in=matching).values_list('user_id', flat=True))
+        added = list(
+            segment.matching_users().order_by().exclude(segment_memberships__segment=segment)
+            .values_list('pk', flat=True)
+        )
+        _apply_diff(segment, added, removed)
+    _stamp(segment)
+    if added or removed:
+        logger.info('Segment %s refreshed: +%d -%d members', segment.pk, len(added), len(removed))
+    return len(added), len(removed)
+
+
+def refresh_all_segments():
+    """Full refresh of every dynamic segment. Returns the number refreshed."""
+    from .models import UserSegment
+
+    refreshed = 0
+    for segment in UserSegment.objects.filter(is_dynamic=True).order_by('pk'):
+        try:
+            refresh_segment(segment)
+            refreshed += 1
+        except Exception:
+            logger.exception('Failed to refresh segment %s', segment.pk)
+    return refreshed
+
+
+def invalidate(segment):
+    """Filters changed: mark the snapshot stale and queue a rebuild.
+
+    Until the task runs, the next ``get_users()`` rebuilds it inline.
+    """
+    from .tasks import refresh_segment_members
+
+    type(segment).objects.filter(pk=segment.pk).update(refreshed_at=None)
+    segment.refreshed_at = None
+    refresh_segment_members.delay(segment.pk)
+
+
+def set_members(segment, user_ids):
+    """Replace a static segment's curated member list."""
+    from django.contrib.auth.models import User
+
+    wanted = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    current = set(segment.memberships.values_list('user_id', flat=True))
+    _apply_diff(segment, wanted - current, current - wanted)
+    _stamp(segment)
+
+
+def refresh_user(user_id):
+    """Re-evaluate one user against every refreshed dynamic segment."""
+    from django.db.models import F
+    from .models import UserSegment
+
+    segments = list(UserSegment.objects.filter(is_dynamic=True, refreshed_at__isnull=False))
+    if not segments:
+        return
+    member_of = set(UserSegment.objects.filter(
+        pk__in=[s.pk for s in segments], memberships__user_id=user_id,
+    ).values_list('pk', flat=True))
+    for segment in segments:
+        matches = segment.matching_users().filter(pk=user_id).exists()
+        if matches == (segment.pk in member_of):
+            continue
+        if matches:
+            _apply_diff(segment, [user_id], [])
+            delta = 1
+        else:
+            _apply_diff(segment, [], [user_id])
+            delta = -1
+        UserSegment.objects.filter(pk=segment.pk).update(member_count=F('member_count') + delta)
+
+
+def record_recipients(notification):
+    """Copy the segment's members into ``notification.target_users``, once.
+
+    Runs when the notification is sent; the row lock makes concurrent sends
+    of the same notification record it a single time.  Returns the number of
+    recipients recorded (0 if already recorded or not a segment notification).
+    """
+    from django.db import transaction
+    from .models import Notification, UserSegmentMembership
+
+    if not notification.target_segment_id:
+        return 0
+    through = Notification.target_users.through
+    recorded = 0
+    with transaction.atomic():
+        Notification.objects.select_for_update().filter(pk=notification.pk).exists()
+        if through.objects.filter(notification_id=notification.pk).exists():
+            return 0
+        members = UserSegmentMembership.objects.filter(
+            segment_id=notification.target_segment_id,
+        ).order_by('user_id').values_list('user_id', flat=True).iterator(chunk_size=WRITE_CHUNK)
+        chunk = []
+        for user_id in members:
+            chunk.append(user_id)
+            if len(chunk) == WRITE_CHUNK:
+                recorded += _record_chunk(through, notification.pk, chunk)
+                chunk = []
+        if chunk:
+            recorded += _record_chunk(through, notification.pk, chunk)
+    if recorded:
+        logger.info('Notification %s: recorded %d segment recipients', notification.pk, recorded)
+    return recorded
+
+
+def _record_chunk(through, notification_id, user_ids):
+    from .notification_counters import targets_changed
+
+    through.objects.bulk_create(
+        [through(notification_id=notification_id, user_id=uid) for uid in user_ids],
+        ignore_conflicts=True,
+    )
+    # bulk_create sends no m2m_changed; update the badges like the signal would.
+    targets_changed({(notification_id, uid) for uid in user_ids}, +1)
+    return len(user_ids)
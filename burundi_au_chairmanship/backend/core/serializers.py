@@ -173,13 +173,72 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
+def _variant_manifest(field, obj, image):
+    """
+    Variant manifest of ``image``, loading the manifests of every object in
+    the root serializer's list in one query on first use (cached in context).
+    """
+    from .image_variants import load_manifests
+
+    loaded = field.context.setdefault('variant_manifests', {})
+    if image.name not in loaded:
+        names = [image.name]
+        siblings = getattr(field.root, 'instance', None)
+        if isinstance(siblings, (list, tuple)) or hasattr(siblings, '_result_cache'):
+            for item in siblings:
+                other = getattr(item, field.image_field, None) if isinstance(item, type(obj)) else None
+                if other and other.name and other.name not in loaded:
+                    names.append(other.name)
+        manifests = load_manifests(names)
+        for name in names:
+            loaded[name] = manifests.get(name, {})
+    return loaded[image.name]
+
+
+class VariantURLField(serializers.Field):
+    """
+    URL of an image size variant, taken from the variant manifest — only
+    advertised once the variant exists; the original image URL until then.
+    """
+
+    def __init__(self, size_name, image_field='image', **kwargs):
+        self.size_name = size_name
+        self.image_field = image_field
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        from .image_utils import get_variant_url
+
+        image = getattr(obj, self.image_field, None)
+        if not image or not image.name:
+            return None
+        return get_variant_url(image, self.size_name, _variant_manifest(self, obj, image))
+
+
+class VariantSetField(VariantURLField):
+    """Every existing variant of an image (``srcset``-style list)."""
+
+    def __init__(self, image_field='image', **kwargs):
+        super().__init__(None, image_field, **kwargs)
+
+    def to_representation(self, obj):
+        from .image_utils import get_variant_set
+
+        image = getattr(obj, self.image_field, None)
+        if not image or not image.name:
+            return []
+        return get_variant_set(image, _variant_manifest(self, obj, image))
+
+
 class HeroSlideSerializer(serializers.ModelSerializer):
-    thumbnail_url = serializers.CharField(read_only=True)
-    medium_url = serializers.CharField(read_only=True)
+    thumbnail_url = VariantURLField('thumb')
+    medium_url = VariantURLField('medium')
+    image_variants = VariantSetField()
 
     class Meta:
         model = HeroSlide
-        fields = ['id', 'image', 'thumbnail_url', 'medium_url', 'label', 'label_fr', 'order']
+        fields = ['id', 'image', 'thumbnail_url', 'medium_url', 'image_variants', 'label', 'label_fr', 'order']
 
 
 class MagazineImageSerializer(serializers.ModelSerializer):
@@ -188,36 +247,126 @@ class MagazineImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image', 'caption', 'caption_fr', 'order']
 
 
+RECENT_LIKERS_LIMIT = 3
+
+
+def _liker_payload(user, request):
+    from .utils import user_handle
+    pic = None
+    if hasattr(user, 'profile') and user.profile.profile_picture:
+        if request:
+            pic = request.build_absolute_uri(user.profile.profile_picture.url)
+        else:
+            pic = user.profile.profile_picture.url
+    return {
+        'user_id': user.id,
+        'name': f'{user.first_name} {user.last_name}'.strip() or user_handle(user),
+        'profile_picture': pic,
+    }
+
+
 def get_recent_likers(like_model, content_field, obj, request):
     """Return the 3 most recent likers with profile info."""
     likes = like_model.objects.filter(
         **{content_field: obj}
-    ).select_related('user', 'user__profile').order_by('-created_at')[:3]
-    result = []
+    ).select_related('user', 'user__profile').order_by('-created_at')[:RECENT_LIKERS_LIMIT]
+    return [_liker_payload(like.user, request) for like in likes]
+
+
+def load_recent_likers(like_model, content_field, parent_ids, request, limit=RECENT_LIKERS_LIMIT):
+    """
+    Bulk version of get_recent_likers for a whole page of parents.
+
+    Works for any ``*Like`` model with ``user``, ``created_at`` and a FK
+    named ``content_field``.  Returns ``{parent_id: [liker, ...]}`` using a
+    single ROW_NUMBER() window query; databases without window support
+    fall back to one query per parent.
+    """
+    from django.db import connections, router
+    from django.db.models import F, Window
+    from django.db.models.functions import RowNumber
+
+    parent_ids = list({pk for pk in parent_ids if pk is not None})
+    result = {pk: [] for pk in parent_ids}
+    if not parent_ids:
+        return result
+
+    fk = f'{content_field}_id'
+    db = router.db_for_read(like_model)
+    if not connections[db].features.supports_over_clause:
+        for pk in parent_ids:
+            likes = like_model.objects.filter(**{fk: pk}).select_related(
+                'user', 'user__profile',
+            ).order_by('-created_at')[:limit]
+            result[pk] = [_liker_payload(like.user, request) for like in likes]
+        return result
+
+    likes = like_model.objects.filter(**{f'{fk}__in': parent_ids}).annotate(
+        _liker_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F(fk)],
+            order_by=[F('created_at').desc(), F('pk').desc()],
+        ),
+    ).filter(_liker_rank__lte=limit).select_related(
+        'user', 'user__profile',
+    ).order_by(fk, '_liker_rank')
     for like in likes:
-        user = like.user
-        pic = None
-        if hasattr(user, 'profile') and user.profile.profile_picture:
-            if request:
-                pic = request.build_absolute_uri(user.profile.profile_picture.url)
-            else:
-                pic = user.profile.profile_picture.url
-        from .utils import user_handle
-        result.append({
-            'user_id': user.id,
-            'name': f'{user.first_name} {user.last_name}'.strip() or user_handle(user),
-            'profile_picture': pic,
-        })
+        result[getattr(like, fk)].append(_liker_payload(like.user, request))
     return result
 
 
-class MagazineEditionSerializer(serializers.ModelSerializer):
+class RecentLikersListSerializer(serializers.ListSerializer):
+    """
+    List serializer that resolves ``recent_likers`` for the whole list in
+    one query and hands the result to the child through context.
+
+    The child declares ``recent_likers_model`` / ``recent_likers_field``
+    (via ``RecentLikersMixin``) and reads its entry from context.
+    """
+
+    def to_representation(self, data):
+        from django.db.models.manager import BaseManager
+
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        child = self.child
+        key = f'recent_likers:{child.recent_likers_model._meta.label_lower}'
+        loaded = self.context.setdefault(key, {})
+        missing = [obj.pk for obj in items if obj.pk not in loaded]
+        if missing:
+            loaded.update(load_recent_likers(
+                child.recent_likers_model, child.recent_likers_field,
+                missing, self.context.get('request'),
+            ))
+        return super().to_representation(items)
+
+
+class RecentLikersMixin:
+    """Serializer mixin backing a ``recent_likers`` SerializerMethodField."""
+    recent_likers_model = None
+    recent_likers_field = None
+
+    def get_recent_likers(self, obj):
+        key = f'recent_likers:{self.recent_likers_model._meta.label_lower}'
+        loaded = self.context.get(key)
+        if loaded is not None and obj.pk in loaded:
+            return loaded[obj.pk]
+        # Single-object serialization (detail views) — one query is fine.
+        return get_recent_likers(
+            self.recent_likers_model, self.recent_likers_field, obj,
+            self.context.get('request'),
+        )
+
+
+class MagazineEditionSerializer(RecentLikersMixin, serializers.ModelSerializer):
+    recent_likers_model = MagazineLike
+    recent_likers_field = 'edition'
+
     effective_pdf_url = serializers.SerializerMethodField()
     images = MagazineImageSerializer(many=True, read_only=True)
     is_liked = serializers.BooleanField(read_only=True, default=False)
     recent_likers = serializers.SerializerMethodField()
-    thumbnail_url = serializers.CharField(read_only=True)
-    medium_url = serializers.CharField(read_only=True)
+    thumbnail_url = VariantURLField('thumb', 'cover_image')
+    medium_url = VariantURLField('medium', 'cover_image')
 
     class Meta:
         model = MagazineEdition
@@ -226,6 +375,7 @@ class MagazineEditionSerializer(serializers.ModelSerializer):
                   'pdf_file', 'external_url', 'effective_pdf_url',
                   'publish_date', 'is_featured', 'view_count', 'like_count',
                   'page_count', 'file_size', 'images', 'is_liked', 'recent_likers']
+        list_serializer_class = RecentLikersListSerializer
 
     def get_effective_pdf_url(self, obj):
         if obj.pdf_file:
@@ -235,10 +385,6 @@ class MagazineEditionSerializer(serializers.ModelSerializer):
             return obj.pdf_file.url
         return obj.external_url or ''
 
-    def get_recent_likers(self, obj):
-        request = self.context.get('request')
-        return get_recent_likers(MagazineLike, 'edition', obj, request)
-
 
 class MagazineCommentSerializer(serializers.ModelSerializer):
     """Serializer for magazine comments with nested replies."""
@@ -571,15 +717,17 @@ class ArticleMediaSerializer(serializers.ModelSerializer):
         fields = ['id', 'media_type', 'image', 'video_url', 'caption', 'caption_fr', 'order']
 
 
-class ArticleListSerializer(serializers.ModelSerializer):
+class ArticleListSerializer(RecentLikersMixin, serializers.ModelSerializer):
     """Lightweight serializer for article list/feed — omits full body content."""
+    recent_likers_model = ArticleLike
+    recent_likers_field = 'article'
     category = CategorySerializer(read_only=True)
     media = ArticleMediaSerializer(many=True, read_only=True)
     comment_count = serializers.IntegerField(read_only=True, default=0)
     like_count = serializers.IntegerField(read_only=True, default=0)
     is_liked = serializers.BooleanField(read_only=True, default=False)
-    thumbnail_url = serializers.CharField(read_only=True)
-    medium_url = serializers.CharField(read_only=True)
+    thumbnail_url = VariantURLField('thumb')
+    medium_url = VariantURLField('medium')
     recent_likers = serializers.SerializerMethodField()
 
     class Meta:
@@ -589,10 +737,7 @@ class ArticleListSerializer(serializers.ModelSerializer):
                   'author', 'category', 'publish_date', 'content_type', 'is_featured',
                   'view_count', 'comment_count', 'like_count', 'is_liked', 'media',
                   'recent_likers']
-
-    def get_recent_likers(self, obj):
-        request = self.context.get('request')
-        return get_recent_likers(ArticleLike, 'article', obj, request)
+        list_serializer_class = RecentLikersListSerializer
 
 
 class ArticleSerializer(ArticleListSerializer):
@@ -610,8 +755,8 @@ class EmbassyLocationSerializer(serializers.ModelSerializer):
 
 
 class EventSerializer(serializers.ModelSerializer):
-    thumbnail_url = serializers.CharField(read_only=True)
-    medium_url = serializers.CharField(read_only=True)
+    thumbnail_url = VariantURLField('thumb')
+    medium_url = VariantURLField('medium')
     map_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -700,7 +845,10 @@ class LiveFeedCommentSerializer(serializers.ModelSerializer):
         return len(obj.replies.all())
 
 
-class LiveFeedSerializer(serializers.ModelSerializer):
+class LiveFeedSerializer(RecentLikersMixin, serializers.ModelSerializer):
+    recent_likers_model = LiveFeedLike
+    recent_likers_field = 'feed'
+
     event_name = serializers.CharField(source='event.name', read_only=True, default=None)
     event_date = serializers.DateTimeField(source='event.event_date', read_only=True, default=None)
     speakers = serializers.SerializerMethodField()
@@ -714,8 +862,9 @@ class LiveFeedSerializer(serializers.ModelSerializer):
                   'event', 'event_name', 'event_date', 'speakers',
                   'stream_url', 'stream_type',
                   'meeting_id', 'passcode', 'thumbnail', 'status',
-                  'viewer_count', 'duration', 'scheduled_time',
+                  'viewer_count', 'peak_viewers', 'duration', 'scheduled_time',
                   'like_count', 'is_liked', 'recent_likers']
+        list_serializer_class = RecentLikersListSerializer
 
     def get_speakers(self, obj):
         if not obj.event_id:
@@ -723,10 +872,6 @@ class LiveFeedSerializer(serializers.ModelSerializer):
         qs = obj.event.event_speakers.filter(is_active=True).order_by('order', 'name')
         return EventSpeakerSerializer(qs, many=True, context=self.context).data
 
-    def get_recent_likers(self, obj):
-        request = self.context.get('request')
-        return get_recent_likers(LiveFeedLike, 'feed', obj, request)
-
 
 class ResourceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -780,8 +925,8 @@ class FeatureCardSerializer(serializers.ModelSerializer):
     impact_areas = serializers.SerializerMethodField()
     impact_areas_fr = serializers.SerializerMethodField()
     media = FeatureCardMediaSerializer(many=True, read_only=True)
-    thumbnail_url = serializers.CharField(read_only=True)
-    medium_url = serializers.CharField(read_only=True)
+    thumbnail_url = VariantURLField('thumb')
+    medium_url = VariantURLField('medium')
 
     class Meta:
         model = FeatureCard
@@ -921,8 +1066,8 @@ class PriorityAgendaSerializer(serializers.ModelSerializer):
 
 
 class GalleryPhotoSerializer(serializers.ModelSerializer):
-    thumbnail_url = serializers.CharField(read_only=True)
-    medium_url = serializers.CharField(read_only=True)
+    thumbnail_url = VariantURLField('thumb')
+    medium_url = VariantURLField('medium')
 
     class Meta:
         model = GalleryPhoto
@@ -930,7 +1075,10 @@ class GalleryPhotoSerializer(serializers.ModelSerializer):
                   'photographer', 'taken_date', 'display_order']
 
 
-class GalleryAlbumSerializer(serializers.ModelSerializer):
+class GalleryAlbumSerializer(RecentLikersMixin, serializers.ModelSerializer):
+    recent_likers_model = GalleryAlbumLike
+    recent_likers_field = 'album'
+
     photos = GalleryPhotoSerializer(many=True, read_only=True)
     is_liked = serializers.BooleanField(read_only=True, default=False)
     recent_likers = serializers.SerializerMethodField()
@@ -941,6 +1089,7 @@ class GalleryAlbumSerializer(serializers.ModelSerializer):
                   'cover_image', 'photo_count', 'view_count', 'like_count',
                   'created_at', 'is_featured', 'display_order', 'photos', 'is_liked',
                   'recent_likers']
+        list_serializer_class = RecentLikersListSerializer
 
     def to_representation(self, instance):
         ret = super().to_representation(instance)
@@ -952,10 +1101,6 @@ class GalleryAlbumSerializer(serializers.ModelSerializer):
                 ret['cover_image'] = instance.cover_image.url
         return ret
 
-    def get_recent_likers(self, obj):
-        request = self.context.get('request')
-        return get_recent_likers(GalleryAlbumLike, 'album', obj, request)
-
 
 class VideoChapterSerializer(serializers.ModelSerializer):
     class Meta:
@@ -970,15 +1115,18 @@ class VideoSubtitleSerializer(serializers.ModelSerializer):
         fields = ['id', 'language', 'subtitle_file', 'is_default']
 
 
-class VideoSerializer(serializers.ModelSerializer):
+class VideoSerializer(RecentLikersMixin, serializers.ModelSerializer):
+    recent_likers_model = VideoLike
+    recent_likers_field = 'video'
+
     # Return either the uploaded file URL or the external video_url
     video_url = serializers.SerializerMethodField()
     is_liked = serializers.BooleanField(read_only=True, default=False)
     chapters = VideoChapterSerializer(many=True, read_only=True)
     subtitles = VideoSubtitleSerializer(many=True, read_only=True)
     recent_likers = serializers.SerializerMethodField()
-    thumbnail_url = serializers.CharField(read_only=True)
-    medium_url = serializers.CharField(read_only=True)
+    thumbnail_url = VariantURLField('thumb', 'thumbnail')
+    medium_url = VariantURLField('medium', 'thumbnail')
 
     class Meta:
         model = Video
@@ -987,6 +1135,7 @@ class VideoSerializer(serializers.ModelSerializer):
                   'duration', 'category', 'view_count',
                   'like_count', 'publish_date', 'is_featured', 'is_liked',
                   'chapters', 'subtitles', 'recent_likers']
+        list_serializer_class = RecentLikersListSerializer
 
     def get_video_url(self, obj):
         """Return video_file URL if exists, otherwise return video_url"""
@@ -997,10 +1146,6 @@ class VideoSerializer(serializers.ModelSerializer):
             return obj.video_file.url
         return obj.video_url
 
-    def get_recent_likers(self, obj):
-        request = self.context.get('request')
-        return get_recent_likers(VideoLike, 'video', obj, request)
-
 
 class SocialMediaLinkSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1302,11 +1447,7 @@ class EventRegistrationSerializer(serializers.ModelSerializer):
     def get_spots_remaining(self, obj):
         if obj.max_registrations <= 0:
             return None  # Unlimited
-        if hasattr(obj, '_non_waitlisted_count'):
-            count = obj._non_waitlisted_count
-        else:
-            count = obj.submissions.filter(is_waitlisted=False).count()
-        remaining = obj.max_registrations - count
+        remaining = obj.max_registrations - obj.seats_taken
         return max(0, remaining)
 
 
@@ -0,0 +1,196 @@
+"""
+Buffered capture of analytics sessions (``UserSession`` rows).
+
+``SessionTrackingMiddleware`` used to run an ``exists()`` dedup query, a
+GeoIP lookup and an INSERT inline on every successful ``/api/`` response.
+The request path now only does:
+
+  1. ``cache.add`` on ``session_track:<user|anon>:<ip>`` — the one-per-hour
+     dedup, atomic and outside the database;
+  2. ``enqueue`` of a small event — ``RPUSH`` to a Redis list with
+     django-redis, or an in-process deque otherwise.
+
+``flush_session_events`` drains the queue in batches: it resolves profile
+snapshots with one query per batch, geolocates each IP through a memoised
+lookup and writes the rows with ``bulk_create``.  It runs from Celery beat
+when Redis is configured; the in-process queue is drained by a daemon
+thread every ``SESSION_TRACKING_FLUSH_INTERVAL`` seconds.
+
+``created_at`` is stamped at flush time, so it lags the request by at most
+one flush interval.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+REDIS_QUEUE_KEY = 'burundi_au:session_events'
+DEDUP_PREFIX = 'session_track'
+MAX_LOCAL_QUEUE = 50000
+
+
+def _redis():
+    """Raw Redis client when the default cache is django-redis, else None."""
+    if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+        return None
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception:
+        return None
+
+
+def should_track(user_id, ip):
+    """One event per user (or anonymous) per IP per dedup window."""
+    key = f'{DEDUP_PREFIX}:{user_id or "anon"}:{ip}'
+    window = getattr(settings, 'SESSION_TRACKING_DEDUP_SECONDS', 3600)
+    return cache.add(key, 1, window)
+
+
+# ── In-process queue + background drain ─────────────────────────
+
+_local_queue = deque(maxlen=MAX_LOCAL_QUEUE)
+_worker_lock = threading.Lock()
+_worker = None
+
+
+def _worker_loop():
+    from django.db import connections
+
+    while True:
+        time.sleep(getattr(settings, 'SESSION_TRACKING_FLUSH_INTERVAL', 10))
+        try:
+            flush_session_events()
+        except Exception:
+            logger.exception('Background session flush failed')
+        finally:
+            # Do not hold a DB connection between flushes.
+            connections.close_all()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_worker_loop, name='session-events', daemon=True)
+            _worker.start()
+
+
+def enqueue(user_id, ip):
+    """Queue one session event; no database access."""
+    event = {'u': user_id, 'ip': ip}
+    client = _redis()
+    if client is not None:
+        try:
+            client.rpush(REDIS_QUEUE_KEY, json.dumps(event))
+            return
+        except Exception:
+            logger.warning('Redis RPUSH failed; queueing session event in-process', exc_info=True)
+    _local_queue.append(event)
+    if getattr(settings, 'SESSION_TRACKING_BACKGROUND_FLUSH', True):
+        _ensure_worker()
+
+
+def _pop_redis(client, n):
+    pipe = client.pipeline()
+    pipe.lrange(REDIS_QUEUE_KEY, 0, n - 1)
+    pipe.ltrim(REDIS_QUEUE_KEY, n, -1)
+    raw, _ = pipe.execute()
+    return [json.loads(item) for item in raw]
+
+
+def _pop_local(n):
+    events = []
+    while _local_queue and len(events) < n:
+        try:
+            events.append(_local_queue.popleft())
+        except IndexError:
+            break
+    return events
+
+
+@lru_cache(maxsize=10000)
+def geolocate(ip):
+    """Memoised (country_code, country_name, city) for an IP."""
+    from .geo_utils import get_country_from_ip
+    return get_country_from_ip(ip)
+
+
+def _write_batch(events):
+    from django.contrib.auth.models import User
+    from .models import UserProfile, UserSession
+
+    user_ids = {e['u'] for e in events if e['u']}
+    if user_ids:
+        # Accounts deleted since the request are recorded as anonymous.
+        user_ids = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    profiles = {
+        p['user_id']: p for p in UserProfile.objects.filter(user_id__in=user_ids).values(
+            'user_id', 'nationality', 'device_type', 'device_os', 'app_version',
+        )
+    } if user_ids else {}
+    rows = []
+    for event in events:
+        country_code, country_name, city = geolocate(event['ip'])
+        user_id = event['u'] if event['u'] in user_ids else None
+        profile = profiles.get(user_id) or {}
+        rows.append(UserSession(
+            user_id=user_id,
+            ip_address=event['ip'],
+            country_code=country_code,
+            country_name=country_name,
+            city=city,
+            user_nationality=profile.get('nationality') or '',
+            device_type=profile.get('device_type') or '',
+            device_os=profile.get('device_os') or '',
+            app_version=profile.get('app_version') or '',
+        ))
+    UserSession.objects.bulk_create(rows)
+    return len(rows)
+
+
+def flush_session_events(batch_size=None, max_batches=20):
+    """Drain queued events into ``UserSession``. Returns rows written."""
+    batch_size = batch_size or getattr(settings, 'SESSION_TRACKING_BATCH_SIZE', 500)
+    written = 0
+    client = _redis()
+    for _ in range(max_batches):
+        events = []
+        if client is not None:
+            try:
+                events = _pop_redis(client, batch_size)
+            except Exception:
+                logger.warning('Could not read session events from Redis', exc_info=True)
+        if len(events) < batch_size:
+            events += _pop_local(batch_size - len(events))
+        if not events:
+            break
+        try:
+            written += _write_batch(events)
+        except Exception:
+            # DB hiccup: drop the batch rather than retrying forever —
+            # this is best-effort analytics.
+            logger.exception('Dropped %d session events', len(events))
+    if written:
+        logger.debug('Flushed %d session events', written)
+    return written
+
+
+def pending_events():
+    total = len(_local_queue)
+    client = _redis()
+    if client is not None:
+        try:
+            total += client.llen(REDIS_QUEUE_KEY)
+        except Exception:
+            pass
+    return total
@@ -2,18 +2,17 @@
 Post-save signals for multi-size WebP thumbnail generation.
 
 When an image field changes on any of the tracked models, three WebP
-variants (_thumb, _medium, _large) are written alongside the original
-file on disk.
+variants (_thumb, _medium, _large) are queued for generation alongside
+the original file (core/image_variants.py, run by Celery after commit).
 
 The pre_save optimiser in models.py already converts uploads to WebP;
 this module runs *after* the row is saved so it can read the final
-file path from storage and generate the extra sizes.
+file name from storage and queue the extra sizes.
 """
 import logging
-import os
 
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
 logger = logging.getLogger(__name__)
@@ -36,8 +35,8 @@ def _get_image_field_names(model):
 
 
 def _on_post_save(sender, instance, created, **kwargs):
-    """Generate multi-size thumbnails when an image field changes."""
-    from .image_utils import generate_thumbnails_on_disk, generate_thumbnails_to_storage
+    """Queue multi-size thumbnails when an image field changes."""
+    from .image_variants import enqueue
 
     field_names = _get_image_field_names(sender)
     if not field_names:
@@ -52,7 +51,8 @@ def _on_post_save(sender, instance, created, **kwargs):
         cache_attr = f'_prev_image_{field_name}'
 
         # On creation every image is "new"; on update only regenerate when
-        # the file name changed (which means a new upload happened).
+        # the file name changed (which means a new upload happened). Saves
+        # from freshly loaded instances are deduplicated by enqueue().
         old_name = getattr(instance, cache_attr, None)
         if not created and old_name == image.name:
             continue
@@ -60,35 +60,18 @@ def _on_post_save(sender, instance, created, **kwargs):
         # Remember current name for subsequent saves within same process.
         setattr(instance, cache_attr, image.name)
 
-        logger.info(
-            "Generating thumbnails for %s.%s (pk=%s): %s",
-            sender.__name__, field_name, instance.pk, image.name,
-        )
-
-        # Resolve to an absolute filesystem path if possible;
-        # fall back to remote (S3) generation otherwise.
-        try:
-            full_path = image.path  # works for default FileSystemStorage
-        except NotImplementedError:
-            # Remote storage (S3, Spaces, etc.)
-            generate_thumbnails_to_storage(image)
-            continue
-
-        if not os.path.isfile(full_path):
-            continue
-
-        generate_thumbnails_on_disk(full_path)
-
+        if enqueue(instance, field_name, image):
+            logger.info(
+                "Queued thumbnails for %s.%s (pk=%s): %s",
+                sender.__name__, field_name, instance.pk, image.name,
+            )
 
-def register_thumbnail_signals():
-    """
-    Connect the post_save signal for all core models that have ImageFields.
 
-    Called from ``CoreConfig.ready()`` so Django has finished model loading.
-    """
+def thumbnail_models():
+    """Models whose images get size variants."""
     from . import models as m  # noqa: N812 — short alias is fine here
 
-    target_models = [
+    return [
         m.HeroSlide,
         m.Article,
         m.ArticleMedia,
@@ -111,7 +94,14 @@ def register_thumbnail_signals():
         m.VerificationRequest,
     ]
 
-    for model in target_models:
+
+def register_thumbnail_signals():
+    """
+    Connect the post_save signal for all core models that have ImageFields.
+
+    Called from ``CoreConfig.ready()`` so Django has finished model loading.
+    """
+    for model in thumbnail_models():
         # Only connect if the model actually has image fields.
         if _get_image_field_names(model):
             post_save.connect(
@@ -202,3 +192,413 @@ def register_admin_notification_signals():
         sender=User,
         dispatch_uid='admin_notif_user_created',
     )
+
+
+# ── Home feed invalidation ───────────────────────────────────────
+# The shared home feed base document is versioned (core.feed_cache);
+# saving or deleting any content it is built from bumps the version so the
+# next request rebuilds once instead of waiting for the TTL.
+
+def _on_home_feed_content_changed(sender, **kwargs):
+    from .feed_cache import bump_version
+    bump_version()
+
+
+def _on_registration_counts_changed(sender, **kwargs):
+    from .feed_cache import invalidate_registration_counts
+    invalidate_registration_counts()
+
+
+def register_feed_invalidation_signals():
+    """
+    Connect post_save/post_delete on every model the home feed reads.
+
+    Called from ``CoreConfig.ready()`` after model loading is complete.
+    """
+    from . import models as m
+
+    feed_models = [
+        m.Article,
+        m.HeroSlide,
+        m.FeatureCard,
+        m.MagazineEdition,
+        m.Event,
+        m.EventRegistration,
+        m.Fact,
+        m.HeroTextContent,
+        m.AppSettings,
+    ]
+    for model in feed_models:
+        post_save.connect(
+            _on_home_feed_content_changed,
+            sender=model,
+            dispatch_uid=f'home_feed_save_{model.__name__}',
+        )
+        post_delete.connect(
+            _on_home_feed_content_changed,
+            sender=model,
+            dispatch_uid=f'home_feed_delete_{model.__name__}',
+        )
+
+    # Submissions only move the registration counts, which are cached as
+    # their own small section — rebuilding the base on every sign-up would
+    # stampede it during a registration rush.
+    post_save.connect(
+        _on_registration_counts_changed, sender=m.EventSubmission,
+        dispatch_uid='home_feed_counts_save',
+    )
+    post_delete.connect(
+        _on_registration_counts_changed, sender=m.EventSubmission,
+        dispatch_uid='home_feed_counts_delete',
+    )
+
+
+
+# ── Full-text search index ───────────────────────────────────────
+
+
+def _on_searchable_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .search import update_search_vectors
+    try:
+        update_search_vectors(instance)
+    except Exception:
+        logger.exception('Failed to refresh search vectors for %s %s', sender.__name__, instance.pk)
+
+
+def register_search_index_signals():
+    """Keep article/magazine tsvector columns current on every save."""
+    from .models import Article, MagazineEdition
+
+    for model in (Article, MagazineEdition):
+        post_save.connect(
+            _on_searchable_saved, sender=model,
+            dispatch_uid=f'search_index_save_{model.__name__}',
+        )
+
+# ── Profanity list hot-reload ────────────────────────────────────
+
+
+def _on_profanity_word_changed(sender, **kwargs):
+    from .profanity import invalidate
+    invalidate()
+
+
+def register_profanity_signals():
+    """Recompile the comment profanity matcher when admins edit the list."""
+    from .models import ProfanityWord
+
+    post_save.connect(
+        _on_profanity_word_changed, sender=ProfanityWord,
+        dispatch_uid='profanity_word_save',
+    )
+    post_delete.connect(
+        _on_profanity_word_changed, sender=ProfanityWord,
+        dispatch_uid='profanity_word_delete',
+    )
+
+
+# ── Unread notification counters ─────────────────────────────────
+
+
+def _on_notification_pre_save(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._unread_prev_state = None
+        return
+    instance._unread_prev_state = sender.objects.filter(pk=instance.pk).values_list(
+        'is_active', 'is_global',
+    ).first()
+
+
+def _on_notification_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .notification_counters import notification_state_changed
+    notification_state_changed(
+        instance.pk,
+        None if created else getattr(instance, '_unread_prev_state', None),
+        (instance.is_active, instance.is_global),
+    )
+
+
+def _on_notification_pre_delete(sender, instance, **kwargs):
+    from .notification_counters import notification_state_changed
+    # Through rows still exist here; they are cascaded without m2m signals.
+    notification_state_changed(instance.pk, (instance.is_active, instance.is_global), None)
+
+
+def _m2m_pairs(instance, reverse, pk_set):
+    if reverse:  # user.read_notifications / user.targeted_notifications
+        return [(pk, instance.pk) for pk in pk_set]
+    return [(instance.pk, pk) for pk in pk_set]
+
+
+def _m2m_counter_handler(apply):
+    """m2m_changed receiver for a Notification<->User through table.
+
+    Removals are applied in ``pre_*`` while the rows still exist, and only
+    for rows that actually exist; ``post_add`` already receives just the
+    newly inserted ids.
+    """
+    def handler(sender, instance, action, reverse, pk_set, **kwargs):
+        owner, other = ('user_id', 'notification_id') if reverse else ('notification_id', 'user_id')
+        if action == 'post_add':
+            apply(_m2m_pairs(instance, reverse, pk_set), +1)
+        elif action in ('pre_remove', 'pre_clear'):
+            existing = sender.objects.filter(**{owner: instance.pk})
+            if action == 'pre_remove':
+                existing = existing.filter(**{f'{other}__in': pk_set})
+            apply(_m2m_pairs(instance, reverse, existing.values_list(other, flat=True)), -1)
+    return handler
+
+
+def register_notification_counter_signals():
+    """Keep the unread badge counters in step with notifications, targets and reads."""
+    from .models import Notification
+    from .notification_counters import reads_changed, targets_changed
+
+    pre_save.connect(
+        _on_notification_pre_save, sender=Notification,
+        dispatch_uid='unread_counter_pre_save',
+    )
+    post_save.connect(
+        _on_notification_saved, sender=Notification,
+        dispatch_uid='unread_counter_save',
+    )
+    pre_delete.connect(
+        _on_notification_pre_delete, sender=Notification,
+        dispatch_uid='unread_counter_delete',
+    )
+    m2m_changed.connect(
+        _m2m_counter_handler(targets_changed), sender=Notification.target_users.through,
+        dispatch_uid='unread_counter_targets', weak=False,
+    )
+    m2m_changed.connect(
+        _m2m_counter_handler(reads_changed), sender=Notification.read_by.through,
+        dispatch_uid='unread_counter_reads', weak=False,
+    )
+
+
+# ── Push audience index ──────────────────────────────────────────
+
+
+def _on_device_token_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from django.db import transaction
+    from .push_audience import sync_tokens
+    try:
+        with transaction.atomic():  # a failure must not poison the caller's transaction
+            sync_tokens([instance.token])
+    except Exception:
+        logger.exception('Failed to sync push audience for a device token')
+
+
+def _on_profile_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    from .push_audience import PROFILE_FIELDS, sync_users
+    if update_fields is not None and not set(update_fields) & set(PROFILE_FIELDS):
+        return
+    from django.db import transaction
+    try:
+        with transaction.atomic():
+            sync_users([instance.user_id])
+    except Exception:
+        logger.exception('Failed to sync push audience for user %s', instance.user_id)
+
+
+def register_push_audience_signals():
+    """Keep PushAudienceToken in step with device tokens and profile targeting fields."""
+    from .models import DeviceToken, UserProfile
+
+    post_save.connect(
+        _on_device_token_changed, sender=DeviceToken,
+        dispatch_uid='push_audience_token_save',
+    )
+    post_delete.connect(
+        _on_device_token_changed, sender=DeviceToken,
+        dispatch_uid='push_audience_token_delete',
+    )
+    post_save.connect(
+        _on_profile_saved, sender=UserProfile,
+        dispatch_uid='push_audience_profile_save',
+    )
+
+
+# ── Segment membership snapshots ─────────────────────────────────
+
+
+def _segment_user_changed(fields, user_attr):
+    def handler(sender, instance, raw=False, update_fields=None, **kwargs):
+        if raw:
+            return
+        if update_fields is not None and not set(update_fields) & set(fields):
+            return
+        user_id = getattr(instance, user_attr)
+        from django.db import transaction
+        from .segments import refresh_user
+        try:
+            with transaction.atomic():
+                refresh_user(user_id)
+        except Exception:
+            logger.exception('Failed to refresh segment membership for user %s', user_id)
+    return handler
+
+
+def _on_segment_pre_delete(sender, instance, **kwargs):
+    # Sent notifications already hold their recipients; record the rest now,
+    # while the snapshot still exists.
+    from .segments import record_recipients
+    for notification in instance.notifications.all():
+        record_recipients(notification)
+
+
+def register_segment_signals():
+    """Keep dynamic segment snapshots in step with profile and account changes."""
+    from django.contrib.auth.models import User
+    from .models import UserProfile, UserSegment
+    from .segments import PROFILE_FIELDS, USER_FIELDS
+
+    post_save.connect(
+        _segment_user_changed(PROFILE_FIELDS, 'user_id'), sender=UserProfile,
+        dispatch_uid='segment_profile_save', weak=False,
+    )
+    post_save.connect(
+        _segment_user_changed(USER_FIELDS, 'pk'), sender=User,
+        dispatch_uid='segment_user_save', weak=False,
+    )
+    pre_delete.connect(
+        _on_segment_pre_delete, sender=UserSegment,
+        dispatch_uid='segment_pre_delete',
+    )
+
+
+# ── Event seat counters ──────────────────────────────────────────
+
+
+def _on_event_submission_deleted(sender, instance, **kwargs):
+    if not instance.is_waitlisted:
+        from .event_seats import release_seat
+        release_seat(instance.event_registration_id)
+
+
+def register_event_seat_signals():
+    """Hand a deleted submission's seat back to the event's counter."""
+    from .models import EventSubmission
+
+    post_delete.connect(
+        _on_event_submission_deleted, sender=EventSubmission,
+        dispatch_uid='event_seat_release',
+    )
+
+
+# ── Gate check-in index ──────────────────────────────────────────
+
+# User fields shown on event ticket scans; saves touching none of them skip the sync.
+CHECKIN_USER_FIELDS = ('first_name', 'username', 'email')
+
+
+def _checkin_sync(qr_type, codes):
+    from django.db import transaction
+    from .checkin import sync
+    try:
+        with transaction.atomic():
+            sync(qr_type, codes)
+    except Exception:
+        logger.exception('Failed to sync check-in credentials %s %s', qr_type, codes)
+
+
+def _on_submission_checkin_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _checkin_sync('event', [instance.pk])
+
+
+def _on_application_checkin_changed(sender, instance, raw=False, **kwargs):
+    if not raw and instance.participant_code:
+        _checkin_sync('youth_dialogue', [instance.participant_code])
+
+
+def _on_application_side_events_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _on_application_checkin_changed(sender, instance)
+    elif pk_set:
+        from .models import YouthDialogueApplication
+        codes = YouthDialogueApplication.objects.filter(pk__in=pk_set).values_list('participant_code', flat=True)
+        _checkin_sync('youth_dialogue', list(codes))
+
+
+def _on_checkin_user_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not set(update_fields) & set(CHECKIN_USER_FIELDS):
+        return
+    from .models import EventSubmission
+    ids = list(EventSubmission.objects.filter(user_id=instance.pk, is_proxy=False).values_list('pk', flat=True))
+    if ids:
+        _checkin_sync('event', ids)
+
+
+def _on_checkin_role_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from django.db import transaction
+    from .checkin import QR_YD, scope_for
+    from .models import CheckinManifest
+    scope = scope_for(QR_YD, instance.event_id)
+    if CheckinManifest.objects.filter(scope=scope).exists():
+        from .tasks import rebuild_checkin_scope
+        transaction.on_commit(lambda: rebuild_checkin_scope.delay(scope))
+
+
+def _checkin_event_saved(qr_type):
+    def handler(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        from .checkin import refresh_info, scope_for
+        try:
+            refresh_info(scope_for(qr_type, instance.pk))
+        except Exception:
+            logger.exception('Failed to refresh check-in manifest info for %s %s', qr_type, instance.pk)
+    return handler
+
+
+def register_checkin_signals():
+    """Keep gate check-in manifests in step with tickets, credentials, roles and events."""
+    from django.contrib.auth.models import User
+    from .models import (
+        EventRegistration, EventSubmission, YouthDialogueApplication, YouthDialogueEvent, YouthDialogueRole,
+    )
+
+    for signal in (post_save, post_delete):
+        signal.connect(
+            _on_submission_checkin_changed, sender=EventSubmission,
+            dispatch_uid=f'checkin_submission_{signal is post_save}',
+        )
+        signal.connect(
+            _on_application_checkin_changed, sender=YouthDialogueApplication,
+            dispatch_uid=f'checkin_application_{signal is post_save}',
+        )
+        signal.connect(
+            _on_checkin_role_changed, sender=YouthDialogueRole,
+            dispatch_uid=f'checkin_role_{signal is post_save}',
+        )
+    m2m_changed.connect(
+        _on_application_side_events_changed, sender=YouthDialogueApplication.selected_side_events.through,
+        dispatch_uid='checkin_application_side_events',
+    )
+    post_save.connect(
+        _on_checkin_user_saved, sender=User,
+        dispatch_uid='checkin_user_save',
+    )
+    post_save.connect(
+        _checkin_event_saved('event'), sender=EventRegistration,
+        dispatch_uid='checkin_event_registration_save', weak=False,
+    )
+    post_save.connect(
+        _checkin_event_saved('youth_dialogue'), sender=YouthDialogueEvent,
+        dispatch_uid='checkin_yd_event_save', weak=False,
+    )
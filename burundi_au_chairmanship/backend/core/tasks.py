@@ -7,9 +7,14 @@ Tasks:
   - Account cleanup (expired OTPs, deactivated accounts)
   - Report generation (weekly analytics PDF)
   - Image optimization (WebP thumbnail generation)
+  - View counter flush (buffered view_count + ContentAnalytics roll-up)
+  - Session analytics flush (queued UserSession rows)
+  - Outbox dispatch (transactional email / push side effects)
+  - Gate check-in index maintenance
 """
 import logging
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
 from django.utils import timezone
 from datetime import timedelta
 
@@ -241,13 +246,80 @@ def send_scheduled_notifications():
     return sent_count
 
 
-@shared_task
+def _newsletter_subscribers():
+    from django.contrib.auth.models import User
+    return User.objects.filter(
+        is_active=True, profile__receives_newsletter=True,
+    ).exclude(email='')
+
+
+def _send_newsletter_edition(edition):
+    """Send ``edition`` to every subscriber with a personal unsubscribe link.
+
+    Goes through the bulk mail engine, so a crashed run resumes from the
+    edition's checkpoint. Returns the number of messages sent.
+    """
+    from django.conf import settings as django_settings
+    from django.core import signing
+    from django.core.mail import EmailMessage, get_connection
+    from .bulk_mail import send_bulk
+
+    site_url = getattr(django_settings, 'SITE_URL', 'https://burundi4africa.com').rstrip('/')
+
+    unsubscribe_footer = (
+        '<hr style="margin:32px 0 16px;border:none;border-top:1px solid #e0e0e0">'
+        '<p style="font-size:12px;color:#888;text-align:center">'
+        'You received this because you subscribed to the Be 4 Africa weekly newsletter. '
+        '<a href="{unsub_url}" style="color:#1976d2">Unsubscribe</a></p>'
+    )
+    subscribers = _newsletter_subscribers().order_by('pk')
+
+    def fetch_page(after, limit):
+        return list(subscribers.filter(pk__gt=after).values_list('pk', 'email', 'pk')[:limit])
+
+    def build_message(email_addr, user_pk):
+        token = signing.dumps(user_pk)
+        unsub_url = f"{site_url}/api/newsletter/unsubscribe/{token}/"
+        msg = EmailMessage(
+            subject=edition.subject,
+            body=edition.body_html + unsubscribe_footer.format(unsub_url=unsub_url),
+            from_email=django_settings.DEFAULT_FROM_EMAIL,
+            to=[email_addr],
+        )
+        msg.content_subtype = 'html'
+        return msg
+
+    result = send_bulk(edition, fetch_page, build_message, get_connection)
+    edition.sent_at = timezone.now()
+    edition.recipient_count = result['sent']
+    edition.save(update_fields=['sent_at', 'recipient_count'])
+
+    logger.info(
+        f"Weekly newsletter sent to {result['sent']}/{result['messages']} subscribers "
+        f"({edition.send_stats['throughput_per_s']} msg/s)"
+    )
+    return result['sent']
+
+
+@shared_task(acks_late=True)
 def send_weekly_newsletter():
-    """Collect articles/events from the past/upcoming week and email subscribers."""
-    from .models import Article, Event, UserProfile, NewsletterEdition, EmailTemplate
-    from django.core.mail import send_mass_mail
+    """Collect articles/events from the past/upcoming week and email subscribers.
+
+    Large lists are sent over several runs: when a run's time budget is
+    spent it re-queues this task, which resumes the unfinished edition.
+    """
+    from .bulk_mail import load_checkpoint
+    from .models import Article, Event, NewsletterEdition, EmailTemplate
     from django.template import Template, Context
 
+    # A run that died mid-send (worker crash, redelivered task) resumes
+    # its edition instead of starting a new one.
+    unfinished = NewsletterEdition.objects.filter(
+        sent_at__isnull=True, send_checkpoint__done=False,
+    ).order_by('-created_at').first()
+    if unfinished and load_checkpoint(unfinished)[1]:
+        return _resume_newsletter(unfinished)
+
     now = timezone.now()
     week_ago = now - timedelta(days=7)
     week_ahead = now + timedelta(days=7)
@@ -285,15 +357,7 @@ def send_weekly_newsletter():
 
     subject = f"Be 4 Africa - Weekly Digest ({now.strftime('%b %d, %Y')})"
 
-    # Get subscribers
-    subscribers = UserProfile.objects.filter(
-        receives_newsletter=True,
-        user__is_active=True,
-    ).select_related('user').exclude(user__email='')
-
-    recipient_emails = [p.user.email for p in subscribers if p.user.email]
-
-    if not recipient_emails:
+    if not _newsletter_subscribers().exists():
         logger.info("No newsletter subscribers found")
         return 0
 
@@ -311,59 +375,48 @@ def send_weekly_newsletter():
     except EmailTemplate.DoesNotExist:
         pass  # Use default body_html built above
 
-    # Send emails in batch with per-user unsubscribe link
-    from django.core import signing
-    from django.core.mail import EmailMessage
-    from django.conf import settings as django_settings
-
-    site_url = getattr(django_settings, 'SITE_URL', 'https://burundi4africa.com').rstrip('/')
-
-    unsubscribe_footer = (
-        '<hr style="margin:32px 0 16px;border:none;border-top:1px solid #e0e0e0">'
-        '<p style="font-size:12px;color:#888;text-align:center">'
-        'You received this because you subscribed to the Be 4 Africa weekly newsletter. '
-        '<a href="{unsub_url}" style="color:#1976d2">Unsubscribe</a></p>'
-    )
-
-    sent = 0
-    batch_size = 50
-    # Build a subscriber lookup: email -> user.pk
-    subscriber_map = {p.user.email: p.user.pk for p in subscribers if p.user.email}
-
-    for i in range(0, len(recipient_emails), batch_size):
-        batch = recipient_emails[i:i + batch_size]
-        for email_addr in batch:
-            try:
-                user_pk = subscriber_map.get(email_addr)
-                if user_pk:
-                    token = signing.dumps(user_pk)
-                    unsub_url = f"{site_url}/api/newsletter/unsubscribe/{token}/"
-                    personalised_html = body_html + unsubscribe_footer.format(unsub_url=unsub_url)
-                else:
-                    personalised_html = body_html
-
-                msg = EmailMessage(
-                    subject=subject,
-                    body=personalised_html,
-                    from_email=django_settings.DEFAULT_FROM_EMAIL,
-                    to=[email_addr],
-                )
-                msg.content_subtype = 'html'
-                msg.send(fail_silently=True)
-                sent += 1
-            except Exception as e:
-                logger.error(f"Newsletter send failed for {email_addr}: {e}")
-
-    # Record the edition
-    NewsletterEdition.objects.create(
+    edition = NewsletterEdition.objects.create(
         subject=subject,
         body_html=body_html,
-        sent_at=now,
-        recipient_count=sent,
     )
+    return _resume_newsletter(edition)
 
-    logger.info(f"Weekly newsletter sent to {sent}/{len(recipient_emails)} subscribers")
-    return sent
+
+def _resume_newsletter(edition):
+    from .bulk_mail import SendPaused
+
+    try:
+        return _send_newsletter_edition(edition)
+    except (SendPaused, SoftTimeLimitExceeded):
+        # Progress is checkpointed per wave; continue in a fresh task.
+        logger.info(f"Newsletter edition {edition.pk} paused; resuming in a new task")
+        send_weekly_newsletter.apply_async(countdown=1)
+        return None
+
+
+@shared_task(bind=True, acks_late=True, max_retries=3, default_retry_delay=60)
+def send_email_campaign(self, campaign_id):
+    """Send an EmailCampaign queued from the admin; retries resume from its checkpoint."""
+    from custom_admin.email_views import send_campaign
+    from .bulk_mail import SendPaused
+    from .models import EmailCampaign
+
+    campaign = EmailCampaign.objects.filter(pk=campaign_id, status='sending').first()
+    if campaign is None:
+        return 0
+    try:
+        return send_campaign(campaign)
+    except (SendPaused, SoftTimeLimitExceeded):
+        # Progress is checkpointed per wave; continue in a fresh task
+        # without spending a retry.
+        logger.info(f"Email campaign {campaign_id} paused; resuming in a new task")
+        send_email_campaign.apply_async(args=[campaign_id], countdown=1)
+        return None
+    except Exception as exc:
+        logger.error(f"Email campaign {campaign_id} failed: {exc}")
+        if self.request.retries >= self.max_retries:
+            EmailCampaign.objects.filter(pk=campaign_id).update(status='failed', last_error=str(exc)[:2000])
+        raise self.retry(exc=exc)
 
 
 @shared_task
@@ -380,6 +433,198 @@ def transition_live_feed_statuses():
     return updated
 
 
+@shared_task
+def flush_view_counts():
+    """Write buffered view increments to view_count and ContentAnalytics."""
+    from .view_counter import flush_view_counts as _flush
+    applied = _flush()
+    if applied:
+        logger.info(f"Flushed {applied} buffered view(s)")
+    return applied
+
+
+@shared_task
+def flush_session_events():
+    """Write queued analytics sessions (SessionTrackingMiddleware) in bulk."""
+    from .session_events import flush_session_events as _flush
+    return _flush()
+
+
+@shared_task
+def persist_presence():
+    """Write presence-store timestamps back to last_active / updated_at."""
+    from .presence import persist_presence as _persist
+    return _persist()
+
+
+@shared_task
+def reconcile_unread_counters():
+    """Correct drift in the per-user unread notification counters."""
+    from .notification_counters import reconcile_unread_counters as _reconcile
+    return _reconcile()
+
+
+@shared_task
+def persist_live_viewer_counts():
+    """Write WebSocket viewer counts to LiveFeed.viewer_count / peak_viewers."""
+    from .live_viewers import persist_viewer_counts
+    return persist_viewer_counts()
+
+
+@shared_task
+def rebuild_push_audience():
+    """Nightly full rebuild of the push audience index to repair drift."""
+    from .push_audience import rebuild
+    return rebuild()
+
+
+@shared_task
+def refresh_user_segments():
+    """Periodic full refresh of every dynamic segment's membership snapshot."""
+    from .segments import refresh_all_segments
+    return refresh_all_segments()
+
+
+@shared_task
+def refresh_segment_members(segment_id):
+    """Rebuild one segment's snapshot after its filters changed."""
+    from .models import UserSegment
+    from .segments import refresh_segment
+    segment = UserSegment.objects.filter(pk=segment_id).first()
+    if segment is None:
+        return 0, 0
+    return refresh_segment(segment)
+
+
+@shared_task
+def run_export_job(job_id):
+    """Generate a large admin export (custom_admin/exports.py) in the background."""
+    from custom_admin.exports import run_job
+    from .models import ExportJob
+    job = ExportJob.objects.filter(pk=job_id, status='pending').first()
+    if job is None:
+        return None
+    return run_job(job).status
+
+
+@shared_task
+def start_document_review(job_id):
+    """List an auto-approve job's documents and queue its chunks (custom_admin/doc_review.py)."""
+    from custom_admin.doc_review import start_job
+    from .models import DocumentReviewJob
+    job = DocumentReviewJob.objects.filter(pk=job_id, status='pending').first()
+    if job is None:
+        return None
+    return start_job(job).status
+
+
+@shared_task
+def review_document_chunk(job_id, doc_ids):
+    """Validate one chunk of an auto-approve job's documents."""
+    from custom_admin.doc_review import review_chunk
+    from .models import DocumentReviewJob
+    try:
+        return review_chunk(job_id, doc_ids)
+    except Exception as exc:
+        logger.error(f"Document review job {job_id} failed: {exc}")
+        DocumentReviewJob.objects.filter(pk=job_id).update(status='failed', error_message=str(exc)[:2000])
+        raise
+
+
+@shared_task
+def start_id_card_print(job_id):
+    """Queue the chunks of an ID card print job (core/id_cards.py)."""
+    from .id_cards import start_job
+    from .models import IdCardPrintJob
+    job = IdCardPrintJob.objects.filter(pk=job_id, status='pending').first()
+    if job is None:
+        return None
+    return start_job(job).status
+
+
+@shared_task
+def render_id_card_chunk(job_id, app_ids):
+    """Render (or reuse) one chunk of a print job's ID cards."""
+    from .id_cards import render_chunk
+    from .models import IdCardPrintJob
+    try:
+        return render_chunk(job_id, app_ids)
+    except Exception as exc:
+        logger.error(f"ID card print job {job_id} failed: {exc}")
+        IdCardPrintJob.objects.filter(pk=job_id).update(status='failed', error_message=str(exc)[:2000])
+        raise
+
+
+@shared_task
+def purge_id_card_sheets():
+    """Delete ID card print sheets past ID_CARD_SHEET_RETENTION_DAYS."""
+    from .id_cards import purge_jobs
+    return purge_jobs()
+
+
+@shared_task
+def purge_export_jobs():
+    """Delete background export files past EXPORT_RETENTION_DAYS."""
+    from custom_admin.exports import purge_jobs
+    return purge_jobs()
+
+
+@shared_task
+def snapshot_dashboard_metrics():
+    """Refresh the pre-aggregated dashboard metrics (core/metrics.py)."""
+    from .metrics import snapshot_metrics
+    return snapshot_metrics()
+
+
+@shared_task
+def deliver_webhooks(webhook_id):
+    """Drain one endpoint's due webhook deliveries (core/webhooks.py)."""
+    from .webhooks import drain
+    return drain(webhook_id)
+
+
+@shared_task
+def dispatch_webhook_deliveries():
+    """Queue a drain for every endpoint with due deliveries (retries, missed enqueues)."""
+    from .webhooks import dispatch_due
+    return dispatch_due()
+
+
+@shared_task
+def purge_webhook_deliveries():
+    """Delete finished webhook deliveries past WEBHOOK_DELIVERY_RETENTION_DAYS."""
+    from .webhooks import purge_deliveries
+    return purge_deliveries()
+
+
+@shared_task
+def dispatch_outbox():
+    """Send due outbox messages (after commit, and on beat for retries)."""
+    from .outbox import drain
+    return drain()
+
+
+@shared_task
+def purge_outbox():
+    """Delete finished outbox messages past OUTBOX_RETENTION_DAYS."""
+    from .outbox import purge
+    return purge()
+
+
+@shared_task
+def rebuild_checkin_scope(scope):
+    """Recompute one check-in manifest (e.g. after its role colours changed)."""
+    from .checkin import rebuild_scope
+    return rebuild_scope(scope)
+
+
+@shared_task
+def rebuild_checkin_index():
+    """Nightly rebuild of every check-in manifest to repair drift."""
+    from .checkin import rebuild
+    return rebuild()
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def send_notification_push_async(self, notification_id):
     """Send push for a Notification model instance in the background."""
@@ -394,11 +639,28 @@ def send_notification_push_async(self, notification_id):
         success, failure = send_push_notification(notification)
         logger.info(f"Async push for notification {notification_id}: {success} sent, {failure} failed")
         return success, failure
+    except SoftTimeLimitExceeded:
+        # Progress is checkpointed per wave; continue in a fresh task
+        # without spending a retry.
+        logger.info(f"Push for notification {notification_id} hit the time limit; resuming")
+        send_notification_push_async.apply_async(args=[notification_id], countdown=1)
+        return None
     except Exception as exc:
         logger.error(f"Async push failed for notification {notification_id}: {exc}")
         raise self.retry(exc=exc)
 
 
+@shared_task(bind=True, max_retries=2, default_retry_delay=30)
+def build_image_variants(self, model_label, field_name, name):
+    """Generate the WebP size variants of an uploaded image (core/image_variants.py)."""
+    from .image_variants import build
+    try:
+        return build(model_label, field_name, name)
+    except Exception as exc:
+        logger.error(f"Image variants failed for {name}: {exc}")
+        raise self.retry(exc=exc)
+
+
 @shared_task(bind=True, max_retries=2, default_retry_delay=30)
 def optimize_image_async(self, image_path):
     """Generate WebP thumbnails at multiple sizes."""
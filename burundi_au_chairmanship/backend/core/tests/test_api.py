@@ -3,15 +3,18 @@ Smoke tests for the highest-risk API paths.
 
 Run with:  python manage.py test core -v2
 """
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import (
-    AppSettings, Article, Category, DeviceToken, Event,
+from core.models import (
+    AppSettings, Article, ArticleLike, Category, DeviceToken, Event,
     EventRegistration, EventSubmission, FeatureCard, HeroSlide,
     UserProfile,
 )
@@ -421,6 +424,121 @@ class PublicEndpointTests(TestCase):
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
 
 
+@override_settings(REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class HomeFeedCacheTests(TestCase):
+    """Shared home feed base + per-user overlay + version invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.article = Article.objects.create(
+            title='Summit opens', content='Body', author='Desk',
+            publish_date=timezone.now(), content_type='article',
+        )
+        self.event_reg = EventRegistration.objects.create(
+            event_title='Test Gala', event_description='A test event',
+            is_registration_enabled=True, send_confirmation_email=False,
+        )
+        self.user = User.objects.create_user('feeduser', 'feed@example.com', 'P@ss12345!')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _feed(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(**_auth_header(user))
+        resp = client.get('/api/home-feed/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.json()
+
+    def test_overlay_marks_user_likes_and_registrations(self):
+        ArticleLike.objects.create(user=self.user, article=self.article)
+        submission = EventSubmission.objects.create(
+            event_registration=self.event_reg, user=self.user, form_data={},
+        )
+        self._feed()  # warm the shared base as an anonymous caller
+
+        data = self._feed(self.user)
+        self.assertTrue(data['articles'][0]['is_liked'])
+        card = next(c for c in data['event_cards'] if c.get('has_registration'))
+        self.assertTrue(card['has_registered'])
+        self.assertEqual(card['user_submission_id'], submission.pk)
+
+        anon = self._feed()
+        self.assertFalse(anon['articles'][0]['is_liked'])
+
+    def test_authenticated_requests_share_the_base(self):
+        from core import views
+        other = User.objects.create_user('other', 'other@example.com', 'P@ss12345!')
+        with patch.object(
+            views, '_build_home_feed_base', wraps=views._build_home_feed_base,
+        ) as build:
+            self._feed(self.user)
+            self._feed(other)
+            self._feed()
+        self.assertEqual(build.call_count, 1)
+
+    def test_content_save_invalidates_base(self):
+        self._feed()
+        Article.objects.create(
+            title='Breaking', content='Body', author='Desk',
+            publish_date=timezone.now(), content_type='article',
+        )
+        titles = [a['title'] for a in self._feed()['articles']]
+        self.assertIn('Breaking', titles)
+
+    def test_submission_refreshes_count_without_rebuilding_base(self):
+        from core import views
+        self.event_reg.max_registrations = 1
+        self.event_reg.save()
+        self._feed()
+        with patch.object(
+            views, '_build_home_feed_base', wraps=views._build_home_feed_base,
+        ) as build:
+            EventSubmission.objects.create(event_registration=self.event_reg, user=self.user, form_data={})
+            card = next(c for c in self._feed()['event_cards'] if c.get('has_registration'))
+        self.assertEqual(build.call_count, 0)
+        self.assertEqual(card['current_registration_count'], 1)
+        self.assertFalse(card['is_registration_open'])
+
+
+class RecentLikersBatchTests(TestCase):
+    """recent_likers is resolved once per page, not once per object."""
+
+    def setUp(self):
+        self.articles = [
+            Article.objects.create(
+                title=f'Story {i}', content='Body', author='Desk',
+                publish_date=timezone.now(), content_type='article',
+            )
+            for i in range(6)
+        ]
+        users = [
+            User.objects.create_user(f'liker{i}', f'liker{i}@example.com', 'P@ss12345!')
+            for i in range(5)
+        ]
+        for article in self.articles:
+            for user in users:
+                ArticleLike.objects.create(user=user, article=article)
+
+    def test_list_serializer_uses_one_liker_query(self):
+        from core.serializers import ArticleListSerializer
+        articles = list(Article.objects.select_related('category').prefetch_related('media'))
+        with self.assertNumQueries(1):
+            data = ArticleListSerializer(articles, many=True, context={}).data
+        for item in data:
+            self.assertEqual(len(item['recent_likers']), 3)
+
+    def test_batched_result_matches_single_lookup(self):
+        from core.serializers import ArticleListSerializer, get_recent_likers
+        data = ArticleListSerializer(self.articles, many=True, context={}).data
+        for article, item in zip(self.articles, data):
+            self.assertEqual(
+                item['recent_likers'],
+                get_recent_likers(ArticleLike, 'article', article, None),
+            )
+
+
 # ─────────────── Auth-guarded endpoints require auth ──────────
 
 
@@ -6,7 +6,10 @@ Verifies that:
 2. Firebase never downgrades is_email_verified True->False
 3. JWT path does not auto-promote is_email_verified
 4. _require_verified_email gate applies equally to both auth paths
+5. Verified Firebase tokens are cached and honour revocation hooks
 """
+import time
+
 from unittest.mock import patch, MagicMock
 
 from django.contrib.auth.models import User
@@ -15,7 +18,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from core.authentication import FirebaseAuthentication
+from core.authentication import FirebaseAuthentication, revoke_cached_tokens, token_cache
 from core.models import UserProfile
 
 
@@ -37,6 +40,7 @@ class FirebaseAutoPromotionTests(TestCase):
     """Test Firebase email-verification auto-promotion logic."""
 
     def setUp(self):
+        token_cache.clear()
         self.user = User.objects.create_user(
             'fbuser', 'fb@example.com', 'P@ss12345!',
         )
@@ -83,6 +87,72 @@ class FirebaseAutoPromotionTests(TestCase):
         self.assertTrue(self.profile.is_email_verified)
 
 
+class FirebaseTokenCacheTests(TestCase):
+    """Verified tokens skip the Firebase round-trip until revoked or due."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            'cacheuser', 'cache@example.com', 'P@ss12345!',
+        )
+        self.profile = self.user.profile
+        self.profile.firebase_uid = 'firebase-uid-cache'
+        self.profile.save()
+        self.factory = RequestFactory()
+        self.backend = FirebaseAuthentication()
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def _authenticate(self):
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Bearer cached-token')
+        return self.backend.authenticate(request)
+
+    @patch('core.authentication.verify_firebase_token')
+    def test_second_request_is_served_from_cache(self, mock_verify):
+        mock_verify.return_value = {
+            'uid': 'firebase-uid-cache', 'exp': time.time() + 3600,
+        }
+        self._authenticate()
+        user, _ = self._authenticate()
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(mock_verify.call_count, 1)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+
+    @patch('core.authentication.verify_firebase_token')
+    def test_revoke_hook_forces_reverification(self, mock_verify):
+        mock_verify.return_value = {
+            'uid': 'firebase-uid-cache', 'exp': time.time() + 3600,
+        }
+        self._authenticate()
+        revoke_cached_tokens(self.user)
+        self._authenticate()
+
+        self.assertEqual(mock_verify.call_count, 2)
+
+    @patch('core.authentication.verify_firebase_token')
+    def test_revocation_recheck_interval(self, mock_verify):
+        mock_verify.return_value = {
+            'uid': 'firebase-uid-cache', 'exp': time.time() + 3600,
+        }
+        with patch.object(token_cache, 'revocation_interval', 0):
+            self._authenticate()
+            self._authenticate()
+
+        self.assertEqual(mock_verify.call_count, 2)
+
+    @patch('core.authentication.verify_firebase_token')
+    def test_expired_token_is_not_cached(self, mock_verify):
+        mock_verify.return_value = {
+            'uid': 'firebase-uid-cache', 'exp': time.time() - 1,
+        }
+        self._authenticate()
+        self._authenticate()
+
+        self.assertEqual(mock_verify.call_count, 2)
+
+
 @override_settings(
     REST_FRAMEWORK={
         'DEFAULT_THROTTLE_CLASSES': [],
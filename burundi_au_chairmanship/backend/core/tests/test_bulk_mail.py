@@ -0,0 +1,113 @@
+"""
+Tests for the bulk mail engine (core/bulk_mail.py) and LoggingEmailBackend batching.
+"""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.bulk_mail import load_checkpoint
+from core.models import Article, EmailCampaign, EmailLog, NewsletterEdition, UserProfile
+from core.tasks import send_weekly_newsletter
+
+
+@override_settings(
+    EMAIL_BACKEND='core.email_backend.LoggingEmailBackend',
+    BULK_MAIL_BATCH_SIZE=2, BULK_MAIL_CONNECTIONS=2, BULK_MAIL_RATE=0,
+)
+class BulkMailTests(TestCase):
+
+    def setUp(self):
+        self.smtp = []
+
+        def connect(*args, **kwargs):
+            server = mock.Mock()
+            server.sendmail.return_value = {}
+            self.smtp.append(server)
+            return server
+
+        for name in ('SMTP', 'SMTP_SSL'):
+            patcher = mock.patch(f'django.core.mail.backends.smtp.smtplib.{name}', side_effect=connect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _users(self, count, newsletter=False):
+        users = []
+        for n in range(count):
+            user = User.objects.create_user(f'reader{n}', f'reader{n}@example.com', 'P@ss12345!')
+            UserProfile.objects.filter(user=user).update(receives_newsletter=newsletter)
+            users.append(user)
+        return users
+
+    def _recipients(self):
+        return [call.args[1] for server in self.smtp for call in server.sendmail.call_args_list]
+
+    def test_backend_uses_one_session_and_one_insert(self):
+        messages = [EmailMessage('Hello', 'Body', 'from@example.com', [f'to{n}@example.com']) for n in range(3)]
+        with self.assertNumQueries(1):
+            self.assertEqual(get_connection().send_messages(messages), 3)
+        self.assertEqual(len(self.smtp), 1)
+        self.assertEqual(EmailLog.objects.filter(status='sent').count(), 3)
+
+    def test_campaign_is_sent_in_batches_from_a_task(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+        self._users(4)
+        campaign = EmailCampaign.objects.create(
+            name='Summit', subject='Hi {{ user_name }}', body_html='<p>{{ user_email }}</p>',
+        )
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/admin/email-campaigns/{campaign.pk}/send/')
+        self.assertEqual(response.status_code, 302)
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count, campaign.failed_count), ('sent', 5, 0))
+        self.assertEqual(len(self.smtp), 3)  # 5 recipients, 2 per SMTP session
+        self.assertEqual(sorted(self._recipients())[0], ['admin@example.com'])
+        self.assertEqual(campaign.logs.filter(category='campaign').count(), 5)
+        self.assertEqual(campaign.send_stats['batches'], 3)
+        self.assertIn('throughput_per_s', campaign.send_stats)
+        self.assertTrue(campaign.send_checkpoint['done'])
+
+    def test_newsletter_resumes_unfinished_edition(self):
+        readers = self._users(5, newsletter=True)
+        Article.objects.create(
+            title='Weekly', content='x', author='Desk', publish_date=timezone.now(), status='published',
+        )
+        edition = NewsletterEdition.objects.create(subject='Digest', body_html='<p>News</p>')
+        checkpoint, resumed = load_checkpoint(edition)
+        self.assertFalse(resumed)
+        checkpoint.update(cursor=readers[1].pk, messages=2, sent=2, batches=1)
+        edition.send_checkpoint = checkpoint
+        edition.save()
+
+        self.assertEqual(send_weekly_newsletter(), 5)
+        self.assertEqual(NewsletterEdition.objects.count(), 1)
+        edition.refresh_from_db()
+        self.assertIsNotNone(edition.sent_at)
+        self.assertEqual(edition.recipient_count, 5)
+        self.assertEqual(
+            sorted(r[0] for r in self._recipients()),
+            [u.email for u in readers[2:]],
+        )
+        self.assertIn('/api/newsletter/unsubscribe/', self.smtp[0].sendmail.call_args.args[2].decode())
+
+    @override_settings(BULK_MAIL_TIME_BUDGET=0.001)  # spent by the first wave
+    def test_send_pauses_between_waves_and_requeues(self):
+        self._users(6, newsletter=True)
+        Article.objects.create(
+            title='Weekly', content='x', author='Desk', publish_date=timezone.now(), status='published',
+        )
+        with mock.patch.object(send_weekly_newsletter, 'apply_async') as requeue:
+            self.assertIsNone(send_weekly_newsletter())
+        requeue.assert_called_once()
+        edition = NewsletterEdition.objects.get()
+        self.assertIsNone(edition.sent_at)
+        self.assertEqual(edition.send_checkpoint['messages'], 4)  # one wave of 2 x 2
+
+        with override_settings(BULK_MAIL_TIME_BUDGET=0):
+            self.assertEqual(send_weekly_newsletter(), 6)  # the re-queued run resumes
+        self.assertEqual(NewsletterEdition.objects.count(), 1)
+        self.assertEqual(len(self._recipients()), 6)
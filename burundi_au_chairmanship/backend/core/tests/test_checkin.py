@@ -0,0 +1,172 @@
+"""
+Tests for gate check-in manifests and the lookup index (core/checkin.py).
+"""
+import base64
+import json
+from unittest import mock
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core import checkin
+from core.models import (
+    CheckinCredential, EventRegistration, EventSubmission, QRScanLog, YouthDialogueApplication,
+    YouthDialogueEvent, YouthDialogueRole,
+)
+from core.tests.test_api import TEST_REST_FRAMEWORK, _auth_header
+
+
+SIGNING_KEY = base64.b64encode(bytes(range(32))).decode()
+
+
+@override_settings(REST_FRAMEWORK=TEST_REST_FRAMEWORK, CHECKIN_MANIFEST_SIGNING_KEY=SIGNING_KEY)
+class CheckinTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        checkin.reset()
+        self.staff = User.objects.create_user('gate', 'gate@example.com', 'P@ss12345!', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(**_auth_header(self.staff))
+        self.event_reg = EventRegistration.objects.create(event_title='Summit Gala', venue='Kigobe')
+        self.event = YouthDialogueEvent.load()
+        YouthDialogueRole.objects.create(event=self.event, name='Panelist', color='#123456')
+        self.app = YouthDialogueApplication.objects.create(
+            user=User.objects.create_user('amani', 'amani@example.com', 'P@ss12345!'), event=self.event,
+            first_name='Amani', last_name='Niyonzima', email='amani@example.com', position='panelist',
+            status='credential_issued', participant_code='YD-2026-0001', qr_hash='a' * 32,
+        )
+
+    def _ticket(self, n):
+        user = User.objects.create_user(f'guest{n}', f'guest{n}@example.com', 'P@ss12345!', first_name=f'Guest{n}')
+        return EventSubmission.objects.create(event_registration=self.event_reg, user=user, form_data={})
+
+    def _manifest(self, scope, since=0):
+        response = self.client.get(f'/api/checkin/manifests/{scope}/', {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_online_scans_are_served_from_the_index(self):
+        ticket = self._ticket(1)
+        qr_data = f'EVT:{ticket.pk}:{ticket.qr_ticket_hash}'
+        first = self.client.post('/api/verify-qr/', {'qr_data': qr_data}, format='json').json()
+        self.assertEqual((first['valid'], first['person_name'], first['event_title']), (True, 'Guest1', 'Summit Gala'))
+        self.assertEqual((first['is_duplicate'], first['scan_count']), (False, 1))
+
+        second = self.client.post('/api/verify-qr/', {'qr_data': qr_data}, format='json').json()
+        self.assertEqual((second['is_duplicate'], second['scan_count']), (True, 2))
+        self.assertEqual(QRScanLog.objects.filter(reference_id=str(ticket.pk)).count(), 2)
+
+        checkin.lookup('youth_dialogue', 'YD-2026-0001')
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(checkin.lookup('event', ticket.pk))
+            entry, info = checkin.lookup('youth_dialogue', 'YD-2026-0001')
+        self.assertEqual((entry['role_color'], entry['role']), ('#123456', 'panelist'))
+
+        response = self.client.post('/api/verify-qr/', {'qr_data': f'YD:YD-2026-0001:{"b" * 32}'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_manifest_delta_carries_revocations_and_removals(self):
+        ticket = self._ticket(1)
+        full = self._manifest(f'event:{self.event_reg.pk}')
+        self.assertEqual([e[0] for e in full['entries']], [str(ticket.pk)])
+        self.assertEqual(full['entries'][0][1], checkin.hash_digest(ticket.qr_ticket_hash))
+        signature = base64.b64decode(full.pop('signature'))
+        public = Ed25519PublicKey.from_public_bytes(base64.b64decode(checkin.public_key()))
+        public.verify(signature, json.dumps(full, sort_keys=True, separators=(',', ':')).encode())
+
+        yd = self._manifest('yd:%d' % self.event.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.app.is_revoked = True
+            self.app.save()
+        delta = self._manifest('yd:%d' % self.event.pk, since=yd['revision'])
+        self.assertEqual(delta['revision'], yd['revision'] + 1)
+        self.assertEqual([(e[0], e[2], e[3]) for e in delta['entries']], [('YD-2026-0001', 'revoked', False)])
+        scan = self.client.post('/api/verify-qr/', {'qr_data': f'YD:YD-2026-0001:{"a" * 32}'}, format='json').json()
+        self.assertEqual((scan['valid'], scan['status']), (False, 'revoked'))
+
+        code = str(ticket.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        delta = self._manifest(f'event:{self.event_reg.pk}', since=full['revision'])
+        self.assertEqual([(e[0], e[2]) for e in delta['entries']], [(code, 'removed')])
+        self.assertIsNone(checkin.lookup('event', code))
+        self.assertEqual(self._manifest(f'event:{self.event_reg.pk}')['entries'], [])
+
+    def test_role_colour_change_rebuilds_the_scope(self):
+        checkin.sync('youth_dialogue', ['YD-2026-0001'])
+        role = YouthDialogueRole.objects.get(event=self.event)
+        role.color = '#654321'
+        with self.captureOnCommitCallbacks(execute=True):
+            role.save()
+        self.assertEqual(CheckinCredential.objects.get(code='YD-2026-0001').role_color, '#654321')
+
+    def test_batch_upload_is_bulk_inserted_once(self):
+        ticket = self._ticket(1)
+        qr_data = f'EVT:{ticket.pk}:{ticket.qr_ticket_hash}'
+        scans = [
+            {'id': 's1', 'qr_data': qr_data, 'scanned_at': '2026-07-01T08:00:00Z'},
+            {'id': 's2', 'qr_data': qr_data, 'scanned_at': '2026-07-01T08:05:00Z'},
+            {'id': 's3', 'qr_data': f'YD:YD-2026-0001:{"a" * 32}', 'scanned_at': '2026-07-01T08:06:00Z'},
+            {'id': 's4', 'qr_data': 'garbage'},
+        ]
+        data = self.client.post('/api/checkin/scans/', {'scans': scans}, format='json').json()
+        self.assertEqual((data['stored'], data['skipped']), (3, 0))
+        self.assertEqual(data['rejected'], [{'id': 's4', 'detail': 'Invalid QR code format.'}])
+        self.assertEqual(
+            [(r['id'], r['valid'], r['is_duplicate'], r['scan_count']) for r in data['results']],
+            [('s1', True, False, 1), ('s2', True, True, 2), ('s3', True, False, 1)],
+        )
+        self.assertEqual(QRScanLog.objects.get(client_ref='s1').scanned_at.isoformat(), '2026-07-01T08:00:00+00:00')
+
+        again = self.client.post('/api/checkin/scans/', {'scans': scans[:3]}, format='json').json()
+        self.assertEqual((again['stored'], again['skipped']), (0, 3))
+        self.assertEqual(QRScanLog.objects.count(), 3)
+
+        online = self.client.post('/api/verify-qr/', {'qr_data': qr_data}, format='json').json()
+        self.assertEqual(online['scan_count'], 3)
+
+    def test_concurrent_reupload_is_counted_once(self):
+        ticket = self._ticket(1)
+        qr_data = f'EVT:{ticket.pk}:{ticket.qr_ticket_hash}'
+        scans = [
+            {'id': 's1', 'qr_data': qr_data, 'scanned_at': '2026-07-01T08:00:00Z'},
+            {'id': 's2', 'qr_data': qr_data, 'scanned_at': '2026-07-01T08:05:00Z'},
+        ]
+        atomic = transaction.atomic
+        raced = []
+
+        def race(*args, **kwargs):
+            # Another upload of s1 commits between the pre-check and this INSERT.
+            if not raced:
+                raced.append(True)
+                checkin.record_scans([{
+                    'qr_type': 'event', 'code': str(ticket.pk), 'client_ref': 's1',
+                    'scanned_at': scans[0]['scanned_at'],
+                }])
+            return atomic(*args, **kwargs)
+
+        with mock.patch.object(checkin.transaction, 'atomic', side_effect=race):
+            data = self.client.post('/api/checkin/scans/', {'scans': scans}, format='json').json()
+        self.assertEqual((data['stored'], data['skipped']), (1, 1))
+        self.assertEqual([(r['id'], r['scan_count']) for r in data['results']], [('s2', 2)])
+        self.assertEqual(QRScanLog.objects.filter(client_ref__in=['s1', 's2']).count(), 2)
+        self.assertTrue(QRScanLog.objects.get(client_ref='s2').is_duplicate)
+
+    def test_manual_lookup_and_staff_only_endpoints(self):
+        data = self.client.post('/api/verify-manual/', {'lookup_type': 'code', 'code': 'YD-2026-0001'},
+                                format='json').json()
+        self.assertEqual((data['valid'], data['details']['role_color']), (True, '#123456'))
+        self.assertEqual(self.client.get('/api/checkin/manifests/event:999999/').status_code, 404)
+        with override_settings(CHECKIN_MANIFEST_SIGNING_KEY=''):
+            response = self.client.get(f'/api/checkin/manifests/event:{self.event_reg.pk}/')
+        self.assertEqual(response.status_code, 503)
+
+        self.client.credentials(**_auth_header(self.app.user))
+        self.assertEqual(self.client.get(f'/api/checkin/manifests/event:{self.event_reg.pk}/').status_code, 403)
+        self.assertEqual(self.client.post('/api/checkin/scans/', {'scans': []}, format='json').status_code, 403)
@@ -0,0 +1,114 @@
+"""
+Tests for the process-local PostgreSQL connection pool (config.db_pool).
+
+Exercises the pool directly against the test database so they run the
+same whether or not DB_POOL_ENABLED is set for the suite.
+"""
+import threading
+import time
+import unittest
+from unittest import mock
+
+import psycopg2
+from django.db import connection
+from django.test import SimpleTestCase
+
+from config.db_pool import ConnectionPool, PoolTimeout
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL only')
+class ConnectionPoolTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        params = connection.get_connection_params()
+        self.pool = ConnectionPool(
+            'test', lambda: psycopg2.connect(**params),
+            min_size=0, max_size=2, timeout=0.2,
+        )
+
+    def tearDown(self):
+        self.pool.closeall()
+
+    def test_connection_is_reused(self):
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        again = self.pool.getconn()
+        self.pool.putconn(again)
+
+        self.assertIs(conn, again)
+        stats = self.pool.stats()
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        conn = self.pool.getconn()
+        conn.autocommit = False
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.pool.putconn(conn)
+
+        self.assertEqual(
+            conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE,
+        )
+
+    def test_exhausted_pool_times_out(self):
+        first, second = self.pool.getconn(), self.pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            self.pool.getconn()
+        self.pool.putconn(first)
+        self.pool.putconn(second)
+        self.assertEqual(self.pool.stats()['timeouts'], 1)
+
+    def test_waiter_gets_returned_connection(self):
+        self.pool.timeout = 2
+        held = [self.pool.getconn(), self.pool.getconn()]
+        got = []
+
+        def worker():
+            conn = self.pool.getconn()
+            got.append(conn)
+            self.pool.putconn(conn)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        while self.pool.stats()['waits'] == 0:
+            time.sleep(0.01)
+        self.pool.putconn(held.pop())
+        thread.join(timeout=5)
+        self.pool.putconn(held.pop())
+
+        self.assertEqual(len(got), 1)
+        self.assertEqual(self.pool.stats()['waits'], 1)
+
+    def test_broken_connection_is_replaced_by_pre_ping(self):
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        conn.close()
+
+        fresh = self.pool.getconn()
+        self.pool.putconn(fresh)
+
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(self.pool.stats()['connections_created'], 2)
+
+    def test_pre_ping_runs_outside_the_lock(self):
+        self.pool.putconn(self.pool.getconn())
+        check = self.pool._check
+        seen = []
+
+        def ping(*args):
+            # stats() takes the lock; it would block if the ping held it.
+            probe = threading.Thread(target=lambda: seen.append(self.pool.stats()['in_use']))
+            probe.start()
+            probe.join(timeout=2)
+            return check(*args)
+
+        with mock.patch.object(self.pool, '_check', side_effect=ping):
+            conn = self.pool.getconn()
+        self.pool.putconn(conn)
+
+        self.assertEqual(seen, [1])  # the slot stays reserved while pinging
+        self.assertEqual(self.pool.stats()['connections_created'], 1)
@@ -0,0 +1,100 @@
+"""
+Tests for background document auto-approval (custom_admin/doc_review.py).
+"""
+import io
+import random
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.models import (
+    DocumentReviewJob, DocumentVerdict, YouthDialogueApplication, YouthDialogueDocument,
+    YouthDialogueEvent,
+)
+
+
+def _png(size, seed):
+    rng = random.Random(seed)
+    img = Image.new('L', (size, size))
+    img.putdata([rng.randrange(256) for _ in range(size * size)])
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@override_settings(DOC_REVIEW_CHUNK=2)
+class DocumentReviewJobTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+        self.client.force_login(self.admin)
+        self.event = YouthDialogueEvent.load()
+        self.event.required_documents = [{'key': 'photo'}, {'key': 'cv'}]
+        self.event.save()
+        self.files = {}
+        read = mock.patch(
+            'custom_admin.doc_review._read', side_effect=lambda doc: (self.files[doc.file.name], ''),
+        )
+        self.read = read.start()
+        self.addCleanup(read.stop)
+        notify = mock.patch('core.views._notify_yd', return_value={})
+        notify.start()
+        self.addCleanup(notify.stop)
+
+    def _application(self, n, documents):
+        user = User.objects.create_user(f'applicant{n}', f'a{n}@example.com', 'P@ss12345!')
+        app = YouthDialogueApplication.objects.create(
+            user=user, event=self.event, first_name='Amani', last_name=f'N{n}',
+            email=f'a{n}@example.com', status='documents_submitted',
+        )
+        for doc_type, content in documents:
+            name = f'youth_dialogue/documents/{n}-{doc_type}.png'
+            self.files[name] = content
+            YouthDialogueDocument.objects.create(application=app, document_type=doc_type, file=name)
+        return app
+
+    def _run(self):
+        url = f'/admin/youth-dialogue/{self.event.pk}/bulk-auto-approve/'
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.post(url).json()
+        return self.client.get(data['progress_url']).json()
+
+    def test_job_validates_in_chunks_and_finalises(self):
+        photo = _png(240, seed=1)
+        ok = self._application(1, [('photo', photo), ('cv', _png(120, seed=2))])
+        bad = self._application(2, [('photo', _png(150, seed=3)), ('cv', _png(120, seed=4))])
+        same = self._application(3, [('photo', photo), ('cv', _png(120, seed=5))])
+
+        progress = self._run()
+        self.assertEqual(progress['state'], 'completed')
+        self.assertEqual(
+            [progress[k] for k in ('total', 'processed', 'approved_count', 'rejected_count', 'credential_count')],
+            [6, 6, 5, 1, 2],
+        )
+        self.assertEqual(progress['memoised_count'], 1)  # the duplicate photo
+        self.assertEqual(DocumentVerdict.objects.count(), 5)
+
+        statuses = dict(YouthDialogueApplication.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[a.pk] for a in (ok, bad, same)],
+            ['credential_issued', 'documents_rejected', 'credential_issued'],
+        )
+        rejected = YouthDialogueDocument.objects.get(status='rejected')
+        self.assertIn('Photo too small', rejected.rejection_reason)
+        self.assertEqual(rejected.reviewed_by, self.admin)
+
+    def test_rerun_reuses_verdicts_without_reading(self):
+        app = self._application(1, [('photo', _png(240, seed=1)), ('cv', _png(120, seed=2))])
+        self._run()
+        self.read.reset_mock()
+
+        # A resubmission stored under an already-judged name costs nothing.
+        YouthDialogueDocument.objects.create(
+            application=app, document_type='cv', file='youth_dialogue/documents/1-cv.png',
+        )
+        progress = self._run()
+        self.assertEqual((progress['total'], progress['memoised_count'], progress['approved_count']), (1, 1, 1))
+        self.read.assert_not_called()
+        self.assertEqual(DocumentReviewJob.objects.filter(status='completed').count(), 2)
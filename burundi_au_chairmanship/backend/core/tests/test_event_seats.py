@@ -0,0 +1,124 @@
+"""
+Tests for event seat / waitlist allocation (core/event_seats.py).
+"""
+import threading
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.models import EventRegistration, EventSubmission, EventWaitlist, OutboxMessage
+from core.tests.test_api import TEST_REST_FRAMEWORK, _auth_header
+
+
+def _verified_user(n):
+    user = User.objects.create_user(f'guest{n}', f'guest{n}@example.com', 'P@ss12345!')
+    user.profile.is_email_verified = True
+    user.profile.save()
+    return user
+
+
+def _register(user, event_reg):
+    client = APIClient()
+    client.credentials(**_auth_header(user))
+    return client.post('/api/event-submissions/', {
+        'event_registration': event_reg.pk, 'form_data': {},
+    }, format='json')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL only (row locks)')
+@override_settings(REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class ParallelRegistrationTests(TransactionTestCase):
+
+    def test_parallel_registrations_never_overbook(self):
+        event_reg = EventRegistration.objects.create(
+            event_title='Summit Gala', max_registrations=3, send_confirmation_email=False,
+        )
+        users = [_verified_user(n) for n in range(10)]
+        barrier = threading.Barrier(len(users))
+        statuses, errors = [], []
+
+        def register(user):
+            try:
+                barrier.wait()
+                statuses.append(_register(user, event_reg).status_code)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        self.assertEqual(statuses, [201] * len(users))
+        self.assertEqual(EventSubmission.objects.filter(is_waitlisted=False).count(), 3)
+        self.assertEqual(
+            sorted(EventWaitlist.objects.values_list('position', flat=True)), list(range(1, 8)),
+        )
+        event_reg.refresh_from_db()
+        self.assertEqual((event_reg.seats_taken, event_reg.waitlist_seq), (3, 7))
+
+
+@override_settings(REST_FRAMEWORK=TEST_REST_FRAMEWORK, OUTBOX_BACKGROUND_DRAIN=False)
+class SeatCounterTests(TestCase):
+
+    def setUp(self):
+        self.event_reg = EventRegistration.objects.create(event_title='Summit Gala', max_registrations=1)
+
+    def test_confirmation_is_sent_from_the_outbox(self):
+        user = _verified_user(1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(_register(user, self.event_reg).status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.get().status, 'pending')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(OutboxMessage.objects.get().status, 'sent')
+        email = mail.outbox[0]
+        self.assertEqual((email.subject, email.to), ('Registration Confirmation: Summit Gala', [user.email]))
+        self.assertIn('Registered', email.alternatives[0][0])
+
+    def test_deleted_seat_is_released_and_promoted(self):
+        first, second = _verified_user(1), _verified_user(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            _register(first, self.event_reg)
+            _register(second, self.event_reg)
+        self.assertIn('Waitlisted', mail.outbox[-1].alternatives[0][0])
+        self.assertEqual(EventWaitlist.objects.get().position, 1)
+
+        EventSubmission.objects.get(user=first).delete()
+        self.event_reg.refresh_from_db()
+        self.assertEqual(self.event_reg.seats_taken, 0)
+
+        call_command('promote_waitlist', stdout=mock.Mock())
+        self.assertFalse(EventSubmission.objects.get(user=second).is_waitlisted)
+        self.event_reg.refresh_from_db()
+        self.assertEqual(self.event_reg.seats_taken, 1)
+
+    def test_proxy_registrations_share_the_counter(self):
+        EventRegistration.objects.filter(pk=self.event_reg.pk).update(
+            allow_proxy_registration=True, send_confirmation_email=False,
+        )
+        client = APIClient()
+        client.credentials(**_auth_header(_verified_user(1)))
+        for n in range(2):
+            response = client.post('/api/event-submissions/register-proxy/', {
+                'event_registration': self.event_reg.pk,
+                'proxy_name': f'Guest {n}', 'proxy_email': f'proxy{n}@example.com',
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(EventSubmission.objects.order_by('pk').values_list('is_waitlisted', flat=True)), [False, True],
+        )
+        self.event_reg.refresh_from_db()
+        self.assertEqual(self.event_reg.seats_taken, 1)
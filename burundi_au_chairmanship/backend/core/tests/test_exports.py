@@ -0,0 +1,132 @@
+"""
+Tests for the streaming admin export subsystem (custom_admin/exports.py).
+"""
+import io
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+
+from core.models import (
+    AdminNotification, ExportJob, YouthDialogueApplication, YouthDialogueDocument,
+    YouthDialogueEvent, YouthDialogueSideEvent,
+)
+from custom_admin import exports
+from custom_admin.reports import generate_users_excel
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+        self.client.force_login(self.admin)
+        self.event = YouthDialogueEvent.load()  # seeded by a data migration
+        self.side = YouthDialogueSideEvent.objects.create(event=self.event, name='Hackathon')
+
+    def _application(self, n, docs=2):
+        user = User.objects.create_user(f'applicant{n}', f'a{n}@example.com', 'P@ss12345!')
+        app = YouthDialogueApplication.objects.create(
+            user=user, event=self.event, first_name='Amani', last_name=f'N{n}',
+            email=f'a{n}@example.com', additional_data={'motivation': '=cmd'},
+        )
+        app.selected_side_events.add(self.side)
+        for i in range(docs):
+            YouthDialogueDocument.objects.create(
+                application=app, document_type='cv', file=f'youth_dialogue/documents/{n}-{i}.pdf',
+                status='approved' if i == 0 else 'pending',
+            )
+        return app
+
+    def _stream(self, export):
+        return ''.join(exports.csv_lines(export)).splitlines()
+
+    def test_csv_rows_use_constant_queries(self):
+        self._application(1)
+        export = exports.build('yd_applications', {'event': self.event.pk})[0]
+        with self.assertNumQueries(2):  # applications + prefetched side events
+            lines = self._stream(export)
+        self.assertEqual(lines[1].split(',')[-2:], ['1/2 approved', 'Yes'])
+
+        for n in range(2, 6):
+            self._application(n)
+        export = exports.build('yd_applications', {'event': self.event.pk})[0]
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self._stream(export)), 6)
+
+    def test_participant_summaries_are_built_lazily(self):
+        self._application(1)
+        # event, side events, row count and the extra-field keys; the summary
+        # aggregates only run when their sheets are written.
+        with self.assertNumQueries(4):
+            sheets = exports.build('yd_participants', {'event': self.event.pk})
+        summary = self._stream(sheets[1])
+        self.assertIn('Total Applications,1', summary)
+        self.assertEqual(self._stream(sheets[3])[1:], ['Hackathon,1,100.0%'])
+
+    def test_views_stream_and_write_only_workbook(self):
+        self._application(1)
+        response = self.client.post('/admin/export/users-csv/')
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('applicant1,a1@example.com', body)
+
+        response = self.client.get(f'/admin/youth-dialogue/{self.event.pk}/export-excel/')
+        wb = load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(wb.sheetnames, ['Participants', 'Summary', 'Countries', 'Side Events'])
+        row = [c.value for c in wb['Participants'][2]]
+        self.assertEqual(row[13:], ['1/2 approved', '=cmd', 'Yes'])
+
+        wb = load_workbook(generate_users_excel(User.objects.all()))
+        last = [c.value for c in list(wb['Users'].rows)[-1]][:2]
+        self.assertEqual(last, ['Total: 2 users', 'Verified: 0'])
+
+    def test_asgi_requests_get_async_iterators(self):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory, RequestFactory
+
+        self._application(1)
+
+        async def drain(response):
+            return b''.join([part async for part in response])
+
+        export = exports.build('users')[0]
+        response = exports.streaming_csv_response(export, AsyncRequestFactory().get('/'))
+        self.assertTrue(response.is_async)
+        self.assertIn(b'applicant1', async_to_sync(drain)(response))
+
+        response = exports.xlsx_response(exports.build('users'), request=AsyncRequestFactory().get('/'))
+        self.assertTrue(response.is_async)
+        self.assertTrue(response.has_header('Content-Length'))
+        wb = load_workbook(io.BytesIO(async_to_sync(drain)(response)))
+        self.assertEqual(wb.sheetnames, ['Users'])
+
+        response = exports.streaming_csv_response(exports.build('users')[0], RequestFactory().get('/'))
+        self.assertFalse(response.is_async)
+
+    @override_settings(EXPORT_ASYNC_THRESHOLD=1)
+    def test_large_export_runs_as_job(self):
+        self._application(1)
+        storage = FileSystemStorage(location=tempfile.mkdtemp())
+        with mock.patch.object(ExportJob._meta.get_field('file'), 'storage', storage):
+            response = self.client.post('/admin/export/users-csv/')
+            self.assertEqual(response.status_code, 302)
+
+            job = ExportJob.objects.get()
+            self.assertEqual((job.status, job.row_count), ('completed', 2))
+            notification = AdminNotification.objects.get(notification_type='export_ready')
+            download = self.client.get(notification.link)
+            self.assertIn(b'applicant1', b''.join(download.streaming_content))
+
+            # Signed-URL storage (Spaces): hand the download off to the bucket.
+            with mock.patch.object(storage, 'querystring_auth', True, create=True), \
+                    mock.patch.object(storage, 'url', return_value='https://spaces.example/x?sig') as url:
+                response = self.client.get(notification.link)
+            self.assertRedirects(response, 'https://spaces.example/x?sig', fetch_redirect_response=False)
+            self.assertIn('attachment', url.call_args.kwargs['parameters']['ResponseContentDisposition'])
+
+            other = User.objects.create_user('staffer', 's@example.com', 'P@ss12345!', is_staff=True)
+            self.client.force_login(other)
+            self.assertEqual(self.client.get(notification.link).status_code, 404)
@@ -0,0 +1,125 @@
+"""
+Tests for stored ID cards and print sheets (core/id_cards.py).
+"""
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from pypdf import PdfReader
+from rest_framework.test import APIClient
+
+from core import id_cards
+from core.models import IdCard, IdCardPrintJob, YouthDialogueApplication, YouthDialogueEvent
+from core.tests.test_api import TEST_REST_FRAMEWORK, _auth_header
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (60, 80), '#336699').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(REST_FRAMEWORK=TEST_REST_FRAMEWORK, ID_CARD_CHUNK=2)
+class IdCardTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_root = override_settings(MEDIA_ROOT=media)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+        self.event = YouthDialogueEvent.load()
+        self.apps = [self._app(n) for n in range(1, 6)]
+        render = mock.patch('core.id_cards.render', wraps=id_cards.render)
+        self.render = render.start()
+        self.addCleanup(render.stop)
+
+    def _app(self, n):
+        user = User.objects.create_user(f'p{n}', f'p{n}@example.com', 'P@ss12345!')
+        user.profile.is_email_verified = True
+        user.profile.save()
+        app = YouthDialogueApplication.objects.create(
+            user=user, event=self.event, first_name=f'Participant{n}', last_name='Test',
+            email=user.email, status='credential_issued', participant_code=f'YD-2026-{n:04d}', qr_hash='a' * 32,
+        )
+        app.id_photo.save(f'p{n}.jpg', ContentFile(_jpeg()))
+        return app
+
+    def test_card_is_rendered_once_per_application_version(self):
+        app = self.apps[0]
+        client = APIClient()
+        client.credentials(**_auth_header(self.admin))
+        first = client.get(f'/api/youth-dialogue/admin/{app.pk}/id-card-pdf/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Disposition'], 'attachment; filename="YD-IDCard-YD-2026-0001.pdf"')
+        pdf = b''.join(first.streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+
+        client.credentials(**_auth_header(app.user))
+        again = client.get('/api/youth-dialogue/credential-pdf/')
+        self.assertEqual(b''.join(again.streaming_content), pdf)
+        self.assertEqual(self.render.call_count, 1)
+
+        old_name = IdCard.objects.get(application=app).file.name
+        app.organization = 'African Union'
+        app.save()
+        with self.captureOnCommitCallbacks() as callbacks:
+            client.get('/api/youth-dialogue/credential-pdf/')
+        self.assertEqual(self.render.call_count, 2)
+        card = IdCard.objects.get(application=app)
+        self.assertNotEqual(card.file.name, old_name)
+        self.assertTrue(card.file.storage.exists(old_name))  # until the new name commits
+        for callback in callbacks:
+            callback()
+        self.assertFalse(card.file.storage.exists(old_name))
+
+        self.client.force_login(self.admin)
+        wallet = self.client.get(f'/admin/youth-dialogue/applications/{app.pk}/id-card-pdf/')
+        self.assertEqual(wallet.status_code, 200)
+        self.assertEqual(PdfReader(io.BytesIO(b''.join(wallet.streaming_content))).pages[0].mediabox.height, 153)
+        self.assertEqual(IdCard.objects.filter(application=app).count(), 2)
+
+    def test_print_sheet_lays_out_cards_per_page(self):
+        self.assertEqual((id_cards.per_sheet('badge'), id_cards.per_sheet('cr80')), (4, 10))
+        id_cards.ensure(self.apps[0], 'badge')
+        YouthDialogueApplication.objects.filter(pk=self.apps[4].pk).update(is_revoked=True)
+
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.post(f'/admin/youth-dialogue/{self.event.pk}/print-id-cards/').json()
+        self.assertEqual((data['status'], data['total'], data['per_sheet']), ('success', 4, 4))
+
+        job = self.client.get(data['progress_url']).json()
+        self.assertEqual(job['state'], 'completed')
+        self.assertEqual((job['card_count'], job['page_count'], job['rendered_count']), (4, 1, 3))
+        sheet = self.client.get(job['download_url'])
+        self.assertEqual(len(PdfReader(io.BytesIO(b''.join(sheet.streaming_content))).pages), 1)
+        self.assertEqual(self.render.call_count, 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.post(f'/admin/youth-dialogue/{self.event.pk}/print-id-cards/', {
+                'template': 'cr80', 'ids': [self.apps[1].pk, self.apps[2].pk],
+            }).json()
+        job = IdCardPrintJob.objects.get(pk=data['job_id'])
+        self.assertEqual((job.status, job.cards, job.pages, job.rendered), ('completed', 2, 1, 2))
+
+        response = self.client.post(f'/admin/youth-dialogue/{self.event.pk}/print-id-cards/', {
+            'ids': [self.apps[4].pk],
+        })
+        self.assertEqual(response.json()['status'], 'error')
+
+    def test_failed_chunk_fails_the_job(self):
+        self.client.force_login(self.admin)
+        self.render.side_effect = ValueError('bad photo')
+        with self.assertRaises(ValueError), self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/admin/youth-dialogue/{self.event.pk}/print-id-cards/')
+        job = IdCardPrintJob.objects.get()
+        self.assertEqual((job.status, job.error_message), ('failed', 'bad photo'))
+        self.assertEqual(id_cards.progress(job)['message'], 'bad photo')
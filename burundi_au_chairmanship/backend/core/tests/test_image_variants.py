@@ -0,0 +1,85 @@
+"""
+Tests for the off-request image variant pipeline (core/image_variants.py).
+"""
+import io
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.image_utils import IMAGE_SIZES, render_variants, variant_name
+from core.models import HeroSlide, ImageVariantManifest
+from core.serializers import HeroSlideSerializer
+
+
+def _jpeg(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImageVariantTests(TestCase):
+
+    def test_cascade_sizes(self):
+        variants = render_variants(_jpeg(4000, 3000))
+        self.assertEqual(list(variants), ['large', 'medium', 'thumb'])
+        self.assertEqual(
+            [(w, h) for _content, w, h in variants.values()],
+            [(1200, 900), (600, 450), (300, 225)],
+        )
+
+    def test_variants_built_after_commit_and_not_redone(self):
+        upload = SimpleUploadedFile('hero.jpg', _jpeg(2400, 1600), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks() as callbacks:
+            slide = HeroSlide.objects.create(label='Summit', image=upload)
+        storage = slide.image.storage
+        self.assertTrue(slide.image.name.endswith('.webp'))
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(storage.exists(variant_name(slide.image.name, 'thumb')))
+
+        callbacks[0]()  # Celery runs eagerly in tests
+        for size_name, width in IMAGE_SIZES.items():
+            with storage.open(variant_name(slide.image.name, size_name)) as fh:
+                self.assertEqual(Image.open(fh).width, width)
+        # The optimiser already produced a 1200px WebP; it is reused for large.
+        with storage.open(slide.image.name) as original, \
+                storage.open(variant_name(slide.image.name, 'large')) as large:
+            self.assertEqual(original.read(), large.read())
+
+        with mock.patch('core.tasks.build_image_variants.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            HeroSlide.objects.get(pk=slide.pk).save()
+        delay.assert_not_called()
+
+    def test_manifest_drives_advertised_urls(self):
+        upload = SimpleUploadedFile('summit.jpg', _jpeg(900, 600), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks() as callbacks:
+            first = HeroSlide.objects.create(label='Pending', image=upload)
+        manifest = ImageVariantManifest.objects.get(source_name=first.image.name)
+        self.assertEqual((manifest.status, manifest.variants), ('pending', {}))
+
+        # Until the variants exist the original is advertised, never a 404.
+        data = HeroSlideSerializer(first).data
+        self.assertTrue(data['thumbnail_url'].endswith(first.image.name))
+        self.assertEqual(data['image_variants'], [])
+
+        callbacks[0]()
+        manifest.refresh_from_db()
+        self.assertEqual(manifest.status, 'ready')
+        thumb = manifest.variants['thumb']['webp']
+        self.assertEqual((thumb['width'], thumb['height']), (300, 200))
+        with first.image.storage.open(thumb['name']) as fh:
+            self.assertEqual(len(fh.read()), thumb['bytes'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            HeroSlide.objects.create(
+                label='Second', image=SimpleUploadedFile('b.jpg', _jpeg(400, 400), content_type='image/jpeg'),
+            )
+        with self.assertNumQueries(2):  # slides + one manifest lookup for the page
+            data = HeroSlideSerializer(list(HeroSlide.objects.order_by('pk')), many=True).data
+        self.assertTrue(data[0]['thumbnail_url'].endswith(f"{thumb['name']}?v={thumb['hash']}"))
+        self.assertEqual([v['width'] for v in data[0]['image_variants']], [300, 600, 900])
+        self.assertIn('b_medium.webp?v=', data[1]['medium_url'])
@@ -0,0 +1,76 @@
+"""
+Tests for in-memory viewer counting and coalesced LiveFeedConsumer broadcasts.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, override_settings
+
+from core import live_viewers
+from core.consumers import LiveFeedConsumer
+from core.models import LiveFeed
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    LIVE_VIEWER_BROADCAST_INTERVAL=0.1,
+    LIVE_VIEWER_PERSIST_INTERVAL=3600,
+)
+class LiveViewerTests(TransactionTestCase):
+
+    def setUp(self):
+        live_viewers._local.clear()
+        self.user = User.objects.create_user('viewer', 'viewer@example.com', 'P@ss12345!')
+        self.feed = LiveFeed.objects.create(
+            title='Summit', stream_url='https://example.com/live.m3u8', status='live',
+        )
+
+    def tearDown(self):
+        live_viewers._local.clear()
+
+    async def _connect(self):
+        communicator = WebsocketCommunicator(LiveFeedConsumer.as_asgi(), '/ws/live-feeds/')
+        communicator.scope['user'] = self.user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    def test_joins_are_coalesced_into_one_broadcast(self):
+        async def scenario():
+            clients = [await self._connect() for _ in range(5)]
+            for client in clients:
+                await client.send_json_to({'type': 'join_feed', 'feed_id': self.feed.pk})
+            await clients[1].send_json_to({'type': 'leave_feed', 'feed_id': self.feed.pk})
+
+            watcher = clients[0]
+            message = await watcher.receive_json_from(timeout=1)
+            self.assertEqual(message, {'type': 'viewer_count', 'feed_id': self.feed.pk, 'viewer_count': 4})
+            await asyncio.sleep(0.2)
+            self.assertTrue(await watcher.receive_nothing())
+
+            await clients[2].disconnect()
+            message = await watcher.receive_json_from(timeout=1)
+            self.assertEqual(message['viewer_count'], 3)
+            for client in clients[3:] + clients[:1]:
+                await client.disconnect()
+
+        async_to_sync(scenario)()
+
+        # No per-join DB writes; the durable figures come from the persist step.
+        self.feed.refresh_from_db()
+        self.assertEqual(self.feed.viewer_count, 0)
+        self.assertEqual(live_viewers.persist_viewer_counts(), 1)
+        self.feed.refresh_from_db()
+        self.assertEqual((self.feed.viewer_count, self.feed.peak_viewers), (0, 5))
+
+    def test_persist_rereads_live_feeds_without_changes(self):
+        # e.g. the viewers were on a worker that died without leaving
+        LiveFeed.objects.filter(pk=self.feed.pk).update(viewer_count=7)
+        self.assertEqual(live_viewers.persist_viewer_counts(), 1)
+        self.feed.refresh_from_db()
+        self.assertEqual(self.feed.viewer_count, 0)
+
+        backend = live_viewers._RedisViewers('redis://localhost:6379/0')
+        self.assertIs(backend._sync_client(), backend._sync_client())
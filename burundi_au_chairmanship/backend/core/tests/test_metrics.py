@@ -0,0 +1,118 @@
+"""
+Tests for the pre-aggregated dashboard metrics snapshot (core/metrics.py).
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Article, MetricSnapshot, UserProfile
+
+
+class MetricSnapshotTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+
+    def _user(self, n, nationality='BI', joined_days_ago=0):
+        user = User.objects.create_user(f'user{n}', f'u{n}@example.com', 'P@ss12345!')
+        if joined_days_ago:
+            User.objects.filter(pk=user.pk).update(
+                date_joined=timezone.now() - timedelta(days=joined_days_ago),
+            )
+        UserProfile.objects.filter(user=user).update(nationality=nationality, preferred_language='fr')
+        return user
+
+    def test_first_read_builds_snapshot(self):
+        self._user(1)
+        self._user(2, nationality='KE', joined_days_ago=40)
+        Article.objects.create(
+            title='A', content='x', author='Desk', publish_date=timezone.now(),
+            status='published', view_count=7, like_count=2,
+        )
+        self.assertFalse(MetricSnapshot.objects.exists())
+
+        snapshot = metrics.latest()
+        self.assertEqual(snapshot['users.total'], 3)
+        self.assertEqual(snapshot['app_users.total'], 2)
+        self.assertEqual((snapshot['articles.published'], snapshot['articles.views']), (1, 7))
+        self.assertEqual(snapshot.breakdown('users.nationality'), [('BI', 1), ('KE', 1)])
+        self.assertEqual(dict(snapshot.breakdown('app_users.language')), {'fr': 2})
+
+        days, series = metrics.daily(['app_users.joined'], 60)
+        self.assertEqual(days[-1], timezone.localdate())
+        self.assertEqual((series['app_users.joined'][-1], sum(series['app_users.joined'])), (1, 2))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(metrics.latest()['users.total'], 3)
+
+    def test_empty_snapshot_queues_one_backfill(self):
+        self._user(1)
+        with mock.patch('core.tasks.snapshot_dashboard_metrics.delay') as delay:
+            self.assertEqual(metrics.latest()['users.total'], 0)  # not built in the request
+            metrics.daily(['app_users.joined'], 7)
+            metrics.latest()
+        self.assertEqual(delay.call_count, 1)
+        self.assertFalse(MetricSnapshot.objects.exists())
+
+        metrics.snapshot_metrics()  # the queued run lands and releases the lock
+        self.assertEqual(metrics.latest()['users.total'], 2)
+
+    def test_runs_are_incremental(self):
+        metrics.snapshot_metrics()
+        old = self._user(1, joined_days_ago=100)
+        self._user(2)
+
+        metrics.snapshot_metrics()
+        series = metrics.daily(['users.joined'], 120)[1]['users.joined']
+        self.assertEqual(series[-1], 2)  # admin + user2 today
+        self.assertEqual(sum(series), 2)  # the backdated sign-up is outside the window
+
+        metrics.snapshot_metrics(full=True)
+        self.assertEqual(metrics.total_since('users.joined', 120), 3)
+
+        old.delete()
+        metrics.snapshot_metrics()
+        self.assertEqual(metrics.latest()['users.total'], 2)
+        self.assertEqual(len(metrics.latest().breakdown('users.nationality')), 1)
+
+    def test_dashboard_reads_do_not_grow_with_data(self):
+        self.client.force_login(self.admin)
+
+        def dashboard_queries():
+            metrics.snapshot_metrics(full=True)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/admin/dashboard/')
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries), response
+
+        self._user(1)
+        baseline, _ = dashboard_queries()
+        for n in range(2, 12):
+            self._user(n, nationality='RW' if n % 2 else 'BI', joined_days_ago=n)
+        queries, response = dashboard_queries()
+        self.assertEqual(queries, baseline)
+        self.assertEqual(response.context['users'], 11)
+        self.assertEqual(sum(int(v) for v in response.context['growth_data_json'][1:-1].split(',')), 11)
+
+        response = self.client.get('/admin/analytics/')
+        self.assertEqual((response.context['total_users'], response.context['new_30d']), (12, 12))
+        response = self.client.get('/admin/analytics/charts/?period=7')
+        self.assertEqual(response.context['nationality_counts'], '[6, 5]')
+        widget = self.client.get('/admin/dashboard/widget/?widget=verification_queue').json()
+        self.assertEqual(widget['pending_count'], 0)
+
+    def test_overview_endpoint_uses_snapshot(self):
+        self._user(1)
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        data = api.get('/api/analytics/overview/').json()
+        self.assertEqual(data['users']['total'], 2)
+        self.assertEqual(data['users']['new_7d'], 2)
+        self.assertIn('albums', data['content'])
@@ -0,0 +1,72 @@
+"""
+Tests for the incrementally maintained unread notification counters.
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import notification_counters as counters
+from core.models import Notification
+
+
+class UnreadCounterTests(TestCase):
+
+    def setUp(self):
+        counters._local.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'P@ss12345!')
+        self.other = User.objects.create_user('other', 'other@example.com', 'P@ss12345!')
+        self.client.force_authenticate(self.user)
+        self.global_one = Notification.objects.create(title='All', message='Hi')
+
+    def tearDown(self):
+        counters._local.clear()
+
+    def _db_unread(self, user):
+        from django.db.models import Q
+        return Notification.objects.filter(is_active=True).filter(
+            Q(is_global=True) | Q(target_users=user)
+        ).exclude(read_by=user).distinct().count()
+
+    def test_counters_follow_lifecycle(self):
+        self.assertEqual(counters.unread_count(self.user.id), 1)  # seeds the user
+
+        targeted = Notification.objects.create(title='You', message='Hi', is_global=False)
+        targeted.target_users.set([self.user, self.other])
+        Notification.objects.create(title='Again', message='Hi')
+        self.assertEqual(counters.unread_count(self.user.id), 3)
+
+        with self.assertNumQueries(0):
+            counters.unread_count(self.user.id)
+
+        targeted.read_by.add(self.user)
+        self.global_one.read_by.add(self.user)
+        self.assertEqual(counters.unread_count(self.user.id), 1)
+
+        self.global_one.is_active = False
+        self.global_one.save()
+        targeted.target_users.remove(self.user)
+        self.user.read_notifications.remove(targeted)
+        self.assertEqual(counters.unread_count(self.user.id), self._db_unread(self.user))
+
+        Notification.objects.filter(title='Again').delete()
+        self.assertEqual(counters.unread_count(self.user.id), self._db_unread(self.user))
+        self.assertEqual(counters.unread_count(self.other.id), self._db_unread(self.other))
+
+    def test_api_mark_read_and_reconcile(self):
+        targeted = Notification.objects.create(title='You', message='Hi', is_global=False)
+        targeted.target_users.add(self.user)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json()['unread_count'], 2)
+
+        response = self.client.post(f'/api/notifications/{targeted.pk}/mark-as-read/')
+        self.assertEqual(response.json()['unread_count'], 1)
+        response = self.client.post('/api/notifications/mark-all-as-read/')
+        self.assertEqual((response.json()['marked_count'], response.json()['unread_count']), (1, 0))
+        self.assertEqual(self._db_unread(self.user), 0)
+
+        # A write that bypasses signals drifts until the reconciler runs.
+        Notification.objects.filter(pk=targeted.pk).update(is_global=True)
+        Notification.read_by.through.objects.filter(notification=targeted).delete()
+        self.assertEqual(counters.unread_count(self.user.id), 0)
+        self.assertGreater(counters.reconcile_unread_counters(), 0)
+        self.assertEqual(counters.unread_count(self.user.id), 1)
@@ -0,0 +1,91 @@
+"""
+Tests for the transactional outbox (core/outbox.py).
+"""
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import outbox
+from core.models import OutboxMessage, SupportTicket
+from core.otp_utils import send_email_otp
+
+
+@override_settings(OUTBOX_BACKGROUND_DRAIN=False, OUTBOX_MAX_ATTEMPTS=2)
+class OutboxTests(TestCase):
+
+    def test_messages_are_sent_after_commit_and_deduplicated(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            outbox.queue_email(['a@example.com'], 'Hello', body='Text', html='<p>Text</p>', dedup_key='k1')
+            outbox.queue_email(['a@example.com'], 'Hello again', body='Text', dedup_key='k1')
+            outbox.queue_email(['b@example.com'], 'Notice', html='<p>Only HTML</p>')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+        callbacks[0]()
+        self.assertEqual(sorted(m.subject for m in mail.outbox), ['Hello', 'Notice'])
+        self.assertEqual(mail.outbox[1].content_subtype, 'html')
+        self.assertFalse(OutboxMessage.objects.exclude(status='sent').exists())
+
+    def test_failed_sends_back_off_then_fail(self):
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException('down'),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                outbox.queue_email(['a@example.com'], 'Hello', body='Text')
+            message = OutboxMessage.objects.get()
+            self.assertEqual((message.status, message.attempts, message.last_error), ('pending', 1, 'down'))
+            self.assertAlmostEqual((message.next_attempt_at - timezone.now()).total_seconds(), 60, delta=5)
+
+            OutboxMessage.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(outbox.drain(), 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('failed', 2))
+
+        self.assertEqual(outbox.retry(OutboxMessage.objects.all()), 1)
+        self.assertEqual(outbox.drain(), 1)
+        self.assertEqual(OutboxMessage.objects.get().status, 'sent')
+
+    def test_identical_pushes_are_merged(self):
+        with mock.patch('core.push_service.send_push_to_users') as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                outbox.queue_push([1], 'Title', 'Body', {'id': 7})
+                outbox.queue_push([2], 'Title', 'Body', {'id': 7})
+                outbox.queue_push([1], 'Other', 'Body')
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(send.call_args_list[0].args[:2], ([1, 2], 'Title'))
+        self.assertEqual(OutboxMessage.objects.filter(status='sent').count(), 3)
+
+    def test_otp_email_is_redacted_and_expires(self):
+        user = User.objects.create_user('otpuser', 'otp@example.com', 'P@ss12345!')
+        with self.captureOnCommitCallbacks(execute=True):
+            success, _message, otp_id = send_email_otp(user, user.email)
+        self.assertTrue(success)
+        self.assertIn('Your email verification OTP code is:', mail.outbox[0].body)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.dedup_key, message.payload), (f'otp:{otp_id}', {'redact': True}))
+
+        with self.captureOnCommitCallbacks():
+            send_email_otp(user, user.email)
+        OutboxMessage.objects.filter(status='pending').update(expires_at=timezone.now() - timedelta(seconds=1))
+        outbox.drain()
+        self.assertEqual(len(mail.outbox), 1)
+        expired = OutboxMessage.objects.get(status='failed')
+        self.assertEqual(expired.last_error, 'Expired before it could be sent')
+        self.assertEqual(outbox.retry(OutboxMessage.objects.all()), 0)
+
+    def test_support_reply_queues_email_and_push(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+        user = User.objects.create_user('member', 'member@example.com', 'P@ss12345!')
+        ticket = SupportTicket.objects.create(user=user, subject='Visa letter')
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(f'/admin/support/{ticket.pk}/reply/', {'message': 'Done'})
+        self.assertEqual(response.status_code, 302)
+        email, push = OutboxMessage.objects.order_by('pk')
+        self.assertEqual((email.kind, email.payload['connection'], email.payload['to']), ('email', 'support', [user.email]))
+        self.assertEqual((push.kind, push.payload['user_ids']), ('push', [user.pk]))
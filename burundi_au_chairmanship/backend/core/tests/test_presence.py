@@ -0,0 +1,60 @@
+"""
+Tests for the sorted-set presence store behind "users online now".
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core import presence
+from core.models import DeviceToken, UserProfile
+
+
+@override_settings(PRESENCE_PERSIST_INTERVAL=3600)
+class PresenceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        presence._local.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user('online', 'online@example.com', 'P@ss12345!')
+        DeviceToken.objects.create(user=None, token='tok-anon')
+        DeviceToken.objects.create(user=self.user, token='tok-user')
+
+    def tearDown(self):
+        presence._local.clear()
+        cache.clear()
+
+    def test_heartbeat_records_presence_without_db_writes(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/heartbeat/', HTTP_X_FCM_TOKEN='tok-user')
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(response.json(), {'ok': True, 'user': True, 'device': True})
+
+        self.client.force_authenticate(None)
+        self.client.post('/api/heartbeat/', HTTP_X_FCM_TOKEN='tok-anon')
+        response = self.client.post('/api/heartbeat/', HTTP_X_FCM_TOKEN='tok-made-up')
+        self.assertEqual(response.json()['device'], False)
+        self.assertEqual(presence.online_counts(), {'users': 1, 'anonymous_devices': 1, 'total': 2})
+        with self.assertNumQueries(0):
+            self.client.post('/api/heartbeat/', HTTP_X_FCM_TOKEN='tok-made-up')
+        self.assertIsNone(UserProfile.objects.get(user=self.user).last_active)
+
+    def test_persist_writes_timestamps_and_drops_unknown_tokens(self):
+        presence.touch_user(self.user.pk)
+        presence.touch_device('tok-user', anonymous=False)
+        presence.touch_device('tok-anon')
+        presence.touch_device('tok-made-up')
+
+        self.assertEqual(presence.persist_presence(), 3)
+        self.assertIsNotNone(UserProfile.objects.get(user=self.user).last_active)
+        self.assertEqual(presence.online_counts()['anonymous_devices'], 1)
+
+    @override_settings(PRESENCE_WINDOW_SECONDS=0)
+    def test_expired_members_are_not_counted(self):
+        presence.touch_user(self.user.pk)
+        presence.persist_presence()
+        self.assertEqual(presence.online_counts()['total'], 0)
@@ -0,0 +1,46 @@
+"""
+Tests for the compiled comment profanity matcher.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import ProfanityWord
+from core.validators import check_profanity
+
+
+class CheckProfanityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_clean_text(self):
+        self.assertEqual(check_profanity('Great summit coverage, thank you!'), (True, None))
+
+    def test_word_boundaries(self):
+        # 'ass' must not match inside 'class' or 'assembly'.
+        self.assertEqual(check_profanity('A class on the AU assembly'), (True, None))
+        self.assertFalse(check_profanity('What an ASS')[0])
+
+    def test_accent_folding(self):
+        for text in ('quel bâtard', 'quel batard', 'quel BÂTARD'):
+            is_clean, word = check_profanity(text)
+            self.assertFalse(is_clean, text)
+            self.assertEqual(word, 'batard')
+        self.assertFalse(check_profanity('espèce d\'encule')[0])
+
+    def test_phrases_take_precedence(self):
+        self.assertEqual(check_profanity('va te faire foutre'), (False, 'va te faire foutre'))
+
+    def test_admin_words_hot_reload(self):
+        self.assertTrue(check_profanity('you absolute plonker')[0])
+        word = ProfanityWord.objects.create(word='plonker')
+        self.assertEqual(check_profanity('you absolute plonker'), (False, 'plonker'))
+        word.delete()
+        self.assertTrue(check_profanity('you absolute plonker')[0])
+
+    def test_admin_allow_exempts_builtin_word(self):
+        ProfanityWord.objects.create(word='idiot', action=ProfanityWord.ACTION_ALLOW)
+        self.assertTrue(check_profanity('the village idiot')[0])
@@ -0,0 +1,56 @@
+"""
+Tests for the precomputed push audience index.
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from core import push_audience, push_service
+from core.models import DeviceToken, Notification, PushAudienceToken, UserProfile
+
+
+class PushAudienceIndexTests(TestCase):
+
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'P@ss12345!')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'P@ss12345!')
+        UserProfile.objects.filter(user=self.alice).update(preferred_language='fr', gender='female')
+        UserProfile.objects.filter(user=self.bob).update(fcm_token='legacy-bob')
+        push_audience.rebuild()
+        DeviceToken.objects.create(user=self.alice, token='alice-phone', device_os='Android 14')
+        DeviceToken.objects.create(user=self.alice, token='alice-tablet', device_os='iOS 17.4')
+        DeviceToken.objects.create(user=None, token='anon-fr', preferred_language='fr', device_os='iOS 18')
+
+    def test_index_tracks_tokens_and_profiles(self):
+        index = dict(PushAudienceToken.objects.values_list('token', 'language'))
+        self.assertEqual(index, {
+            'alice-phone': 'fr', 'alice-tablet': 'fr', 'anon-fr': 'fr', 'legacy-bob': 'en',
+        })
+
+        profile = UserProfile.objects.get(user=self.alice)
+        profile.preferred_language = 'en'
+        profile.save(update_fields=['preferred_language'])
+        self.assertEqual(
+            set(PushAudienceToken.objects.filter(user=self.alice).values_list('language', flat=True)), {'en'},
+        )
+
+        push_service._clear_stale_tokens(['alice-tablet', 'legacy-bob'])
+        self.assertEqual(
+            set(PushAudienceToken.objects.values_list('token', flat=True)), {'alice-phone', 'anon-fr'},
+        )
+
+    def test_estimate_and_tokens_match_targeting(self):
+        notification = Notification(is_global=True, target_language='fr')
+        pages = push_service._iter_token_pages(notification, {})
+        rows = [row for _, _, page in pages for row in page]
+        self.assertEqual(sorted(rows), [('alice-phone', 'fr'), ('alice-tablet', 'fr'), ('anon-fr', 'fr')])
+
+        with self.assertNumQueries(1):
+            result = push_audience.estimate(Notification(
+                is_global=False, target_gender='female', target_platform='android',
+            ))
+        self.assertEqual(result, {
+            'count': 1, 'total': 3,
+            'by_language': {'en': 0, 'fr': 1},
+            'by_platform': {'android': 1, 'ios': 2},
+        })
+        self.assertEqual(push_service.get_target_audience_count(Notification(is_global=True)), 3)
@@ -0,0 +1,86 @@
+"""
+Tests for the streaming, resumable FCM fan-out in core.push_service.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from firebase_admin import messaging
+
+from core import push_audience, push_service
+from core.models import DeviceToken, Notification, UserProfile
+
+
+def _fake_send_each(stale=(), fail_on_call=None):
+    """send_each stand-in recording the tokens of every batch."""
+    calls = []
+
+    def send_each(messages):
+        calls.append([m.token for m in messages])
+        if fail_on_call is not None and len(calls) == fail_on_call:
+            raise RuntimeError('FCM unavailable')
+        responses = [
+            SimpleNamespace(exception=messaging.UnregisteredError('gone') if m.token in stale else None)
+            for m in messages
+        ]
+        ok = sum(1 for r in responses if r.exception is None)
+        return SimpleNamespace(success_count=ok, failure_count=len(messages) - ok, responses=responses)
+
+    return send_each, calls
+
+
+@override_settings(PUSH_FANOUT_WORKERS=2)
+@patch('config.firebase.initialize_firebase', lambda: None)
+class PushFanoutTests(TestCase):
+
+    def setUp(self):
+        for i, lang in enumerate(['en', 'en', 'fr', 'fr', 'en']):
+            user = User.objects.create_user(f'push{i}', f'push{i}@example.com', 'P@ss12345!')
+            UserProfile.objects.filter(user=user).update(preferred_language=lang)
+            DeviceToken.objects.create(user=user, token=f'tok-{lang}-{i}')
+        DeviceToken.objects.create(user=None, token='tok-anon-fr', preferred_language='fr')
+        legacy = User.objects.create_user('legacy', 'legacy@example.com', 'P@ss12345!')
+        UserProfile.objects.filter(user=legacy).update(fcm_token='tok-legacy', preferred_language='en')
+        push_audience.rebuild()  # the update() above bypasses the index signals
+        self.notification = Notification.objects.create(
+            title='Hello', title_fr='Bonjour', message='Body', message_fr='Corps', is_global=True,
+        )
+
+    def test_fanout_splits_languages_and_records_stats(self):
+        send_each, calls = _fake_send_each(stale={'tok-en-1'})
+        with patch.object(messaging, 'send_each', send_each):
+            success, failure = push_service.send_push_notification(self.notification)
+
+        sent = sorted(t for batch in calls for t in batch)
+        self.assertEqual(len(sent), len(set(sent)))
+        self.assertEqual(len(sent), 7)
+        self.assertEqual((success, failure), (6, 1))
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.push_recipient_fr, 3)
+        self.assertEqual(self.notification.push_recipient_en, 3)
+        self.assertEqual(self.notification.push_checkpoint['phase'], 'done')
+        self.assertEqual(self.notification.push_stats['tokens'], 7)
+        self.assertIn('throughput_per_s', self.notification.push_stats)
+        self.assertFalse(DeviceToken.objects.get(token='tok-en-1').is_active)
+
+    def test_retry_resumes_after_last_completed_wave(self):
+        with patch.object(push_service, 'FCM_BATCH_SIZE', 2), \
+                override_settings(PUSH_FANOUT_WORKERS=1):
+            send_each, first_calls = _fake_send_each(fail_on_call=2)
+            with patch.object(messaging, 'send_each', send_each):
+                with self.assertRaises(RuntimeError):
+                    push_service.send_push_notification(self.notification)
+            self.notification.refresh_from_db()
+            done_before_failure = self.notification.push_checkpoint['tokens']
+            self.assertGreater(done_before_failure, 0)
+
+            send_each, second_calls = _fake_send_each()
+            with patch.object(messaging, 'send_each', send_each):
+                success, _ = push_service.send_push_notification(self.notification)
+
+        first_sent = {t for batch in first_calls[:1] for t in batch}
+        second_sent = {t for batch in second_calls for t in batch}
+        self.assertFalse(first_sent & second_sent)
+        self.assertEqual(success, 7)
+        self.assertEqual(len(first_sent | second_sent), 7)
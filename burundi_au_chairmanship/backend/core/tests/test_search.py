@@ -0,0 +1,74 @@
+"""
+Tests for the bilingual full-text search endpoints.
+"""
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Article, MagazineEdition
+from core.tests.test_api import TEST_REST_FRAMEWORK
+
+
+@skipUnless(connection.vendor == 'postgresql', 'tsvector search requires PostgreSQL')
+@override_settings(REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class FullTextSearchTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        now = timezone.now()
+        self.title_hit = Article.objects.create(
+            title='Summit opens in Addis Ababa', content='<p>Heads of state arrived.</p>',
+            title_fr='Ouverture du sommet', content_fr='Les chefs d\'État sont arrivés.',
+            author='Desk', publish_date=now - timedelta(days=60), content_type='article',
+        )
+        self.body_hit = Article.objects.create(
+            title='Trade ministers meet', content='Talks continued after the summit dinner.',
+            author='Desk', publish_date=now, content_type='article',
+        )
+        Article.objects.create(
+            title='Weather update', content='Rain expected.', author='Desk',
+            publish_date=now, content_type='news',
+        )
+
+    def _search(self, q, **params):
+        resp = self.client.get('/api/search/articles/', {'q': q, **params})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()['results']
+
+    def test_prefix_and_ranking(self):
+        results = self._search('summ')
+        self.assertEqual([r['id'] for r in results], [self.title_hit.pk, self.body_hit.pk])
+
+    def test_french_stemming_and_snippet(self):
+        results = self._search('sommets', lang='fr')
+        self.assertEqual([r['id'] for r in results], [self.title_hit.pk])
+        results = self._search('arrived')
+        self.assertIn('<mark>arrived</mark>', results[0]['snippet'])
+        self.assertNotIn('<p>', results[0]['snippet'])
+
+    def test_snippet_markup_is_escaped(self):
+        self.body_hit.content = 'Talks on &lt;script&gt;alert(1)&lt;/script&gt; & the summit dinner.'
+        self.body_hit.save()
+        snippet = self._search('dinner')[0]['snippet']
+        self.assertIn('<mark>dinner</mark>', snippet)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt; &amp; the', snippet)
+        self.assertNotIn('&amp;lt;', snippet)
+        self.assertNotIn('<script>', snippet)
+
+    def test_vectors_refresh_on_save(self):
+        self.assertEqual(self._search('drought'), [])
+        self.body_hit.content = 'Drought relief was discussed.'
+        self.body_hit.save()
+        self.assertEqual([r['id'] for r in self._search('drought')], [self.body_hit.pk])
+
+    def test_magazine_search(self):
+        edition = MagazineEdition.objects.create(
+            title='Agenda 2063', description='Infrastructure corridors across the continent.',
+            cover_image='magazines/cover.jpg', publish_date=timezone.now().date(),
+        )
+        resp = self.client.get('/api/search/magazines/', {'q': 'corridor'})
+        self.assertEqual([r['id'] for r in resp.json()['results']], [edition.pk])
@@ -0,0 +1,106 @@
+"""
+Tests for materialised user segment membership.
+"""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import notification_counters as counters
+from core import push_audience, segments
+from core.models import Notification, UserProfile, UserSegment, UserSegmentMembership
+
+
+class SegmentSnapshotTests(TestCase):
+
+    def setUp(self):
+        counters._local.clear()
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'P@ss12345!')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'P@ss12345!')
+        UserProfile.objects.filter(user=self.alice).update(nationality='BI', fcm_token='alice-token')
+        UserProfile.objects.filter(user=self.bob).update(nationality='KE', fcm_token='bob-token')
+        push_audience.rebuild()
+        self.segment = UserSegment.objects.create(name='Burundians', filters={'nationality': ['BI']})
+
+    def tearDown(self):
+        counters._local.clear()
+
+    def _set_nationality(self, user, code):
+        profile = UserProfile.objects.get(user=user)
+        profile.nationality = code
+        profile.save(update_fields=['nationality'])
+
+    def test_snapshot_built_once_then_read(self):
+        self.assertEqual(list(self.segment.get_users()), [self.alice])
+        self.assertEqual(self.segment.member_count, 1)
+        self.assertIsNotNone(self.segment.refreshed_at)
+
+        segment = UserSegment.objects.get(pk=self.segment.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(segment.get_member_count(), 1)
+
+    def test_profile_changes_update_snapshot(self):
+        self.segment.get_users()
+        self._set_nationality(self.bob, 'BI')
+        self._set_nationality(self.alice, 'RW')
+
+        segment = UserSegment.objects.get(pk=self.segment.pk)
+        self.assertEqual(list(segment.get_users()), [self.bob])
+        self.assertEqual(segment.member_count, 1)
+
+        # Writes that bypass signals are picked up by the full refresh.
+        UserProfile.objects.filter(user=self.alice).update(nationality='BI')
+        self.assertEqual(segments.refresh_all_segments(), 1)
+        self.assertEqual(set(segment.get_users()), {self.alice, self.bob})
+
+    def test_notify_records_snapshot_when_sent(self):
+        staff = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+        self.client.force_login(staff)
+        self.assertEqual(counters.unread_count(self.alice.id), 0)
+
+        with mock.patch('core.tasks.send_notification_push_async.delay') as push:
+            self.client.post(f'/admin/segments/{self.segment.pk}/notify/', {
+                'notify_title': 'Hello', 'notify_body': 'Segment news',
+            })
+        push.assert_called_once()
+        notification = Notification.objects.get(title='Hello')
+        self.assertEqual(notification.target_segment, self.segment)
+        self.assertFalse(notification.target_users.exists())  # not copied in the request
+
+        self.assertEqual(segments.record_recipients(notification), 1)  # the push task's first step
+        self.assertEqual(segments.record_recipients(notification), 0)
+        self.assertEqual(
+            set(push_audience.audience_queryset(notification).values_list('user_id', flat=True)),
+            {self.alice.id},
+        )
+        self.assertEqual(counters.unread_count(self.alice.id), 1)
+
+        api = APIClient()
+        api.force_authenticate(self.alice)
+        self.assertEqual(api.get('/api/notifications/unread-count/').json()['unread_count'], 1)
+
+        # Recipients are fixed when the notification is sent: joining later
+        # doesn't add it, leaving doesn't take it away.
+        counters.unread_count(self.bob.id)
+        self._set_nationality(self.bob, 'BI')
+        self._set_nationality(self.alice, 'RW')
+        self.assertEqual(counters.unread_count(self.bob.id), 0)
+        self.assertEqual(counters.unread_count(self.alice.id), 1)
+        api.force_authenticate(self.bob)
+        self.assertEqual(api.get('/api/notifications/').json()['count'], 0)
+        self.assertEqual(counters.reconcile_unread_counters(), 0)
+
+    def test_deleting_segment_keeps_notification_recipients(self):
+        notification = Notification.objects.create(
+            title='Hi', message='Hi', is_global=False, target_segment=self.segment,
+        )
+        self.segment.get_users()
+        self.assertEqual(counters.unread_count(self.alice.id), 0)  # not sent yet
+
+        self.segment.delete()
+        notification.refresh_from_db()
+        self.assertIsNone(notification.target_segment)
+        self.assertEqual(list(notification.target_users.all()), [self.alice])
+        self.assertEqual(counters.unread_count(self.alice.id), 1)
+        self.assertFalse(UserSegmentMembership.objects.exists())
@@ -0,0 +1,49 @@
+"""
+Tests for queued session analytics capture.
+"""
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import session_events
+from core.middleware.session_tracking import SessionTrackingMiddleware
+from core.models import UserProfile, UserSession
+
+
+@override_settings(SESSION_TRACKING_BACKGROUND_FLUSH=False)
+class SessionTrackingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        session_events._local_queue.clear()
+        self.middleware = SessionTrackingMiddleware(lambda request: HttpResponse())
+        self.user = User.objects.create_user('tracked', 'tracked@example.com', 'P@ss12345!')
+        UserProfile.objects.filter(user=self.user).update(nationality='BI', device_os='Android 14')
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def tearDown(self):
+        session_events._local_queue.clear()
+        cache.clear()
+
+    def _request(self, user, ip='203.0.113.7'):
+        request = RequestFactory().get('/api/home-feed/', REMOTE_ADDR=ip)
+        request.user = user
+        return request
+
+    def test_request_path_runs_no_queries(self):
+        with self.assertNumQueries(0):
+            self.middleware(self._request(self.user))
+            self.middleware(self._request(AnonymousUser()))
+        self.assertEqual(session_events.pending_events(), 2)
+
+    def test_dedup_and_batched_flush(self):
+        for _ in range(3):
+            self.middleware(self._request(self.user))
+        self.middleware(self._request(AnonymousUser(), ip='203.0.113.8'))
+
+        self.assertEqual(session_events.flush_session_events(), 2)
+        session = UserSession.objects.get(user=self.user)
+        self.assertEqual((session.user_nationality, session.device_os), ('BI', 'Android 14'))
+        self.assertTrue(UserSession.objects.filter(user__isnull=True, ip_address='203.0.113.8').exists())
+        self.assertEqual(session_events.pending_events(), 0)
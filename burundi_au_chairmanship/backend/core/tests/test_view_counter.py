@@ -0,0 +1,123 @@
+"""
+Tests for write-behind view counting.
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import view_counter
+from core.models import Article, ContentAnalytics, Video
+
+
+class _FakeRedis:
+    """The handful of hash commands the flush uses, on plain dicts."""
+
+    def __init__(self):
+        self.data = {}
+        self.deleted_in_atomic = []
+
+    def hincrby(self, key, field, n):
+        self.data.setdefault(key, {})
+        self.data[key][field] = self.data[key].get(field, 0) + n
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def hvals(self, key):
+        return list(self.data.get(key, {}).values())
+
+    def exists(self, key):
+        return key in self.data
+
+    def rename(self, src, dst):
+        self.data[dst] = self.data.pop(src)
+
+    def delete(self, key):
+        self.deleted_in_atomic.append(len(connection.atomic_blocks))
+        self.data.pop(key, None)
+
+    def pipeline(self):
+        fake = self
+
+        class _Pipe:
+            def hincrby(self, *args):
+                fake.hincrby(*args)
+
+            def execute(self):
+                pass
+        return _Pipe()
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=3600)
+class ViewCounterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        view_counter._local.drain()
+        self.article = Article.objects.create(
+            title='Summit opens', content='Body', author='Desk',
+            publish_date=timezone.now(), content_type='article',
+        )
+
+    def tearDown(self):
+        view_counter._local.drain()
+        cache.clear()
+
+    def test_record_view_does_not_write(self):
+        with self.assertNumQueries(1):  # the cached existence check
+            for _ in range(3):
+                view_counter.record_view(Article, self.article.pk, 'article')
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 0)
+        self.assertEqual(view_counter.pending_views(), 3)
+
+    def test_flush_updates_counts_and_rolls_up_analytics(self):
+        video = Video.objects.create(
+            title='Opening', video_url='https://example.com/v.mp4', publish_date=timezone.now(),
+        )
+        for _ in range(3):
+            view_counter.record_view(Article, self.article.pk, 'article')
+        view_counter.record_view(Video, video.pk, 'video')
+        self.assertFalse(view_counter.record_view(Article, 999999, 'article'))  # bogus id: not buffered
+        self.assertEqual(view_counter.pending_views(), 4)
+        gone = Video.objects.create(
+            title='Removed', video_url='https://example.com/r.mp4', publish_date=timezone.now(),
+        )
+        view_counter.record_view(Video, gone.pk, 'video')
+        gone.delete()  # deleted before the flush: dropped there
+
+        self.assertEqual(view_counter.flush_view_counts(), 4)
+        self.article.refresh_from_db()
+        video.refresh_from_db()
+        self.assertEqual(self.article.view_count, 3)
+        self.assertEqual(video.view_count, 1)
+        row = ContentAnalytics.objects.get(content_type='article', content_id=self.article.pk)
+        self.assertEqual((row.date, row.views), (timezone.localdate(), 3))
+
+        view_counter.record_view(Article, self.article.pk, 'article')
+        view_counter.flush_view_counts()
+        row.refresh_from_db()
+        self.assertEqual(row.views, 4)
+        self.assertEqual(ContentAnalytics.objects.count(), 2)
+        self.assertEqual(view_counter.pending_views(), 0)
+
+    def test_redis_batch_is_dropped_inside_the_flush_transaction(self):
+        redis = _FakeRedis()
+        outer = len(connection.atomic_blocks)
+        with mock.patch.object(view_counter, '_redis', return_value=redis):
+            view_counter.record_view(Article, self.article.pk, 'article', n=2)
+            self.assertEqual(view_counter.flush_view_counts(), 2)
+            # Crashing after this commit leaves nothing to replay.
+            self.assertEqual(redis.data, {})
+            self.assertGreater(redis.deleted_in_atomic[-1], outer)
+
+            view_counter.record_view(Article, self.article.pk, 'article')
+            with mock.patch.object(view_counter, '_apply', side_effect=RuntimeError):
+                self.assertEqual(view_counter.flush_view_counts(), 0)
+            self.assertIn(view_counter.REDIS_FLUSHING_KEY, redis.data)
+            self.assertEqual(view_counter.flush_view_counts(), 1)  # retried once
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 3)
@@ -0,0 +1,117 @@
+"""
+Tests for the queued webhook delivery pipeline (core/webhooks.py).
+"""
+import socket
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import webhooks
+from core.models import Webhook, WebhookDelivery
+
+PUBLIC_ADDR = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('93.184.216.34', 443))]
+
+
+def _response(status):
+    response = mock.Mock(status_code=status, text='ok' if status < 300 else 'nope')
+    return response
+
+
+@override_settings(WEBHOOK_BREAKER_THRESHOLD=3, WEBHOOK_MAX_ATTEMPTS=4)
+class WebhookDeliveryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.hook = Webhook.objects.create(
+            name='Ops', url='https://hooks.example.com/a', service_type='custom',
+            events=['user.registered', 'article.published'],
+        )
+        Webhook.objects.create(
+            name='Other', url='https://hooks.example.com/b', events=['article.published'],
+        )
+        dns = mock.patch('core.webhooks.socket.getaddrinfo', return_value=PUBLIC_ADDR)
+        self.getaddrinfo = dns.start()
+        self.addCleanup(dns.stop)
+        session = mock.patch('core.webhooks._session')
+        self.post = session.start().return_value.post
+        self.addCleanup(session.stop)
+
+    def test_events_are_queued_and_delivered_after_commit(self):
+        self.post.return_value = _response(200)
+        with self.captureOnCommitCallbacks() as callbacks:
+            deliveries = webhooks.send_webhook('user.registered', {'user_id': 1})
+        self.assertEqual([d.webhook_id for d in deliveries], [self.hook.pk])
+        self.post.assert_not_called()
+
+        callbacks[0]()
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts), ('delivered', 1))
+        self.assertEqual(delivery.logs.get().response_status, 200)
+        self.assertEqual(self.post.call_args.kwargs['json']['data'], {'user_id': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            webhooks.send_webhook('article.published', {'id': 9})
+        self.assertEqual(self.post.call_count, 3)
+        self.assertEqual(self.getaddrinfo.call_count, 1)  # host verdict is cached
+
+    def test_backoff_and_circuit_breaker(self):
+        self.post.side_effect = requests.ConnectionError('refused')
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(3):
+                webhooks.send_webhook('user.registered', {'n': n})
+        self.hook.refresh_from_db()
+        self.assertEqual(self.hook.failure_count, 3)
+        self.assertIsNotNone(self.hook.circuit_open_until)
+
+        first = WebhookDelivery.objects.earliest('pk')
+        self.assertEqual((first.status, first.attempts), ('pending', 1))
+        self.assertGreaterEqual(first.next_attempt_at, self.hook.circuit_open_until)
+
+        # While the circuit is open nothing is attempted or dispatched.
+        with self.captureOnCommitCallbacks(execute=True):
+            webhooks.send_webhook('user.registered', {'n': 3})
+            self.assertEqual(webhooks.dispatch_due(), 0)
+        self.assertEqual(self.post.call_count, 3)
+
+        # After the cooldown one success closes the circuit and drains the queue.
+        WebhookDelivery.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        Webhook.objects.filter(pk=self.hook.pk).update(circuit_open_until=timezone.now())
+        self.post.side_effect = None
+        self.post.return_value = _response(200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(webhooks.dispatch_due(), 1)
+        self.hook.refresh_from_db()
+        self.assertEqual((self.hook.failure_count, self.hook.circuit_open_until), (0, None))
+        self.assertFalse(WebhookDelivery.objects.filter(status='pending').exists())
+
+        stats = webhooks.delivery_stats(self.hook)
+        self.assertEqual((stats['queue_depth'], stats['delivered_count']), (0, 4))
+        self.assertFalse(stats['circuit_open'])
+
+    def test_client_errors_are_not_retried(self):
+        self.post.return_value = _response(404)
+        with self.captureOnCommitCallbacks(execute=True):
+            webhooks.send_webhook('user.registered', {})
+        self.assertEqual(WebhookDelivery.objects.get().status, 'failed')
+
+        self.post.return_value = _response(503)
+        with self.captureOnCommitCallbacks(execute=True):
+            webhooks.send_webhook('user.registered', {})
+        retry = WebhookDelivery.objects.latest('pk')
+        self.assertEqual(retry.status, 'pending')
+        self.assertAlmostEqual(
+            (retry.next_attempt_at - timezone.now()).total_seconds(), 30, delta=5,
+        )
+
+    def test_logs_page_shows_queue_stats(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'P@ss12345!')
+        WebhookDelivery.objects.create(webhook=self.hook, event='user.registered', payload={})
+        self.client.force_login(admin)
+        response = self.client.get(f'/admin/webhooks/{self.hook.pk}/logs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['queue_depth'], 1)
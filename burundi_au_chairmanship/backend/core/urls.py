@@ -105,6 +105,8 @@ urlpatterns = [
     # QR Code Verification
     path('verify-qr/', views.verify_qr, name='verify-qr'),
     path('verify-manual/', views.verify_manual, name='verify-manual'),
+    path('checkin/manifests/<str:scope>/', views.checkin_manifest, name='checkin-manifest'),
+    path('checkin/scans/', views.checkin_scans, name='checkin-scans'),
     path('youth-dialogue/scan-history/', views.yd_scan_history, name='yd-scan-history'),
 
     # Event registrations
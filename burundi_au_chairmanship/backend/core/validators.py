@@ -112,6 +112,13 @@ def validate_document_or_image_file(file):
         return validate_document_file(file)
 
 
+# Bump when the auto-approve rules change: memoised verdicts
+# (DocumentVerdict) are only reused for the same spec.
+AUTO_APPROVE_SPEC = 'v2'
+# Blank-image and face checks run on a copy no larger than this.
+DETECT_MAX_SIDE = 800
+
+
 def validate_for_auto_approve(document):
     """Validate a YouthDialogueDocument for auto-approval.
 
@@ -119,6 +126,23 @@ def validate_for_auto_approve(document):
     Photo documents require face detection; images must not be blank;
     PDFs must be readable with at least one page.
     """
+    try:
+        with document.file.open('rb') as f:
+            file_data = f.read()
+    except Exception as e:
+        return False, f'Cannot read file: {e}'
+
+    filename = getattr(document, 'original_filename', '') or document.file.name or ''
+    ext = os.path.splitext(filename)[1][1:].lower()
+    return validate_document_bytes(file_data, ext, document.document_type, document.pk)
+
+
+def validate_document_bytes(file_data, ext, doc_type, document_id=None):
+    """The auto-approve rules applied to a document's content.
+
+    Pure function of its arguments (the verdict is memoised by content hash
+    and computed in worker processes). Returns (bool, str).
+    """
     import io
     import logging
 
@@ -130,22 +154,12 @@ def validate_for_auto_approve(document):
         np = None
     MAX_SIZE = 5 * 1024 * 1024  # 5 MB
 
-    try:
-        with document.file.open('rb') as f:
-            file_data = f.read()
-        file_size = len(file_data)
-    except Exception as e:
-        return False, f'Cannot read file: {e}'
-
+    file_size = len(file_data)
     if file_size > MAX_SIZE:
         return False, 'File exceeds 5 MB limit.'
     if file_size < 100:
         return False, 'File is too small or empty.'
 
-    filename = getattr(document, 'original_filename', '') or document.file.name or ''
-    ext = os.path.splitext(filename)[1][1:].lower()
-    doc_type = document.document_type
-
     # --- PDF documents ---
     if ext == 'pdf':
         try:
@@ -182,11 +196,19 @@ def validate_for_auto_approve(document):
             if width < 100 or height < 100:
                 return False, f'Image too small ({width}x{height}). Minimum 100x100 pixels.'
 
+        # Decode at reduced scale where the codec allows (JPEG), then
+        # downscale: the checks below don't need full resolution.
+        try:
+            img.draft('RGB', (DETECT_MAX_SIDE, DETECT_MAX_SIDE))
+            img = img.convert('RGB')
+            img.thumbnail((DETECT_MAX_SIDE, DETECT_MAX_SIDE))
+        except Exception as e:
+            return False, f'Image is corrupt or unreadable: {e}'
+
         # Blank image check via pixel variance
         if np is not None:
             try:
-                arr = np.array(img.convert('L'), dtype=np.float64)
-                variance = np.var(arr)
+                variance = np.var(np.asarray(img.convert('L'), dtype=np.float32))
                 if variance < 50:
                     return False, 'Image appears blank or solid-colored.'
             except Exception:
@@ -196,18 +218,17 @@ def validate_for_auto_approve(document):
         if doc_type == 'photo':
             try:
                 import face_recognition
-                fr_image = face_recognition.load_image_file(io.BytesIO(file_data))
-                faces = face_recognition.face_locations(fr_image, model='hog')
+                faces = face_recognition.face_locations(np.asarray(img), model='hog')
                 if len(faces) < 1:
                     return False, 'No face detected in photo. Please upload a clear face photo.'
             except ImportError:
                 logger.warning(
                     'face_recognition not installed — skipping face detection for document %s. '
                     'Approving based on image quality only.',
-                    document.pk,
+                    document_id,
                 )
             except Exception as e:
-                logger.warning('Face detection failed for document %s: %s', document.pk, e)
+                logger.warning('Face detection failed for document %s: %s', document_id, e)
                 # Don't reject on face detection errors — approve on image quality
                 pass
 
@@ -580,107 +601,13 @@ def check_profanity(text):
     """
     Check text for profanity in English and French.
     Returns (is_clean, matched_word) tuple.
-    Uses word-boundary matching to avoid false positives on substrings.
+    Uses word-boundary matching to avoid false positives on substrings and
+    accent folding so 'bâtard' and 'batard' are treated alike. The word
+    list is compiled once per process (see core/profanity.py) and includes
+    admin-managed ProfanityWord entries.
     """
-    # Normalize: lowercase, strip extra spaces
-    normalized = text.lower()
-
-    # Common English profane/offensive words
-    EN_WORDS = {
-        'fuck', 'fucking', 'fucked', 'fucker', 'fuckers', 'fucks',
-        'shit', 'shitty', 'shitting', 'bullshit',
-        'ass', 'asshole', 'assholes',
-        'bitch', 'bitches', 'bitching',
-        'damn', 'damned', 'dammit',
-        'dick', 'dicks', 'dickhead',
-        'pussy', 'pussies',
-        'cock', 'cocks', 'cocksucker',
-        'cunt', 'cunts',
-        'bastard', 'bastards',
-        'whore', 'whores',
-        'slut', 'sluts',
-        'nigger', 'niggers', 'nigga', 'niggas',
-        'retard', 'retarded', 'retards',
-        'faggot', 'faggots', 'fag', 'fags',
-        'motherfucker', 'motherfuckers', 'motherfucking',
-        'wanker', 'wankers',
-        'twat', 'twats',
-        'piss', 'pissed', 'pissing',
-        'crap', 'crappy',
-        'douche', 'douchebag',
-        'jackass',
-        'scumbag', 'scumbags',
-        'idiot', 'idiots', 'idiotic',
-        'stupid', 'stupids',
-        'moron', 'morons',
-        'imbecile', 'imbeciles',
-        'kill yourself', 'kys',
-        'stfu', 'gtfo', 'wtf', 'lmfao',
-    }
-
-    # Common French profane/offensive words (incl. African French variants)
-    FR_WORDS = {
-        'merde', 'merdique', 'merdes', 'merdeux', 'merdeuse',
-        'putain', 'putains',
-        'connard', 'connards', 'connasse', 'connasses',
-        'salaud', 'salauds', 'salope', 'salopes', 'saloperie',
-        'enculer', 'encule', 'enculé', 'enculés', 'enculée',
-        'foutre', 'fous', 'foutu', 'foutue', 'foutez',
-        'bordel',
-        'batard', 'bâtard', 'batards', 'bâtards',
-        'nique', 'niquer', 'niqué', 'niquée', 'niques',
-        'pute', 'putes',
-        'con', 'cons', 'conne', 'connes',
-        'bite', 'bites',
-        'couille', 'couilles', 'couillon', 'couillons',
-        'chier', 'chié', 'chierie', 'chieur', 'chieuse',
-        'dégueulasse', 'degueulasse',
-        'enfoiré', 'enfoire', 'enfoirés', 'enfoires', 'enfoirée',
-        'abruti', 'abrutie', 'abrutis',
-        'crétin', 'cretin', 'crétins', 'cretins', 'crétine',
-        'imbécile', 'imbecile', 'imbéciles',
-        'idiot', 'idiote', 'idiots',
-        'débile', 'debile', 'débiles',
-        'ta gueule', 'ferme ta gueule',
-        'va te faire foutre',
-        'fils de pute', 'fils de putain',
-        'nègre', 'negre', 'nègres',
-        'pd', 'pédé', 'pede', 'pédés',
-        # Additional French vulgarities and slurs
-        'branleur', 'branleurs', 'branleuse',
-        'bouffon', 'bouffons', 'bouffonne',
-        'clochard', 'clochards', 'clocharde',
-        'pouffiasse', 'poufiasse',
-        'garce', 'garces',
-        'ordure', 'ordures',
-        'raclure', 'raclures',
-        'trouduc', 'trou du cul',
-        'petasse', 'pétasse',
-        'emmerdeur', 'emmerdeuse', 'emmerder',
-        'niquer sa mère', 'nique ta mère',
-        'casse-toi', 'dégage',
-        'sous-merde', 'sous merde',
-        'encul', 'fdp',
-        'tg', 'ntm', 'ntkm',
-    }
-
-    ALL_WORDS = EN_WORDS | FR_WORDS
-
-    # Check multi-word phrases first
-    phrases = [w for w in ALL_WORDS if ' ' in w]
-    for phrase in phrases:
-        if phrase in normalized:
-            return False, phrase
-
-    # Check single words with word boundaries
-    for word in ALL_WORDS:
-        if ' ' in word:
-            continue
-        pattern = r'\b' + re.escape(word) + r'\b'
-        if re.search(pattern, normalized):
-            return False, word
-
-    return True, None
+    from .profanity import get_matcher
+    return get_matcher().check(text)
 
 
 PROFANITY_STRIKE_LIMIT = 5
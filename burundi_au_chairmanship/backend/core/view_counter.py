@@ -0,0 +1,279 @@
+"""
+Write-behind view counters.
+
+Counting a view used to be an ``UPDATE … SET view_count = view_count + 1``
+on the content row — a hot-row write on exactly the most popular content.
+Views are now accumulated outside the database and written in bulk by
+``flush_view_counts`` (Celery beat, every ``VIEW_COUNT_FLUSH_INTERVAL``
+seconds):
+
+  • with django-redis, increments go to one Redis hash via ``HINCRBY`` and
+    are shared by every worker;
+  • with LocMem (local dev / no Redis), increments go to an in-process
+    buffer, which also flushes itself once the interval has elapsed since
+    there is usually no beat scheduler running.
+
+A flush applies one ``UPDATE`` per model (``CASE`` on pk) and upserts the
+per-day ``ContentAnalytics`` rows.  A Redis batch is parked under
+``REDIS_FLUSHING_KEY`` while it is applied and that key is deleted *before*
+the transaction commits (and folded back into the pending hash if the
+commit fails), so a flush that dies at any point never applies a batch
+twice — at worst, dying between the delete and the commit loses it.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REDIS_PENDING_KEY = 'burundi_au:view_counts:pending'
+REDIS_FLUSHING_KEY = 'burundi_au:view_counts:flushing'
+FLUSH_LOCK_KEY = 'view_counts:flush_lock'
+FLUSH_LOCK_TIMEOUT = 120
+EXISTS_KEY = 'view_counts:exists:{}:{}'
+EXISTS_TTL = 3600
+MISSING_TTL = 60
+
+
+def _redis():
+    """Raw Redis client when the default cache is django-redis, else None."""
+    if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+        return None
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception:
+        logger.warning('django-redis unavailable; buffering views in-process', exc_info=True)
+        return None
+
+
+def _field(model_class, pk, content_label, day):
+    return f'{model_class._meta.label}|{content_label}|{pk}|{day.isoformat()}'
+
+
+def _parse_field(field):
+    model_label, content_label, pk, day = field.split('|')
+    return model_label, content_label, int(pk), day
+
+
+class _LocalBuffer:
+    """Per-process fallback buffer used when Redis is not configured."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._last_flush = time.monotonic()
+
+    def add(self, field, n=1):
+        with self._lock:
+            self._counts[field] += n
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+            self._last_flush = time.monotonic()
+        return dict(counts)
+
+    def restore(self, counts):
+        with self._lock:
+            for field, n in counts.items():
+                self._counts[field] += n
+
+    def due(self):
+        interval = getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 60)
+        return bool(self._counts) and time.monotonic() - self._last_flush >= interval
+
+    def pending(self):
+        with self._lock:
+            return sum(self._counts.values())
+
+
+_local = _LocalBuffer()
+
+
+def _exists(model_class, pk):
+    """Cached ``pk`` existence check, so bogus ids are never buffered."""
+    key = EXISTS_KEY.format(model_class._meta.label_lower, pk)
+    found = cache.get(key)
+    if found is None:
+        found = model_class.objects.filter(pk=pk).exists()
+        cache.set(key, found, EXISTS_TTL if found else MISSING_TTL)
+    return found
+
+
+def record_view(model_class, pk, content_label, n=1):
+    """Buffer ``n`` views for one object; no database write.
+
+    Returns False for ids that don't exist.  Objects deleted after their
+    existence was cached are still dropped by the flush.
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return False
+    if not _exists(model_class, pk):
+        return False
+    field = _field(model_class, pk, content_label, timezone.localdate())
+    client = _redis()
+    if client is not None:
+        try:
+            client.hincrby(REDIS_PENDING_KEY, field, n)
+            return True
+        except Exception:
+            logger.warning('Redis HINCRBY failed; buffering view in-process', exc_info=True)
+    _local.add(field, n)
+    if _local.due():
+        flush_view_counts()
+    return True
+
+
+def _restore_redis(client, counts):
+    """Fold ``counts`` back into the pending hash."""
+    pipe = client.pipeline()
+    for field, n in counts.items():
+        pipe.hincrby(REDIS_PENDING_KEY, field, int(n))
+    pipe.execute()
+
+
+def _drain_redis(client):
+    """Atomically move the pending hash aside and read it."""
+    # A previous flush that died before committing leaves its batch here;
+    # fold it back in rather than losing it.
+    if client.exists(REDIS_FLUSHING_KEY):
+        _restore_redis(client, client.hgetall(REDIS_FLUSHING_KEY))
+        client.delete(REDIS_FLUSHING_KEY)
+    try:
+        client.rename(REDIS_PENDING_KEY, REDIS_FLUSHING_KEY)
+    except Exception:
+        return {}  # nothing pending (RENAME on a missing key raises)
+    raw = client.hgetall(REDIS_FLUSHING_KEY)
+    return {
+        (f.decode() if isinstance(f, bytes) else f): int(n)
+        for f, n in raw.items()
+    }
+
+
+def _apply_redis_batch(client, batch):
+    """Apply ``batch`` and drop REDIS_FLUSHING_KEY in the same transaction."""
+    dropped = False
+    try:
+        with transaction.atomic():
+            applied = _apply(batch)
+            client.delete(REDIS_FLUSHING_KEY)
+            dropped = True
+    except Exception:
+        if dropped:  # the commit itself failed
+            _restore_redis(client, batch)
+        raise
+    return applied
+
+
+def _apply(counts):
+    """Write a drained batch to view_count and ContentAnalytics."""
+    from .models import ContentAnalytics
+
+    per_model = defaultdict(lambda: defaultdict(int))
+    per_day = defaultdict(int)
+    for field, n in counts.items():
+        if n <= 0:
+            continue
+        model_label, content_label, pk, day = _parse_field(field)
+        per_model[model_label][pk] += n
+        per_day[(content_label, pk, day, model_label)] += n
+
+    existing_ids = {}
+    with transaction.atomic():
+        for model_label, deltas in per_model.items():
+            model = apps.get_model(model_label)
+            existing_ids[model_label] = set(
+                model.objects.filter(pk__in=deltas).values_list('pk', flat=True)
+            )
+            if not existing_ids[model_label]:
+                continue
+            model.objects.filter(pk__in=existing_ids[model_label]).update(
+                view_count=F('view_count') + Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in deltas.items()],
+                    default=Value(0), output_field=IntegerField(),
+                ),
+            )
+
+        rows = {
+            (content_label, pk, day): n
+            for (content_label, pk, day, model_label), n in per_day.items()
+            if pk in existing_ids.get(model_label, ())
+        }
+        if not rows:
+            return 0
+        match = Q()
+        for content_label, pk, day in rows:
+            match |= Q(content_type=content_label, content_id=pk, date=day)
+        current = {
+            (row.content_type, row.content_id, row.date.isoformat()): row
+            for row in ContentAnalytics.objects.select_for_update().filter(match)
+        }
+        to_update, to_create = [], []
+        for key, n in rows.items():
+            row = current.get(key)
+            if row is not None:
+                row.views += n
+                to_update.append(row)
+            else:
+                to_create.append(ContentAnalytics(
+                    content_type=key[0], content_id=key[1], date=key[2], views=n,
+                ))
+        if to_update:
+            ContentAnalytics.objects.bulk_update(to_update, ['views'])
+        if to_create:
+            ContentAnalytics.objects.bulk_create(to_create)
+    return sum(rows.values())
+
+
+def flush_view_counts():
+    """
+    Drain buffered views and write them in bulk.  Returns the number of
+    views applied.  Safe to call concurrently — only one flush runs.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        applied = 0
+        client = _redis()
+        if client is not None:
+            try:
+                batch = _drain_redis(client)
+                if batch:
+                    applied += _apply_redis_batch(client, batch)
+            except Exception:
+                # Batch is under REDIS_FLUSHING_KEY or back in the pending
+                # hash; the next flush retries it.
+                logger.exception('Failed to flush Redis view counters')
+        local = _local.drain()
+        if local:
+            try:
+                applied += _apply(local)
+            except Exception:
+                _local.restore(local)
+                logger.exception('Failed to flush in-process view counters')
+        return applied
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def pending_views():
+    """Views recorded but not yet flushed (for health/diagnostics)."""
+    total = _local.pending()
+    client = _redis()
+    if client is not None:
+        try:
+            total += sum(int(n) for n in client.hvals(REDIS_PENDING_KEY))
+        except Exception:
+            pass
+    return total
@@ -9,7 +9,7 @@ from datetime import timedelta
 from django.conf import settings as django_settings
 import hashlib
 from django.core.cache import cache
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
 from django.db.models import Count, Exists, OuterRef, F, Q, Subquery, Value, BooleanField
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
@@ -24,6 +24,10 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
 from config.firebase import verify_firebase_token
+from .authentication import revoke_cached_tokens, token_cache as firebase_token_cache
+from .view_counter import record_view
+from .event_seats import claim_seat, next_waitlist_position
+from . import checkin, id_cards, outbox
 from .throttling import ViewCountThrottle, LikeToggleThrottle, AuthRateThrottle, OTPRateThrottle, OTPVerifyThrottle, SupportTicketThrottle, SearchRateThrottle, ProxyRegistrationThrottle, WeatherProxyThrottle
 
 logger = logging.getLogger(__name__)
@@ -56,7 +60,7 @@ from .models import (
     GalleryCommentLike, EventCommentLike, DiscussionReplyLike,
     # Youth Dialogue
     YouthDialogueEvent, YouthDialogueSettings, YouthDialogueApplication, YouthDialogueDocument, YouthDialogueActivityLog,
-    YouthDialogueSideEvent, YouthDialogueRole, YouthDialogueMedia,
+    YouthDialogueSideEvent, YouthDialogueMedia,
     QRScanLog,
     FactCategory, Fact,
     AboutFeature,
@@ -191,10 +195,11 @@ def _atomic_toggle_like(model_class, like_model, like_kwargs, obj):
 
 
 def _dedup_record_view(model_class, pk, request, content_label):
-    """Increment view_count with IP+UA+day dedup to resist inflation.
+    """Count a view with IP+UA+day dedup to resist inflation.
 
     Returns True if the view was counted, False if it was a duplicate.
     Uses cache-based fingerprint: hash(IP + UA prefix + content + day).
+    The increment is buffered and written in bulk (see core/view_counter.py).
     """
     ip = get_client_ip(request)
     ua = request.META.get('HTTP_USER_AGENT', '')[:64]
@@ -206,10 +211,10 @@ def _dedup_record_view(model_class, pk, request, content_label):
 
     if cache.get(cache_key):
         return False  # already counted today
-    rows = model_class.objects.filter(pk=pk).update(view_count=F('view_count') + 1)
-    if rows:
+    counted = record_view(model_class, pk, content_label)
+    if counted:
         cache.set(cache_key, 1, 86400)  # 24-hour expiry
-    return bool(rows)
+    return counted
 
 
 def lookup_ip_geolocation(login_history_id):
@@ -545,6 +550,7 @@ def deactivate_account(request):
     # Mark Django user as inactive so they can't access protected endpoints
     user.is_active = False
     user.save()
+    revoke_cached_tokens(user)
 
     # Send confirmation email
     try:
@@ -593,6 +599,7 @@ def delete_account(request):
     # Mark user as inactive
     user.is_active = False
     user.save()
+    revoke_cached_tokens(user)
 
     # Send confirmation email
     deletion_date = profile.deletion_scheduled_for.strftime('%B %d, %Y')
@@ -1226,6 +1233,7 @@ def logout_view(request):
         token.blacklist()
     except Exception:
         logger.debug('Token blacklist skipped (already invalid)')
+    revoke_cached_tokens(request.user)
 
     # Deactivate FCM tokens so the user stops receiving push notifications
     fcm_token = request.data.get('fcm_token')
@@ -1328,29 +1336,31 @@ def heartbeat(request):
     """Lightweight presence ping used for the "users online now" counter.
 
     Called every 60 seconds by the Flutter app while it is foregrounded.
-    Updates:
-      * ``UserProfile.last_active`` when the caller is authenticated.
-      * ``DeviceToken.updated_at`` when an ``X-FCM-Token`` header is present,
-        so anonymous devices are counted too.
-
-    Returns a minimal payload to keep the request cheap. This endpoint must
-    stay fast — it runs on every active device on a tight interval.
+    Records, in the presence store (``core/presence.py``):
+      * the user when the caller is authenticated;
+      * the device when an ``X-FCM-Token`` header matches an active
+        ``DeviceToken``, so anonymous devices are counted too; unknown
+        tokens report ``device: False`` and are not counted.
+
+    No database writes: ``UserProfile.last_active`` and
+    ``DeviceToken.updated_at`` are persisted by the ``persist_presence`` task,
+    and token lookups are cached by ``presence.known_device``.
+    This endpoint must stay fast — it runs on every active device on a tight
+    interval.
     """
-    now = timezone.now()
+    from .presence import known_device, touch_device, touch_user
+
     bumped_user = False
     bumped_device = False
 
     if request.user.is_authenticated:
-        UserProfile.objects.filter(user_id=request.user.pk).update(last_active=now)
+        touch_user(request.user.pk)
         bumped_user = True
 
     fcm_token = request.headers.get('X-FCM-Token') or request.META.get('HTTP_X_FCM_TOKEN')
-    if fcm_token:
-        # ``updated_at`` is auto_now=True, so any .save()/update() refreshes it.
-        updated = DeviceToken.objects.filter(token=fcm_token, is_active=True).update(
-            updated_at=now
-        )
-        bumped_device = bool(updated)
+    if fcm_token and known_device(fcm_token[:255]):
+        touch_device(fcm_token[:255], anonymous=not bumped_user)
+        bumped_device = True
 
     return Response({
         'ok': True,
@@ -1672,10 +1682,9 @@ class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
         return qs
 
     def retrieve(self, request, *args, **kwargs):
-        """Override retrieve to increment view_count on each article view using F() for thread safety."""
+        """Override retrieve to count a view on each article open (buffered, no write here)."""
         instance = self.get_object()
-        Article.objects.filter(pk=instance.pk).update(view_count=F('view_count') + 1)
-        instance.refresh_from_db()
+        record_view(Article, instance.pk, 'article')
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -2823,14 +2832,14 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         Mark a single notification as read for the current user.
         Requires authentication.
         """
+        from .notification_counters import unread_count
         notification = self.get_object()
         notification.read_by.add(request.user)
 
-        remaining = self.get_queryset().exclude(read_by=request.user).count()
         return Response({
             'message': 'Notification marked as read',
             'is_read': True,
-            'unread_count': remaining,
+            'unread_count': unread_count(request.user.id),
         })
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], url_path='mark-all-as-read')
@@ -2839,39 +2848,34 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         Mark all notifications as read for the current user.
         Requires authentication.
         """
-        # Get all active notifications for the user
-        notifications = self.get_queryset()
+        from .notification_counters import mark_all_read
 
-        # Bulk-add user to read_by for all unread notifications
-        already_read = set(
-            Notification.read_by.through.objects.filter(
-                user_id=request.user.id,
-                notification_id__in=notifications.values_list('pk', flat=True),
-            ).values_list('notification_id', flat=True)
+        # Ids of visible notifications the user hasn't read yet, filtered in SQL.
+        to_mark = list(
+            self.get_queryset().filter(_is_read=False).values_list('pk', flat=True)
         )
-        to_mark = [n for n in notifications if n.pk not in already_read]
         if to_mark:
             Notification.read_by.through.objects.bulk_create(
                 [Notification.read_by.through(
-                    notification_id=n.pk, user_id=request.user.id,
-                ) for n in to_mark],
+                    notification_id=pk, user_id=request.user.id,
+                ) for pk in to_mark],
                 ignore_conflicts=True,
             )
+        # bulk_create bypasses m2m_changed; everything visible is now read.
+        mark_all_read(request.user.id)
         count = len(to_mark)
 
-        remaining = self.get_queryset().exclude(read_by=request.user).count()
         return Response({
             'message': f'{count} notification(s) marked as read',
             'marked_count': count,
-            'unread_count': remaining,
+            'unread_count': 0,
         })
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated], url_path='unread-count')
     def unread_count(self, request):
         """Return count of unread notifications for the current user."""
-        notifications = self.get_queryset()
-        count = notifications.exclude(read_by=request.user).count()
-        return Response({'unread_count': count})
+        from .notification_counters import unread_count
+        return Response({'unread_count': unread_count(request.user.id)})
 
     def _resolve_device_token(self, request):
         """Look up the DeviceToken row for the X-FCM-Token header (if any)."""
@@ -3067,6 +3071,16 @@ def health_check(request):
     except Exception as e:
         checks['memory'] = {'status': 'unknown', 'error': str(e)}
 
+    # ── Firebase verified-token cache (per process) ───────────
+    checks['firebase_token_cache'] = firebase_token_cache.stats()
+
+    # ── Buffered view counters awaiting flush ─────────────────
+    try:
+        from .view_counter import pending_views
+        checks['view_counter'] = {'pending_views': pending_views()}
+    except Exception as e:
+        checks['view_counter'] = {'status': 'unknown', 'error': str(e)}
+
     response_status = status.HTTP_200_OK if overall_healthy else status.HTTP_503_SERVICE_UNAVAILABLE
 
     return Response({
@@ -3077,17 +3091,22 @@ def health_check(request):
     }, status=response_status)
 
 
-def _annotated_event_registrations(request):
+def _annotated_event_registrations(request, personalize=True):
     """Return EventRegistration queryset with DB-level annotations to avoid N+1 queries.
 
-    Annotates: _submission_count, _non_waitlisted_count,
-               _has_registered, _user_submission_status, _user_submission_id
+    Annotates: _submission_count, _has_registered,
+               _user_submission_status, _user_submission_id
+
+    Remaining seats come from the ``seats_taken`` counter column.
+
+    With ``personalize=False`` the per-user fields are annotated as empty
+    even for authenticated requests (used for shared, cacheable payloads).
     """
     qs = EventRegistration.objects.filter(
         is_active=True,
     ).select_related('category').prefetch_related('form_fields')
 
-    if request.user.is_authenticated:
+    if personalize and request.user.is_authenticated:
         user_sub = EventSubmission.objects.filter(
             event_registration=OuterRef('pk'),
             user=request.user,
@@ -3095,7 +3114,6 @@ def _annotated_event_registrations(request):
         )
         qs = qs.annotate(
             _submission_count=Count('submissions'),
-            _non_waitlisted_count=Count('submissions', filter=Q(submissions__is_waitlisted=False)),
             _has_registered=Exists(user_sub),
             _user_submission_status=Subquery(user_sub.values('status')[:1]),
             _user_submission_id=Subquery(user_sub.values('id')[:1]),
@@ -3103,8 +3121,9 @@ def _annotated_event_registrations(request):
     else:
         qs = qs.annotate(
             _submission_count=Count('submissions'),
-            _non_waitlisted_count=Count('submissions', filter=Q(submissions__is_waitlisted=False)),
             _has_registered=Value(False, output_field=BooleanField()),
+            _user_submission_status=Value(None, output_field=models.CharField()),
+            _user_submission_id=Value(None, output_field=models.IntegerField()),
         )
     return qs
 
@@ -3164,12 +3183,23 @@ class FactViewSet(viewsets.ReadOnlyModelViewSet):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def home_feed(request):
-    """Combined endpoint for home screen — hero slides, featured articles, feature cards, categories, event cards, and settings."""
-    cache_key = f'home_feed:auth:{request.user.id}' if request.user.is_authenticated else 'home_feed:anon'
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return Response(cached)
+    """Combined endpoint for home screen — hero slides, featured articles, feature cards, categories, event cards, and settings.
+
+    Everyone shares one cached base document (see core.feed_cache) with live
+    registration counts patched on top; logged-in users also get their likes
+    and registrations.
+    """
+    from . import feed_cache
+
+    data = feed_cache.get_base(lambda: _build_home_feed_base(request))
+    data = feed_cache.apply_registration_counts(data)
+    if request.user.is_authenticated:
+        data = feed_cache.apply_user_overlay(data, request.user)
+    return Response(data)
 
+
+def _build_home_feed_base(request):
+    """Assemble the user-independent home feed (all per-user fields unset)."""
     hero_slides = HeroSlide.objects.filter(is_active=True)
 
     now = timezone.now()
@@ -3182,13 +3212,6 @@ def home_feed(request):
     ).annotate(
         comment_count=Count('comments', distinct=True),
     ).order_by('-publish_date')  # Explicitly order by newest first
-    if request.user.is_authenticated:
-        base_articles = base_articles.annotate(
-            is_liked=Exists(ArticleLike.objects.filter(article=OuterRef('pk'), user=request.user)),
-        )
-    else:
-        from django.db.models import Value, BooleanField
-        base_articles = base_articles.annotate(is_liked=Value(False, output_field=BooleanField()))
 
     featured_articles = base_articles.filter(is_featured=True, content_type='article')[:5]
     featured_news = base_articles.filter(is_featured=True, content_type='news')[:5]
@@ -3202,7 +3225,7 @@ def home_feed(request):
 
     # Combine both event types: EventRegistration (with forms) and Event (informational)
     # Get events with registration (annotated to avoid N+1)
-    event_registrations = _annotated_event_registrations(request)
+    event_registrations = _annotated_event_registrations(request, personalize=False)
 
     # Get regular informational events (upcoming only)
     now = timezone.now()
@@ -3309,10 +3332,6 @@ def home_feed(request):
     magazines = MagazineEdition.objects.prefetch_related('images').filter(
         status='published',
     ).order_by('-publish_date')[:5]
-    if request.user.is_authenticated:
-        magazines = magazines.annotate(
-            is_liked=Exists(MagazineLike.objects.filter(user=request.user, edition=OuterRef('pk')))
-        )
 
     # Featured facts & quotes
     facts_data = []
@@ -3340,8 +3359,7 @@ def home_feed(request):
         'facts': facts_data,
         'hero_text_content': hero_text_data,
     }
-    cache.set(cache_key, data, django_settings.CACHE_TTL_SHORT)
-    return Response(data)
+    return data
 
 
 # ── Search Endpoints ────────────────────────────────────────────
@@ -3352,10 +3370,14 @@ def home_feed(request):
 def search_articles(request):
     """
     Search articles by query string in both English and French.
+    Results are ranked by relevance (with a recency boost) and each carries
+    a highlighted ``snippet``; see core/search.py.
     Query params:
       - q: search query (required, min 2 characters)
       - lang: language preference (en or fr) for display
     """
+    from .search import run_search
+
     query = request.GET.get('q', '').strip()
     lang = request.GET.get('lang', 'en')
     content_type_filter = request.GET.get('content_type', '').strip()
@@ -3363,11 +3385,7 @@ def search_articles(request):
     if not query or len(query) < 2:
         return Response({'results': [], 'count': 0})
 
-    # Bilingual search in title and content
-    articles = Article.objects.filter(
-        Q(title__icontains=query) | Q(content__icontains=query) |
-        Q(title_fr__icontains=query) | Q(content_fr__icontains=query)
-    ).select_related('category').prefetch_related('media').annotate(
+    articles = Article.objects.select_related('category').prefetch_related('media').annotate(
         comment_count=Count('comments', distinct=True),
     )
 
@@ -3383,12 +3401,15 @@ def search_articles(request):
         from django.db.models import Value, BooleanField
         articles = articles.annotate(is_liked=Value(False, output_field=BooleanField()))
 
-    articles = articles[:20]  # Limit to 20 results
+    results = run_search(articles, query, lang=lang, limit=20)
 
-    serializer = ArticleSerializer(articles, many=True, context={'request': request})
+    serializer = ArticleSerializer(results, many=True, context={'request': request})
+    data = serializer.data
+    for item, article in zip(data, results):
+        item['snippet'] = article.search_snippet
     return Response({
-        'results': serializer.data,
-        'count': len(serializer.data)
+        'results': data,
+        'count': len(data)
     })
 
 
@@ -3398,26 +3419,30 @@ def search_articles(request):
 def search_magazines(request):
     """
     Search magazine editions by query string in both English and French.
+    Ranked and highlighted like search_articles.
     Query params:
       - q: search query (required, min 2 characters)
       - lang: language preference (en or fr) for display
     """
+    from .search import run_search
+
     query = request.GET.get('q', '').strip()
     lang = request.GET.get('lang', 'en')
 
     if not query or len(query) < 2:
         return Response({'results': [], 'count': 0})
 
-    # Bilingual search in title and description
-    magazines = MagazineEdition.objects.filter(
-        Q(title__icontains=query) | Q(description__icontains=query) |
-        Q(title_fr__icontains=query) | Q(description_fr__icontains=query)
-    ).prefetch_related('images')[:20]  # Limit to 20 results
+    results = run_search(
+        MagazineEdition.objects.prefetch_related('images'), query, lang=lang, limit=20,
+    )
 
-    serializer = MagazineEditionSerializer(magazines, many=True, context={'request': request})
+    serializer = MagazineEditionSerializer(results, many=True, context={'request': request})
+    data = serializer.data
+    for item, magazine in zip(data, results):
+        item['snippet'] = magazine.search_snippet
     return Response({
-        'results': serializer.data,
-        'count': len(serializer.data)
+        'results': data,
+        'count': len(data)
     })
 
 
@@ -3737,65 +3762,12 @@ class EventRegistrationViewSet(viewsets.ReadOnlyModelViewSet):
         return response
 
 
-class EventSubmissionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
-                             mixins.RetrieveModelMixin, viewsets.GenericViewSet):
-    """User submissions for event registrations (create/list/retrieve only)"""
-    permission_classes = [IsVerifiedUser]
-    serializer_class = EventSubmissionSerializer
+def _registration_confirmation_email(event_reg, user, is_waitlisted):
+    """``(subject, plain_message, html_message)`` confirming an event submission."""
+    subject = f'Registration Confirmation: {event_reg.event_title}'
 
-    def get_queryset(self):
-        # Users can only see their own submissions
-        return EventSubmission.objects.filter(
-            user=self.request.user
-        ).select_related('event_registration', 'user')
-
-    def create(self, request, *args, **kwargs):
-        resp = _require_verified_email(request)
-        if resp:
-            return resp
-        return super().create(request, *args, **kwargs)
-
-    def perform_create(self, serializer):
-        event_reg = serializer.validated_data['event_registration']
-        user = self.request.user
-        # Enforce one self-registration per user per event
-        if not serializer.validated_data.get('is_proxy', False):
-            if EventSubmission.objects.filter(event_registration=event_reg, user=user, is_proxy=False).exists():
-                from rest_framework.exceptions import ValidationError
-                raise ValidationError({'detail': 'You have already registered for this event.'})
-
-        # Check capacity and auto-waitlist if full
-        is_waitlisted = False
-        if event_reg.max_registrations > 0:
-            current_count = event_reg.submissions.filter(is_waitlisted=False).count()
-            if current_count >= event_reg.max_registrations:
-                is_waitlisted = True
-
-        submission = serializer.save(
-            user=user,
-            is_waitlisted=is_waitlisted,
-            status='waitlist' if is_waitlisted else 'pending',
-        )
-
-        # Also create EventWaitlist entry for waitlisted submissions
-        if is_waitlisted:
-            position = EventWaitlist.objects.filter(event_registration=event_reg).count() + 1
-            EventWaitlist.objects.get_or_create(
-                user=user,
-                event_registration=event_reg,
-                defaults={'position': position},
-            )
-
-        # Send confirmation email
-        if event_reg.send_confirmation_email and user.email:
-            try:
-                from django.core.mail import send_mail
-                from django.conf import settings as django_settings
-
-                subject = f'Registration Confirmation: {event_reg.event_title}'
-
-                # Build HTML email
-                html_message = f'''<!DOCTYPE html>
+    # Build HTML email
+    html_message = f'''<!DOCTYPE html>
 <html>
 <head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"></head>
 <body style="margin:0;padding:0;background:#f4f6f9;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;">
@@ -3820,30 +3792,30 @@ class EventSubmissionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
         <table style="width:100%;border-collapse:collapse;">
           <tr><td style="padding:6px 0;color:#718096;font-size:14px;">Event</td><td style="padding:6px 0;color:#2d3748;font-size:14px;font-weight:600;">{event_reg.event_title}</td></tr>'''
 
-                if event_reg.event_date:
-                    html_message += f'''
+    if event_reg.event_date:
+        html_message += f'''
           <tr><td style="padding:6px 0;color:#718096;font-size:14px;">Date</td><td style="padding:6px 0;color:#2d3748;font-size:14px;">{event_reg.event_date.strftime("%B %d, %Y at %H:%M")}</td></tr>'''
-                if event_reg.venue:
-                    html_message += f'''
+    if event_reg.venue:
+        html_message += f'''
           <tr><td style="padding:6px 0;color:#718096;font-size:14px;">Venue</td><td style="padding:6px 0;color:#2d3748;font-size:14px;">{event_reg.venue}</td></tr>'''
-                if is_waitlisted:
-                    html_message += f'''
+    if is_waitlisted:
+        html_message += f'''
           <tr><td style="padding:6px 0;color:#718096;font-size:14px;">Status</td><td style="padding:6px 0;color:#e53e3e;font-size:14px;font-weight:600;">Waitlisted</td></tr>'''
-                else:
-                    html_message += f'''
+    else:
+        html_message += f'''
           <tr><td style="padding:6px 0;color:#718096;font-size:14px;">Status</td><td style="padding:6px 0;color:#38a169;font-size:14px;font-weight:600;">Registered</td></tr>'''
 
-                html_message += '''
+    html_message += '''
         </table>
       </div>'''
 
-                if event_reg.confirmation_message:
-                    html_message += f'''
+    if event_reg.confirmation_message:
+        html_message += f'''
       <div style="background:#fffff0;border-left:4px solid #ecc94b;padding:16px 20px;border-radius:0 8px 8px 0;margin:0 0 24px;">
         <p style="color:#744210;font-size:14px;line-height:1.6;margin:0;">{event_reg.confirmation_message}</p>
       </div>'''
 
-                html_message += f'''
+    html_message += f'''
       <p style="color:#718096;font-size:13px;line-height:1.6;margin:0;">
         If you have any questions, please contact us at <a href="mailto:{event_reg.contact_email or "info@burundi4africa.com"}" style="color:#3182ce;">{event_reg.contact_email or "info@burundi4africa.com"}</a>
       </p>
@@ -3856,21 +3828,65 @@ class EventSubmissionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
 </body>
 </html>'''
 
-                plain_message = f"Dear {user.get_full_name() or user.username},\n\nThank you for registering for {event_reg.event_title}.\n\n"
-                if event_reg.confirmation_message:
-                    plain_message += f"{event_reg.confirmation_message}\n\n"
-                plain_message += "Best regards,\nBe 4 Africa Team"
-
-                send_mail(
-                    subject=subject,
-                    message=plain_message,
-                    from_email=django_settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    html_message=html_message,
-                    fail_silently=True,
+    plain_message = f"Dear {user.get_full_name() or user.username},\n\nThank you for registering for {event_reg.event_title}.\n\n"
+    if event_reg.confirmation_message:
+        plain_message += f"{event_reg.confirmation_message}\n\n"
+    plain_message += "Best regards,\nBe 4 Africa Team"
+    return subject, plain_message, html_message
+
+
+class EventSubmissionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+                             mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """User submissions for event registrations (create/list/retrieve only)"""
+    permission_classes = [IsVerifiedUser]
+    serializer_class = EventSubmissionSerializer
+
+    def get_queryset(self):
+        # Users can only see their own submissions
+        return EventSubmission.objects.filter(
+            user=self.request.user
+        ).select_related('event_registration', 'user')
+
+    def create(self, request, *args, **kwargs):
+        resp = _require_verified_email(request)
+        if resp:
+            return resp
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        event_reg = serializer.validated_data['event_registration']
+        user = self.request.user
+        # Enforce one self-registration per user per event
+        if not serializer.validated_data.get('is_proxy', False):
+            if EventSubmission.objects.filter(event_registration=event_reg, user=user, is_proxy=False).exists():
+                from rest_framework.exceptions import ValidationError
+                raise ValidationError({'detail': 'You have already registered for this event.'})
+
+        # Claim a seat (or a waitlist position) in the same transaction as
+        # the submission, so a failed insert hands the counter back.
+        with transaction.atomic():
+            is_waitlisted = not claim_seat(event_reg.pk)
+            submission = serializer.save(
+                user=user,
+                is_waitlisted=is_waitlisted,
+                status='waitlist' if is_waitlisted else 'pending',
+            )
+
+            # Also create EventWaitlist entry for waitlisted submissions
+            if is_waitlisted and not EventWaitlist.objects.filter(user=user, event_registration=event_reg).exists():
+                EventWaitlist.objects.create(
+                    user=user,
+                    event_registration=event_reg,
+                    position=next_waitlist_position(event_reg.pk),
+                )
+
+            # Confirmation email is sent from the outbox once the submission commits.
+            if event_reg.send_confirmation_email and user.email:
+                subject, plain_message, html_message = _registration_confirmation_email(event_reg, user, is_waitlisted)
+                outbox.queue_email(
+                    [user.email], subject, body=plain_message, html=html_message,
+                    dedup_key=f'event-submission:{submission.pk}:confirmation',
                 )
-            except Exception:
-                pass  # Don't fail registration if email fails
 
     @staticmethod
     def _build_qr_data(prefix, ref_id, qr_hash, request):
@@ -4004,16 +4020,21 @@ class EventSubmissionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        submission = EventSubmission.objects.create(
-            event_registration=event_reg,
-            user=request.user,
-            is_proxy=True,
-            proxy_name=data['proxy_name'],
-            proxy_email=data['proxy_email'],
-            proxy_email_verified=False,  # Proxy never consented — treat as unverified
-            proxy_phone=data.get('proxy_phone', ''),
-            form_data=data.get('form_data', {}),
-        )
+        # Proxy registrations take seats from the same counter as self-registrations.
+        with transaction.atomic():
+            is_waitlisted = not claim_seat(event_reg.pk)
+            submission = EventSubmission.objects.create(
+                event_registration=event_reg,
+                user=request.user,
+                is_proxy=True,
+                proxy_name=data['proxy_name'],
+                proxy_email=data['proxy_email'],
+                proxy_email_verified=False,  # Proxy never consented — treat as unverified
+                proxy_phone=data.get('proxy_phone', ''),
+                form_data=data.get('form_data', {}),
+                is_waitlisted=is_waitlisted,
+                status='waitlist' if is_waitlisted else 'pending',
+            )
 
         # Notify the proxy recipient.  The email is deliberately *not*
         # worded as a confirmation — the proxy never consented, so we tell
@@ -4093,13 +4114,9 @@ class EventSubmissionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
                     f"Best regards,\nBe 4 Africa Team"
                 )
 
-                send_mail(
-                    subject=subject,
-                    message=plain_message,
-                    from_email=django_settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[data['proxy_email']],
-                    html_message=html_message,
-                    fail_silently=True,
+                outbox.queue_email(
+                    [data['proxy_email']], subject, body=plain_message, html=html_message,
+                    dedup_key=f'event-submission:{submission.pk}:proxy-notice',
                 )
             except Exception:
                 pass  # Don't fail registration if email fails
@@ -4167,7 +4184,7 @@ def my_event_registrations(request):
 def send_pending_otp(request):
     """Send OTP for a pending (pre-registration) signup. No auth required —
     verifies Firebase token directly, like firebase_register/firebase_login."""
-    from .otp_utils import generate_otp, _hash_otp, _send_mail_with_fallback
+    from .otp_utils import generate_otp, _hash_otp, queue_otp_email
 
     id_token = request.data.get('firebase_token')
     if not id_token:
@@ -4197,7 +4214,7 @@ def send_pending_otp(request):
     pending['otp_attempts'] = 0
     cache.set(cache_key, pending, timeout=1800)  # preserve 30-min TTL
 
-    # Send OTP email
+    # Queue OTP email (sent from the outbox)
     from_email = getattr(django_settings, 'DEFAULT_FROM_EMAIL', None)
     if not from_email:
         return Response(
@@ -4206,19 +4223,9 @@ def send_pending_otp(request):
         )
 
     try:
-        _send_mail_with_fallback(
-            'Be 4 Africa - Email Verification OTP',
-            f'Hello {pending["name"]},\n\n'
-            f'Your email verification OTP code is: {otp_code}\n\n'
-            f'This code will expire in 10 minutes.\n\n'
-            f'If you did not request this code, please ignore this email.\n\n'
-            f'Best regards,\n'
-            f'Be 4 Africa Team',
-            from_email,
-            [pending['email']],
-        )
+        queue_otp_email(pending['email'], pending['name'], otp_code)
     except Exception as e:
-        logger.exception('Failed to send pending signup OTP email: %s', e)
+        logger.exception('Failed to queue pending signup OTP email: %s', e)
         return Response(
             {'detail': 'Failed to send verification code. Please try again.'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -4973,10 +4980,14 @@ def join_event_waitlist(request):
     if EventWaitlist.objects.filter(user=request.user, event_registration=event_reg).exists():
         return Response({'detail': 'Already on waitlist'}, status=400)
 
-    position = EventWaitlist.objects.filter(event_registration=event_reg).count() + 1
-    waitlist = EventWaitlist.objects.create(
-        user=request.user, event_registration=event_reg, position=position
-    )
+    try:
+        with transaction.atomic():
+            waitlist = EventWaitlist.objects.create(
+                user=request.user, event_registration=event_reg,
+                position=next_waitlist_position(event_reg.pk),
+            )
+    except IntegrityError:
+        return Response({'detail': 'Already on waitlist'}, status=400)
     return Response(EventWaitlistSerializer(waitlist).data, status=201)
 
 
@@ -5827,8 +5838,10 @@ def merge_accounts(request):
     # Transfer support tickets
     SupportTicket.objects.filter(user=source_user).update(user=target_user)
 
-    # Transfer event submissions
-    EventSubmission.objects.filter(user=source_user).update(user=target_user)
+    # Transfer event submissions (ticket names come from the user; .update() skips the check-in signals)
+    submission_ids = list(EventSubmission.objects.filter(user=source_user).values_list('pk', flat=True))
+    EventSubmission.objects.filter(pk__in=submission_ids).update(user=target_user)
+    checkin.sync('event', submission_ids)
 
     # Transfer discussions & replies
     Discussion.objects.filter(author=source_user).update(author=target_user)
@@ -6573,7 +6586,7 @@ def translation_queue_detail(request, pk):
 # ═══════════════════════════════════════════════════════════════
 
 def _send_yd_admin_notification(application):
-    """Send admin notification email when a new Continental Dialogue application is submitted."""
+    """Queue the admin notification email for a new Continental Dialogue application."""
     try:
         admin_emails = getattr(django_settings, 'YD_ADMIN_EMAILS', [])
         if not admin_emails:
@@ -6614,12 +6627,10 @@ def _send_yd_admin_notification(application):
 </div>
 </body></html>'''
 
-        def _send():
-            send_mail(
-                subject, '', django_settings.DEFAULT_FROM_EMAIL,
-                admin_emails, html_message=html_message, fail_silently=True,
-            )
-        threading.Thread(target=_send, daemon=True).start()
+        outbox.queue_email(
+            admin_emails, subject, html=html_message,
+            dedup_key=f'yd-application:{application.pk}:admin-notification',
+        )
     except Exception:
         logger.exception('Continental Dialogue admin notification email failed')
 
@@ -6998,7 +7009,7 @@ def _notify_yd(application, event_key):
 
     results = {'email': False, 'push': False, 'in_app': False, 'push_detail': '', 'in_app_detail': ''}
 
-    # 1. Send email (best-effort, threaded)
+    # 1. Queue email (sent from the outbox after commit)
     try:
         _send_yd_applicant_email(
             application,
@@ -7012,7 +7023,7 @@ def _notify_yd(application, event_key):
     except Exception:
         logger.exception('Continental Dialogue email notification failed for user %s', application.user_id)
 
-    # 2. Send push notification — check tokens first, then dispatch
+    # 2. Queue push notification — check tokens first
     from core.models import UserProfile, DeviceToken
     try:
         device_tokens = list(
@@ -7042,54 +7053,7 @@ def _notify_yd(application, event_key):
             'action_value': config.get('push_route', '/youth-dialogue'),
         }
 
-        def _send_push():
-            try:
-                from core.tasks import send_push_notification_async
-                send_push_notification_async.delay(
-                    [application.user_id],
-                    config['push_title'],
-                    config['push_body'],
-                    push_data,
-                )
-                logger.info('Push dispatched via Celery for Continental Dialogue user %s (%d tokens)', application.user_id, len(all_tokens))
-            except Exception:
-                # Celery/Redis unavailable — send synchronously as fallback
-                try:
-                    from config.firebase import initialize_firebase
-                    initialize_firebase()
-                    import firebase_admin.messaging as messaging
-                    msg = messaging.MulticastMessage(
-                        tokens=all_tokens,
-                        notification=messaging.Notification(
-                            title=config['push_title'],
-                            body=config['push_body'],
-                        ),
-                        data=push_data,
-                        android=messaging.AndroidConfig(
-                            priority='high',
-                            notification=messaging.AndroidNotification(
-                                channel_id='default_channel',
-                                priority='max',
-                                default_sound=True,
-                                default_vibrate_timings=True,
-                            ),
-                        ),
-                        apns=messaging.APNSConfig(
-                            headers={'apns-priority': '10'},
-                            payload=messaging.APNSPayload(
-                                aps=messaging.Aps(
-                                    sound='default',
-                                    badge=1,
-                                    content_available=True,
-                                ),
-                            ),
-                        ),
-                    )
-                    resp = messaging.send_each_for_multicast(msg)
-                    logger.info('Push sent synchronously for user %s: %d success, %d failed', application.user_id, resp.success_count, resp.failure_count)
-                except Exception:
-                    logger.exception('Push notification failed for Continental Dialogue user %s', application.user_id)
-        threading.Thread(target=_send_push, daemon=True).start()
+        outbox.queue_push([application.user_id], config['push_title'], config['push_body'], push_data)
         results['push'] = True
         results['push_detail'] = f'{len(all_tokens)} device(s)'
 
@@ -7174,7 +7138,7 @@ def _yd_logo_absolute_url(image_field):
 
 
 def _send_yd_applicant_email(application, subject, heading, badge_color, body_html, lang='en'):
-    """Send branded email to Continental Dialogue applicant with embedded logos."""
+    """Queue a branded email (core/outbox.py) to a Continental Dialogue applicant with embedded logos."""
     try:
         if not application.email:
             return
@@ -7300,33 +7264,10 @@ def _send_yd_applicant_email(application, subject, heading, badge_color, body_ht
 </div>
 </body></html>'''
 
-        def _send():
-            from email.mime.image import MIMEImage
-            from django.core.mail import EmailMessage
-            email = EmailMessage(
-                subject=subject,
-                body=html_message,
-                from_email=django_settings.DEFAULT_FROM_EMAIL,
-                to=[application.email],
-            )
-            email.content_subtype = 'html'
-
-            # Embed images as CID attachments
-            for cid_name, image_field in cid_images:
-                try:
-                    image_field.open('rb')
-                    img_data = image_field.read()
-                    image_field.close()
-                    mime_img = MIMEImage(img_data)
-                    mime_img.add_header('Content-ID', f'<{cid_name}>')
-                    mime_img.add_header('Content-Disposition', 'inline', filename=f'{cid_name}.png')
-                    email.attach(mime_img)
-                except Exception:
-                    logger.warning('Failed to embed image %s for email', cid_name)
-
-            email.send(fail_silently=True)
-
-        threading.Thread(target=_send, daemon=True).start()
+        outbox.queue_email(
+            [application.email], subject, html=html_message,
+            inline_images=[(cid_name, image_field.name) for cid_name, image_field in cid_images],
+        )
     except Exception:
         logger.exception('Continental Dialogue applicant email failed')
 
@@ -7843,7 +7784,7 @@ class YouthDialogueViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=['get'], url_path='credential-pdf')
     def credential_pdf(self, request):
-        """Generate and return a PDF ID card for the authenticated user's credential."""
+        """The PDF ID card of the authenticated user's credential (stored, see core/id_cards.py)."""
         active_event = YouthDialogueEvent.get_active()
         lookup = {'user': request.user}
         if active_event:
@@ -7862,11 +7803,7 @@ class YouthDialogueViewSet(viewsets.GenericViewSet):
         if app.status != 'credential_issued' or not app.participant_code:
             return Response({'detail': 'Credential not yet issued.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        from django.http import HttpResponse as DjangoHttpResponse
-        buf = _generate_yd_id_card_pdf(app, request)
-        response = DjangoHttpResponse(buf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="YD-IDCard-{app.participant_code}.pdf"'
-        return response
+        return id_cards.download(app, 'badge')
 
     @action(detail=False, methods=['get'], url_path='eligibility')
     def eligibility(self, request):
@@ -7976,217 +7913,16 @@ class YouthDialogueViewSet(viewsets.GenericViewSet):
         return Response({'detail': 'Activity logged.'})
 
 
-def _generate_yd_id_card_pdf(app, request=None):
-    """Generate a professional Continental Dialogue PDF ID card with QR code and logos.
-
-    Returns a BytesIO buffer containing the PDF.
-    Used by both the user-facing credential_pdf endpoint and the admin yd_id_card_pdf view.
-    """
-    import io as _io
-    from reportlab.lib.pagesizes import A4, inch
-    from reportlab.lib import colors as rl_colors
-    from reportlab.pdfgen import canvas as rl_canvas
-    from reportlab.lib.utils import ImageReader
-    import qrcode
-
-    buf = _io.BytesIO()
-    page_w, page_h = A4
-    c = rl_canvas.Canvas(buf, pagesize=A4)
-
-    # Card dimensions (centred on A4)
-    card_w = 3.5 * inch
-    card_h = 5.0 * inch
-    card_x = (page_w - card_w) / 2
-    card_y = (page_h - card_h) / 2
-
-    GREEN = '#409843'
-    DARK_GREEN = '#2D6E31'
-    GOLD = '#D4A843'
-    DARK = '#1a1a1a'
-
-    # ── Card background with rounded corners ──
-    c.setFillColor(rl_colors.white)
-    c.setStrokeColor(rl_colors.HexColor('#e0e0e0'))
-    c.setLineWidth(0.5)
-    c.roundRect(card_x, card_y, card_w, card_h, 12, fill=1, stroke=1)
-
-    # ── Green header band ──
-    header_h = 1.1 * inch
-    header_y = card_y + card_h - header_h
-    c.saveState()
-    p = c.beginPath()
-    p.roundRect(card_x, header_y, card_w, header_h, 12)
-    c.clipPath(p, stroke=0)
-    c.setFillColor(rl_colors.HexColor(GREEN))
-    c.rect(card_x, header_y, card_w, header_h, fill=1, stroke=0)
-    # Darker bottom strip of header (below the rounded top)
-    c.setFillColor(rl_colors.HexColor(DARK_GREEN))
-    c.rect(card_x, header_y, card_w, 0.25 * inch, fill=1, stroke=0)
-    c.restoreState()
-
-    # ── Gold accent line below header ──
-    c.setStrokeColor(rl_colors.HexColor(GOLD))
-    c.setLineWidth(2)
-    c.line(card_x + 0.3 * inch, header_y, card_x + card_w - 0.3 * inch, header_y)
-
-    # ── Header text ──
-    cx = card_x + card_w / 2
-    c.setFillColor(rl_colors.white)
-    c.setFont('Helvetica-Bold', 10)
-    c.drawCentredString(cx, header_y + 0.72 * inch, 'YOUTH DIALOGUE')
-    c.setFont('Helvetica-Bold', 8)
-    c.drawCentredString(cx, header_y + 0.55 * inch, 'PARTICIPANT')
-    c.setFont('Helvetica', 7)
-    c.drawCentredString(cx, header_y + 0.35 * inch, 'Burundi AU Chairmanship 2025-2026')
-    c.setFont('Helvetica', 6)
-    c.setFillColor(rl_colors.HexColor('#D4E8D5'))
-    c.drawCentredString(cx, header_y + 0.12 * inch, 'Be 4 Africa')
-
-    # ── Event logos in header ──
-    event = app.event
-    if event:
-        # Left logo
-        for logo_field in [event.logo_left, event.logo_right]:
-            if logo_field:
-                try:
-                    logo_img = ImageReader(logo_field.path)
-                    logo_size = 0.45 * inch
-                    if logo_field == event.logo_left:
-                        c.drawImage(logo_img, card_x + 0.15 * inch, header_y + 0.5 * inch,
-                                    logo_size, logo_size, preserveAspectRatio=True, mask='auto')
-                    else:
-                        c.drawImage(logo_img, card_x + card_w - 0.15 * inch - logo_size,
-                                    header_y + 0.5 * inch, logo_size, logo_size,
-                                    preserveAspectRatio=True, mask='auto')
-                except Exception:
-                    pass
-
-    # ── Participant photo ──
-    photo_size = 1.0 * inch
-    photo_x = cx - photo_size / 2
-    photo_y = header_y - photo_size - 0.15 * inch
-
-    # Photo border (gold ring)
-    c.setStrokeColor(rl_colors.HexColor(GOLD))
-    c.setLineWidth(2)
-    c.circle(cx, photo_y + photo_size / 2, photo_size / 2 + 3, fill=0, stroke=1)
-
-    if app.id_photo:
-        try:
-            img = ImageReader(app.id_photo.path)
-            # Clip to circle
-            c.saveState()
-            p = c.beginPath()
-            p.circle(cx, photo_y + photo_size / 2, photo_size / 2)
-            c.clipPath(p, stroke=0)
-            c.drawImage(img, photo_x, photo_y, photo_size, photo_size,
-                        preserveAspectRatio=True, mask='auto')
-            c.restoreState()
-        except Exception:
-            c.setFillColor(rl_colors.HexColor('#e8e8e8'))
-            c.circle(cx, photo_y + photo_size / 2, photo_size / 2, fill=1, stroke=0)
-    else:
-        c.setFillColor(rl_colors.HexColor('#e8e8e8'))
-        c.circle(cx, photo_y + photo_size / 2, photo_size / 2, fill=1, stroke=0)
-
-    # ── Name ──
-    name_y = photo_y - 0.25 * inch
-    c.setFillColor(rl_colors.HexColor(DARK))
-    c.setFont('Helvetica-Bold', 14)
-    full_name = f'{app.first_name} {app.last_name}'
-    # Truncate if too long
-    if len(full_name) > 28:
-        c.setFont('Helvetica-Bold', 11)
-    c.drawCentredString(cx, name_y, full_name)
-
-    # ── Organization ──
-    info_y = name_y - 0.2 * inch
-    if app.organization:
-        c.setFillColor(rl_colors.HexColor('#666666'))
-        c.setFont('Helvetica', 8)
-        org_text = app.organization[:40]
-        c.drawCentredString(cx, info_y, org_text)
-        info_y -= 0.18 * inch
-
-    # ── Nationality ──
-    if app.nationality:
-        c.setFillColor(rl_colors.HexColor('#888888'))
-        c.setFont('Helvetica', 8)
-        c.drawCentredString(cx, info_y, app.get_nationality_display())
-        info_y -= 0.18 * inch
-
-    # ── Thin separator ──
-    info_y -= 0.05 * inch
-    c.setStrokeColor(rl_colors.HexColor('#e0e0e0'))
-    c.setLineWidth(0.5)
-    c.line(card_x + 0.5 * inch, info_y, card_x + card_w - 0.5 * inch, info_y)
-
-    # ── Participant code ──
-    info_y -= 0.25 * inch
-    c.setFillColor(rl_colors.HexColor(GREEN))
-    c.setFont('Courier-Bold', 16)
-    c.drawCentredString(cx, info_y, app.participant_code)
-
-    # ── QR Code (actual image) ──
-    qr_data = f'YD:{app.participant_code}:{app.qr_hash}'
-    # Build URL format if settings say so
-    try:
-        settings_obj = AppSettings.load()
-        if settings_obj.qr_code_mode == 'url' and request:
-            base = request.build_absolute_uri('/').rstrip('/')
-            qr_data = f'{base}/verify?code={qr_data}'
-    except Exception:
-        pass
-
-    qr_img_buf = _io.BytesIO()
-    qr_obj = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=1)
-    qr_obj.add_data(qr_data)
-    qr_obj.make(fit=True)
-    qr_pil = qr_obj.make_image(fill_color='black', back_color='white')
-    qr_pil.save(qr_img_buf, format='PNG')
-    qr_img_buf.seek(0)
-
-    qr_size = 0.9 * inch
-    qr_x = cx - qr_size / 2
-    qr_y = info_y - qr_size - 0.2 * inch
-
-    qr_reader = ImageReader(qr_img_buf)
-    c.drawImage(qr_reader, qr_x, qr_y, qr_size, qr_size)
-
-    # "Scan to verify" label
-    c.setFillColor(rl_colors.HexColor('#999999'))
-    c.setFont('Helvetica', 5)
-    c.drawCentredString(cx, qr_y - 0.12 * inch, 'SCAN TO VERIFY')
-
-    # ── Footer ──
-    footer_y = card_y + 0.15 * inch
-    c.setFillColor(rl_colors.HexColor('#cccccc'))
-    c.setFont('Helvetica', 5)
-    c.drawCentredString(cx, footer_y, 'Burundi Be 4 Africa 2026')
-    if app.credential_issued_at:
-        c.drawCentredString(cx, footer_y - 0.12 * inch,
-                            f'Issued {app.credential_issued_at.strftime("%d/%m/%Y")}')
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
-    return buf
-
-
 @api_view(['GET'])
 @permission_classes([HasAdminSection.for_section('youth_dialogue_list')])
 def yd_id_card_pdf(request, app_id):
-    """Generate a printable PDF ID card for a Continental Dialogue participant."""
+    """Printable PDF ID card for a Continental Dialogue participant (stored, see core/id_cards.py)."""
     from django.http import HttpResponse as DjangoHttpResponse
 
-    app = get_object_or_404(YouthDialogueApplication, pk=app_id)
+    app = get_object_or_404(YouthDialogueApplication.objects.select_related('event'), pk=app_id)
     if app.status != 'credential_issued' or not app.participant_code:
         return DjangoHttpResponse('Credential not issued yet.', status=400)
-
-    buf = _generate_yd_id_card_pdf(app, request)
-    response = DjangoHttpResponse(buf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="YD-IDCard-{app.participant_code}.pdf"'
-    return response
+    return id_cards.download(app, 'badge')
 
 
 # ═══════════════════════════════════════════════════════════
@@ -8236,12 +7972,81 @@ def track_promotional_splash_click(request, pk):
 #  QR CODE VERIFICATION
 # ═══════════════════════════════════════════════════════════
 
-def _get_side_event_name(app):
-    """Return the name of the participant's selected side event, or empty string."""
-    se = app.selected_side_events.first()
-    if se:
-        return se.name
-    return ''
+def _id_photo_url(request, name):
+    """Absolute URL of a stored ID photo (signed URLs are minted per request)."""
+    if not name:
+        return ''
+    try:
+        storage = YouthDialogueApplication._meta.get_field('id_photo').storage
+        return request.build_absolute_uri(storage.url(name))
+    except Exception:
+        return ''
+
+
+def _event_scan_result(entry, info, is_duplicate, scan_count):
+    """verify_qr response for an event ticket, from a check-in index entry."""
+    details = entry['details']
+    return {
+        'valid': True,
+        'type': 'event',
+        'person_name': entry['name'],
+        'event_title': info.get('event_title', ''),
+        'status': entry['status'],
+        'checked_in_at': details.get('checked_in_at'),
+        'is_duplicate': is_duplicate,
+        'scan_count': scan_count,
+        'details': {
+            'email': details.get('email', ''),
+            'organization': entry['organization'],
+            'nationality': entry['nationality'],
+            'title': entry['role'],
+            'phone': details.get('phone', ''),
+            'is_proxy': details.get('is_proxy', False),
+            'is_waitlisted': details.get('is_waitlisted', False),
+            'event_venue': info.get('event_venue', ''),
+            'event_date': info.get('event_date'),
+            'event_end_date': info.get('event_end_date'),
+            'submission_id': int(entry['code']),
+        },
+    }
+
+
+def _yd_scan_result(request, entry, info, is_duplicate, scan_count, with_details=True):
+    """verify_qr response for a Continental Dialogue credential, from a check-in index entry."""
+    details = entry['details']
+    result = {
+        'valid': entry['valid'],
+        'type': 'youth_dialogue',
+        'person_name': entry['name'],
+        'programme': 'Continental Dialogue',
+        'status': entry['status'],
+        'detail': '' if entry['valid'] else 'This credential has been revoked.',
+        'is_duplicate': is_duplicate,
+        'scan_count': scan_count,
+    }
+    if with_details:
+        result['details'] = {
+            'participant_code': entry['code'],
+            'nationality': entry['nationality'],
+            'nationality_flag': details.get('nationality_flag', ''),
+            'organization': entry['organization'],
+            'position': details.get('position', ''),
+            'credential_issued_at': details.get('credential_issued_at'),
+            'id_photo_url': _id_photo_url(request, details.get('id_photo')),
+            'email': details.get('email', ''),
+            'role': entry['role'],
+            'role_color': entry['role_color'],
+            'event_start_date': info.get('event_start_date'),
+            'event_end_date': info.get('event_end_date'),
+            'event_location': info.get('event_location', ''),
+            'reference_id': details.get('reference_id', ''),
+            'scan_result_visible_fields': info.get('scan_result_visible_fields', []),
+            'side_event': details.get('side_event', ''),
+        }
+        if not entry['valid']:
+            result['details']['revoked_at'] = details.get('revoked_at')
+            result['details']['revoked_reason'] = details.get('revoked_reason', '')
+    return result
 
 
 def _parse_qr_code(raw_data):
@@ -8278,7 +8083,8 @@ def verify_qr(request):
 
     Accepts {"qr_data": "EVT:123:abc..."} or {"qr_data": "YD:CODE:hash..."}.
     Also handles URL-encoded variants.
-    Returns verification result and logs the scan.
+    Returns verification result and logs the scan.  Tickets and credentials
+    are read from the in-memory check-in index (core/checkin.py).
     """
     qr_data = request.data.get('qr_data', '').strip()
     if not qr_data:
@@ -8295,172 +8101,33 @@ def verify_qr(request):
     scanned_by = request.user if request.user.is_authenticated else None
     is_staff = scanned_by and scanned_by.is_staff
 
-    # Check for duplicate scans
-    scan_count = QRScanLog.objects.filter(qr_type=qr_type, reference_id=ref_id).count()
-    is_duplicate = scan_count > 0
-
-    # Log the scan
-    QRScanLog.objects.create(
-        qr_type=qr_type,
-        reference_id=ref_id,
-        scanned_by=scanned_by,
-        ip_address=ip_address,
-        is_duplicate=is_duplicate,
-    )
-    scan_count += 1  # include current scan
+    # Log the scan; the count includes it
+    scan_count = checkin.record_scan(qr_type, ref_id, scanned_by, ip_address)
+    is_duplicate = scan_count > 1
 
     if qr_type == 'event':
         try:
-            sub_id = int(ref_id)
+            int(ref_id)
         except (ValueError, TypeError):
             return Response({'valid': False, 'type': 'event', 'detail': 'Invalid reference.'}, status=404)
 
-        try:
-            submission = EventSubmission.objects.select_related('event_registration', 'user').get(pk=sub_id)
-        except EventSubmission.DoesNotExist:
+        found = checkin.lookup('event', ref_id)
+        if found is None:
             return Response({'valid': False, 'type': 'event', 'detail': 'Ticket not found.'}, status=404)
 
-        if submission.qr_ticket_hash != qr_hash:
+        entry, info = found
+        if not checkin.hash_matches(entry, qr_hash):
             return Response({'valid': False, 'type': 'event', 'detail': 'QR code validation failed.'}, status=400)
 
-        attendee_name = submission.proxy_name if submission.is_proxy else (
-            submission.user.first_name or submission.user.username
-        )
-        reg = submission.event_registration
-        form_data = submission.form_data or {}
-
-        # Extract useful fields from form_data (dynamic form submissions)
-        def _fd(keys):
-            """Return the first non-empty value matching any of the given keys."""
-            for k in keys:
-                v = form_data.get(k, '')
-                if v:
-                    return str(v).strip()
-            return ''
-
-        fd_organization = _fd(['organization', 'institution', 'company', 'organisation', 'org'])
-        fd_nationality = _fd(['nationality', 'country', 'pays', 'nationalite'])
-        fd_title = _fd(['title', 'titre', 'position', 'role', 'function', 'fonction'])
-        fd_phone = _fd(['phone', 'phone_number', 'telephone', 'tel', 'mobile'])
-        fd_full_name = _fd(['full_name', 'name', 'nom_complet', 'nom'])
-
-        # Build a fuller attendee name from form_data if available
-        if fd_full_name and not submission.is_proxy:
-            attendee_name = fd_full_name
-
-        result = {
-            'valid': True,
-            'type': 'event',
-            'person_name': attendee_name,
-            'event_title': reg.event_title,
-            'status': submission.status,
-            'checked_in_at': submission.checked_in_at.isoformat() if submission.checked_in_at else None,
-            'is_duplicate': is_duplicate,
-            'scan_count': scan_count,
-            'details': {
-                'email': submission.proxy_email if submission.is_proxy else submission.user.email,
-                'organization': fd_organization,
-                'nationality': fd_nationality,
-                'title': fd_title,
-                'phone': fd_phone,
-                'is_proxy': submission.is_proxy,
-                'is_waitlisted': submission.is_waitlisted,
-                'event_venue': reg.venue or '',
-                'event_date': reg.event_date.isoformat() if reg.event_date else None,
-                'event_end_date': reg.event_end_date.isoformat() if reg.event_end_date else None,
-                'submission_id': submission.id,
-            },
-        }
-        return Response(result)
+        return Response(_event_scan_result(entry, info, is_duplicate, scan_count))
 
     elif qr_type == 'youth_dialogue':
-        try:
-            app = YouthDialogueApplication.objects.select_related('event').get(participant_code=ref_id, qr_hash=qr_hash)
-        except YouthDialogueApplication.DoesNotExist:
+        found = checkin.lookup('youth_dialogue', ref_id)
+        if found is None or not checkin.hash_matches(found[0], qr_hash):
             return Response({'valid': False, 'type': 'youth_dialogue', 'detail': 'Credential not found.'}, status=404)
 
-        # Look up role color from backend-configurable roles
-        _role_color = '#4CAF50'
-        _position = app.position or 'Participant'
-        try:
-            _role_obj = YouthDialogueRole.objects.get(event=app.event, name__iexact=_position, is_active=True)
-            _role_color = _role_obj.color
-        except YouthDialogueRole.DoesNotExist:
-            pass
-
-        if app.is_revoked:
-            result = {
-                'valid': False,
-                'type': 'youth_dialogue',
-                'person_name': f'{app.first_name} {app.last_name}',
-                'status': 'revoked',
-                'detail': 'This credential has been revoked.',
-                'is_duplicate': is_duplicate,
-                'scan_count': scan_count,
-            }
-            if is_staff:
-                id_photo_url = ''
-                if app.id_photo:
-                    try:
-                        id_photo_url = request.build_absolute_uri(app.id_photo.url)
-                    except Exception:
-                        id_photo_url = ''
-                result['details'] = {
-                    'revoked_at': app.revoked_at.isoformat() if app.revoked_at else None,
-                    'revoked_reason': app.revoked_reason,
-                    'organization': app.organization,
-                    'id_photo_url': id_photo_url,
-                    'email': app.email,
-                    'role': app.position or 'Participant',
-                    'role_color': _role_color,
-                    'event_start_date': app.event.start_date.isoformat() if app.event and app.event.start_date else None,
-                    'event_end_date': app.event.end_date.isoformat() if app.event and app.event.end_date else None,
-                    'event_location': app.event.location if app.event else '',
-                    'reference_id': app.reference_id or '',
-                    'participant_code': app.participant_code,
-                    'nationality': app.get_nationality_display(),
-                    'nationality_flag': app.nationality_flag,
-                    'credential_issued_at': app.credential_issued_at.isoformat() if app.credential_issued_at else None,
-                    'scan_result_visible_fields': app.event.get_scan_result_visible_fields() if app.event else [],
-                    'side_event': _get_side_event_name(app),
-                }
-            return Response(result)
-
-        result = {
-            'valid': True,
-            'type': 'youth_dialogue',
-            'person_name': f'{app.first_name} {app.last_name}',
-            'programme': 'Continental Dialogue',
-            'status': 'valid',
-            'is_duplicate': is_duplicate,
-            'scan_count': scan_count,
-        }
-        if is_staff:
-            id_photo_url = ''
-            if app.id_photo:
-                try:
-                    id_photo_url = request.build_absolute_uri(app.id_photo.url)
-                except Exception:
-                    id_photo_url = ''
-            result['details'] = {
-                'participant_code': app.participant_code,
-                'nationality': app.get_nationality_display(),
-                'nationality_flag': app.nationality_flag,
-                'organization': app.organization,
-                'position': app.position,
-                'credential_issued_at': app.credential_issued_at.isoformat() if app.credential_issued_at else None,
-                'id_photo_url': id_photo_url,
-                'email': app.email,
-                'role': app.position or 'Participant',
-                'role_color': _role_color,
-                'event_start_date': app.event.start_date.isoformat() if app.event and app.event.start_date else None,
-                'event_end_date': app.event.end_date.isoformat() if app.event and app.event.end_date else None,
-                'event_location': app.event.location if app.event else '',
-                'reference_id': app.reference_id or '',
-                'scan_result_visible_fields': app.event.get_scan_result_visible_fields() if app.event else [],
-                'side_event': _get_side_event_name(app),
-            }
-        return Response(result)
+        entry, info = found
+        return Response(_yd_scan_result(request, entry, info, is_duplicate, scan_count, with_details=is_staff))
 
     return Response({'valid': False, 'detail': 'Unknown QR type.'}, status=400)
 
@@ -8493,22 +8160,21 @@ def verify_manual(request):
         if not code:
             return Response({'detail': 'code is required.'}, status=400)
 
-        # Try YouthDialogueApplication by participant_code first
-        try:
-            app = YouthDialogueApplication.objects.select_related('event').get(participant_code=code)
-            return _manual_yd_result(request, app, ip_address)
-        except YouthDialogueApplication.DoesNotExist:
-            pass
+        # Try a Continental Dialogue participant code first (the check-in index,
+        # then applications that have no scannable credential yet)
+        found = checkin.lookup('youth_dialogue', code)
+        if found is None:
+            app = YouthDialogueApplication.objects.select_related('event').filter(participant_code=code).first()
+            if app:
+                found = checkin.build_entry('youth_dialogue', app)
+        if found:
+            return _manual_result(request, *found, ip_address)
 
         # Try EventSubmission by numeric PK
-        try:
-            sub_id = int(code)
-            submission = EventSubmission.objects.select_related('event_registration', 'user').get(pk=sub_id)
-            return _manual_event_result(request, submission, ip_address)
-        except (ValueError, TypeError):
-            pass
-        except EventSubmission.DoesNotExist:
-            pass
+        if code.isdigit():
+            found = checkin.lookup('event', code)
+            if found:
+                return _manual_result(request, *found, ip_address)
 
         return Response({'valid': False, 'detail': 'No credential or ticket found for that code.'}, status=404)
 
@@ -8546,7 +8212,7 @@ def verify_manual(request):
             return Response({'valid': False, 'detail': 'No matches found.'}, status=404)
 
         if len(yd_matches) == 1:
-            return _manual_yd_result(request, yd_matches[0], ip_address)
+            return _manual_result(request, *_manual_checkin_entry('youth_dialogue', yd_matches[0]), ip_address)
 
         pick_list = []
         for app in yd_matches:
@@ -8619,10 +8285,7 @@ def verify_manual(request):
 
     if len(matches) == 1:
         m = matches[0]
-        if m['match_type'] == 'youth_dialogue':
-            return _manual_yd_result(request, m['_obj'], ip_address)
-        else:
-            return _manual_event_result(request, m['_obj'], ip_address)
+        return _manual_result(request, *_manual_checkin_entry(m['match_type'], m['_obj']), ip_address)
 
     # Multiple matches — return pick list (without ORM objects)
     pick_list = []
@@ -8637,124 +8300,106 @@ def verify_manual(request):
     return Response({'multiple': True, 'matches': pick_list})
 
 
-def _manual_yd_result(request, app, ip_address):
-    """Build a verify_qr-compatible response for a YouthDialogueApplication (staff view)."""
-    scanned_by = request.user
-    ref_id = app.participant_code
+def _manual_checkin_entry(qr_type, obj):
+    """``(entry, info)`` for a matched application / submission: the index copy if it has one."""
+    code = obj.participant_code if qr_type == 'youth_dialogue' else str(obj.pk)
+    return (code and checkin.lookup(qr_type, code)) or checkin.build_entry(qr_type, obj)
 
-    scan_count = QRScanLog.objects.filter(qr_type='youth_dialogue', reference_id=ref_id).count()
-    is_duplicate = scan_count > 0
-    QRScanLog.objects.create(
-        qr_type='youth_dialogue', reference_id=ref_id,
-        scanned_by=scanned_by, ip_address=ip_address, is_duplicate=is_duplicate,
-    )
-    scan_count += 1
 
-    _role_color = '#4CAF50'
-    _position = app.position or 'Participant'
-    try:
-        _role_obj = YouthDialogueRole.objects.get(event=app.event, name__iexact=_position, is_active=True)
-        _role_color = _role_obj.color
-    except YouthDialogueRole.DoesNotExist:
-        pass
+def _manual_result(request, entry, info, ip_address):
+    """Build a verify_qr-compatible response for a manual lookup (staff view) and log the scan."""
+    scan_count = checkin.record_scan(entry['qr_type'], entry['code'] or '', request.user, ip_address)
+    is_duplicate = scan_count > 1
+    if entry['qr_type'] == 'youth_dialogue':
+        return Response(_yd_scan_result(request, entry, info, is_duplicate, scan_count))
+    return Response(_event_scan_result(entry, info, is_duplicate, scan_count))
 
-    id_photo_url = ''
-    if app.id_photo:
-        try:
-            id_photo_url = request.build_absolute_uri(app.id_photo.url)
-        except Exception:
-            pass
 
-    is_valid = not app.is_revoked
-    result = {
-        'valid': is_valid,
-        'type': 'youth_dialogue',
-        'person_name': f'{app.first_name} {app.last_name}',
-        'programme': 'Continental Dialogue',
-        'status': 'revoked' if app.is_revoked else 'valid',
-        'detail': 'This credential has been revoked.' if app.is_revoked else '',
-        'is_duplicate': is_duplicate,
-        'scan_count': scan_count,
-        'details': {
-            'participant_code': app.participant_code,
-            'nationality': app.get_nationality_display(),
-            'nationality_flag': app.nationality_flag,
-            'organization': app.organization,
-            'position': app.position,
-            'credential_issued_at': app.credential_issued_at.isoformat() if app.credential_issued_at else None,
-            'id_photo_url': id_photo_url,
-            'email': app.email,
-            'role': _position,
-            'role_color': _role_color,
-            'event_start_date': app.event.start_date.isoformat() if app.event and app.event.start_date else None,
-            'event_end_date': app.event.end_date.isoformat() if app.event and app.event.end_date else None,
-            'event_location': app.event.location if app.event else '',
-            'reference_id': app.reference_id or '',
-            'scan_result_visible_fields': app.event.get_scan_result_visible_fields() if app.event else [],
-            'side_event': _get_side_event_name(app),
-        },
-    }
-    if app.is_revoked:
-        result['details']['revoked_at'] = app.revoked_at.isoformat() if app.revoked_at else None
-        result['details']['revoked_reason'] = app.revoked_reason
-    return Response(result)
-
-
-def _manual_event_result(request, submission, ip_address):
-    """Build a verify_qr-compatible response for an EventSubmission (staff view)."""
-    scanned_by = request.user
-    ref_id = str(submission.pk)
-
-    scan_count = QRScanLog.objects.filter(qr_type='event', reference_id=ref_id).count()
-    is_duplicate = scan_count > 0
-    QRScanLog.objects.create(
-        qr_type='event', reference_id=ref_id,
-        scanned_by=scanned_by, ip_address=ip_address, is_duplicate=is_duplicate,
-    )
-    scan_count += 1
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def checkin_manifest(request, scope):
+    """Signed check-in manifest of one event for offline gate scanners.
 
-    reg = submission.event_registration
-    form_data = submission.form_data or {}
+    ``scope`` is ``event:<registration id>`` or ``yd:<event id>``.  Without
+    ``?since`` the whole manifest is returned; ``?since=<revision>`` returns
+    only the entries changed after the scanner's copy, including removed ones.
+    See core/checkin.py for the entry format and signature.
+    """
+    if not request.user.is_staff:
+        return Response({'detail': 'Staff access required.'}, status=403)
 
-    def _fd(keys):
-        for k in keys:
-            v = form_data.get(k, '')
-            if v:
-                return str(v).strip()
-        return ''
+    since = request.query_params.get('since', '0').strip() or '0'
+    if not since.isdigit():
+        return Response({'detail': 'since must be a manifest revision.'}, status=400)
 
-    fd_organization = _fd(['organization', 'institution', 'company', 'organisation', 'org'])
-    fd_nationality = _fd(['nationality', 'country', 'pays', 'nationalite'])
-    fd_title = _fd(['title', 'titre', 'position', 'role', 'function', 'fonction'])
-    fd_phone = _fd(['phone', 'phone_number', 'telephone', 'tel', 'mobile'])
-    fd_full_name = _fd(['full_name', 'name', 'nom_complet', 'nom'])
+    if not checkin.can_sign():
+        return Response({'detail': 'Check-in manifests are not configured.'}, status=503)
+    data = checkin.manifest(scope, int(since))
+    if data is None:
+        return Response({'detail': 'Unknown check-in scope.'}, status=404)
+    return Response(data)
 
-    attendee_name = submission.proxy_name if submission.is_proxy else (
-        fd_full_name or submission.user.first_name or submission.user.username
-    )
-    return Response({
-        'valid': True,
-        'type': 'event',
-        'person_name': attendee_name,
-        'event_title': reg.event_title,
-        'status': submission.status,
-        'checked_in_at': submission.checked_in_at.isoformat() if submission.checked_in_at else None,
-        'is_duplicate': is_duplicate,
-        'scan_count': scan_count,
-        'details': {
-            'email': submission.proxy_email if submission.is_proxy else submission.user.email,
-            'organization': fd_organization,
-            'nationality': fd_nationality,
-            'title': fd_title,
-            'phone': fd_phone,
-            'is_proxy': submission.is_proxy,
-            'is_waitlisted': submission.is_waitlisted,
-            'event_venue': reg.venue or '',
-            'event_date': reg.event_date.isoformat() if reg.event_date else None,
-            'event_end_date': reg.event_end_date.isoformat() if reg.event_end_date else None,
-            'submission_id': submission.id,
-        },
-    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def checkin_scans(request):
+    """Upload scans a gate scanner recorded (offline) in one batch.
+
+    Accepts JSON:
+      {"scans": [{"id": "<scanner scan uuid>", "qr_data": "EVT:123:abc...", "scanned_at": "<ISO 8601>"}, ...]}
+
+    Scans are stored with one bulk insert; an ``id`` already uploaded is
+    skipped, so a failed upload can simply be retried.  Each stored scan is
+    returned with its validity and duplicate flag as the server sees them.
+    """
+    from django.utils.dateparse import parse_datetime
+
+    if not request.user.is_staff:
+        return Response({'detail': 'Staff access required.'}, status=403)
+
+    items = request.data.get('scans')
+    if not isinstance(items, list) or not items:
+        return Response({'detail': 'scans must be a non-empty list.'}, status=400)
+    if len(items) > django_settings.CHECKIN_UPLOAD_MAX:
+        return Response(
+            {'detail': f'At most {django_settings.CHECKIN_UPLOAD_MAX} scans per upload.'}, status=400,
+        )
+
+    ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', ''))
+    if ip_address and ',' in ip_address:
+        ip_address = ip_address.split(',')[0].strip()
+
+    scans, rejected = [], []
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        client_ref = str(item.get('id') or '')[:64] or None
+        parsed = _parse_qr_code(str(item.get('qr_data') or ''))
+        if not parsed:
+            rejected.append({'id': client_ref, 'detail': 'Invalid QR code format.'})
+            continue
+        try:
+            scanned_at = parse_datetime(str(item.get('scanned_at') or '')) or timezone.now()
+        except ValueError:
+            scanned_at = timezone.now()
+        if timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at)
+        qr_type, ref_id, qr_hash = parsed
+        scans.append({
+            'client_ref': client_ref, 'qr_type': qr_type, 'code': ref_id,
+            'qr_hash': qr_hash, 'scanned_at': scanned_at,
+        })
+
+    stored, skipped = checkin.record_scans(scans, request.user, ip_address)
+    results = []
+    for scan in stored:
+        found = checkin.lookup(scan['qr_type'], scan['code'])
+        results.append({
+            'id': scan['client_ref'],
+            'valid': bool(found) and found[0]['valid'] and checkin.hash_matches(found[0], scan['qr_hash']),
+            'is_duplicate': scan['is_duplicate'],
+            'scan_count': scan['scan_count'],
+        })
+    return Response({'stored': len(stored), 'skipped': skipped, 'results': results, 'rejected': rejected})
 
 
 @api_view(['GET'])
@@ -8834,41 +8479,33 @@ def verify_qr_web(request):
             ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', ''))
             if ip_address and ',' in ip_address:
                 ip_address = ip_address.split(',')[0].strip()
-            scan_count = QRScanLog.objects.filter(qr_type=qr_type, reference_id=ref_id).count()
-            is_duplicate = scan_count > 0
-            QRScanLog.objects.create(
-                qr_type=qr_type,
-                reference_id=ref_id,
-                scanned_by=None,
-                ip_address=ip_address,
-                is_duplicate=is_duplicate,
-            )
-            context['scan_count'] = scan_count + 1
-            context['is_duplicate'] = is_duplicate
+            scan_count = checkin.record_scan(qr_type, ref_id, None, ip_address)
+            context['scan_count'] = scan_count
+            context['is_duplicate'] = scan_count > 1
 
             if qr_type == 'event':
-                try:
-                    sub_id = int(ref_id)
-                    submission = EventSubmission.objects.select_related('event_registration', 'user').get(pk=sub_id)
-                    if submission.qr_ticket_hash != qr_hash:
-                        context['error'] = 'Verification failed — invalid code.'
-                    else:
-                        context['valid'] = True
-                        context['person_name'] = submission.proxy_name if submission.is_proxy else (
-                            submission.user.first_name or submission.user.username
-                        )
-                        context['event_title'] = submission.event_registration.event_title
-                        context['status_display'] = submission.get_status_display()
-                        context['status_class'] = 'valid' if submission.status == 'approved' else 'pending'
-                except (ValueError, EventSubmission.DoesNotExist):
+                found = checkin.lookup('event', ref_id) if ref_id.isdigit() else None
+                if found is None:
                     context['error'] = 'Ticket not found.'
+                elif not checkin.hash_matches(found[0], qr_hash):
+                    context['error'] = 'Verification failed — invalid code.'
+                else:
+                    entry, info = found
+                    context['valid'] = True
+                    context['person_name'] = entry['name']
+                    context['event_title'] = info.get('event_title', '')
+                    context['status_display'] = dict(EventSubmission.STATUS_CHOICES).get(entry['status'], entry['status'])
+                    context['status_class'] = 'valid' if entry['status'] == 'approved' else 'pending'
 
             elif qr_type == 'youth_dialogue':
-                try:
-                    app = YouthDialogueApplication.objects.get(participant_code=ref_id, qr_hash=qr_hash)
-                    context['person_name'] = f'{app.first_name} {app.last_name}'
+                found = checkin.lookup('youth_dialogue', ref_id)
+                if found is None or not checkin.hash_matches(found[0], qr_hash):
+                    context['error'] = 'Credential not found.'
+                else:
+                    entry = found[0]
+                    context['person_name'] = entry['name']
                     context['programme'] = 'Continental Dialogue'
-                    if app.is_revoked:
+                    if not entry['valid']:
                         context['valid'] = False
                         context['status_display'] = 'Revoked'
                         context['status_class'] = 'revoked'
@@ -8876,8 +8513,6 @@ def verify_qr_web(request):
                         context['valid'] = True
                         context['status_display'] = 'Valid Credential'
                         context['status_class'] = 'valid'
-                except YouthDialogueApplication.DoesNotExist:
-                    context['error'] = 'Credential not found.'
             else:
                 context['error'] = 'Unknown verification type.'
 
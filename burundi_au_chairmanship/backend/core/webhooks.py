@@ -1,6 +1,19 @@
 """
 Webhook dispatch logic for external integrations.
 
+``send_webhook`` no longer POSTs inline: it looks up the subscribed endpoints
+(GIN-indexed ``events`` containment), stores one ``WebhookDelivery`` per
+endpoint and, once the transaction commits, queues the ``deliver_webhooks``
+Celery task for each.  A drain holds a per-endpoint lock, so one slow or dead
+endpoint only ever occupies one worker, and posts the endpoint's due
+deliveries in order over a keep-alive ``requests.Session`` kept per host.
+
+Failed attempts are retried with exponential backoff.  ``failure_count``
+drives a circuit breaker: after ``WEBHOOK_BREAKER_THRESHOLD`` consecutive
+failures the endpoint's queue is held (``circuit_open_until``) and the next
+attempt after the cooldown decides whether it closes again.  The
+``dispatch_webhook_deliveries`` beat task picks up retries that fall due.
+
 Usage:
     from core.webhooks import send_webhook
     send_webhook('user.registered', {'user_id': 123, 'username': 'john'})
@@ -9,17 +22,53 @@ Usage:
 import ipaddress
 import json
 import logging
+import math
 import socket
 import time
+from datetime import timedelta
 from urllib.parse import urlparse
 
 import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.utils import timezone
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'AU-Chairmanship-Webhook/1.0'
+DRAIN_BATCH = 50
+DRAIN_LOCK_TTL = 300  # CELERY_TASK_TIME_LIMIT
+RETRYABLE_STATUS = {408, 425, 429}
+
+# Keep-alive sessions per (scheme, host), reused across tasks in a worker.
+_sessions = {}
+
+
+def _check_host(hostname, port):
+    """Resolve ``hostname`` and reject private/internal addresses."""
+    # Resolve hostname to IP(s) — catches DNS rebinding to private IPs
+    try:
+        addrinfos = socket.getaddrinfo(hostname, port, proto=socket.IPPROTO_TCP)
+    except socket.gaierror:
+        raise ValueError(f'Cannot resolve hostname: {hostname}')
+
+    for family, _, _, _, sockaddr in addrinfos:
+        ip = ipaddress.ip_address(sockaddr[0])
+
+        # Unwrap IPv4-mapped IPv6 (e.g. ::ffff:169.254.169.254)
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+
+        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved:
+            raise ValueError(
+                f'Webhook URL resolves to blocked address {ip} '
+                f'(private/loopback/link-local/reserved)'
+            )
+
 
-def _validate_webhook_url(url):
+def _validate_webhook_url(url, cached=False):
     """Validate that a webhook URL does not target private/internal networks.
 
     Blocks:
@@ -29,6 +78,9 @@ def _validate_webhook_url(url):
     - IPv6 mapped/translated IPv4 addresses wrapping blocked ranges
     - Non-HTTP(S) schemes
 
+    With ``cached`` (deliveries), a host's verdict is reused for
+    WEBHOOK_DNS_TTL seconds; resolution failures are never cached.
+
     Raises ValueError with a descriptive message on failure.
     """
     parsed = urlparse(url)
@@ -40,25 +92,24 @@ def _validate_webhook_url(url):
     if not hostname:
         raise ValueError('URL has no hostname')
 
-    # Resolve hostname to IP(s) — catches DNS rebinding to private IPs
-    try:
-        addrinfos = socket.getaddrinfo(hostname, parsed.port or 443, proto=socket.IPPROTO_TCP)
-    except socket.gaierror:
-        raise ValueError(f'Cannot resolve hostname: {hostname}')
-
-    for family, _, _, _, sockaddr in addrinfos:
-        ip = ipaddress.ip_address(sockaddr[0])
-
-        # Unwrap IPv4-mapped IPv6 (e.g. ::ffff:169.254.169.254)
-        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
-            ip = ip.ipv4_mapped
-
-        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved:
-            raise ValueError(
-                f'Webhook URL resolves to blocked address {ip} '
-                f'(private/loopback/link-local/reserved)'
-            )
+    port = parsed.port or 443
+    if not cached:
+        _check_host(hostname, port)
+        return True
 
+    key = f'webhook-dns:{hostname}:{port}'
+    verdict = cache.get(key)
+    if verdict is None:
+        try:
+            _check_host(hostname, port)
+            verdict = ''
+        except ValueError as e:
+            if str(e).startswith('Cannot resolve'):
+                raise
+            verdict = str(e)
+        cache.set(key, verdict, settings.WEBHOOK_DNS_TTL)
+    if verdict:
+        raise ValueError(verdict)
     return True
 
 
@@ -169,122 +220,270 @@ FORMATTERS = {
 }
 
 
-def send_webhook(event_type, data):
-    """
-    Dispatch webhook to all active endpoints subscribed to the given event_type.
+def _session(url):
+    parsed = urlparse(url)
+    key = (parsed.scheme, parsed.netloc)
+    session = _sessions.get(key)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _sessions[key] = session
+    return session
+
+
+def _headers(webhook):
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': USER_AGENT,
+    }
 
-    Args:
-        event_type: str - e.g. 'user.registered', 'article.published'
-        data: dict - payload data to send
+    # Add secret key header if configured
+    if webhook.secret_key:
+        headers['X-Webhook-Secret'] = webhook.secret_key
 
-    Returns:
-        list of (webhook_id, success, status_code) tuples
+    # Add custom headers
+    if isinstance(webhook.custom_headers, dict):
+        headers.update(webhook.custom_headers)
+    return headers
+
+
+def _post(webhook, payload):
+    """POST ``payload`` to the webhook once.
+
+    Returns ``(success, status_code, response_body, duration_ms, retryable)``.
     """
-    from core.models import Webhook, WebhookLog
+    # SSRF guard: block requests to private/link-local/metadata IPs
+    try:
+        _validate_webhook_url(webhook.url, cached=True)
+    except ValueError as e:
+        logger.warning("Webhook SSRF blocked: %s (%s) — %s", webhook.name, webhook.url, e)
+        return False, None, f'Blocked: {e}', None, str(e).startswith('Cannot resolve')
+
+    timeout = settings.WEBHOOK_TIMEOUT
+    start_time = time.time()
+    try:
+        response = _session(webhook.url).post(
+            webhook.url,
+            json=payload,
+            headers=_headers(webhook),
+            timeout=timeout,
+        )
+    except requests.Timeout:
+        logger.warning("Webhook timeout: %s (%s)", webhook.name, webhook.url)
+        return False, None, f'Request timed out after {timeout} seconds', timeout * 1000, True
+    except requests.ConnectionError as e:
+        logger.warning("Webhook connection error: %s (%s)", webhook.name, webhook.url)
+        return False, None, f'Connection error: {str(e)[:500]}', None, True
+    except Exception as e:
+        logger.error("Webhook error: %s (%s): %s", webhook.name, webhook.url, e)
+        return False, None, f'Unexpected error: {str(e)[:500]}', None, True
+
+    duration_ms = int((time.time() - start_time) * 1000)
+    status_code = response.status_code
+    success = 200 <= status_code < 300
+    retryable = status_code in RETRYABLE_STATUS or status_code >= 500
+    return success, status_code, response.text[:2000], duration_ms, retryable
+
+
+def _backoff(attempts):
+    return min(settings.WEBHOOK_RETRY_BASE * 2 ** (attempts - 1), settings.WEBHOOK_RETRY_MAX)
+
+
+def _record_outcome(webhook, success, now):
+    """Update ``failure_count`` and the circuit breaker after an attempt."""
+    if success:
+        webhook.failure_count = 0
+        webhook.circuit_open_until = None
+    else:
+        webhook.failure_count += 1
+        threshold = settings.WEBHOOK_BREAKER_THRESHOLD
+        if threshold and webhook.failure_count >= threshold:
+            trips = min(webhook.failure_count - threshold, 4)
+            webhook.circuit_open_until = now + timedelta(
+                seconds=settings.WEBHOOK_BREAKER_COOLDOWN * 2 ** trips,
+            )
+    webhook.last_triggered_at = now
+    webhook.save(update_fields=['last_triggered_at', 'failure_count', 'circuit_open_until'])
 
-    results = []
 
-    webhooks = Webhook.objects.filter(is_active=True)
-    matching_webhooks = []
-    for wh in webhooks:
-        if isinstance(wh.events, list) and event_type in wh.events:
-            matching_webhooks.append(wh)
+def _enqueue(webhook_ids):
+    from core.tasks import deliver_webhooks
 
-    for webhook in matching_webhooks:
-        formatter = FORMATTERS.get(webhook.service_type, _format_custom_payload)
-        payload = formatter(event_type, data)
+    def send():
+        for webhook_id in webhook_ids:
+            deliver_webhooks.delay(webhook_id)
 
-        headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': 'AU-Chairmanship-Webhook/1.0',
-        }
+    if webhook_ids:
+        transaction.on_commit(send)
 
-        # Add secret key header if configured
-        if webhook.secret_key:
-            headers['X-Webhook-Secret'] = webhook.secret_key
 
-        # Add custom headers
-        if isinstance(webhook.custom_headers, dict):
-            headers.update(webhook.custom_headers)
+def send_webhook(event_type, data):
+    """
+    Queue the event for every active endpoint subscribed to ``event_type``.
 
-        success = False
-        status_code = None
-        response_body = ''
-        duration_ms = None
+    Delivery happens in Celery after the current transaction commits.
 
-        # SSRF guard: block requests to private/link-local/metadata IPs
-        try:
-            _validate_webhook_url(webhook.url)
-        except ValueError as e:
-            response_body = f'Blocked: {e}'
-            webhook.failure_count += 1
-            logger.warning("Webhook SSRF blocked: %s (%s) — %s", webhook.name, webhook.url, e)
-            webhook.last_triggered_at = timezone.now()
-            webhook.save(update_fields=['last_triggered_at', 'failure_count'])
-            WebhookLog.objects.create(
-                webhook=webhook, event=event_type, payload=payload,
-                response_status=None, response_body=response_body, success=False,
-            )
-            results.append((webhook.id, False, None))
-            continue
+    Args:
+        event_type: str - e.g. 'user.registered', 'article.published'
+        data: dict - payload data to send
 
-        try:
-            start_time = time.time()
-            response = requests.post(
-                webhook.url,
-                json=payload,
-                headers=headers,
-                timeout=5,
-            )
-            duration_ms = int((time.time() - start_time) * 1000)
-            status_code = response.status_code
-            response_body = response.text[:2000]  # Truncate long responses
-            success = 200 <= response.status_code < 300
-
-            if success:
-                webhook.failure_count = 0
-            else:
-                webhook.failure_count += 1
-
-        except requests.Timeout:
-            duration_ms = 5000
-            response_body = 'Request timed out after 5 seconds'
-            webhook.failure_count += 1
-            logger.warning(f"Webhook timeout: {webhook.name} ({webhook.url})")
-
-        except requests.ConnectionError as e:
-            response_body = f'Connection error: {str(e)[:500]}'
-            webhook.failure_count += 1
-            logger.warning(f"Webhook connection error: {webhook.name} ({webhook.url})")
-
-        except Exception as e:
-            response_body = f'Unexpected error: {str(e)[:500]}'
-            webhook.failure_count += 1
-            logger.error(f"Webhook error: {webhook.name} ({webhook.url}): {e}")
-
-        # Update webhook metadata
-        webhook.last_triggered_at = timezone.now()
-        webhook.save(update_fields=['last_triggered_at', 'failure_count'])
-
-        # Create log entry
-        WebhookLog.objects.create(
+    Returns:
+        list of queued WebhookDelivery instances
+    """
+    from core.models import Webhook, WebhookDelivery
+
+    now = timezone.now()
+    webhooks = Webhook.objects.filter(is_active=True)
+    if connection.features.supports_json_field_contains:
+        webhooks = webhooks.filter(events__contains=[event_type])
+    else:
+        webhooks = [wh for wh in webhooks if isinstance(wh.events, list) and event_type in wh.events]
+    deliveries = []
+    for webhook in webhooks:
+        formatter = FORMATTERS.get(webhook.service_type, _format_custom_payload)
+        held_until = webhook.circuit_open_until
+        deliveries.append(WebhookDelivery(
             webhook=webhook,
             event=event_type,
-            payload=payload,
-            response_status=status_code,
-            response_body=response_body,
-            success=success,
-            duration_ms=duration_ms,
-        )
+            payload=formatter(event_type, data),
+            next_attempt_at=held_until if held_until and held_until > now else now,
+        ))
+    WebhookDelivery.objects.bulk_create(deliveries)
+    _enqueue([d.webhook_id for d in deliveries if d.next_attempt_at <= now])
+    return deliveries
+
+
+def _attempt(webhook, delivery):
+    from core.models import WebhookDelivery, WebhookLog
+
+    delivery.attempts += 1
+    success, status_code, response_body, duration_ms, retryable = _post(webhook, delivery.payload)
+    now = timezone.now()
+    WebhookLog.objects.create(
+        webhook=webhook,
+        delivery=delivery,
+        event=delivery.event,
+        payload=delivery.payload,
+        response_status=status_code,
+        response_body=response_body,
+        success=success,
+        duration_ms=duration_ms,
+    )
+    _record_outcome(webhook, success, now)
+
+    if success:
+        delivery.status = WebhookDelivery.STATUS_DELIVERED
+        delivery.delivered_at = now
+        delivery.last_error = ''
+    else:
+        delivery.last_error = response_body[:1000]
+        if retryable and delivery.attempts < settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.next_attempt_at = max(
+                now + timedelta(seconds=_backoff(delivery.attempts)),
+                webhook.circuit_open_until or now,
+            )
+        else:
+            delivery.status = WebhookDelivery.STATUS_FAILED
+    delivery.save(update_fields=['attempts', 'status', 'next_attempt_at', 'last_error', 'delivered_at'])
+    return success
 
-        results.append((webhook.id, success, status_code))
 
-    return results
+def drain(webhook_id):
+    """Attempt one endpoint's due deliveries, oldest first.
+
+    Runs in the Celery worker; returns the number of attempts made.
+    """
+    from core.models import Webhook, WebhookDelivery
+
+    lock = f'webhook-drain:{webhook_id}'
+    if not cache.add(lock, 1, DRAIN_LOCK_TTL):
+        return 0  # another worker is draining this endpoint
+    try:
+        webhook = Webhook.objects.filter(pk=webhook_id).first()
+        if webhook is None:
+            return 0
+        pending = webhook.deliveries.filter(status=WebhookDelivery.STATUS_PENDING)
+        if not webhook.is_active:
+            pending.update(status=WebhookDelivery.STATUS_FAILED, last_error='Webhook disabled')
+            return 0
+        now = timezone.now()
+        if webhook.circuit_open_until and webhook.circuit_open_until > now:
+            return 0
+
+        due = list(pending.filter(next_attempt_at__lte=now).order_by('next_attempt_at', 'pk')[:DRAIN_BATCH])
+        attempts = 0
+        for delivery in due:
+            attempts += 1
+            if not _attempt(webhook, delivery) and webhook.circuit_open_until:
+                # Breaker tripped: hold the rest of the queue until the cooldown.
+                pending.filter(next_attempt_at__lt=webhook.circuit_open_until).update(
+                    next_attempt_at=webhook.circuit_open_until,
+                )
+                return attempts
+    finally:
+        cache.delete(lock)
+
+    if len(due) == DRAIN_BATCH:
+        _enqueue([webhook_id])
+    return attempts
+
+
+def dispatch_due():
+    """Queue a drain for each endpoint with due deliveries. Returns the endpoint count."""
+    from core.models import WebhookDelivery
+
+    now = timezone.now()
+    webhook_ids = list(
+        WebhookDelivery.objects
+        .filter(status=WebhookDelivery.STATUS_PENDING, next_attempt_at__lte=now)
+        .exclude(webhook__circuit_open_until__gt=now)
+        .order_by().values_list('webhook_id', flat=True).distinct()
+    )
+    _enqueue(webhook_ids)
+    return len(webhook_ids)
+
+
+def purge_deliveries():
+    """Delete delivered/failed deliveries older than WEBHOOK_DELIVERY_RETENTION_DAYS."""
+    from core.models import WebhookDelivery
+
+    cutoff = timezone.now() - timedelta(days=settings.WEBHOOK_DELIVERY_RETENTION_DAYS)
+    deleted, _ = (
+        WebhookDelivery.objects
+        .exclude(status=WebhookDelivery.STATUS_PENDING)
+        .filter(created_at__lt=cutoff)
+        .delete()
+    )
+    return deleted
+
+
+def delivery_stats(webhook, hours=24):
+    """Queue depth and delivery latency (queued → delivered) for the logs page."""
+    from core.models import WebhookDelivery
+
+    deliveries = webhook.deliveries.all()
+    latencies = sorted(
+        (delivered - created).total_seconds()
+        for created, delivered in deliveries.filter(
+            status=WebhookDelivery.STATUS_DELIVERED,
+            delivered_at__gte=timezone.now() - timedelta(hours=hours),
+        ).values_list('created_at', 'delivered_at')
+    )
+    return {
+        'queue_depth': deliveries.filter(status=WebhookDelivery.STATUS_PENDING).count(),
+        'delivered_count': len(latencies),
+        'latency_avg': sum(latencies) / len(latencies) if latencies else None,
+        'latency_p95': latencies[math.ceil(len(latencies) * 0.95) - 1] if latencies else None,
+        'circuit_open': bool(webhook.circuit_open_until and webhook.circuit_open_until > timezone.now()),
+    }
 
 
 def send_test_webhook(webhook):
     """
-    Send a test payload to a specific webhook.
+    Send a test payload to a specific webhook, synchronously and bypassing
+    the delivery queue and circuit breaker.
 
     Args:
         webhook: Webhook model instance
@@ -302,72 +501,25 @@ def send_test_webhook(webhook):
     }
     payload = formatter('test.ping', test_data)
 
-    headers = {
-        'Content-Type': 'application/json',
-        'User-Agent': 'AU-Chairmanship-Webhook/1.0',
-    }
-
-    if webhook.secret_key:
-        headers['X-Webhook-Secret'] = webhook.secret_key
-
-    if isinstance(webhook.custom_headers, dict):
-        headers.update(webhook.custom_headers)
-
     # SSRF guard: block requests to private/link-local/metadata IPs
     try:
         _validate_webhook_url(webhook.url)
     except ValueError as e:
         return False, None, f'Blocked: {e}'
 
-    try:
-        start_time = time.time()
-        response = requests.post(
-            webhook.url,
-            json=payload,
-            headers=headers,
-            timeout=5,
-        )
-        duration_ms = int((time.time() - start_time) * 1000)
-
-        success = 200 <= response.status_code < 300
-
-        WebhookLog.objects.create(
-            webhook=webhook,
-            event='test.ping',
-            payload=payload,
-            response_status=response.status_code,
-            response_body=response.text[:2000],
-            success=success,
-            duration_ms=duration_ms,
-        )
-
-        if success:
-            return True, response.status_code, None
-        else:
-            return False, response.status_code, f'HTTP {response.status_code}: {response.text[:200]}'
-
-    except requests.Timeout:
-        WebhookLog.objects.create(
-            webhook=webhook,
-            event='test.ping',
-            payload=payload,
-            response_status=None,
-            response_body='Request timed out',
-            success=False,
-            duration_ms=5000,
-        )
-        return False, None, 'Request timed out after 5 seconds'
-
-    except requests.ConnectionError as e:
-        WebhookLog.objects.create(
-            webhook=webhook,
-            event='test.ping',
-            payload=payload,
-            response_status=None,
-            response_body=str(e)[:500],
-            success=False,
-        )
-        return False, None, f'Connection error: {str(e)[:200]}'
-
-    except Exception as e:
-        return False, None, f'Error: {str(e)[:200]}'
+    success, status_code, response_body, duration_ms, _retryable = _post(webhook, payload)
+    WebhookLog.objects.create(
+        webhook=webhook,
+        event='test.ping',
+        payload=payload,
+        response_status=status_code,
+        response_body=response_body,
+        success=success,
+        duration_ms=duration_ms,
+    )
+
+    if success:
+        return True, status_code, None
+    if status_code is not None:
+        return False, status_code, f'HTTP {status_code}: {response_body[:200]}'
+    return False, None, response_body[:200]
@@ -9,3 +9,20 @@ imports between sibling modules.
 def is_staff(user):
     """Auth gate used by every custom_admin view."""
     return user.is_staff or user.is_superuser
+
+
+def _sanitize_csv_value(value):
+    """Neutralize CSV formula injection.
+
+    Any cell whose string representation starts with a formula-trigger
+    character (= + - @ TAB CR LF) is prefixed with an apostrophe so
+    spreadsheet applications treat it as a literal text value.
+    """
+    if isinstance(value, str) and value and value[0] in ('=', '+', '-', '@', '\t', '\r', '\n'):
+        return "'" + value
+    return value
+
+
+def _sanitize_csv_row(row):
+    """Apply formula-injection sanitization to every cell in a CSV row."""
+    return [_sanitize_csv_value(v) for v in row]
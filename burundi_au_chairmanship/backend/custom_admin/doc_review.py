@@ -0,0 +1,338 @@
+"""
+Background auto-approval of Continental Dialogue documents.
+
+"Auto-approve" used to validate every pending document of an event inside
+the admin request — a full private-storage download, PIL ``verify()``, a
+float64 variance and full-resolution HOG face detection per file, one
+``save()`` per document — and timed out with a few hundred applicants.
+
+It is now a ``DocumentReviewJob``:
+
+  * ``start_job`` lists the pending documents and queues them in chunks of
+    ``DOC_REVIEW_CHUNK`` as ``review_document_chunk`` Celery tasks (on
+    ``DOC_REVIEW_QUEUE`` when set), so the CPU work is spread over the
+    worker's process pool;
+  * a chunk downloads its files on a few threads, reuses memoised verdicts
+    (``DocumentVerdict``, by storage name and then by content hash, for the
+    current ``AUTO_APPROVE_SPEC``), validates the rest with
+    ``validate_document_bytes`` (checks run on a downscaled copy) and writes
+    the statuses with one ``bulk_update``;
+  * the chunk that completes the job finalises every affected application
+    (credential / rejection notice) exactly once.
+
+The admin UI polls ``progress`` for the job's counters.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+READ_THREADS = 4
+ACTIVE_STATUSES = ('pending', 'running', 'finalizing')
+STALE_AFTER = timedelta(hours=1)
+
+
+def active_job(event):
+    """The event's unfinished auto-approve job, if one started recently."""
+    from core.models import DocumentReviewJob
+    return DocumentReviewJob.objects.filter(
+        event=event, status__in=ACTIVE_STATUSES,
+        created_at__gte=timezone.now() - STALE_AFTER,
+    ).first()
+
+
+def start_job(job):
+    """Queue the event's pending documents for review, in chunks."""
+    from core.models import DocumentReviewJob, YouthDialogueDocument
+    from core.tasks import review_document_chunk
+
+    doc_ids = list(
+        YouthDialogueDocument.objects
+        .filter(application__event_id=job.event_id, status='pending')
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    job.total = len(doc_ids)
+    job.status = 'running'
+    job.save(update_fields=['total', 'status'])
+    if not doc_ids:
+        finish_job(job)
+        return job
+
+    size = max(1, settings.DOC_REVIEW_CHUNK)
+    for i in range(0, len(doc_ids), size):
+        args = [job.pk, doc_ids[i:i + size]]
+        if settings.DOC_REVIEW_QUEUE:
+            review_document_chunk.apply_async(args=args, queue=settings.DOC_REVIEW_QUEUE)
+        else:
+            review_document_chunk.delay(*args)
+    return DocumentReviewJob.objects.get(pk=job.pk)
+
+
+def _read(doc):
+    try:
+        with doc.file.open('rb') as f:
+            return f.read(), ''
+    except Exception as e:
+        return None, str(e)
+
+
+def _ext(doc):
+    filename = doc.original_filename or doc.file.name or ''
+    return os.path.splitext(filename)[1][1:].lower()
+
+
+def _verdicts(docs):
+    """``({doc_pk: (is_valid, reason)}, memo_hits)`` for a chunk of documents."""
+    from core.models import DocumentVerdict
+    from core.validators import AUTO_APPROVE_SPEC, validate_document_bytes
+
+    verdicts = {}
+    memoised = DocumentVerdict.objects.filter(spec=AUTO_APPROVE_SPEC)
+    by_name = {
+        (v.file_name, v.document_type): v
+        for v in memoised.filter(file_name__in={d.file.name for d in docs})
+    }
+    todo = []
+    for doc in docs:
+        hit = by_name.get((doc.file.name, doc.document_type))
+        if hit:
+            verdicts[doc.pk] = (hit.is_valid, hit.reason)
+        else:
+            todo.append(doc)
+    hits = len(verdicts)
+    if not todo:
+        return verdicts, hits
+
+    with ThreadPoolExecutor(max_workers=READ_THREADS) as pool:
+        contents = list(pool.map(_read, todo))
+    hashes = {doc.pk: hashlib.sha256(data).hexdigest() for doc, (data, _) in zip(todo, contents) if data is not None}
+    by_hash = {
+        (v.content_hash, v.document_type): v
+        for v in memoised.filter(content_hash__in=set(hashes.values()))
+    }
+
+    new = []
+    for doc, (data, error) in zip(todo, contents):
+        if data is None:
+            # Not memoised: the storage may be back on the next run.
+            verdicts[doc.pk] = (False, f'Cannot read file: {error}')
+            continue
+        key = (hashes[doc.pk], doc.document_type)
+        hit = by_hash.get(key)
+        if hit:
+            hits += 1
+        else:
+            is_valid, reason = validate_document_bytes(data, _ext(doc), doc.document_type, doc.pk)
+            hit = by_hash[key] = DocumentVerdict(
+                content_hash=key[0], document_type=doc.document_type, spec=AUTO_APPROVE_SPEC,
+                file_name=doc.file.name[:500], is_valid=is_valid, reason=reason,
+            )
+            new.append(hit)
+        verdicts[doc.pk] = (hit.is_valid, hit.reason)
+    DocumentVerdict.objects.bulk_create(new, ignore_conflicts=True)
+    return verdicts, hits
+
+
+def review_chunk(job_id, doc_ids):
+    """Validate one chunk of documents and record the verdicts in bulk."""
+    from core.models import DocumentReviewJob, YouthDialogueDocument
+
+    job = DocumentReviewJob.objects.filter(pk=job_id, status='running').first()
+    if job is None:
+        return 0
+    # Documents reviewed by hand since the job started are skipped.
+    docs = list(YouthDialogueDocument.objects.filter(pk__in=doc_ids, status='pending'))
+    verdicts, hits = _verdicts(docs)
+
+    now = timezone.now()
+    approved = 0
+    for doc in docs:
+        is_valid, reason = verdicts[doc.pk]
+        doc.status = 'approved' if is_valid else 'rejected'
+        if not is_valid:
+            doc.rejection_reason = reason
+        doc.reviewed_by_id = job.requested_by_id
+        doc.reviewed_at = now
+        approved += is_valid
+
+    with transaction.atomic():
+        YouthDialogueDocument.objects.bulk_update(
+            docs, ['status', 'rejection_reason', 'reviewed_by', 'reviewed_at'],
+        )
+        DocumentReviewJob.objects.filter(pk=job_id).update(
+            processed=F('processed') + len(doc_ids),
+            approved=F('approved') + approved,
+            rejected=F('rejected') + len(docs) - approved,
+            memoised=F('memoised') + hits,
+        )
+    job.refresh_from_db()
+    if job.processed >= job.total:
+        finish_job(job)
+    return len(docs)
+
+
+def _audit(job, action_type, model_name, object_id=None, object_repr='', changes=None):
+    """AdminActivityLog entry on behalf of the admin who started the job."""
+    from core.models import AdminActivityLog
+    try:
+        AdminActivityLog.objects.create(
+            user=job.requested_by, action_type=action_type, model_name=model_name,
+            object_id=object_id, object_repr=str(object_repr)[:255], changes=changes or {},
+        )
+    except Exception:
+        logger.exception('Failed to log document review action: %s %s', action_type, model_name)
+
+
+def finish_job(job):
+    """Finalise every application touched by the job; runs once per job."""
+    from core.models import DocumentReviewJob, YouthDialogueApplication
+
+    if not DocumentReviewJob.objects.filter(pk=job.pk, status='running').update(status='finalizing'):
+        return  # another chunk got here first
+    app_ids = (
+        YouthDialogueApplication.objects
+        .filter(event_id=job.event_id, documents__reviewed_at__gte=job.created_at)
+        .values_list('pk', flat=True).distinct()
+    )
+    credentials = 0
+    for app in YouthDialogueApplication.objects.filter(pk__in=list(app_ids)).select_related('event'):
+        old_status = app.status
+        outcome, _detail = finalize_documents(app, job.requested_by)
+        name = f'{app.first_name} {app.last_name}'
+        if outcome == 'documents_rejected':
+            _audit(job, 'reject', 'YouthDialogueApplication', app.pk, name,
+                   {'status': {'old': old_status, 'new': 'documents_rejected'}})
+        elif outcome == 'credential_issued':
+            credentials += 1
+            _audit(job, 'issue_credential', 'YouthDialogueApplication', app.pk, name,
+                   {'status': {'old': old_status, 'new': 'credential_issued'}})
+
+    job.refresh_from_db()
+    job.credentials = credentials
+    job.status = 'completed'
+    job.completed_at = timezone.now()
+    job.save(update_fields=['credentials', 'status', 'completed_at'])
+    _audit(
+        job, 'bulk_action', 'YouthDialogueDocument',
+        object_repr=f'Bulk auto-approve docs for {job.event.programme_title}',
+        changes={
+            'approved': str(job.approved),
+            'rejected': str(job.rejected),
+            'credentials': str(credentials),
+        },
+    )
+
+
+def progress(job):
+    """JSON-ready progress for the admin UI."""
+    done = job.status == 'completed'
+    payload = {
+        'job_id': job.pk,
+        'state': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'approved_count': job.approved,
+        'rejected_count': job.rejected,
+        'memoised_count': job.memoised,
+        'credential_count': job.credentials,
+        'percent': round(100 * job.processed / job.total) if job.total else (100 if done else 0),
+    }
+    if done:
+        payload['message'] = (
+            f'{job.approved} document(s) approved, {job.rejected} rejected. '
+            f'{job.credentials} credential(s) issued.'
+        )
+    elif job.status == 'failed':
+        payload['message'] = job.error_message or 'Auto-approve failed.'
+    return payload
+
+
+def finalize_documents(application, reviewer):
+    """After documents are reviewed, check if all are done and update the application.
+
+    Only considers the LATEST document per type (highest id = most recent submission).
+    Old rejected docs are ignored if a newer version has been submitted.
+
+    - All approved, none pending → issue credential
+    - Has rejected, none pending → set documents_rejected + notify
+    - Still has pending → do nothing (wait for more reviews)
+
+    Returns ``(outcome, detail)``: outcome is None (still pending),
+    'documents_rejected' or 'credential_issued' (detail = notification
+    results) or 'missing_types' (detail = labels of the missing types).
+    """
+    from core.models import YouthDialogueDocument
+
+    # A document type is satisfied if ANY doc of that type is approved.
+    # Rejected duplicates of an already-approved type are ignored.
+    approved_types = set(
+        application.documents.filter(status='approved')
+        .values_list('document_type', flat=True)
+    )
+
+    # Still have pending docs for types that aren't already approved? Wait.
+    pending_count = (
+        application.documents
+        .filter(status='pending')
+        .exclude(document_type__in=approved_types)
+        .count()
+    )
+    if pending_count > 0:
+        return None, None  # Still have docs to review
+
+    # Only flag rejected for types with NO approved version
+    rejected_docs = (
+        application.documents
+        .filter(status='rejected')
+        .exclude(document_type__in=approved_types)
+    )
+
+    if rejected_docs.exists():
+        # Build rejection notes from rejected docs (only unresolved types)
+        rejection_details = []
+        for doc in rejected_docs:
+            reason = doc.rejection_reason or 'No reason specified'
+            rejection_details.append(f'• {doc.get_document_type_display()}: {reason}')
+
+        application.status = 'documents_rejected'
+        application.documents_rejection_notes = '\n'.join(rejection_details)
+        application.documents_reviewed_by = reviewer
+        application.documents_reviewed_at = timezone.now()
+        application.save()
+        from core.views import _notify_yd
+        return 'documents_rejected', _notify_yd(application, 'documents_rejected')
+
+    # All docs approved — auto-issue credential if all required types present
+    event = application.event
+    if event and event.required_documents:
+        required_types = {d.get('key', '') for d in event.required_documents if d.get('key')}
+    else:
+        required_types = {'passport', 'national_id', 'photo', 'cv'}
+    missing_types = required_types - approved_types
+
+    if not missing_types:
+        application.generate_participant_code()
+        application.generate_qr_hash()
+        application.status = 'credential_issued'
+        application.credential_issued_at = timezone.now()
+        application.documents_reviewed_by = reviewer
+        application.documents_reviewed_at = timezone.now()
+        application.save()
+        from core.views import _notify_yd
+        return 'credential_issued', _notify_yd(application, 'credential_issued')
+
+    # All reviewed docs approved but some required types missing
+    application.status = 'documents_under_review'
+    application.documents_reviewed_by = reviewer
+    application.documents_reviewed_at = timezone.now()
+    application.save()
+    labels = dict(YouthDialogueDocument.DOCUMENT_TYPE_CHOICES)
+    return 'missing_types', [labels.get(m, m) for m in missing_types]
@@ -33,12 +33,13 @@ logger = logging.getLogger(__name__)
 #  CAMPAIGN SMTP CONNECTION (newsletter@burundichairship.africa)
 # ═══════════════════════════════════════════════════════════════
 
-def _get_campaign_smtp_connection():
+def _get_campaign_smtp_connection(**options):
     """Return a dedicated SMTP connection for campaign emails.
 
     Uses CAMPAIGN_EMAIL_* settings so campaigns go through
     newsletter@burundichairship.africa while OTP / system emails
     continue using the default info@burundi4africa.com account.
+    Extra ``options`` are passed to the backend (see LoggingEmailBackend).
     """
     from django.core.mail import get_connection
     return get_connection(
@@ -48,6 +49,7 @@ def _get_campaign_smtp_connection():
         password=settings.CAMPAIGN_EMAIL_HOST_PASSWORD,
         use_tls=settings.CAMPAIGN_EMAIL_USE_TLS,
         use_ssl=settings.CAMPAIGN_EMAIL_USE_SSL,
+        **options,
     )
 
 
@@ -320,6 +322,14 @@ def _campaign_audience_queryset(campaign):
         emails = [e.strip() for e in raw.split('\n') if e.strip() and '@' in e]
         return [(e, '') for e in emails]
 
+    return [
+        (u.email, u.get_full_name() or u.email.split('@')[0])
+        for u in _campaign_users(campaign).only('email', 'first_name', 'last_name')
+    ]
+
+
+def _campaign_users(campaign):
+    """Active users in a non-custom campaign audience."""
     qs = User.objects.filter(is_active=True).exclude(email='')
 
     if campaign.audience_type == 'language':
@@ -333,11 +343,84 @@ def _campaign_audience_queryset(campaign):
     elif campaign.audience_type == 'staff':
         qs = qs.filter(is_staff=True)
     # 'all' → no further filter
+    return qs
 
-    return [
-        (u.email, u.get_full_name() or u.email.split('@')[0])
-        for u in qs.select_related('profile').only('email', 'first_name', 'last_name')
-    ]
+
+def _campaign_recipient_pages(campaign):
+    """``fetch_page(after, limit)`` for the bulk mail engine: keyset pages of
+    ``(cursor, email, name)``; the cursor is the user pk, or the position in
+    a custom list."""
+    if campaign.audience_type == 'custom':
+        emails = [email for email, _ in _campaign_audience_queryset(campaign)]
+
+        def fetch_page(after, limit):
+            return [(i, email, '') for i, email in enumerate(emails[after:after + limit], start=after + 1)]
+        return fetch_page
+
+    users = _campaign_users(campaign).order_by('pk')
+
+    def fetch_page(after, limit):
+        rows = users.filter(pk__gt=after).values_list('pk', 'email', 'first_name', 'last_name')[:limit]
+        return [(pk, email, f'{first} {last}'.strip()) for pk, email, first, last in rows]
+    return fetch_page
+
+
+def _render_placeholders(tpl, ctx):
+    import re as _re
+    out = tpl
+    for k, v in ctx.items():
+        out = _re.sub(r'\{\{\s*' + k + r'\s*\}\}', str(v), out)
+    return out
+
+
+def send_campaign(campaign):
+    """Send ``campaign`` to its audience through the bulk mail engine.
+
+    Runs in the ``send_email_campaign`` Celery task; a retried task resumes
+    from the campaign's checkpoint. Returns the number of messages sent.
+    """
+    from functools import partial
+
+    from django.core.mail import EmailMultiAlternatives
+
+    from core.bulk_mail import send_bulk
+
+    campaign_from = settings.CAMPAIGN_FROM_EMAIL
+
+    def build_message(email, name):
+        user_name = name or email.split('@')[0]
+        ctx = {
+            'user_name': user_name,
+            'user_email': email,
+            'app_name': 'Be 4 Africa',
+        }
+        raw_body = _render_placeholders(campaign.body_html, ctx)
+        msg = EmailMultiAlternatives(
+            subject=_render_placeholders(campaign.subject, ctx),
+            body=f'Hello {user_name},\n\n'
+                 f'{raw_body[:500]}\n\n'
+                 f'-- Be 4 Africa | Burundi AU Chairmanship',
+            from_email=campaign_from,
+            to=[email],
+        )
+        # Wrap in branded template with personalised greeting
+        msg.attach_alternative(_wrap_campaign_html(raw_body, user_name=user_name), 'text/html')
+        return msg
+
+    # Use dedicated newsletter SMTP connections, tagging the EmailLog rows.
+    connection_factory = partial(
+        _get_campaign_smtp_connection, log_category='campaign', log_campaign=campaign,
+    )
+    result = send_bulk(campaign, _campaign_recipient_pages(campaign), build_message, connection_factory)
+
+    sent_ok, sent_fail = result['sent'], result['failed']
+    campaign.status = 'failed' if sent_ok == 0 and sent_fail else 'sent'
+    campaign.sent_count = sent_ok
+    campaign.failed_count = sent_fail
+    campaign.last_error = result['last_error']
+    campaign.sent_at = timezone.now()
+    campaign.save(update_fields=['status', 'sent_count', 'failed_count', 'last_error', 'sent_at'])
+    return sent_ok
 
 
 @login_required(login_url='custom_admin:login')
@@ -414,7 +497,6 @@ def email_campaign_edit(request, pk):
 @user_passes_test(is_staff, login_url='custom_admin:login')
 def email_campaign_send_confirm(request, pk):
     """Show a confirmation page with preview before sending."""
-    import re as _re
     campaign = get_object_or_404(EmailCampaign, pk=pk)
     recipients = _campaign_audience_queryset(campaign)
 
@@ -430,9 +512,7 @@ def email_campaign_send_confirm(request, pk):
         'user_email': sample_email,
         'app_name': 'Be 4 Africa',
     }
-    preview_body = campaign.body_html
-    for k, v in ctx.items():
-        preview_body = _re.sub(r'\{\{\s*' + k + r'\s*\}\}', str(v), preview_body)
+    preview_body = _render_placeholders(campaign.body_html, ctx)
     preview_html = _wrap_campaign_html(preview_body, user_name=sample_name)
 
     return render(request, 'custom_admin/email_campaigns/send_confirm.html', {
@@ -446,9 +526,13 @@ def email_campaign_send_confirm(request, pk):
 @user_passes_test(is_staff, login_url='custom_admin:login')
 @require_POST
 def email_campaign_send(request, pk):
-    """Send the campaign to its resolved audience. Inline / synchronous —
-    fine for audiences up to a few thousand. Each message is logged via
-    LoggingEmailBackend (EmailLog rows). Wraps body in branded template."""
+    """Queue the campaign for its resolved audience. The ``send_email_campaign``
+    Celery task sends it through the bulk mail engine (batched SMTP sessions,
+    throttled, checkpointed); EmailLog rows are tagged with the campaign."""
+    from django.db import transaction
+
+    from core.tasks import send_email_campaign
+
     campaign = get_object_or_404(EmailCampaign, pk=pk)
 
     if campaign.status == 'sending':
@@ -465,83 +549,20 @@ def email_campaign_send(request, pk):
     campaign.sent_count = 0
     campaign.failed_count = 0
     campaign.last_error = ''
-    campaign.save(update_fields=['status', 'recipient_count', 'sent_count', 'failed_count', 'last_error'])
-
-    from django.core.mail import EmailMultiAlternatives
-    import re as _re
-
-    def _render(tpl, ctx):
-        out = tpl
-        for k, v in ctx.items():
-            out = _re.sub(r'\{\{\s*' + k + r'\s*\}\}', str(v), out)
-        return out
-
-    # Use dedicated newsletter SMTP connection
-    campaign_from = settings.CAMPAIGN_FROM_EMAIL
-    connection = _get_campaign_smtp_connection()
-
-    sent_ok = 0
-    sent_fail = 0
-    last_error = ''
-
-    try:
-        connection.open()
-        for email, name in recipients:
-            user_name = name or email.split('@')[0]
-            ctx = {
-                'user_name': user_name,
-                'user_email': email,
-                'app_name': 'Be 4 Africa',
-            }
-            subject = _render(campaign.subject, ctx)
-            raw_body = _render(campaign.body_html, ctx)
-            # Wrap in branded template with personalised greeting
-            full_html = _wrap_campaign_html(raw_body, user_name=user_name)
-            try:
-                msg = EmailMultiAlternatives(
-                    subject=subject,
-                    body=f'Hello {user_name},\n\n'
-                         f'{raw_body[:500]}\n\n'
-                         f'-- Be 4 Africa | Burundi AU Chairmanship',
-                    from_email=campaign_from,
-                    to=[email],
-                    connection=connection,
-                )
-                msg.attach_alternative(full_html, 'text/html')
-                msg.send(fail_silently=False)
-                sent_ok += 1
-                # Tag the most-recent EmailLog row with this campaign.
-                try:
-                    latest = EmailLog.objects.filter(
-                        recipients=email
-                    ).order_by('-created_at').first()
-                    if latest and latest.campaign_id is None:
-                        latest.campaign = campaign
-                        latest.category = 'campaign'
-                        latest.save(update_fields=['campaign', 'category'])
-                except Exception:
-                    logger.warning('Failed to tag EmailLog for %s', email, exc_info=True)
-            except Exception as e:
-                sent_fail += 1
-                last_error = str(e)[:2000]
-    finally:
-        try:
-            connection.close()
-        except Exception:
-            pass
-
-    campaign.status = 'sent' if sent_fail == 0 else ('failed' if sent_ok == 0 else 'sent')
-    campaign.sent_count = sent_ok
-    campaign.failed_count = sent_fail
-    campaign.last_error = last_error
-    campaign.sent_at = timezone.now()
-    campaign.save(update_fields=['status', 'sent_count', 'failed_count', 'last_error', 'sent_at'])
+    campaign.send_checkpoint = {}
+    campaign.send_stats = {}
+    campaign.save(update_fields=[
+        'status', 'recipient_count', 'sent_count', 'failed_count', 'last_error',
+        'send_checkpoint', 'send_stats',
+    ])
+    transaction.on_commit(lambda: send_email_campaign.delay(campaign.pk))
 
     log_admin_action(request, 'send', 'EmailCampaign', object_id=campaign.pk, object_repr=campaign.name)
-    if sent_fail == 0:
-        messages.success(request, f'Campaign "{campaign.name}" sent to {sent_ok} recipient(s).')
-    else:
-        messages.warning(request, f'Campaign "{campaign.name}" sent to {sent_ok}, failed {sent_fail}. Last error: {last_error[:200]}')
+    messages.success(
+        request,
+        f'Campaign "{campaign.name}" is sending to {campaign.recipient_count} recipient(s). '
+        'Progress is shown in the campaign list.',
+    )
     return redirect('custom_admin:email_campaigns_list')
 
 
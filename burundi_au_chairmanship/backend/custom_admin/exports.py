@@ -0,0 +1,567 @@
+"""
+Streaming admin exports (CSV / XLSX).
+
+Exports used to build the whole CSV in an ``HttpResponse`` or the whole
+workbook in memory, styling every cell individually, and several issued a
+few queries per exported row.  Each export is now an ``Export``: a header
+plus a lazy row generator over ``.iterator()`` querysets, with per-row counts
+annotated and relations prefetched per chunk, so memory stays flat however
+many rows there are.
+
+  * CSV is streamed line by line through ``StreamingHttpResponse``;
+  * XLSX is written with an openpyxl write-only workbook (rows are flushed
+    to disk as they are appended, styles are shared named styles) into a
+    temporary file that is then streamed back;
+  * under ASGI both are handed to the server as async iterators (see
+    ``stream``) — Django would otherwise drain a sync iterator into a list
+    before sending the first byte;
+  * exports with more than ``EXPORT_ASYNC_THRESHOLD`` rows run as an
+    ``ExportJob`` in Celery instead: the file is saved to private storage
+    and an ``export_ready`` AdminNotification links to the download.
+
+New exports register a builder in ``EXPORTS``; builders take the JSON
+``params`` stored on the job and return a list of sheets (CSV uses the first).
+"""
+import csv
+import itertools
+import logging
+import tempfile
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from ._helpers import _sanitize_csv_row
+
+logger = logging.getLogger(__name__)
+
+ITER_CHUNK = 2000
+STREAM_BATCH = 128  # parts pulled per thread hop when streaming over ASGI
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+SLATE = '1E293B'
+MAROON = '5B1A2A'
+
+
+class SummaryRow(list):
+    """A row rendered bold on a shaded background (totals at the bottom of a sheet)."""
+
+
+class Export:
+    """One sheet of an export: column headers and a lazy row source.
+
+    ``total`` is the number of data rows (used to pick job mode) and
+    ``highlight`` optionally maps ``(column_index, {value: fill_hex})``.
+    """
+
+    def __init__(self, filename, columns, rows, total=0, title=None, widths=None,
+                 header_color=SLATE, highlight=None, wrap=False, sanitize=True):
+        self.filename = filename
+        self.columns = columns
+        self.rows = rows
+        self.total = total
+        self.title = title or filename[:31]
+        self.widths = widths
+        self.header_color = header_color
+        self.highlight = highlight
+        self.wrap = wrap
+        self.sanitize = sanitize
+
+
+# ── Writers ─────────────────────────────────────────────────────
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(export):
+    writer = csv.writer(_Echo())
+    if export.columns:
+        yield writer.writerow(export.columns)
+    for row in export.rows:
+        yield writer.writerow(_sanitize_csv_row(row) if export.sanitize else row)
+
+
+async def _aiter_sync(iterator):
+    """Drive a blocking iterator from the event loop, ``STREAM_BATCH`` parts
+    per hop onto the request's sync thread (which owns its DB cursor)."""
+    from asgiref.sync import sync_to_async
+
+    iterator = iter(iterator)
+    pull = sync_to_async(lambda: list(itertools.islice(iterator, STREAM_BATCH)))
+    while True:
+        parts = await pull()
+        if not parts:
+            return
+        for part in parts:
+            yield part
+
+
+def stream(request, response):
+    """Give a streaming ``response`` an async iterator when served over ASGI.
+
+    ``StreamingHttpResponse.__aiter__`` consumes a sync iterator with
+    ``sync_to_async(list)``, i.e. the whole export or file in memory.
+    Headers (and FileResponse's file closer) are already set and are kept.
+    """
+    from django.core.handlers.asgi import ASGIRequest
+
+    if isinstance(request, ASGIRequest):
+        response.streaming_content = _aiter_sync(response.streaming_content)
+    return response
+
+
+def streaming_csv_response(export, request=None):
+    response = StreamingHttpResponse(csv_lines(export), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{export.filename}.csv"'
+    return stream(request, response)
+
+
+class _Styles:
+    """Named styles registered once per workbook and shared by every cell."""
+
+    def __init__(self, wb):
+        self.wb = wb
+        self.names = {}
+
+    def get(self, fill=None, bold=False, wrap=False, header=False):
+        key = (fill, bold, wrap, header)
+        if key not in self.names:
+            from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+            name = f'export_{len(self.names)}'
+            style = NamedStyle(name=name)
+            if header:
+                style.font = Font(name='Arial', bold=True, color='FFFFFF', size=11)
+                style.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+                style.border = Border(bottom=Side(style='thin', color='CBD5E1'))
+            else:
+                style.font = Font(name='Arial', bold=bold, size=11 if bold else 10)
+                if wrap:
+                    style.alignment = Alignment(vertical='center', wrap_text=True)
+            if fill:
+                style.fill = PatternFill(start_color=fill, end_color=fill, fill_type='solid')
+            self.wb.add_named_style(style)
+            self.names[key] = name
+        return self.names[key]
+
+
+def _widths(export):
+    if export.widths:
+        return export.widths
+    widths = [len(str(c)) for c in export.columns]
+    if isinstance(export.rows, list):  # small in-memory sheets can be measured
+        for row in export.rows:
+            for i, value in enumerate(row[:len(widths)]):
+                widths[i] = max(widths[i], len(str(value)) if value is not None else 0)
+    return [min(max(w + 4, 10), 50) for w in widths]
+
+
+def write_xlsx(fileobj, sheets):
+    """Write ``sheets`` to ``fileobj`` with a constant-memory workbook."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    styles = _Styles(wb)
+    for export in sheets:
+        ws = wb.create_sheet(title=export.title)
+        for i, width in enumerate(_widths(export), start=1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+
+        def cells(values, style, overrides=None):
+            out = []
+            for i, value in enumerate(values):
+                cell = WriteOnlyCell(ws, value=value)
+                if cell.data_type == 'f':  # user text starting with '=' stays text
+                    cell.data_type = 's'
+                cell.style = (overrides or {}).get(i, style)
+                out.append(cell)
+            return out
+
+        ws.append(cells(export.columns, styles.get(fill=export.header_color, header=True)))
+        plain = styles.get(wrap=export.wrap)
+        shaded = styles.get(fill='F8FAFC', wrap=export.wrap)
+        summary = styles.get(fill='F1F5F9', bold=True)
+        col, fills = export.highlight or (None, {})
+        for n, row in enumerate(export.rows):
+            if isinstance(row, SummaryRow):
+                ws.append(cells(list(row) + [None] * (len(export.columns) - len(row)), summary))
+                continue
+            overrides = {}
+            if col is not None and row[col] in fills:
+                overrides[col] = styles.get(fill=fills[row[col]], wrap=export.wrap)
+            # Shade every other row, starting with the first data row (sheet row 2)
+            ws.append(cells(row, shaded if n % 2 == 0 else plain, overrides))
+    wb.save(fileobj)
+
+
+def _spooled(write):
+    """Run ``write(fileobj)`` into an anonymous temporary file, rewound."""
+    tmp = tempfile.TemporaryFile()
+    write(tmp)
+    tmp.seek(0)
+    return tmp
+
+
+def xlsx_file(sheets):
+    return _spooled(lambda f: write_xlsx(f, sheets))
+
+
+def xlsx_response(sheets, filename=None, request=None):
+    return stream(request, FileResponse(
+        xlsx_file(sheets), as_attachment=True,
+        filename=f'{filename or sheets[0].filename}.xlsx', content_type=XLSX_CONTENT_TYPE,
+    ))
+
+
+# ── Registry ────────────────────────────────────────────────────
+
+EXPORTS = {}
+
+
+def register(kind):
+    def decorator(builder):
+        EXPORTS[kind] = builder
+        return builder
+    return decorator
+
+
+def build(kind, params=None):
+    return EXPORTS[kind](params or {})
+
+
+def _fmt(dt, pattern='%Y-%m-%d %H:%M:%S'):
+    return dt.strftime(pattern) if dt else ''
+
+
+@register('users')
+def users_export(params):
+    """All users with profile fields (the Users list "Export CSV" button)."""
+    from django.contrib.auth.models import User
+
+    qs = User.objects.select_related('profile').order_by('-date_joined')
+
+    def rows():
+        for user in qs.iterator(chunk_size=ITER_CHUNK):
+            profile = getattr(user, 'profile', None)
+            yield [
+                user.id, user.username, user.email, user.first_name, user.last_name,
+                user.is_active, user.is_staff, user.is_superuser,
+                _fmt(user.date_joined), _fmt(user.last_login),
+                profile.nationality if profile else '',
+                profile.gender if profile else '',
+                profile.is_verified if profile else False,
+            ]
+
+    return [Export(
+        'users_export',
+        ['ID', 'Username', 'Email', 'First Name', 'Last Name',
+         'Is Active', 'Is Staff', 'Is Superuser', 'Date Joined',
+         'Last Login', 'Nationality', 'Gender', 'Is Verified'],
+        rows(), total=qs.count(), title='Users',
+    )]
+
+
+@register('analytics')
+def analytics_export(params):
+    """Platform summary, 30-day user growth, top countries and engagement."""
+    from django.contrib.auth.models import User
+    from django.db.models import Sum
+    from django.db.models.functions import TruncDate
+    from core.models import Article, Event, LiveFeed, MagazineEdition, SupportTicket, UserProfile, Video
+
+    def rows():
+        now = timezone.now()
+        users = User.objects.aggregate(
+            total=Count('pk'),
+            active_30=Count('pk', filter=Q(last_login__gte=now - timedelta(days=30))),
+            active_7=Count('pk', filter=Q(last_login__gte=now - timedelta(days=7))),
+        )
+        yield ['Metric', 'Value']
+        yield ['Total Users', users['total']]
+        yield ['Active Users (30 days)', users['active_30']]
+        yield ['Active Users (7 days)', users['active_7']]
+        yield ['Total Articles', Article.objects.count()]
+        yield ['Total Events', Event.objects.count()]
+        yield ['Total Magazines', MagazineEdition.objects.count()]
+        yield ['Total Videos', Video.objects.count()]
+        yield ['Active Live Feeds', LiveFeed.objects.filter(status='live').count()]
+        yield ['Open Support Tickets', SupportTicket.objects.filter(status='open').count()]
+        yield []
+
+        yield ['=== USER GROWTH (Last 30 Days) ===']
+        yield ['Date', 'New Users']
+        first_day = (now - timedelta(days=30)).date()
+        joined = dict(
+            User.objects.filter(date_joined__date__gte=first_day)
+            .annotate(day=TruncDate('date_joined')).values('day')
+            .annotate(n=Count('pk')).values_list('day', 'n')
+        )
+        for i in range(31):
+            day = first_day + timedelta(days=i)
+            yield [day.strftime('%Y-%m-%d'), joined.get(day, 0)]
+        yield []
+
+        yield ['=== TOP COUNTRIES BY NATIONALITY ===']
+        yield ['Country', 'User Count']
+        for entry in (
+            UserProfile.objects.exclude(nationality='')
+            .values('nationality').annotate(count=Count('id')).order_by('-count')[:20]
+        ):
+            yield _sanitize_csv_row([entry['nationality'], entry['count']])
+        yield []
+
+        yield ['=== CONTENT ENGAGEMENT ===']
+        yield ['Content Type', 'Total Views', 'Total Likes']
+        articles = Article.objects.aggregate(views=Sum('view_count'), likes=Sum('like_count'))
+        magazine_views = MagazineEdition.objects.aggregate(s=Sum('view_count'))['s'] or 0
+        yield ['Articles', articles['views'] or 0, articles['likes'] or 0]
+        yield ['Magazines', magazine_views, 'N/A']
+
+    # Section labels start with '=' so rows are sanitized individually above.
+    return [Export('analytics_export', ['=== ANALYTICS SUMMARY ==='], rows(), sanitize=False)]
+
+
+def _yd_applications(event_pk, status=None, order=('-created_at',)):
+    """Applications with document counts annotated and side events prefetched."""
+    from core.models import YouthDialogueApplication
+
+    qs = YouthDialogueApplication.objects.filter(event_id=event_pk)
+    if status:
+        qs = qs.filter(status=status)
+    return qs, qs.annotate(
+        total_docs=Count('documents'),
+        approved_docs=Count('documents', filter=Q(documents__status='approved')),
+    ).prefetch_related('selected_side_events').order_by(*order)
+
+
+@register('yd_applications')
+def youth_dialogue_applications_export(params):
+    """Continental Dialogue applications, one column per side event."""
+    from core.models import YouthDialogueEvent, YouthDialogueSideEvent
+
+    event = YouthDialogueEvent.objects.get(pk=params['event'])
+    side_events = list(YouthDialogueSideEvent.objects.filter(event=event).order_by('order'))
+    base, qs = _yd_applications(event.pk)
+
+    def rows():
+        for app in qs.iterator(chunk_size=ITER_CHUNK):
+            docs_status = (f'{app.approved_docs}/{app.total_docs} approved'
+                           if app.total_docs else 'No documents')
+            selected = {se.id for se in app.selected_side_events.all()}
+            yield [
+                f'{app.first_name} {app.last_name}',
+                app.email,
+                app.get_nationality_display() if app.nationality else '',
+                app.organization,
+                app.get_position_display() if app.position else app.position,
+                app.get_gender_display() if app.gender else '',
+                app.get_status_display(),
+                app.participant_code or '',
+                _fmt(app.created_at),
+                docs_status,
+            ] + ['Yes' if se.id in selected else '' for se in side_events]
+
+    return [Export(
+        f'{event.slug or "youth_dialogue"}_applications',
+        ['Name', 'Email', 'Nationality', 'Organization', 'Position', 'Gender',
+         'Status', 'Participant Code', 'Created At', 'Documents Status']
+        + [se.name for se in side_events],
+        rows(), total=base.count(), title='Applications',
+    )]
+
+
+@register('yd_participants')
+def youth_dialogue_participants_export(params):
+    """Styled participants workbook: list, summary, countries and side events."""
+    from core.models import (
+        NATIONALITY_CHOICES, YouthDialogueApplication, YouthDialogueEvent, YouthDialogueSideEvent,
+    )
+
+    event = YouthDialogueEvent.objects.get(pk=params['event'])
+    side_events = list(YouthDialogueSideEvent.objects.filter(event=event).order_by('order'))
+    base, qs = _yd_applications(event.pk, params.get('status'), order=('last_name', 'first_name'))
+    total = base.count()
+
+    # Extra form fields become columns; one pass over just the JSON column.
+    extra_keys = {}
+    for data in base.exclude(additional_data__isnull=True).order_by('last_name', 'first_name') \
+            .values_list('additional_data', flat=True).iterator(chunk_size=ITER_CHUNK):
+        if isinstance(data, dict):
+            extra_keys.update(dict.fromkeys(data))
+    extra_keys = list(extra_keys)
+
+    columns = [
+        '#', 'Title', 'Name', 'Country', 'Position', 'Gender', 'Age',
+        'Email', 'Phone', 'Organisation', 'Status', 'Participant Code',
+        'Applied At', 'Documents',
+    ] + [k.replace('_', ' ').title() for k in extra_keys] + [se.name for se in side_events]
+    widths = [6, 10, 28, 20, 20, 10, 8, 32, 18, 28, 18, 18, 18, 16]
+    widths += [20] * (len(columns) - len(widths))
+    status_colors = {
+        'accepted': 'DCFCE7', 'credential_issued': 'D1FAE5', 'rejected': 'FEE2E2',
+        'submitted': 'DBEAFE', 'under_review': 'FEF3C7',
+    }
+    labels = dict(YouthDialogueApplication.STATUS_CHOICES)
+
+    def participants():
+        today = date.today()
+        for idx, app in enumerate(qs.iterator(chunk_size=ITER_CHUNK), start=1):
+            age = ''
+            if app.date_of_birth:
+                dob = app.date_of_birth
+                age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+            extra = app.additional_data or {}
+            selected = {se.id for se in app.selected_side_events.all()}
+            yield [
+                idx,
+                app.get_title_display() if app.title else '',
+                f'{app.first_name} {app.last_name}',
+                app.get_nationality_display() if app.nationality else '',
+                app.get_position_display() if app.position else '',
+                app.get_gender_display() if app.gender else '',
+                age,
+                app.email,
+                f'{app.country_code}{app.phone_number}' if app.phone_number else '',
+                app.organization,
+                app.get_status_display(),
+                app.participant_code or '',
+                _fmt(app.created_at, '%Y-%m-%d %H:%M'),
+                f'{app.approved_docs}/{app.total_docs} approved' if app.total_docs else 'None',
+            ] + [str(extra.get(k) or '') for k in extra_keys] \
+              + ['Yes' if se.id in selected else '' for se in side_events]
+
+    nat_dict = dict(NATIONALITY_CHOICES)
+
+    def pct(n):
+        return f'{round(n / total * 100, 1) if total else 0}%'
+
+    def countries():
+        return base.values('nationality').annotate(c=Count('id')).order_by('-c')
+
+    # The summary sheets are generators too, so a queued export runs their
+    # aggregates in the job rather than in the request that queued it.
+    def summary():
+        by_status = dict(base.order_by().values('status').annotate(c=Count('id')).values_list('status', 'c'))
+        by_gender = dict(base.order_by().values('gender').annotate(c=Count('id')).values_list('gender', 'c'))
+        yield ['Event', event.programme_title or event.slug]
+        yield ['Total Applications', total]
+        for code, label in YouthDialogueApplication.STATUS_CHOICES:
+            if by_status.get(code):
+                yield [label, by_status[code]]
+        yield ['Male', by_gender.get('male', 0)]
+        yield ['Female', by_gender.get('female', 0)]
+        for e in countries()[:10]:
+            if e['nationality']:
+                yield [f'Country: {nat_dict.get(e["nationality"], e["nationality"])}', e['c']]
+
+    def country_rows():
+        for e in countries():
+            yield [nat_dict.get(e['nationality'], e['nationality'] or 'Unknown'), e['c'], pct(e['c'])]
+
+    def side_event_rows():
+        for se in YouthDialogueSideEvent.objects.filter(event=event) \
+                .annotate(reg_count=Count('applications')).order_by('-reg_count'):
+            yield [se.name, se.reg_count, pct(se.reg_count)]
+
+    filename = f'{event.slug or "youth_dialogue"}_participants'
+    return [
+        Export(filename, columns, participants(), total=total, title='Participants',
+               widths=widths, header_color=MAROON, wrap=True,
+               highlight=(columns.index('Status'), {labels[k]: v for k, v in status_colors.items()})),
+        Export(filename, ['Statistic', 'Value'], summary(), title='Summary', widths=[40, 30]),
+        Export(filename, ['Country', 'Count', '% of Total'], country_rows(), title='Countries',
+               widths=[30, 10, 14]),
+        Export(filename, ['Side Event', 'Registrations', '% of Total'], side_event_rows(), title='Side Events',
+               widths=[40, 16, 14]),
+    ]
+
+
+# ── Request / job entry points ──────────────────────────────────
+
+def respond(request, kind, params=None, file_format='csv'):
+    """Stream the export, or queue an ExportJob when it is too large.
+
+    Returns ``(response_or_None, sheets, job_or_None)``; with a job the
+    caller redirects and tells the admin a notification will follow.
+    """
+    params = params or {}
+    sheets = build(kind, params)
+    threshold = getattr(settings, 'EXPORT_ASYNC_THRESHOLD', 5000)
+    if threshold and sheets[0].total > threshold:
+        return None, sheets, queue_job(request.user, kind, params, file_format)
+    if file_format == 'xlsx':
+        return xlsx_response(sheets, request=request), sheets, None
+    return streaming_csv_response(sheets[0], request), sheets, None
+
+
+def queue_job(user, kind, params, file_format):
+    from core.models import ExportJob
+    from core.tasks import run_export_job
+
+    job = ExportJob.objects.create(
+        kind=kind, params=params, file_format=file_format, requested_by=user,
+    )
+    run_export_job.delay(job.pk)
+    return job
+
+
+def run_job(job):
+    """Generate a queued export into private storage and notify the admin."""
+    from django.core.files import File
+    from django.urls import reverse
+    from core.models import AdminNotification
+
+    job.status = 'running'
+    job.save(update_fields=['status'])
+    try:
+        sheets = build(job.kind, job.params)
+        if job.file_format == 'xlsx':
+            tmp = xlsx_file(sheets)
+        else:
+            tmp = _spooled(lambda f: f.writelines(
+                line.encode('utf-8') for line in csv_lines(sheets[0])
+            ))
+        with tmp:
+            stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            job.file.save(f'{sheets[0].filename}_{stamp}.{job.file_format}', File(tmp), save=False)
+        job.row_count = sheets[0].total
+        job.status = 'completed'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['file', 'row_count', 'status', 'completed_at'])
+    except Exception as exc:
+        logger.exception('Export job %s failed', job.pk)
+        job.status = 'failed'
+        job.error_message = str(exc)
+        job.save(update_fields=['status', 'error_message'])
+        return job
+
+    who = job.requested_by.username if job.requested_by else 'an admin'
+    AdminNotification.objects.create(
+        notification_type='export_ready',
+        title='Export ready',
+        message=f'{job.row_count} rows ({job.get_file_format_display()}) requested by {who}',
+        link=reverse('custom_admin:export_job_download', args=[job.pk]),
+        icon='download',
+    )
+    return job
+
+
+def purge_jobs(days=None):
+    """Delete export jobs (and their files) older than ``EXPORT_RETENTION_DAYS``."""
+    from core.models import ExportJob
+
+    days = days or getattr(settings, 'EXPORT_RETENTION_DAYS', 7)
+    removed = 0
+    for job in ExportJob.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)):
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        removed += 1
+    return removed
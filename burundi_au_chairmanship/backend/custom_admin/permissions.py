@@ -134,6 +134,8 @@ UNRESTRICTED_URLS = {
     'admin_notifications_api', 'admin_notification_mark_read', 'admin_notifications_page',
     # Admin management is superuser-only (enforced by the view decorator)
     'admin_management', 'admin_invite', 'admin_edit_access',
+    # Background export files are limited to the requesting admin (enforced by the view)
+    'export_job_download',
 }
 
 
@@ -256,6 +256,7 @@ urlpatterns = [
     # Export Reports
     path('export/users-csv/', views.export_users_csv, name='export_users_csv'),
     path('export/analytics-csv/', views.export_analytics_csv, name='export_analytics_csv'),
+    path('export/jobs/<int:pk>/download/', views.export_job_download, name='export_job_download'),
 
     # Translation Manager
     path('translations/', views.translation_manager, name='translation_manager'),
@@ -355,6 +356,10 @@ urlpatterns = [
     path('youth-dialogue/<int:event_pk>/applications/', views.youth_dialogue_applications_list, name='youth_dialogue_applications_list'),
     path('youth-dialogue/<int:event_pk>/bulk-action/', views.bulk_yd_action, name='youth_dialogue_bulk_action'),
     path('youth-dialogue/<int:event_pk>/bulk-auto-approve/', views.bulk_auto_approve_documents, name='youth_dialogue_bulk_auto_approve'),
+    path('youth-dialogue/<int:event_pk>/bulk-auto-approve/<int:job_pk>/', views.auto_approve_progress, name='youth_dialogue_auto_approve_progress'),
+    path('youth-dialogue/<int:event_pk>/print-id-cards/', views.print_id_cards, name='youth_dialogue_print_id_cards'),
+    path('youth-dialogue/<int:event_pk>/print-id-cards/<int:job_pk>/', views.id_card_print_progress, name='youth_dialogue_id_card_print_progress'),
+    path('youth-dialogue/<int:event_pk>/print-id-cards/<int:job_pk>/download/', views.id_card_sheet_download, name='youth_dialogue_id_card_sheet'),
     path('youth-dialogue/<int:event_pk>/batch-accept-documents/', views.batch_accept_all_documents, name='youth_dialogue_batch_accept_docs'),
     path('youth-dialogue/<int:event_pk>/media/', views.youth_dialogue_media_list, name='youth_dialogue_media_list'),
     path('youth-dialogue/<int:event_pk>/media/create/', views.youth_dialogue_media_form, name='youth_dialogue_media_create'),
@@ -15,6 +15,7 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User as AuthUser
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Count, Q, Sum, Value
 from django.db.models.functions import Replace
 from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
@@ -29,27 +30,14 @@ from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 
-logger = logging.getLogger(__name__)
-
-
-def _sanitize_csv_value(value):
-    """Neutralize CSV formula injection.
-
-    Any cell whose string representation starts with a formula-trigger
-    character (= + - @ TAB CR LF) is prefixed with an apostrophe so
-    spreadsheet applications treat it as a literal text value.
-    """
-    if isinstance(value, str) and value and value[0] in ('=', '+', '-', '@', '\t', '\r', '\n'):
-        return "'" + value
-    return value
+from ._helpers import _sanitize_csv_row
 
-
-def _sanitize_csv_row(row):
-    """Apply formula-injection sanitization to every cell in a CSV row."""
-    return [_sanitize_csv_value(v) for v in row]
+logger = logging.getLogger(__name__)
 
 
 from core.utils import log_admin_action, compute_model_diff
+from core.search import run_search
+from core import checkin, id_cards, outbox
 from core.models import (
     HeroSlide, FeatureCard, Article, MagazineEdition, Event,
     LiveFeed, Video, GalleryAlbum, GalleryPhoto, EmbassyLocation, Resource,
@@ -62,10 +50,10 @@ from core.models import (
     # New models
     Poll, PollOption, Discussion, ContactDirectory, AnnouncementBanner,
     EmailTemplate, EventSpeaker, OnboardingStep, Webhook, WebhookLog,
-    ScheduledMaintenance, PromotionalSplash, LoginHistory, Bookmark, Reaction,
+    ScheduledMaintenance, PromotionalSplash, LoginHistory,
     TranslationEntry, RateLimitLog,
     AdminActivityLog, DatabaseBackup,
-    UserSegment, UserSegmentMembership,
+    UserSegment,
     AdminNotification,
     ABTest, ABTestParticipant,
     TranslationRequest, VideoChapter,
@@ -73,7 +61,6 @@ from core.models import (
     VideoComment, GalleryComment, DiscussionReply,
     DeviceToken,
     AppRelease, AppReleaseHighlight,
-    ArticleLike,
     NewsletterEdition,
     YouthDialogueEvent,
     YouthDialogueFormField,
@@ -309,22 +296,25 @@ def admin_logout(request):
 def dashboard(request):
     import json
     from datetime import timedelta
+    from core import metrics
+
+    # Counts, totals and series come from the pre-aggregated snapshot
+    # (core/metrics.py, refreshed by Celery beat) — a couple of indexed reads
+    # instead of a scan of every content table per page load.
+    snapshot = metrics.latest()
     # Exclude staff/admin accounts — "App Users" should reflect real end users only
-    users_count = User.objects.filter(is_staff=False).count()
+    users_count = snapshot['app_users.total']
     # Only count articles that are actually published (not drafts/archived)
-    articles_count = Article.objects.filter(status='published').count()
-    events_count = Event.objects.count()
-    magazines_count = MagazineEdition.objects.count()
-    hero_slides_count = HeroSlide.objects.filter(is_active=True).count()
-    live_feeds_active = LiveFeed.objects.filter(status='live').count()
+    articles_count = snapshot['articles.published']
+    events_count = snapshot['events.total']
+    magazines_count = snapshot['magazines.total']
+    hero_slides_count = snapshot['hero_slides.active']
+    live_feeds_active = snapshot['live_feeds.live']
     total_content = articles_count + events_count + magazines_count + hero_slides_count
     # Use UserProfile.last_active (bumped by LastActiveMiddleware on every
     # authenticated API request, throttled to 60s) instead of last_login,
     # which only fires on credential re-entry and misses JWT refresh-token sessions.
-    active_today = UserProfile.objects.filter(
-        last_active__gte=timezone.now() - timedelta(days=1),
-        user__is_staff=False,
-    ).count()
+    active_today = snapshot['app_users.active_24h']
 
     # Account alerts
     deletion_scheduled = UserProfile.objects.filter(
@@ -334,64 +324,25 @@ def dashboard(request):
         is_deactivated=True, is_scheduled_for_deletion=False
     ).select_related('user').order_by('-deactivated_at')
 
-    # "Users online now" — presence signal updated by:
-    #   * LastActiveMiddleware on every authenticated API hit (throttled 60s)
-    #   * The /api/heartbeat/ endpoint every 60s from foregrounded Flutter apps
-    # We union authenticated active profiles with anonymous device tokens
-    # (refreshed by heartbeat via X-FCM-Token header) and deduplicate so a
-    # single physical device can't inflate the count.
-    from datetime import timedelta as td
-    from core.models import DeviceToken
-    live_window = timezone.now() - td(minutes=5)
-    authed_user_ids = set(
-        UserProfile.objects.filter(last_active__gte=live_window)
-        .values_list('user_id', flat=True)
-    )
-    # Anonymous devices: tokens with no linked user, recently bumped.
-    anon_device_count = DeviceToken.objects.filter(
-        user__isnull=True,
-        is_active=True,
-        updated_at__gte=live_window,
-    ).values('token').distinct().count()
-    live_users = len(authed_user_ids) + anon_device_count
+    # "Users online now" — read from the presence store (core/presence.py),
+    # fed by LastActiveMiddleware on authenticated API hits and by the
+    # /api/heartbeat/ endpoint every 60s from foregrounded Flutter apps.
+    # Authenticated users and anonymous device tokens are kept in separate
+    # sorted sets, so a signed-in device is only counted once.
+    from core.presence import online_counts
+    live_users = online_counts()['total']
 
     # --- User growth + Event activity (last 30 days) ---
     now = timezone.now()
-    from django.db.models.functions import TruncDate
-    thirty_days_ago = (now - timedelta(days=30)).date()
-
-    # Two queries instead of 60: aggregate counts per day in the DB
-    user_counts = dict(
-        User.objects.filter(date_joined__date__gte=thirty_days_ago, is_staff=False)
-        .annotate(day=TruncDate('date_joined'))
-        .values('day')
-        .annotate(count=Count('id'))
-        .values_list('day', 'count')
-    )
-    event_counts = dict(
-        Event.objects.filter(created_at__date__gte=thirty_days_ago)
-        .annotate(day=TruncDate('created_at'))
-        .values('day')
-        .annotate(count=Count('id'))
-        .values_list('day', 'count')
-    )
-
-    growth_labels = []
-    growth_data = []
-    events_30d_data = []
-    for i in range(29, -1, -1):
-        day = (now - timedelta(days=i)).date()
-        growth_labels.append(day.strftime('%b %d'))
-        growth_data.append(user_counts.get(day, 0))
-        events_30d_data.append(event_counts.get(day, 0))
+    # 60 days in one read: the last 30 for the chart, the 30 before for the trend
+    days, series = metrics.daily(['app_users.joined', 'events.created'], 60)
+    growth_labels = [day.strftime('%b %d') for day in days[30:]]
+    growth_data = series['app_users.joined'][30:]
+    events_30d_data = series['events.created'][30:]
 
     # --- User growth trend: last 30 days vs previous 30 days ---
     growth_last_30 = sum(growth_data)
-    growth_prev_30 = User.objects.filter(
-        date_joined__gte=now - timedelta(days=60),
-        date_joined__lt=now - timedelta(days=30),
-        is_staff=False,
-    ).count()
+    growth_prev_30 = sum(series['app_users.joined'][:30])
     if growth_prev_30 > 0:
         growth_trend_pct = round(
             ((growth_last_30 - growth_prev_30) / growth_prev_30) * 100
@@ -412,43 +363,32 @@ def dashboard(request):
         growth_trend_direction = 'flat'
 
     # --- Content engagement (views + likes across all content types) ---
-    article_views = Article.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    article_likes = Article.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    magazine_views = MagazineEdition.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    magazine_likes = MagazineEdition.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    gallery_views = GalleryAlbum.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    gallery_likes = GalleryAlbum.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    video_views = Video.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    video_likes = Video.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    video_count = Video.objects.count()
+    article_views = snapshot['articles.views']
+    article_likes = snapshot['articles.likes']
+    magazine_views = snapshot['magazines.views']
+    magazine_likes = snapshot['magazines.likes']
+    gallery_views = snapshot['albums.views']
+    gallery_likes = snapshot['albums.likes']
+    video_views = snapshot['videos.views']
+    video_likes = snapshot['videos.likes']
+    video_count = snapshot['videos.total']
 
     engagement_labels = ['Articles', 'Magazines', 'Gallery', 'Videos']
     engagement_views = [article_views, magazine_views, gallery_views, video_views]
     engagement_likes = [article_likes, magazine_likes, gallery_likes, video_likes]
 
     # --- Top countries ---
-    nationality_data = list(
-        UserProfile.objects.exclude(nationality='')
-        .values('nationality')
-        .annotate(count=Count('id'))
-        .order_by('-count')[:8]
-    )
-    country_labels = [d['nationality'] for d in nationality_data]
-    country_counts = [d['count'] for d in nationality_data]
+    nationality_data = snapshot.breakdown('users.nationality', 8)
+    country_labels = [code for code, _ in nationality_data]
+    country_counts = [count for _, count in nationality_data]
 
     # --- Verification status ---
-    verified_count = UserProfile.objects.filter(is_verified=True).count()
-    pending_verif = VerificationRequest.objects.filter(status='pending').count()
+    verified_count = snapshot['users.verified']
+    pending_verif = snapshot['verification.pending']
     unverified_count = users_count - verified_count
 
     # --- Language distribution (real app users only) ---
-    lang_agg = (
-        UserProfile.objects
-        .filter(user__is_staff=False, user__is_active=True)
-        .values('preferred_language')
-        .annotate(count=Count('id'))
-    )
-    lang_map = {row['preferred_language']: row['count'] for row in lang_agg}
+    lang_map = dict(snapshot.breakdown('app_users.language'))
     language_en = lang_map.get('en', 0)
     language_fr = lang_map.get('fr', 0)
     language_total = language_en + language_fr
@@ -524,7 +464,7 @@ def dashboard(request):
         'events': events_count,
         'magazines': magazines_count,
         'hero_slides': hero_slides_count,
-        'feature_cards': FeatureCard.objects.filter(is_active=True).count(),
+        'feature_cards': snapshot['feature_cards.active'],
         'live_feeds_active': live_feeds_active,
         'active_today': active_today,
         'total_content': total_content or 1,
@@ -1610,76 +1550,31 @@ def notification_send_push(request, pk):
 @user_passes_test(is_staff, login_url='custom_admin:login')
 def notification_estimate_audience(request):
     """Return estimated audience count based on targeting filters.
-    Includes anonymous device tokens for global notifications."""
-    from core.models import UserProfile
-    from django.db.models import Q
-
-    # Include profiles with either a legacy fcm_token or active DeviceTokens
-    profiles = UserProfile.objects.filter(
-        Q(fcm_token__isnull=False) & ~Q(fcm_token='')
-        | Q(user__device_tokens__is_active=True)
-    ).distinct()
-
-    is_global = request.GET.get('is_global') == 'true'
-    platform = request.GET.get('target_platform', '')
-    if not is_global:
-        gender = request.GET.get('target_gender', '')
-        if gender:
-            profiles = profiles.filter(gender=gender)
-
-        language = request.GET.get('target_language', '')
-        if language:
-            profiles = profiles.filter(preferred_language=language)
-
-        verified_only = request.GET.get('target_verified_only') == 'true'
-        if verified_only:
-            profiles = profiles.filter(is_verified=True)
-            badge_type = request.GET.get('target_badge_type', '')
-            if badge_type:
-                profiles = profiles.filter(badge_type=badge_type)
-
-    # When a platform filter is set, narrow to profiles that have at least
-    # one active DeviceToken on that platform.
-    if platform:
-        profiles = profiles.filter(
-            user__device_tokens__is_active=True,
-            user__device_tokens__device_os__istartswith=platform,
-        ).distinct()
-
-    count = profiles.count()
-
-    # Split by language (before anonymous devices, which have no language)
-    en_count = profiles.filter(preferred_language='en').count()
-    fr_count = profiles.filter(preferred_language='fr').count()
-
-    # Include anonymous device tokens for global notifications
-    if is_global:
-        anon_qs = DeviceToken.objects.filter(
-            user__isnull=True,
-            is_active=True,
-        )
-        if platform:
-            anon_qs = anon_qs.filter(device_os__istartswith=platform)
-        anonymous_count = anon_qs.count()
-        count += anonymous_count
-
-    total = UserProfile.objects.filter(
-        Q(fcm_token__isnull=False) & ~Q(fcm_token='')
-        | Q(user__device_tokens__is_active=True)
-    ).distinct().count()
-    # Add anonymous device count to total as well
-    total += DeviceToken.objects.filter(user__isnull=True, is_active=True).count()
-
-    # Platform breakdown
-    android_count = DeviceToken.objects.filter(is_active=True, device_os__istartswith='android').count()
-    ios_count = DeviceToken.objects.filter(is_active=True, device_os__istartswith='ios').count()
+    Includes anonymous device tokens for global notifications.
 
-    return JsonResponse({
-        'count': count,
-        'total': total,
-        'by_language': {'en': en_count, 'fr': fr_count},
-        'by_platform': {'android': android_count, 'ios': ios_count},
-    })
+    Answered from the precomputed push audience index (core/push_audience.py)
+    with a single aggregate query, using the same targeting rules as sending.
+    """
+    from core.push_audience import estimate
+
+    def _int_or_none(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    notification = Notification(
+        is_global=request.GET.get('is_global') == 'true',
+        target_gender=request.GET.get('target_gender', ''),
+        target_language=request.GET.get('target_language', ''),
+        target_platform=request.GET.get('target_platform', ''),
+        target_verified_only=request.GET.get('target_verified_only') == 'true',
+        target_badge_type=request.GET.get('target_badge_type', ''),
+        target_nationalities=[c for c in request.GET.getlist('target_nationalities') if c],
+        target_age_min=_int_or_none(request.GET.get('target_age_min')),
+        target_age_max=_int_or_none(request.GET.get('target_age_max')),
+    )
+    return JsonResponse(estimate(notification))
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -4173,73 +4068,45 @@ def support_ticket_reply(request, pk):
         messages.error(request, 'Reply message cannot be empty.')
         return redirect('custom_admin:support_ticket_detail', pk=pk)
 
-    # Create admin reply
-    TicketMessage.objects.create(
-        ticket=ticket,
-        sender=request.user,
-        message=message_text,
-        is_admin_reply=True,
-        is_read=False,
-    )
-
-    # Update ticket status
-    if ticket.status == 'open':
-        ticket.status = 'in_progress'
-        ticket.assigned_to = request.user
-        ticket.save(update_fields=['status', 'assigned_to'])
-
-    # Send email copy to user via support SMTP (info@burundichairship.africa)
-    try:
-        from django.core.mail import send_mail, get_connection
-        connection = get_connection(
-            backend='django.core.mail.backends.smtp.EmailBackend',
-            host=settings.FALLBACK_EMAIL_HOST,
-            port=settings.FALLBACK_EMAIL_PORT,
-            username=settings.FALLBACK_EMAIL_HOST_USER,
-            password=settings.FALLBACK_EMAIL_HOST_PASSWORD,
-            use_tls=settings.FALLBACK_EMAIL_USE_TLS,
-            use_ssl=settings.FALLBACK_EMAIL_USE_SSL,
-        )
-        send_mail(
-            subject=f'Re: {ticket.subject} - Support Ticket #{ticket.pk}',
-            message=(
-                f'Hello {ticket.user.first_name or ticket.user.username},\n\n'
-                f'You have a new reply to your support ticket:\n\n'
-                f'"{message_text}"\n\n'
-                f'Open the Burundi AU app to continue the conversation.\n\n'
-                f'Best regards,\n'
-                f'Burundi AU Support Team'
-            ),
-            from_email=settings.FALLBACK_FROM_EMAIL,
-            recipient_list=[ticket.user.email],
-            fail_silently=False,
-            connection=connection,
+    with transaction.atomic():
+        # Create admin reply
+        TicketMessage.objects.create(
+            ticket=ticket,
+            sender=request.user,
+            message=message_text,
+            is_admin_reply=True,
+            is_read=False,
         )
-    except Exception:
-        pass  # Don't block reply if email fails
 
-    # Send push notification to user
-    try:
-        from config.firebase import initialize_firebase
-        initialize_firebase()
-        from firebase_admin import messaging
-
-        fcm_token = ticket.user.profile.fcm_token if hasattr(ticket.user, 'profile') else ''
-        if fcm_token:
-            fcm_message = messaging.Message(
-                notification=messaging.Notification(
-                    title=f'Support Reply: {ticket.subject}',
-                    body=message_text[:100],
+        # Update ticket status
+        if ticket.status == 'open':
+            ticket.status = 'in_progress'
+            ticket.assigned_to = request.user
+            ticket.save(update_fields=['status', 'assigned_to'])
+
+        # Email copy via support SMTP (info@burundichairship.africa) and a push,
+        # both sent from the outbox once the reply is committed.
+        if ticket.user.email:
+            outbox.queue_email(
+                [ticket.user.email],
+                f'Re: {ticket.subject} - Support Ticket #{ticket.pk}',
+                body=(
+                    f'Hello {ticket.user.first_name or ticket.user.username},\n\n'
+                    f'You have a new reply to your support ticket:\n\n'
+                    f'"{message_text}"\n\n'
+                    f'Open the Burundi AU app to continue the conversation.\n\n'
+                    f'Best regards,\n'
+                    f'Burundi AU Support Team'
                 ),
-                data={
-                    'type': 'support_reply',
-                    'ticket_id': str(ticket.pk),
-                },
-                token=fcm_token,
+                from_email=settings.FALLBACK_FROM_EMAIL,
+                connection='support',
             )
-            messaging.send(fcm_message)
-    except Exception:
-        pass  # Don't block reply if push fails
+        outbox.queue_push(
+            [ticket.user_id],
+            f'Support Reply: {ticket.subject}',
+            message_text[:100],
+            {'type': 'support_reply', 'ticket_id': str(ticket.pk)},
+        )
 
     messages.success(request, 'Reply sent successfully! User has been notified.')
     return redirect('custom_admin:support_ticket_detail', pk=pk)
@@ -4313,40 +4180,31 @@ def support_ticket_update_status(request, pk):
 @user_passes_test(is_staff, login_url='custom_admin:login')
 def analytics_dashboard(request):
     from datetime import timedelta
-    from django.db.models import Sum
     from django.db.models.functions import TruncMonth
-    from core.models import UserSession, Video, GalleryAlbum
+    from core import metrics
+    from core.models import UserSession, Video
 
     now = timezone.now()
+    snapshot = metrics.latest()
 
     # User metrics
-    total_users = User.objects.count()
-    new_7d = User.objects.filter(date_joined__gte=now - timedelta(days=7)).count()
-    new_30d = User.objects.filter(date_joined__gte=now - timedelta(days=30)).count()
-    active_7d = User.objects.filter(last_login__gte=now - timedelta(days=7)).count()
-    active_30d = User.objects.filter(last_login__gte=now - timedelta(days=30)).count()
-    active_today = User.objects.filter(last_login__date=now.date()).count()
+    total_users = snapshot['users.total']
+    _, joined = metrics.daily(['users.joined', 'articles.created'], 30)
+    new_7d = sum(joined['users.joined'][-7:])
+    new_30d = sum(joined['users.joined'])
+    active_7d = snapshot['users.login_7d']
+    active_30d = snapshot['users.login_30d']
+    active_today = snapshot['users.login_today']
 
     # User growth (12 months)
-    user_growth = (
-        User.objects.filter(date_joined__gte=now - timedelta(days=365))
-        .annotate(month=TruncMonth('date_joined'))
-        .values('month')
-        .annotate(count=Count('id'))
-        .order_by('month')
-    )
-    months = [g['month'].strftime('%b %Y') for g in user_growth]
-    month_counts = [g['count'] for g in user_growth]
+    user_growth = metrics.monthly('users.joined', 12)
+    months = [month.strftime('%b %Y') for month, _ in user_growth]
+    month_counts = [count for _, count in user_growth]
 
     # Country analytics — nationality
-    nationality_data = list(
-        UserProfile.objects.exclude(nationality='')
-        .values('nationality')
-        .annotate(count=Count('id'))
-        .order_by('-count')[:20]
-    )
-    nat_labels = [d['nationality'] for d in nationality_data]
-    nat_counts = [d['count'] for d in nationality_data]
+    nationality_data = snapshot.breakdown('users.nationality', 20)
+    nat_labels = [code for code, _ in nationality_data]
+    nat_counts = [count for _, count in nationality_data]
 
     # Country analytics — IP geolocation
     ip_country_data = list(
@@ -4359,14 +4217,14 @@ def analytics_dashboard(request):
     ip_counts = [d['session_count'] for d in ip_country_data]
 
     # Content engagement
-    article_views = Article.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    article_likes = Article.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    magazine_views = MagazineEdition.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    magazine_likes = MagazineEdition.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    video_views = Video.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    video_likes = Video.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    album_views = GalleryAlbum.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    album_likes = GalleryAlbum.objects.aggregate(s=Sum('like_count'))['s'] or 0
+    article_views = snapshot['articles.views']
+    article_likes = snapshot['articles.likes']
+    magazine_views = snapshot['magazines.views']
+    magazine_likes = snapshot['magazines.likes']
+    video_views = snapshot['videos.views']
+    video_likes = snapshot['videos.likes']
+    album_views = snapshot['albums.views']
+    album_likes = snapshot['albums.likes']
 
     # Top content
     top_articles = Article.objects.order_by('-view_count')[:5]
@@ -4374,24 +4232,16 @@ def analytics_dashboard(request):
     top_videos = Video.objects.order_by('-view_count')[:5]
 
     # Device OS distribution
-    os_data = list(
-        UserProfile.objects.exclude(device_os='')
-        .values('device_os')
-        .annotate(count=Count('id'))
-        .order_by('-count')[:10]
-    )
-    os_labels = [d['device_os'] for d in os_data]
-    os_counts = [d['count'] for d in os_data]
+    os_data = snapshot.breakdown('users.device_os', 10)
+    os_labels = [os_name for os_name, _ in os_data]
+    os_counts = [count for _, count in os_data]
 
     # ─── ADVANCED ANALYTICS (features 131-140) ───
 
     # --- 132. Funnel Analysis ---
     total_registered = total_users
-    verified_users = UserProfile.objects.filter(is_verified=True).count()
-    try:
-        event_registered_users = EventSubmission.objects.values('user').distinct().count()
-    except Exception:
-        event_registered_users = 0
+    verified_users = snapshot['users.verified']
+    event_registered_users = snapshot['event_submissions.users']
     funnel_verify_pct = round(verified_users / max(total_registered, 1) * 100, 1)
     funnel_event_pct = round(event_registered_users / max(total_registered, 1) * 100, 1)
 
@@ -4412,23 +4262,13 @@ def analytics_dashboard(request):
         c['retention_pct'] = round(c['retained'] / max(c['total'], 1) * 100, 1)
 
     # --- 135. Device Analytics (device_type breakdown) ---
-    device_type_data = list(
-        UserProfile.objects.exclude(device_type='')
-        .values('device_type')
-        .annotate(count=Count('id'))
-        .order_by('-count')[:10]
-    )
-    device_type_labels = [d['device_type'] for d in device_type_data]
-    device_type_counts = [d['count'] for d in device_type_data]
+    device_type_data = snapshot.breakdown('users.device_type', 10)
+    device_type_labels = [device for device, _ in device_type_data]
+    device_type_counts = [count for _, count in device_type_data]
 
     # --- 137. Event Attendance ---
-    try:
-        from core.models import EventCheckIn
-        total_checkins = EventCheckIn.objects.filter(checked_in=True).count()
-    except Exception:
-        total_checkins = 0
-
-    total_event_submissions = EventSubmission.objects.count()
+    total_checkins = snapshot['checkins.total']
+    total_event_submissions = snapshot['event_submissions.total']
 
     # Per-event registration stats (EventRegistration cards with submission counts)
     event_attendance = list(
@@ -4440,7 +4280,7 @@ def analytics_dashboard(request):
     # --- 138. Admin KPI Dashboard ---
     dau = active_today
     mau = active_30d
-    content_published_30d = Article.objects.filter(created_at__gte=now - timedelta(days=30)).count()
+    content_published_30d = sum(joined['articles.created'])
     try:
         tickets_resolved_30d = SupportTicket.objects.filter(
             status='resolved',
@@ -4448,10 +4288,7 @@ def analytics_dashboard(request):
         ).count()
     except Exception:
         tickets_resolved_30d = 0
-    try:
-        open_tickets = SupportTicket.objects.filter(status='open').count()
-    except Exception:
-        open_tickets = 0
+    open_tickets = snapshot['tickets.open']
 
     # Staff email recipients for weekly report config
     staff_emails = list(
@@ -4480,16 +4317,16 @@ def analytics_dashboard(request):
         'ip_counts_json': ip_counts,
 
         # Content engagement
-        'total_articles': Article.objects.count(),
+        'total_articles': snapshot['articles.total'],
         'article_views': article_views,
         'article_likes': article_likes,
-        'total_magazines': MagazineEdition.objects.count(),
+        'total_magazines': snapshot['magazines.total'],
         'magazine_views': magazine_views,
         'magazine_likes': magazine_likes,
-        'total_videos': Video.objects.count(),
+        'total_videos': snapshot['videos.total'],
         'video_views': video_views,
         'video_likes': video_likes,
-        'total_albums': GalleryAlbum.objects.count(),
+        'total_albums': snapshot['albums.total'],
         'album_views': album_views,
         'album_likes': album_likes,
 
@@ -6046,10 +5883,7 @@ def admin_global_search_api(request):
     # --- Articles ---
     if total_count < max_total and (allowed is None or 'articles_list' in allowed):
         try:
-            articles = Article.objects.filter(
-                Q(title__icontains=query) |
-                Q(title_fr__icontains=query)
-            )[:max_per_category]
+            articles = run_search(Article.objects.all(), query, limit=max_per_category)
             if articles:
                 items = []
                 for a in articles:
@@ -6089,10 +5923,7 @@ def admin_global_search_api(request):
     # --- Magazines ---
     if total_count < max_total and (allowed is None or 'magazines_list' in allowed):
         try:
-            magazines = MagazineEdition.objects.filter(
-                Q(title__icontains=query) |
-                Q(title_fr__icontains=query)
-            )[:max_per_category]
+            magazines = run_search(MagazineEdition.objects.all(), query, limit=max_per_category)
             if magazines:
                 items = []
                 for m in magazines:
@@ -6167,45 +5998,22 @@ def admin_global_search_api(request):
 @user_passes_test(is_staff, login_url='custom_admin:login')
 @require_POST
 def export_users_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="users_export.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Username', 'Email', 'First Name', 'Last Name',
-        'Is Active', 'Is Staff', 'Is Superuser', 'Date Joined',
-        'Last Login', 'Nationality', 'Gender', 'Is Verified',
-    ])
-
-    users = User.objects.all().select_related('profile').order_by('-date_joined')
-    for user in users:
-        profile = getattr(user, 'profile', None)
-        writer.writerow(_sanitize_csv_row([
-            user.id,
-            user.username,
-            user.email,
-            user.first_name,
-            user.last_name,
-            user.is_active,
-            user.is_staff,
-            user.is_superuser,
-            user.date_joined.strftime('%Y-%m-%d %H:%M:%S') if user.date_joined else '',
-            user.last_login.strftime('%Y-%m-%d %H:%M:%S') if user.last_login else '',
-            profile.nationality if profile else '',
-            profile.gender if profile else '',
-            profile.is_verified if profile else False,
-        ]))
+    from custom_admin.exports import respond
+    response, sheets, job = respond(request, 'users')
+    total = sheets[0].total
 
     # Log the export (both old AuditLogEntry and new AdminActivityLog)
     AuditLogEntry.objects.create(
         user=request.user,
         action='EXPORT',
         entity_type='User',
-        entity_label=f'CSV export of {users.count()} users',
+        entity_label=f'CSV export of {total} users',
         status='success',
     )
-    log_admin_action(request, 'export', 'User', object_repr=f'CSV export of {users.count()} users')
+    log_admin_action(request, 'export', 'User', object_repr=f'CSV export of {total} users')
 
+    if job:
+        return _export_queued(request, total, 'custom_admin:users_list')
     return response
 
 
@@ -6213,58 +6021,8 @@ def export_users_csv(request):
 @user_passes_test(is_staff, login_url='custom_admin:login')
 @require_POST
 def export_analytics_csv(request):
-    from datetime import timedelta
-
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="analytics_export.csv"'
-
-    writer = csv.writer(response)
-    now = timezone.now()
-
-    # Summary section
-    writer.writerow(['=== ANALYTICS SUMMARY ==='])
-    writer.writerow(['Metric', 'Value'])
-    writer.writerow(['Total Users', User.objects.count()])
-    writer.writerow(['Active Users (30 days)', User.objects.filter(last_login__gte=now - timedelta(days=30)).count()])
-    writer.writerow(['Active Users (7 days)', User.objects.filter(last_login__gte=now - timedelta(days=7)).count()])
-    writer.writerow(['Total Articles', Article.objects.count()])
-    writer.writerow(['Total Events', Event.objects.count()])
-    writer.writerow(['Total Magazines', MagazineEdition.objects.count()])
-    writer.writerow(['Total Videos', Video.objects.count()])
-    writer.writerow(['Active Live Feeds', LiveFeed.objects.filter(status='live').count()])
-    writer.writerow(['Open Support Tickets', SupportTicket.objects.filter(status='open').count()])
-    writer.writerow([])
-
-    # User growth (last 30 days)
-    writer.writerow(['=== USER GROWTH (Last 30 Days) ==='])
-    writer.writerow(['Date', 'New Users'])
-    for i in range(30, -1, -1):
-        day = (now - timedelta(days=i)).date()
-        count = User.objects.filter(date_joined__date=day).count()
-        writer.writerow([day.strftime('%Y-%m-%d'), count])
-    writer.writerow([])
-
-    # Top countries
-    writer.writerow(['=== TOP COUNTRIES BY NATIONALITY ==='])
-    writer.writerow(['Country', 'User Count'])
-    nationality_data = (
-        UserProfile.objects.exclude(nationality='')
-        .values('nationality')
-        .annotate(count=Count('id'))
-        .order_by('-count')[:20]
-    )
-    for entry in nationality_data:
-        writer.writerow(_sanitize_csv_row([entry['nationality'], entry['count']]))
-    writer.writerow([])
-
-    # Content engagement
-    writer.writerow(['=== CONTENT ENGAGEMENT ==='])
-    writer.writerow(['Content Type', 'Total Views', 'Total Likes'])
-    article_views = Article.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    article_likes = Article.objects.aggregate(s=Sum('like_count'))['s'] or 0
-    magazine_views = MagazineEdition.objects.aggregate(s=Sum('view_count'))['s'] or 0
-    writer.writerow(['Articles', article_views, article_likes])
-    writer.writerow(['Magazines', magazine_views, 'N/A'])
+    from custom_admin.exports import build, streaming_csv_response
+    response = streaming_csv_response(build('analytics')[0], request)
 
     # Log the export
     AuditLogEntry.objects.create(
@@ -6278,6 +6036,44 @@ def export_analytics_csv(request):
     return response
 
 
+def _export_queued(request, total, redirect_to, *args):
+    """Large exports run as an ExportJob; tell the admin where the file will appear."""
+    messages.info(
+        request,
+        f'This export has {total} rows, so it is being generated in the background. '
+        'You will get a notification with the download link when it is ready.'
+    )
+    return redirect(redirect_to, *args)
+
+
+@login_required(login_url='custom_admin:login')
+@user_passes_test(is_staff, login_url='custom_admin:login')
+def export_job_download(request, pk):
+    """Download the file of a finished background export (requester or superuser only).
+
+    On Spaces the admin is redirected to a short-lived signed URL so the
+    file never passes through the app server; local storage streams it.
+    """
+    from django.http import FileResponse, Http404
+    from core.models import ExportJob
+    from custom_admin.exports import stream
+
+    job = get_object_or_404(ExportJob, pk=pk, status='completed')
+    if job.requested_by_id != request.user.pk and not request.user.is_superuser:
+        raise Http404
+    if not job.file:
+        raise Http404
+    filename = os.path.basename(job.file.name)
+    storage = job.file.storage
+    if getattr(storage, 'querystring_auth', False):
+        return redirect(storage.url(job.file.name, parameters={
+            'ResponseContentDisposition': f'attachment; filename="{filename}"',
+        }, expire=300))
+    return stream(request, FileResponse(
+        job.file.open('rb'), as_attachment=True, filename=filename,
+    ))
+
+
 # ═══════════════════════════════════════════════════════════════
 #  TRANSLATION MANAGER
 # ═══════════════════════════════════════════════════════════════
@@ -6443,13 +6239,7 @@ def rate_limiting_dashboard(request):
 def analytics_charts(request):
     """Deep-dive interactive Chart.js dashboard with 8 chart types."""
     import json
-    from datetime import timedelta
-    from django.db.models import Sum, Count, Q
-    from django.db.models.functions import (
-        TruncDate, TruncWeek, TruncMonth, ExtractHour,
-    )
-
-    now = timezone.now()
+    from core import metrics
 
     # Period filter (default 30 days)
     period_param = request.GET.get('period', '30')
@@ -6459,131 +6249,53 @@ def analytics_charts(request):
         period_days = 30
     if period_days not in (7, 30, 90):
         period_days = 30
-    period_start = now - timedelta(days=period_days)
+
+    # Counts come from the pre-aggregated snapshot (core/metrics.py).
+    snapshot = metrics.latest()
 
     # ──────────────────────────────────────────────────────
     # 1. USER GROWTH (line chart) — registrations per day
     # ──────────────────────────────────────────────────────
-    user_growth_qs = (
-        User.objects.filter(date_joined__gte=period_start)
-        .annotate(day=TruncDate('date_joined'))
-        .values('day')
-        .annotate(count=Count('id'))
-        .order_by('day')
-    )
-    user_growth_labels = [g['day'].strftime('%b %d') for g in user_growth_qs]
-    user_growth_data = [g['count'] for g in user_growth_qs]
+    growth_days, growth = metrics.daily(['users.joined'], period_days)
+    user_growth_labels = [day.strftime('%b %d') for day in growth_days]
+    user_growth_data = growth['users.joined']
 
     # ──────────────────────────────────────────────────────
     # 2. CONTENT PUBLISHED (stacked bar) — per week, last 12 weeks
     # ──────────────────────────────────────────────────────
-    content_weeks = 12
-    content_start = now - timedelta(weeks=content_weeks)
-
-    articles_by_week = dict(
-        Article.objects.filter(created_at__gte=content_start)
-        .annotate(week=TruncWeek('created_at'))
-        .values('week')
-        .annotate(count=Count('id'))
-        .values_list('week', 'count')
-    )
-    magazines_by_week = dict(
-        MagazineEdition.objects.filter(created_at__gte=content_start)
-        .annotate(week=TruncWeek('created_at'))
-        .values('week')
-        .annotate(count=Count('id'))
-        .values_list('week', 'count')
-    )
-    videos_by_week = dict(
-        Video.objects.filter(created_at__gte=content_start)
-        .annotate(week=TruncWeek('created_at'))
-        .values('week')
-        .annotate(count=Count('id'))
-        .values_list('week', 'count')
+    content_mondays, content = metrics.weekly(
+        ['articles.created', 'magazines.created', 'videos.created'], 12,
     )
-
-    # Build unified week labels
-    content_week_labels = []
-    content_articles = []
-    content_magazines = []
-    content_videos = []
-    for i in range(content_weeks - 1, -1, -1):
-        week_date = (now - timedelta(weeks=i)).date()
-        # TruncWeek returns Monday of each week
-        from datetime import date as date_type
-        monday = week_date - timedelta(days=week_date.weekday())
-        label = monday.strftime('%b %d')
-        content_week_labels.append(label)
-        from django.utils.timezone import make_aware
-        from datetime import datetime as dt_type
-        week_key = make_aware(dt_type.combine(monday, dt_type.min.time()))
-        content_articles.append(articles_by_week.get(week_key, 0))
-        content_magazines.append(magazines_by_week.get(week_key, 0))
-        content_videos.append(videos_by_week.get(week_key, 0))
+    content_week_labels = [monday.strftime('%b %d') for monday in content_mondays]
+    content_articles = content['articles.created']
+    content_magazines = content['magazines.created']
+    content_videos = content['videos.created']
 
     # ──────────────────────────────────────────────────────
     # 3. ENGAGEMENT METRICS (multi-line) — daily over period
     # ──────────────────────────────────────────────────────
     engagement_days = min(period_days, 30)
-    engagement_start = now - timedelta(days=engagement_days)
 
     # Article views by day — use ArticleLike/ArticleComment created_at as proxies
-    likes_by_day = dict(
-        ArticleLike.objects.filter(created_at__gte=engagement_start)
-        .annotate(day=TruncDate('created_at'))
-        .values('day')
-        .annotate(count=Count('id'))
-        .values_list('day', 'count')
-    )
-    comments_by_day = dict(
-        ArticleComment.objects.filter(created_at__gte=engagement_start)
-        .annotate(day=TruncDate('created_at'))
-        .values('day')
-        .annotate(count=Count('id'))
-        .values_list('day', 'count')
-    )
-    reactions_by_day = dict(
-        Reaction.objects.filter(created_at__gte=engagement_start)
-        .annotate(day=TruncDate('created_at'))
-        .values('day')
-        .annotate(count=Count('id'))
-        .values_list('day', 'count')
-    )
-    bookmarks_by_day = dict(
-        Bookmark.objects.filter(created_at__gte=engagement_start)
-        .annotate(day=TruncDate('created_at'))
-        .values('day')
-        .annotate(count=Count('id'))
-        .values_list('day', 'count')
-    )
-
-    engagement_labels = []
-    engagement_likes = []
-    engagement_comments = []
-    engagement_reactions = []
-    engagement_bookmarks = []
-    for i in range(engagement_days - 1, -1, -1):
-        day = (now - timedelta(days=i)).date()
-        engagement_labels.append(day.strftime('%b %d'))
-        engagement_likes.append(likes_by_day.get(day, 0))
-        engagement_comments.append(comments_by_day.get(day, 0))
-        engagement_reactions.append(reactions_by_day.get(day, 0))
-        engagement_bookmarks.append(bookmarks_by_day.get(day, 0))
+    engagement_dates, engagement = metrics.daily([
+        'article_likes.created', 'article_comments.created',
+        'reactions.created', 'bookmarks.created',
+    ], engagement_days)
+    engagement_labels = [day.strftime('%b %d') for day in engagement_dates]
+    engagement_likes = engagement['article_likes.created']
+    engagement_comments = engagement['article_comments.created']
+    engagement_reactions = engagement['reactions.created']
+    engagement_bookmarks = engagement['bookmarks.created']
 
     # ──────────────────────────────────────────────────────
     # 4. USER DEMOGRAPHICS (doughnut) — by nationality top 10
     # ──────────────────────────────────────────────────────
-    nationality_data = list(
-        UserProfile.objects.exclude(nationality='')
-        .values('nationality')
-        .annotate(count=Count('id'))
-        .order_by('-count')[:10]
-    )
-    nationality_labels = [d['nationality'] for d in nationality_data]
-    nationality_counts = [d['count'] for d in nationality_data]
+    nationality_data = snapshot.breakdown('users.nationality', 10)
+    nationality_labels = [code for code, _ in nationality_data]
+    nationality_counts = [count for _, count in nationality_data]
     # Add "Other" bucket
     top_10_total = sum(nationality_counts)
-    total_with_nationality = UserProfile.objects.exclude(nationality='').count()
+    total_with_nationality = snapshot['users.with_nationality']
     other_count = total_with_nationality - top_10_total
     if other_count > 0:
         nationality_labels.append('Other')
@@ -6604,61 +6316,24 @@ def analytics_charts(request):
     # ──────────────────────────────────────────────────────
     # 6. SUPPORT TICKETS (line chart) — opened vs closed per week
     # ──────────────────────────────────────────────────────
-    ticket_weeks = 8
-    ticket_start = now - timedelta(weeks=ticket_weeks)
-
-    tickets_opened_by_week = dict(
-        SupportTicket.objects.filter(created_at__gte=ticket_start)
-        .annotate(week=TruncWeek('created_at'))
-        .values('week')
-        .annotate(count=Count('id'))
-        .values_list('week', 'count')
-    )
-    tickets_closed_by_week = dict(
-        SupportTicket.objects.filter(
-            resolved_at__gte=ticket_start,
-            status__in=['resolved', 'closed']
-        )
-        .annotate(week=TruncWeek('resolved_at'))
-        .values('week')
-        .annotate(count=Count('id'))
-        .values_list('week', 'count')
-    )
-
-    ticket_labels = []
-    ticket_opened = []
-    ticket_closed = []
-    for i in range(ticket_weeks - 1, -1, -1):
-        week_date = (now - timedelta(weeks=i)).date()
-        monday = week_date - timedelta(days=week_date.weekday())
-        label = monday.strftime('%b %d')
-        ticket_labels.append(label)
-        week_key = make_aware(dt_type.combine(monday, dt_type.min.time()))
-        ticket_opened.append(tickets_opened_by_week.get(week_key, 0))
-        ticket_closed.append(tickets_closed_by_week.get(week_key, 0))
+    ticket_mondays, tickets = metrics.weekly(['tickets.opened', 'tickets.closed'], 8)
+    ticket_labels = [monday.strftime('%b %d') for monday in ticket_mondays]
+    ticket_opened = tickets['tickets.opened']
+    ticket_closed = tickets['tickets.closed']
 
     # ──────────────────────────────────────────────────────
     # 7. TRAFFIC BY HOUR (area chart) — login activity averaged over last 7 days
     # ──────────────────────────────────────────────────────
-    traffic_start = now - timedelta(days=7)
-    hourly_logins = dict(
-        LoginHistory.objects.filter(created_at__gte=traffic_start, success=True)
-        .annotate(hour=ExtractHour('created_at'))
-        .values('hour')
-        .annotate(count=Count('id'))
-        .values_list('hour', 'count')
-    )
+    hourly_logins = metrics.hour_of_day('logins.success', 7)
     traffic_labels = [f'{h:02d}:00' for h in range(24)]
-    traffic_data = [round(hourly_logins.get(h, 0) / 7, 1) for h in range(24)]
+    traffic_data = [round(hourly_logins[h] / 7, 1) for h in range(24)]
 
     # ──────────────────────────────────────────────────────
     # 8. BADGE DISTRIBUTION (pie chart)
     # ──────────────────────────────────────────────────────
-    gold_count = UserProfile.objects.filter(badge_type='GOLD').count()
-    blue_count = UserProfile.objects.filter(badge_type='BLUE').count()
-    no_badge_count = UserProfile.objects.filter(
-        Q(badge_type__isnull=True) | Q(badge_type='')
-    ).count()
+    gold_count = snapshot['users.badge_gold']
+    blue_count = snapshot['users.badge_blue']
+    no_badge_count = snapshot['users.badge_none']
     badge_labels = ['Gold Badge', 'Blue Badge', 'No Badge']
     badge_data = [gold_count, blue_count, no_badge_count]
 
@@ -6826,6 +6501,7 @@ def segment_create(request):
     """Create a new user segment."""
     import json as json_mod
     from core.models import NATIONALITY_CHOICES
+    from core.segments import invalidate, set_members
 
     if request.method == 'POST':
         name = request.POST.get('name', '').strip()
@@ -6851,17 +6527,12 @@ def segment_create(request):
             created_by=request.user,
         )
 
-        # For static segments, add selected users
-        if not is_dynamic:
-            user_ids = request.POST.getlist('static_users')
-            for uid in user_ids:
-                try:
-                    UserSegmentMembership.objects.create(
-                        segment=segment,
-                        user_id=int(uid),
-                    )
-                except (ValueError, Exception):
-                    pass
+        # Dynamic segments are materialised in the background; static ones
+        # take the selected users
+        if is_dynamic:
+            invalidate(segment)
+        else:
+            set_members(segment, _parse_static_user_ids(request))
 
         messages.success(request, f'Segment "{name}" created successfully!')
         return redirect('custom_admin:segment_detail', pk=segment.pk)
@@ -6878,6 +6549,7 @@ def segment_edit(request, pk):
     """Edit an existing user segment."""
     import json as json_mod
     from core.models import NATIONALITY_CHOICES
+    from core.segments import invalidate, set_members
 
     segment = get_object_or_404(UserSegment, pk=pk)
 
@@ -6898,25 +6570,14 @@ def segment_edit(request, pk):
         segment.description = description
         segment.is_dynamic = is_dynamic
 
+        segment.filters = _build_segment_filters(request) if is_dynamic else {}
+        segment.save()
+
         if is_dynamic:
-            segment.filters = _build_segment_filters(request)
-            # Clear any static memberships when switching to dynamic
-            segment.memberships.all().delete()
+            # The refresh diffs the snapshot (or former static list) against the new filters
+            invalidate(segment)
         else:
-            segment.filters = {}
-            # Update static membership
-            segment.memberships.all().delete()
-            user_ids = request.POST.getlist('static_users')
-            for uid in user_ids:
-                try:
-                    UserSegmentMembership.objects.create(
-                        segment=segment,
-                        user_id=int(uid),
-                    )
-                except (ValueError, Exception):
-                    pass
-
-        segment.save()
+            set_members(segment, _parse_static_user_ids(request))
         messages.success(request, f'Segment "{name}" updated successfully!')
         return redirect('custom_admin:segment_detail', pk=segment.pk)
 
@@ -6933,7 +6594,6 @@ def segment_detail(request, pk):
     """View segment details with paginated member list."""
     segment = get_object_or_404(UserSegment, pk=pk)
     users = segment.get_users().select_related('profile').order_by('-date_joined')
-    member_count = users.count()
 
     paginator = Paginator(users, 25)
     page = request.GET.get('page')
@@ -6942,7 +6602,7 @@ def segment_detail(request, pk):
     return render(request, 'custom_admin/segments/detail.html', {
         'segment': segment,
         'users': users_page,
-        'member_count': member_count,
+        'member_count': paginator.count,
     })
 
 
@@ -6974,7 +6634,7 @@ def segment_preview(request):
 
     # Build a temporary in-memory segment to compute preview
     temp_segment = UserSegment(filters=body, is_dynamic=True)
-    count = temp_segment.get_users().count()
+    count = temp_segment.matching_users().count()
     return JsonResponse({'count': count})
 
 
@@ -7023,26 +6683,38 @@ def segment_notify(request, pk):
         messages.error(request, 'Both notification title and body are required.')
         return redirect('custom_admin:segment_detail', pk=pk)
 
-    # Create a notification targeting the segment members
-    users = segment.get_users()
+    # The push task records the snapshot's members as the recipients
+    # (core.segments.record_recipients); nothing is copied in this request
+    member_count = segment.get_member_count()
     notification = Notification.objects.create(
         title=title,
         message=body,
         notification_type='general',
         is_global=False,
+        target_segment=segment,
     )
-    notification.target_users.set(users)
 
     from core.tasks import send_notification_push_async
     send_notification_push_async.delay(notification.pk)
     messages.success(
         request,
-        f'Notification queued for segment "{segment.name}".'
+        f'Notification queued for segment "{segment.name}" ({member_count} members).'
     )
 
     return redirect('custom_admin:segment_detail', pk=pk)
 
 
+def _parse_static_user_ids(request):
+    """Helper: the selected static member ids from the form, ignoring junk."""
+    user_ids = []
+    for uid in request.POST.getlist('static_users'):
+        try:
+            user_ids.append(int(uid))
+        except ValueError:
+            pass
+    return user_ids
+
+
 def _build_segment_filters(request):
     """
     Helper: extract filter criteria from the POST form and return a dict
@@ -7194,6 +6866,19 @@ def system_health_api(request):
         data['db_connected'] = False
         data['db_latency_ms'] = 0
 
+    # ── Connection pool utilisation (config.db_pool backend) ──
+    data['db_pool_enabled'] = getattr(settings, 'DB_POOL_ENABLED', False)
+    if data['db_pool_enabled']:
+        from config.db_pool import pool_stats
+        data['db_pools'] = pool_stats()
+
+    # ── Users online now (presence store) ──
+    try:
+        from core.presence import online_counts
+        data['presence'] = online_counts()
+    except Exception:
+        data['presence'] = None
+
     # ── Cache connectivity ──
     try:
         from django.core.cache import cache
@@ -7737,7 +7422,8 @@ def widget_data(request):
     widget = request.GET.get('widget', '')
 
     if widget == 'verification_queue':
-        pending = VerificationRequest.objects.filter(status='pending').count()
+        from core import metrics
+        pending = metrics.latest()['verification.pending']
         recent = list(
             VerificationRequest.objects.filter(status='pending')
             .select_related('user')
@@ -8679,27 +8365,29 @@ def webhook_toggle(request, pk):
 @login_required(login_url='custom_admin:login')
 @user_passes_test(is_staff, login_url='custom_admin:login')
 def webhook_logs(request, pk):
-    """View delivery logs for a webhook."""
+    """View delivery logs, queue depth and delivery latency for a webhook."""
+    from core.webhooks import delivery_stats
+
     webhook = get_object_or_404(Webhook, pk=pk)
     logs_qs = webhook.logs.all()
 
-    # Add pretty-printed payload to each log for template use
-    log_items = list(logs_qs)
-    for log in log_items:
+    paginator = Paginator(logs_qs, 25)
+    page = request.GET.get('page')
+    logs = paginator.get_page(page)
+
+    # Add pretty-printed payload to each log on the page for template use
+    for log in logs:
         try:
             log.payload_pretty = json.dumps(log.payload, indent=2, default=str)
         except (TypeError, ValueError):
             log.payload_pretty = str(log.payload)
 
-    paginator = Paginator(log_items, 25)
-    page = request.GET.get('page')
-    logs = paginator.get_page(page)
-
     context = {
         'webhook': webhook,
         'logs': logs,
         'success_count': logs_qs.filter(success=True).count(),
         'fail_count': logs_qs.filter(success=False).count(),
+        'stats': delivery_stats(webhook),
     }
     return render(request, 'custom_admin/webhooks/logs.html', context)
 
@@ -9627,6 +9315,11 @@ def _save_yd_roles(request, yd_event):
     if to_delete:
         YouthDialogueRole.objects.filter(pk__in=to_delete).delete()
 
+    # Role colours are copied onto check-in credentials and .update() sends no signal.
+    from core.tasks import rebuild_checkin_scope
+    scope = checkin.scope_for(checkin.QR_YD, yd_event.pk)
+    transaction.on_commit(lambda: rebuild_checkin_scope.delay(scope))
+
 
 def _save_yd_side_events(request, yd_event):
     """Parse and save inline side events from the Continental Dialogue event form."""
@@ -9738,6 +9431,24 @@ def youth_dialogue_media_delete(request, event_pk, pk):
     return redirect('custom_admin:youth_dialogue_media_list', event_pk=event_pk)
 
 
+# Some applications store nationality in additional_data under keys like
+# "country", "pays", "nationalite" instead of the model's nationality column.
+_YD_COUNTRY_KEYS = ('nationality', 'country', 'pays', 'nationalite', 'country_of_origin')
+
+
+def _yd_nationality_q(codes):
+    """Match the nationality column OR the additional_data country keys (codes or names)."""
+    from core.models import NATIONALITY_CHOICES
+    nationality_map = dict(NATIONALITY_CHOICES)
+    names = [nationality_map[code] for code in codes if code in nationality_map]
+    nat_q = Q(nationality__in=codes)
+    for key in _YD_COUNTRY_KEYS:
+        nat_q |= Q(**{f'additional_data__{key}__in': codes})
+        if names:
+            nat_q |= Q(**{f'additional_data__{key}__in': names})
+    return nat_q
+
+
 @login_required(login_url='custom_admin:login')
 @user_passes_test(is_staff, login_url='custom_admin:login')
 def youth_dialogue_applications_list(request, event_pk):
@@ -9759,13 +9470,10 @@ def youth_dialogue_applications_list(request, event_pk):
     elif status_filter:
         qs = qs.filter(status=status_filter)
 
-    # --- Nationality helpers ---
-    # Some applications store nationality in additional_data under keys like
-    # "country", "pays", "nationalite" instead of the model's nationality column.
+    # --- Nationality helpers (see _YD_COUNTRY_KEYS) ---
     from core.models import NATIONALITY_CHOICES
     nationality_map = dict(NATIONALITY_CHOICES)  # code → name
     _reverse_nat = {v.lower(): k for k, v in NATIONALITY_CHOICES}  # name → code
-    _COUNTRY_KEYS = ('nationality', 'country', 'pays', 'nationalite', 'country_of_origin')
 
     def _resolve_code(value):
         """Normalize a nationality value (ISO code or country name) to an ISO code."""
@@ -9784,7 +9492,7 @@ def youth_dialogue_applications_list(request, event_pk):
             return app.nationality.upper()
         ad = app.additional_data
         if isinstance(ad, dict):
-            for key in _COUNTRY_KEYS:
+            for key in _YD_COUNTRY_KEYS:
                 val = ad.get(key)
                 if val:
                     code = _resolve_code(val)
@@ -9795,19 +9503,7 @@ def youth_dialogue_applications_list(request, event_pk):
     nationality_filter = request.GET.getlist('nationality')
     nationality_filter = [n.strip() for n in nationality_filter if n.strip()]
     if nationality_filter:
-        # Build Q to match nationality column OR additional_data country keys
-        nat_q = Q(nationality__in=nationality_filter)
-        # Also match country names for additional_data lookups
-        filter_names = []
-        for code in nationality_filter:
-            name = nationality_map.get(code)
-            if name:
-                filter_names.append(name)
-        for key in _COUNTRY_KEYS:
-            nat_q |= Q(**{f'additional_data__{key}__in': nationality_filter})
-            if filter_names:
-                nat_q |= Q(**{f'additional_data__{key}__in': filter_names})
-        qs = qs.filter(nat_q)
+        qs = qs.filter(_yd_nationality_q(nationality_filter))
 
     search_q = request.GET.get('q', '').strip()
     if search_q:
@@ -9860,7 +9556,7 @@ def youth_dialogue_applications_list(request, event_pk):
     for ad in event_apps.filter(nationality='').values_list('additional_data', flat=True):
         if not isinstance(ad, dict):
             continue
-        for key in _COUNTRY_KEYS:
+        for key in _YD_COUNTRY_KEYS:
             val = ad.get(key)
             if val:
                 code = _resolve_code(val)
@@ -9928,172 +9624,151 @@ def youth_dialogue_applications_list(request, event_pk):
 
 
 def _auto_finalize_docs(request, application):
-    """After individually reviewing docs, check if all are done and auto-update status.
-
-    Only considers the LATEST document per type (highest id = most recent submission).
-    Old rejected docs are ignored if a newer version has been submitted.
+    """After individually reviewing docs, check if all are done and auto-update status
+    (see ``doc_review.finalize_documents``), then log and tell the admin."""
+    from .doc_review import finalize_documents
 
-    - All approved, none pending → issue credential
-    - Has rejected, none pending → set documents_rejected + notify
-    - Still has pending → do nothing (wait for more reviews)
-    """
-    from core.models import YouthDialogueDocument
-
-    # A document type is satisfied if ANY doc of that type is approved.
-    # Rejected duplicates of an already-approved type are ignored.
-    approved_types = set(
-        application.documents.filter(status='approved')
-        .values_list('document_type', flat=True)
-    )
+    old_status = application.status
+    outcome, detail = finalize_documents(application, request.user)
+    name = f'{application.first_name} {application.last_name}'
 
-    # Still have pending docs for types that aren't already approved? Wait.
-    pending_count = (
-        application.documents
-        .filter(status='pending')
-        .exclude(document_type__in=approved_types)
-        .count()
-    )
-    if pending_count > 0:
-        return  # Still have docs to review
-
-    # Only flag rejected for types with NO approved version
-    rejected_docs = (
-        application.documents
-        .filter(status='rejected')
-        .exclude(document_type__in=approved_types)
-    )
-    has_rejected = rejected_docs.exists()
-    all_approved = not has_rejected
-
-    if has_rejected:
-        # Build rejection notes from rejected docs (only unresolved types)
-        rejection_details = []
-        for doc in rejected_docs:
-            reason = doc.rejection_reason or 'No reason specified'
-            rejection_details.append(f'• {doc.get_document_type_display()}: {reason}')
-        auto_notes = '\n'.join(rejection_details)
-
-        application.status = 'documents_rejected'
-        application.documents_rejection_notes = auto_notes
-        application.documents_reviewed_by = request.user
-        application.documents_reviewed_at = timezone.now()
-        application.save()
+    if outcome == 'documents_rejected':
         log_admin_action(
             request, 'reject', 'YouthDialogueApplication', object_id=application.pk,
-            object_repr=f'{application.first_name} {application.last_name}',
-            changes={'status': {'old': 'documents_under_review', 'new': 'documents_rejected'}},
+            object_repr=name,
+            changes={'status': {'old': old_status, 'new': 'documents_rejected'}},
         )
-        from core.views import _notify_yd
-        notif_results = _notify_yd(application, 'documents_rejected')
         messages.info(request, 'All documents reviewed — applicant notified about rejected documents.')
-        if notif_results:
-            _surface_notif_results(request, notif_results)
-
-    elif all_approved:
-        # All docs approved — auto-issue credential if all required types present
-        # (approved_types already computed above)
-        # Check against configured required docs
-        event = application.event
-        if event and event.required_documents:
-            required_types = {d.get('key', '') for d in event.required_documents if d.get('key')}
-        else:
-            required_types = {'passport', 'national_id', 'photo', 'cv'}
-        missing_types = required_types - approved_types
-
-        if not missing_types:
-            application.generate_participant_code()
-            application.generate_qr_hash()
-            application.status = 'credential_issued'
-            application.credential_issued_at = timezone.now()
-            application.documents_reviewed_by = request.user
-            application.documents_reviewed_at = timezone.now()
-            application.save()
-            log_admin_action(
-                request, 'issue_credential', 'YouthDialogueApplication', object_id=application.pk,
-                object_repr=f'{application.first_name} {application.last_name}',
-                changes={'status': {'old': 'documents_under_review', 'new': 'credential_issued'}},
-            )
-            from core.views import _notify_yd
-            notif_results = _notify_yd(application, 'credential_issued')
-            messages.success(request, f'All documents approved — credential issued for {application.first_name} {application.last_name}!')
-            if notif_results:
-                _surface_notif_results(request, notif_results)
-        else:
-            # All reviewed docs approved but some required types missing
-            application.status = 'documents_under_review'
-            application.documents_reviewed_by = request.user
-            application.documents_reviewed_at = timezone.now()
-            application.save()
-            labels = dict(YouthDialogueDocument.DOCUMENT_TYPE_CHOICES)
-            missing_names = [labels.get(m, m) for m in missing_types]
-            messages.warning(request, f'All documents approved but missing required types: {", ".join(missing_names)}')
+        if detail:
+            _surface_notif_results(request, detail)
+    elif outcome == 'credential_issued':
+        log_admin_action(
+            request, 'issue_credential', 'YouthDialogueApplication', object_id=application.pk,
+            object_repr=name,
+            changes={'status': {'old': old_status, 'new': 'credential_issued'}},
+        )
+        messages.success(request, f'All documents approved — credential issued for {name}!')
+        if detail:
+            _surface_notif_results(request, detail)
+    elif outcome == 'missing_types':
+        messages.warning(request, f'All documents approved but missing required types: {", ".join(detail)}')
 
 
 @login_required(login_url='custom_admin:login')
 @user_passes_test(is_staff, login_url='custom_admin:login')
 @require_POST
 def bulk_auto_approve_documents(request, event_pk):
-    """Bulk auto-approve all pending documents for an event using validation."""
-    from core.validators import validate_for_auto_approve
+    """Start (or rejoin) a background auto-approve job for the event's pending
+    documents (custom_admin/doc_review.py); the UI polls its progress."""
+    from core.models import DocumentReviewJob
+    from core.tasks import start_document_review
+
+    from .doc_review import active_job, progress
 
     yd_event = get_object_or_404(YouthDialogueEvent, pk=event_pk)
 
-    # Get all pending documents for this event
-    pending_docs = YouthDialogueDocument.objects.filter(
-        application__event=yd_event,
-        status='pending',
-    ).select_related('application')
-
-    approved_count = 0
-    rejected_count = 0
-    processed_apps = set()
-
-    for doc in pending_docs:
-        is_valid, reason = validate_for_auto_approve(doc)
-        if is_valid:
-            doc.status = 'approved'
-            doc.reviewed_by = request.user
-            doc.reviewed_at = timezone.now()
-            doc.save(update_fields=['status', 'reviewed_by', 'reviewed_at'])
-            approved_count += 1
-        else:
-            doc.status = 'rejected'
-            doc.rejection_reason = reason
-            doc.reviewed_by = request.user
-            doc.reviewed_at = timezone.now()
-            doc.save(update_fields=['status', 'rejection_reason', 'reviewed_by', 'reviewed_at'])
-            rejected_count += 1
-        processed_apps.add(doc.application_id)
-
-    # Auto-finalize each affected application
-    credential_count = 0
-    for app in YouthDialogueApplication.objects.filter(pk__in=processed_apps):
-        _auto_finalize_docs(request, app)
-        if app.status == 'credential_issued':
-            credential_count += 1
+    job = active_job(yd_event)
+    if job is None:
+        job = DocumentReviewJob.objects.create(event=yd_event, requested_by=request.user)
+        transaction.on_commit(lambda: start_document_review.delay(job.pk))
+        log_admin_action(
+            request, 'bulk_action', 'YouthDialogueDocument', object_id=job.pk,
+            object_repr=f'Started auto-approve for {yd_event.programme_title}',
+        )
+
+    return JsonResponse({
+        'status': 'success',
+        'progress_url': reverse('custom_admin:youth_dialogue_auto_approve_progress', args=[yd_event.pk, job.pk]),
+        **progress(job),
+    })
+
+
+@login_required(login_url='custom_admin:login')
+@user_passes_test(is_staff, login_url='custom_admin:login')
+def auto_approve_progress(request, event_pk, job_pk):
+    """Counters of a background auto-approve job, polled by the admin UI."""
+    from core.models import DocumentReviewJob
 
+    from .doc_review import progress
+
+    job = get_object_or_404(DocumentReviewJob, pk=job_pk, event_id=event_pk)
+    return JsonResponse({'status': 'success', **progress(job)})
+
+
+@login_required(login_url='custom_admin:login')
+@user_passes_test(is_staff, login_url='custom_admin:login')
+@require_POST
+def print_id_cards(request, event_pk):
+    """Start a background print sheet of issued ID cards (core/id_cards.py): the
+    selected applications, or every credential narrowed by nationality / position."""
+    from core.models import IdCard, IdCardPrintJob
+    from core.tasks import start_id_card_print
+
+    yd_event = get_object_or_404(YouthDialogueEvent, pk=event_pk)
+    template = request.POST.get('template', 'badge')
+    if template not in dict(IdCard.TEMPLATE_CHOICES):
+        return JsonResponse({'status': 'error', 'message': 'Unknown card template.'}, status=400)
+
+    qs = id_cards.printable(YouthDialogueApplication.objects.filter(event=yd_event))
+    ids = request.POST.getlist('ids')
+    if ids:
+        qs = qs.filter(pk__in=ids)
+    nationality_filter = [n.strip() for n in request.POST.getlist('nationality') if n.strip()]
+    if nationality_filter:
+        qs = qs.filter(_yd_nationality_q(nationality_filter))
+    positions = [p for p in request.POST.getlist('position') if p]
+    if positions:
+        qs = qs.filter(position__in=positions)
+    app_ids = list(qs.order_by('participant_code').values_list('pk', flat=True))
+    if not app_ids:
+        return JsonResponse({'status': 'error', 'message': 'No issued credentials match the selection.'})
+
+    job = IdCardPrintJob.objects.create(
+        event=yd_event, template=template, application_ids=app_ids, total=len(app_ids),
+        requested_by=request.user,
+    )
+    transaction.on_commit(lambda: start_id_card_print.delay(job.pk))
     log_admin_action(
-        request, 'bulk_action', 'YouthDialogueDocument',
-        object_repr=f'Bulk auto-approve docs for {yd_event.programme_title}',
-        changes={
-            'approved': str(approved_count),
-            'rejected': str(rejected_count),
-            'credentials': str(credential_count),
-        },
+        request, 'bulk_action', 'YouthDialogueApplication', object_id=job.pk,
+        object_repr=f'Print {len(app_ids)} ID cards for {yd_event.programme_title}',
     )
-
     return JsonResponse({
         'status': 'success',
-        'approved_count': approved_count,
-        'rejected_count': rejected_count,
-        'credential_count': credential_count,
-        'message': (
-            f'{approved_count} document(s) approved, {rejected_count} rejected. '
-            f'{credential_count} credential(s) issued.'
-        ),
+        'progress_url': reverse('custom_admin:youth_dialogue_id_card_print_progress', args=[yd_event.pk, job.pk]),
+        'per_sheet': id_cards.per_sheet(template),
+        **id_cards.progress(job),
     })
 
 
+@login_required(login_url='custom_admin:login')
+@user_passes_test(is_staff, login_url='custom_admin:login')
+def id_card_print_progress(request, event_pk, job_pk):
+    """Counters of a print sheet job, polled by the admin UI; links the sheet once done."""
+    from core.models import IdCardPrintJob
+
+    job = get_object_or_404(IdCardPrintJob, pk=job_pk, event_id=event_pk)
+    payload = {'status': 'success', **id_cards.progress(job)}
+    if job.status == 'completed' and job.file:
+        payload['download_url'] = reverse('custom_admin:youth_dialogue_id_card_sheet', args=[event_pk, job.pk])
+    return JsonResponse(payload)
+
+
+@login_required(login_url='custom_admin:login')
+@user_passes_test(is_staff, login_url='custom_admin:login')
+def id_card_sheet_download(request, event_pk, job_pk):
+    """Download a finished print sheet."""
+    from django.http import FileResponse, Http404
+    from core.models import IdCardPrintJob
+
+    job = get_object_or_404(IdCardPrintJob, pk=job_pk, event_id=event_pk, status='completed')
+    if not job.file:
+        raise Http404
+    return FileResponse(
+        job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name),
+        content_type='application/pdf',
+    )
+
+
 @login_required(login_url='custom_admin:login')
 @user_passes_test(is_staff, login_url='custom_admin:login')
 @require_POST
@@ -10576,47 +10251,13 @@ def _yd_email_html(application, heading, badge_color, body_html):
 @require_POST
 def youth_dialogue_export_csv(request, event_pk):
     yd_event = get_object_or_404(YouthDialogueEvent, pk=event_pk)
-    qs = YouthDialogueApplication.objects.filter(event=yd_event).select_related('user').prefetch_related('selected_side_events').order_by('-created_at')
+    from custom_admin.exports import respond
+    response, sheets, job = respond(request, 'yd_applications', {'event': yd_event.pk})
 
-    # Collect all side events for this event to create columns
-    all_side_events = list(YouthDialogueSideEvent.objects.filter(event=yd_event).order_by('order'))
-
-    safe_title = yd_event.slug or 'youth_dialogue'
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{safe_title}_applications.csv"'
-
-    writer = csv.writer(response)
-    header = [
-        'Name', 'Email', 'Nationality', 'Organization', 'Position', 'Gender',
-        'Status', 'Participant Code', 'Created At', 'Documents Status',
-    ]
-    for se in all_side_events:
-        header.append(se.name)
-    writer.writerow(header)
-
-    for app in qs:
-        total_docs = app.documents.count()
-        approved_docs = app.documents.filter(status='approved').count()
-        docs_status = f'{approved_docs}/{total_docs} approved' if total_docs else 'No documents'
-        app_side_event_ids = set(app.selected_side_events.values_list('id', flat=True))
-        row = [
-            f'{app.first_name} {app.last_name}',
-            app.email,
-            app.get_nationality_display() if app.nationality else '',
-            app.organization,
-            app.get_position_display() if app.position else app.position,
-            app.get_gender_display() if app.gender else '',
-            app.get_status_display(),
-            app.participant_code or '',
-            app.created_at.strftime('%Y-%m-%d %H:%M:%S') if app.created_at else '',
-            docs_status,
-        ]
-        for se in all_side_events:
-            row.append('Yes' if se.id in app_side_event_ids else '')
-        writer.writerow(_sanitize_csv_row(row))
-
-    log_admin_action(request, 'export', 'YouthDialogueApplication', object_repr=f'CSV export of {qs.count()} applications')
+    log_admin_action(request, 'export', 'YouthDialogueApplication', object_repr=f'CSV export of {sheets[0].total} applications')
 
+    if job:
+        return _export_queued(request, sheets[0].total, 'custom_admin:youth_dialogue_applications_list', yd_event.pk)
     return response
 
 
@@ -10626,15 +10267,14 @@ def youth_dialogue_export_excel(request, event_pk):
     """Export Youth Dialogue applications as a styled Excel file."""
     yd_event = get_object_or_404(YouthDialogueEvent, pk=event_pk)
     status_filter = request.GET.get('status', '')
-    from custom_admin.reports import generate_youth_dialogue_excel
-    buf = generate_youth_dialogue_excel(yd_event, status_filter=status_filter or None)
-    safe_title = yd_event.slug or 'youth_dialogue'
-    response = HttpResponse(
-        buf.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    from custom_admin.exports import respond
+    response, sheets, job = respond(
+        request, 'yd_participants', {'event': yd_event.pk, 'status': status_filter or None}, 'xlsx',
     )
-    response['Content-Disposition'] = f'attachment; filename="{safe_title}_participants.xlsx"'
+    safe_title = yd_event.slug or 'youth_dialogue'
     log_admin_action(request, 'export', 'YouthDialogueApplication', object_repr=f'Excel export ({safe_title})')
+    if job:
+        return _export_queued(request, sheets[0].total, 'custom_admin:youth_dialogue_applications_list', yd_event.pk)
     return response
 
 
@@ -10828,84 +10468,11 @@ def youth_dialogue_export_id_holders_excel(request, event_pk):
 @login_required(login_url='custom_admin:login')
 @user_passes_test(is_staff, login_url='custom_admin:login')
 def youth_dialogue_id_card_pdf(request, pk):
-    """Generate a printable PDF ID card for a Continental Dialogue participant."""
-    app = get_object_or_404(YouthDialogueApplication, pk=pk)
+    """Printable wallet-size PDF ID card for a Continental Dialogue participant (stored, see core/id_cards.py)."""
+    app = get_object_or_404(YouthDialogueApplication.objects.select_related('event'), pk=pk)
     if app.status != 'credential_issued' or not app.participant_code:
         return HttpResponse('Credential not issued yet.', status=400)
-
-    try:
-        from reportlab.lib.pagesizes import inch
-        from reportlab.lib import colors as rl_colors
-        from reportlab.pdfgen import canvas as rl_canvas
-        from reportlab.lib.utils import ImageReader
-    except ImportError:
-        return HttpResponse('reportlab is not installed.', status=500)
-
-    buf = io.BytesIO()
-    card_w = 3.375 * inch
-    card_h = 2.125 * inch
-    c = rl_canvas.Canvas(buf, pagesize=(card_w, card_h))
-
-    # Green header
-    header_h = 0.65 * inch
-    c.setFillColor(rl_colors.HexColor('#409843'))
-    c.rect(0, card_h - header_h, card_w, header_h, fill=1, stroke=0)
-    c.setFillColor(rl_colors.white)
-    c.setFont('Helvetica-Bold', 8)
-    c.drawCentredString(card_w / 2, card_h - 0.25 * inch, 'YOUTH DIALOGUE PARTICIPANT')
-    c.setFont('Helvetica', 6)
-    c.drawCentredString(card_w / 2, card_h - 0.40 * inch, 'Be 4 Africa 2026')
-
-    # Photo
-    photo_x = 0.15 * inch
-    photo_y = card_h - header_h - 0.85 * inch
-    photo_size = 0.7 * inch
-    if app.id_photo:
-        try:
-            img = ImageReader(app.id_photo.path)
-            c.drawImage(img, photo_x, photo_y, photo_size, photo_size, preserveAspectRatio=True, mask='auto')
-        except Exception:
-            c.setFillColor(rl_colors.HexColor('#e0e0e0'))
-            c.rect(photo_x, photo_y, photo_size, photo_size, fill=1, stroke=0)
-    else:
-        c.setFillColor(rl_colors.HexColor('#e0e0e0'))
-        c.rect(photo_x, photo_y, photo_size, photo_size, fill=1, stroke=0)
-
-    # Name & details
-    text_x = photo_x + photo_size + 0.15 * inch
-    text_y = card_h - header_h - 0.2 * inch
-    c.setFillColor(rl_colors.black)
-    c.setFont('Helvetica-Bold', 9)
-    c.drawString(text_x, text_y, f'{app.first_name} {app.last_name}')
-    c.setFont('Helvetica', 7)
-    text_y -= 0.15 * inch
-    if app.organization:
-        c.drawString(text_x, text_y, app.organization)
-        text_y -= 0.13 * inch
-    if app.nationality:
-        c.drawString(text_x, text_y, f'Nationality: {app.get_nationality_display()}')
-        text_y -= 0.13 * inch
-
-    # Participant code
-    c.setFont('Courier-Bold', 10)
-    c.setFillColor(rl_colors.HexColor('#409843'))
-    c.drawString(text_x, text_y - 0.05 * inch, app.participant_code)
-
-    # QR data footer
-    c.setFillColor(rl_colors.HexColor('#888888'))
-    c.setFont('Helvetica', 5)
-    c.drawCentredString(card_w / 2, 0.1 * inch, f'{app.participant_code}:{app.qr_hash}')
-    c.setStrokeColor(rl_colors.HexColor('#409843'))
-    c.setLineWidth(1)
-    c.line(0, 0.25 * inch, card_w, 0.25 * inch)
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
-
-    response = HttpResponse(buf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="YD-IDCard-{app.participant_code}.pdf"'
-    return response
+    return id_cards.download(app, 'cr80')
 
 
 @login_required(login_url='custom_admin:login')
@@ -11311,7 +10878,9 @@ def push_diagnostics(request):
                     )
                 ]
                 if stale:
+                    from core.push_audience import sync_tokens
                     DeviceToken.objects.filter(token__in=stale).update(is_active=False)
+                    sync_tokens(stale)
 
                 test_result = {
                     'ok': successes > 0,
@@ -17,6 +17,9 @@ export const ADMIN_PASSWORD = __ENV.ADMIN_PASSWORD || 'AdminTest2026!';
 // Admin panel base URL (Django admin / custom dashboard)
 export const ADMIN_BASE_URL = __ENV.ADMIN_BASE_URL || 'https://burundi4africa.com';
 
+// WebSocket base URL (Channels routes under /ws/)
+export const WS_BASE_URL = __ENV.WS_BASE_URL || ADMIN_BASE_URL.replace(/^http/, 'ws');
+
 // Default thresholds — every scenario should import these
 export const DEFAULT_THRESHOLDS = {
   http_req_duration: ['p(95)<2000', 'p(99)<5000'],  // 95th < 2s, 99th < 5s
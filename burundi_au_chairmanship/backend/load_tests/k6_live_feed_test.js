@@ -0,0 +1,43 @@
+/**
+ * k6 Live Feed WebSocket Load Test — Burundi AU Chairmanship 2026
+ *
+ * Opens N concurrent WebSocket viewers on a single live feed to exercise
+ * LiveFeedConsumer join/leave handling and coalesced viewer_count broadcasts.
+ *
+ * Usage:
+ *   # Smoke test (1 viewer)
+ *   k6 run --vus 1 --iterations 1 -e FEED_ID=12 k6_live_feed_test.js
+ *
+ *   # N viewers on one feed (VIEWERS defaults to 2000)
+ *   k6 run -e FEED_ID=12 -e VIEWERS=5000 k6_live_feed_test.js
+ *
+ *   # Reuse an existing session instead of logging every VU in
+ *   k6 run -e FEED_ID=12 -e SESSION_ID=<sessionid cookie> k6_live_feed_test.js
+ */
+
+import liveFeedViewer from './scenarios/live_feed_viewers.js';
+
+const VIEWERS = parseInt(__ENV.VIEWERS || '2000', 10);
+
+export const options = {
+  scenarios: {
+    viewers: {
+      executor: 'ramping-vus',
+      exec: 'viewer',
+      startVUs: 0,
+      stages: [
+        { duration: '1m', target: VIEWERS },  // viewers pile in
+        { duration: '3m', target: VIEWERS },  // hold
+        { duration: '30s', target: 0 },       // stream ends
+      ],
+      gracefulRampDown: '70s',
+    },
+  },
+  thresholds: {
+    ws_connecting:             ['p(95)<1000'],
+    ws_first_viewer_count_ms:  ['p(95)<5000'],
+    checks:                    ['rate>0.99'],
+  },
+};
+
+export function viewer() { liveFeedViewer(); }
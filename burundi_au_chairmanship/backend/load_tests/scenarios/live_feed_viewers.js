@@ -0,0 +1,61 @@
+import http from 'k6/http';
+import ws from 'k6/ws';
+import { check } from 'k6';
+import { Counter, Trend } from 'k6/metrics';
+import { ADMIN_BASE_URL, WS_BASE_URL, ADMIN_EMAIL, ADMIN_PASSWORD } from '../config.js';
+import { adminLogin } from '../helpers/auth.js';
+
+const FEED_ID = parseInt(__ENV.FEED_ID || '1', 10);
+const WATCH_SECONDS = parseInt(__ENV.WATCH_SECONDS || '60', 10);
+
+export const viewerCountMessages = new Counter('ws_viewer_count_messages');
+export const firstCountLatency = new Trend('ws_first_viewer_count_ms', true);
+
+/**
+ * Session cookie for the Channels AuthMiddlewareStack.  Pass SESSION_ID to
+ * reuse one, otherwise each VU signs in through the Django admin login.
+ */
+function sessionCookie() {
+  if (__ENV.SESSION_ID) return `sessionid=${__ENV.SESSION_ID}`;
+  if (!adminLogin(ADMIN_EMAIL, ADMIN_PASSWORD)) return null;
+  const cookies = http.cookieJar().cookiesForURL(ADMIN_BASE_URL);
+  return cookies.sessionid ? `sessionid=${cookies.sessionid[0]}` : null;
+}
+
+/**
+ * One WebSocket viewer: connect to ws/live-feeds/, join FEED_ID, watch for
+ * WATCH_SECONDS, leave.  Run with N VUs to put N concurrent viewers on one
+ * feed; with coalesced broadcasts each client should see roughly
+ * WATCH_SECONDS / LIVE_VIEWER_BROADCAST_INTERVAL viewer_count messages,
+ * not one per join/leave.
+ */
+export default function liveFeedViewer() {
+  const cookie = sessionCookie();
+  if (!cookie) return;
+
+  const params = { headers: { Cookie: cookie, Origin: ADMIN_BASE_URL } };
+  const res = ws.connect(`${WS_BASE_URL}/ws/live-feeds/`, params, (socket) => {
+    let joinedAt = 0;
+
+    socket.on('open', () => {
+      joinedAt = Date.now();
+      socket.send(JSON.stringify({ type: 'join_feed', feed_id: FEED_ID }));
+      socket.setTimeout(() => {
+        socket.send(JSON.stringify({ type: 'leave_feed', feed_id: FEED_ID }));
+        socket.close();
+      }, WATCH_SECONDS * 1000);
+    });
+
+    socket.on('message', (raw) => {
+      const msg = JSON.parse(raw);
+      if (msg.type !== 'viewer_count' || msg.feed_id !== FEED_ID) return;
+      if (joinedAt) {
+        firstCountLatency.add(Date.now() - joinedAt);
+        joinedAt = 0;
+      }
+      viewerCountMessages.add(1);
+    });
+  });
+
+  check(res, { 'ws live-feeds upgraded (101)': (r) => r && r.status === 101 });
+}